@@ -18,6 +18,12 @@ from app.tool.search import (
 )
 from app.tool.search.base import SearchItem
 
+try:
+    # 与 Research Agent 共享按 URL 的 HTTP 响应缓存（可选）
+    from src.utils.http_cache import get_http_cache
+except ImportError:
+    get_http_cache = None
+
 
 class SearchResult(BaseModel):
     """Represents a single search result returned by a search engine."""
@@ -122,20 +128,39 @@ class WebContentFetcher:
             "WebSearch": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         }
 
-        try:
-            # Use asyncio to run requests in a thread pool
-            response = await asyncio.get_event_loop().run_in_executor(
-                None, lambda: requests.get(url, headers=headers, timeout=timeout)
+        http_cache = get_http_cache() if get_http_cache is not None else None
+        if http_cache is not None:
+            # Reuse text extracted from an unchanged cached page (SQLite access runs off the event loop)
+            cached_text = await asyncio.get_event_loop().run_in_executor(
+                None, lambda: http_cache.get_extracted(url, "web_search_text")
             )
+            if cached_text is not None:
+                return cached_text
 
-            if response.status_code != 200:
-                logger.warning(
-                    f"Failed to fetch content from {url}: HTTP {response.status_code}"
+        try:
+            if http_cache is not None:
+                # Cached fetch: fresh hits skip the network, stale entries are revalidated
+                html, error = await asyncio.get_event_loop().run_in_executor(
+                    None, lambda: http_cache.fetch(url, headers=headers, timeout=timeout)
+                )
+                if html is None:
+                    logger.warning(f"Failed to fetch content from {url}: {error}")
+                    return None
+            else:
+                # Use asyncio to run requests in a thread pool
+                response = await asyncio.get_event_loop().run_in_executor(
+                    None, lambda: requests.get(url, headers=headers, timeout=timeout)
                 )
-                return None
+
+                if response.status_code != 200:
+                    logger.warning(
+                        f"Failed to fetch content from {url}: HTTP {response.status_code}"
+                    )
+                    return None
+                html = response.text
 
             # Parse HTML with BeautifulSoup
-            soup = BeautifulSoup(response.text, "html.parser")
+            soup = BeautifulSoup(html, "html.parser")
 
             # Remove script and style elements
             for script in soup(["script", "style", "header", "footer", "nav"]):
@@ -146,7 +171,12 @@ class WebContentFetcher:
 
             # Clean up whitespace and limit size (100KB max)
             text = " ".join(text.split())
-            return text[:10000] if text else None
+            text = text[:10000] if text else None
+            if text and http_cache is not None:
+                await asyncio.get_event_loop().run_in_executor(
+                    None, lambda: http_cache.set_extracted(url, "web_search_text", text)
+                )
+            return text
 
         except Exception as e:
             logger.warning(f"Error fetching content from {url}: {e}")
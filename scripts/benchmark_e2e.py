@@ -0,0 +1,653 @@
+"""
+端到端延迟基准：用本地模拟服务回放 question.jsonl，测量 AgentOrchestrator 各阶段耗时。
+
+- 模拟 LLM：OpenAI 兼容的 /v1/chat/completions（支持 stream），按提示词类型返回确定性的
+  多跳计划 / 任务分解 / 单跳评估 / 答案；延迟 = 基础延迟 + 每 token 延迟（按提示词哈希确定性抖动）
+- 模拟搜索：SerpAPI 兼容的 /search（search_web 通过 SERPAPI_BASE_URL 指向它）、百度/知乎/Bing 结果页
+  与可继续跟进链接的 /page/<id> 页面；爬取类工具请求的搜索站点在 requests 层改投到模拟服务，
+  advanced_web_search / web_search_crawl 的搜索与深度爬取全程离线执行（DuckDuckGo 库不走 requests，离线时停用）
+- 离线时 governor 预算不设并发/速率上限、爬取礼貌延迟为 0（面向真实站点的限速不计入测量，
+  --production-governor 保留 config.yaml 中的预算）；各并发级别单独报告 governor 排队时间
+- 模拟计划的第二跳按问题哈希轮换 search_web / advanced_web_search / web_search_crawl；MCP 在基准中禁用
+- 报告：各并发级别下端到端与各阶段（planning / hop_N / tool:<name> / synthesis ...）的 p50/p95/p99，
+  LLM 调用数、token 数（模拟服务端统计）、吞吐量；可输出 JSON 基线并与旧基线对比
+- 录制/回放（--cassette）：--live 时对真实 LLM/搜索服务录制，之后同样以 --live 加 replay 离线回放
+  （不加 --live 则录制/回放模拟服务的流量）；--replay-latency 指定回放延迟分布（none 时测量 agent
+  自身的 CPU 开销）；回放时 LLM 统计取自 cassette
+
+Run:
+  python scripts/benchmark_e2e.py --limit 10 --concurrency 1,4 --out bench_baseline.json
+  python scripts/benchmark_e2e.py --limit 10 --concurrency 1,4 --compare bench_baseline.json
+  python scripts/benchmark_e2e.py --live --cassette data/cassettes/bench.sqlite3 --cassette-mode record --concurrency 1
+  python scripts/benchmark_e2e.py --live --cassette data/cassettes/bench.sqlite3 --cassette-mode replay --replay-latency none
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse, urlsplit
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.observability.token_ledger import estimate_tokens  # noqa: E402
+
+SEARCH_PORT_FOR_CASSETTE = 18089
+
+# 离线时改投到模拟搜索服务的站点（爬取类工具直接请求的搜索引擎）
+OFFLINE_ROUTED_HOSTS = ("www.baidu.com", "m.baidu.com", "www.zhihu.com", "www.bing.com")
+# 模拟计划第二跳轮换使用的搜索工具
+HOP_SEARCH_TOOLS = ("search_web", "advanced_web_search", "web_search_crawl")
+# 离线时不限并发/速率的 governor 预算（保留排队路径与统计）
+OFFLINE_GOVERNOR_BUDGETS = {
+    category: {"max_concurrent": 0, "rate": 0, "burst": 0}
+    for category in ("llm", "search", "fetch", "mcp", "default")
+}
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+# ---------------- 本地模拟服务 ----------------
+
+class _LocalServer:
+    """在后台线程中运行的 ThreadingHTTPServer"""
+
+    def __init__(self, handler_factory, port: int = 0):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), handler_factory(self))
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class FakeLLMServer(_LocalServer):
+    """OpenAI 兼容的模拟 LLM 服务：按提示词类型返回确定性内容，并统计调用数与 token"""
+
+    def __init__(self, latency_ms: float = 80.0, ms_per_token: float = 0.5, jitter: float = 0.2):
+        self.latency_ms = latency_ms
+        self.ms_per_token = ms_per_token
+        self.jitter = jitter
+        self._lock = threading.Lock()
+        self.reset()
+        super().__init__(self._handler)
+
+    @property
+    def url(self) -> str:
+        return f"{self.base_url}/v1/chat/completions"
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = 0
+            self.prompt_tokens = 0
+            self.completion_tokens = 0
+            self.by_kind: Dict[str, int] = {}
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "by_kind": dict(sorted(self.by_kind.items())),
+            }
+
+    @staticmethod
+    def respond(prompt: str) -> Tuple[str, str]:
+        """根据提示词类型生成 (类型, 内容)"""
+        question = ""
+        match = re.search(r"(?:用户问题|问题)[：:]\s*(.+)", prompt)
+        if match:
+            question = match.group(1).strip()[:80]
+        if "多跳推理规划专家" in prompt or "多跳计划" in prompt:
+            second_tool = HOP_SEARCH_TOOLS[int(_digest(question), 16) % len(HOP_SEARCH_TOOLS)]
+            plan = {
+                "hop_count": "两跳",
+                "hops": [
+                    {"hop_num": 1, "target": f"{question} 关键实体", "tool": "search_web", "stop_condition": "获取到关键实体即停止"},
+                    {"hop_num": 2, "target": f"{question} 最终答案", "tool": second_tool, "stop_condition": "获取到答案即停止"},
+                ],
+                "total_stop_condition": "所有跳完成且能回答原问题即停止",
+            }
+            return "multi_hop_plan", json.dumps(plan, ensure_ascii=False)
+        if "多跳推理的评估器" in prompt:
+            total = "第1跳：" in prompt
+            assessment = {
+                "valid": True,
+                "corrected_result": "",
+                "hop_complete": True,
+                "fused_evidence": f"benchmark evidence {_digest(prompt)[:8]}",
+                "total_complete": total,
+            }
+            return "hop_assessment", json.dumps(assessment, ensure_ascii=False)
+        if '"steps"' in prompt and "parallel_groups" in prompt:
+            plan = {
+                "steps": [
+                    {"id": 1, "description": f"搜索：{question}", "tool_type": "search_web", "dependencies": [], "complexity": 2},
+                    {"id": 2, "description": f"回答：{question}", "tool_type": "none", "dependencies": [1], "complexity": 1},
+                ],
+                "parallel_groups": [[1], [2]],
+            }
+            return "decomposition", json.dumps(plan, ensure_ascii=False)
+        if re.search(r"\bYES\b", prompt) and re.search(r"\bNO\b", prompt):
+            return "judge", "YES"
+        return "answer", f"benchmark answer {_digest(prompt)[:8]}"
+
+    def _delay(self, prompt: str, completion_tokens: int) -> float:
+        rng = random.Random(_digest(prompt))
+        base = self.latency_ms + self.ms_per_token * completion_tokens
+        return max(0.0, base * (1 + rng.uniform(-self.jitter, self.jitter))) / 1000.0
+
+    def _handler(self, server: "FakeLLMServer"):
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                messages = body.get("messages") or []
+                prompt = "\n".join(str(m.get("content") or "") for m in messages)
+                kind, content = server.respond(prompt)
+                usage = {"prompt_tokens": estimate_tokens(prompt), "completion_tokens": estimate_tokens(content)}
+                usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+                with server._lock:
+                    server.calls += 1
+                    server.prompt_tokens += usage["prompt_tokens"]
+                    server.completion_tokens += usage["completion_tokens"]
+                    server.by_kind[kind] = server.by_kind.get(kind, 0) + 1
+                delay = server._delay(prompt, usage["completion_tokens"])
+                if body.get("stream"):
+                    self._stream(content, usage, delay)
+                    return
+                time.sleep(delay)
+                data = json.dumps({
+                    "id": "bench",
+                    "object": "chat.completion",
+                    "model": body.get("model", "bench"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                    "usage": usage,
+                }, ensure_ascii=False).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _stream(self, content: str, usage: Dict[str, int], delay: float):
+                # 首个分片前等待 30% 的延迟，其余均摊到各分片
+                pieces = [content[i:i + 16] for i in range(0, len(content), 16)] or [""]
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                time.sleep(delay * 0.3)
+                for piece in pieces:
+                    chunk = {"choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+                    self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                    time.sleep(delay * 0.7 / len(pieces))
+                final = {"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "usage": usage}
+                self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+                self.wfile.flush()
+                self.close_connection = True
+
+        return Handler
+
+
+class FakeSearchServer(_LocalServer):
+    """
+    模拟搜索服务：SerpAPI 兼容的 /search、改投过来的百度/知乎/Bing 结果页（/site/<host>/<path>），
+    以及结果页面 /page/<key>-<i>（含指向下一层页面的链接）与 /page/<key>-<i>/<j>（含答案句，爬取到即停止）
+    """
+
+    def __init__(self, latency_ms: float = 30.0, results: int = 5, port: int = 0):
+        self.latency_ms = latency_ms
+        self.results = results
+        self.requests = 0
+        super().__init__(self._handler, port)
+
+    @property
+    def url(self) -> str:
+        return f"{self.base_url}/search"
+
+    def route(self, url: str) -> Optional[str]:
+        """OFFLINE_ROUTED_HOSTS 中站点的 URL 改写为本服务的 /site/<host>/<path>，其余返回 None"""
+        parts = urlsplit(url)
+        if parts.hostname not in OFFLINE_ROUTED_HOSTS:
+            return None
+        return f"{self.base_url}/site/{parts.hostname}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+
+    def _items(self, query: str) -> List[Dict[str, str]]:
+        key = _digest(query)[:10]
+        return [
+            {
+                "title": f"{query[:40]} - result {i + 1}",
+                "link": f"{self.base_url}/page/{key}-{i}",
+                # 摘要不回显查询：爬取工具会把含查询词与单位字的摘要当作直接答案，不再深入爬取
+                "snippet": f"Benchmark snippet {i + 1} ({key}).",
+            }
+            for i in range(self.results)
+        ]
+
+    def _page(self, page_id: str) -> str:
+        title = f"Page {page_id}"
+        body = "".join(f"<p>Benchmark paragraph {i} of page {page_id}.</p>" for i in range(20))
+        if "/" in page_id:
+            # 第二层页面：含答案句，爬取工具找到答案后停止
+            body += f"<p>答案是：benchmark answer {_digest(page_id)[:8]}</p>"
+        else:
+            body += "".join(
+                f'<a href="{self.base_url}/page/{page_id}/{j}">{escape(page_id)} detail {j}</a>' for j in range(3)
+            )
+        return f"<html><head><title>{escape(title)}</title></head><body>{body}</body></html>"
+
+    def _site(self, host: str, query: Dict[str, List[str]]) -> Tuple[str, str]:
+        """百度/知乎/Bing 结果页：返回 (内容, Content-Type)"""
+        if host == "www.zhihu.com":
+            q = (query.get("q") or [""])[0]
+            data = [{"object": {"title": it["title"], "excerpt": it["snippet"], "url": it["link"]}} for it in self._items(q)]
+            return json.dumps({"data": data}, ensure_ascii=False), "application/json"
+        if host == "www.bing.com":
+            q = (query.get("q") or [""])[0]
+            lis = "".join(
+                f'<li class="b_algo"><h2><a href="{it["link"]}">{escape(it["title"])}</a></h2><p>{escape(it["snippet"])}</p></li>'
+                for it in self._items(q)
+            )
+            return f'<html><body><ol id="b_results">{lis}</ol></body></html>', "text/html; charset=utf-8"
+        q = (query.get("wd") or [""])[0]
+        blocks = "".join(
+            f'<div class="result c-container"><h3><a href="{it["link"]}">{escape(it["title"])}</a></h3>'
+            f'<div class="c-abstract">{escape(it["snippet"])}</div></div>'
+            for it in self._items(q)
+        )
+        return f'<html><body><div id="content_left">{blocks}</div></body></html>', "text/html; charset=utf-8"
+
+    def _handler(self, server: "FakeSearchServer"):
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, data: bytes, content_type: str):
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                server.requests += 1
+                parsed = urlparse(self.path)
+                time.sleep(server.latency_ms / 1000.0)
+                if parsed.path.startswith("/page/"):
+                    page = server._page(parsed.path[len("/page/"):])
+                    self._send(page.encode("utf-8"), "text/html; charset=utf-8")
+                    return
+                if parsed.path.startswith("/site/"):
+                    host = parsed.path[len("/site/"):].split("/", 1)[0]
+                    content, content_type = server._site(host, parse_qs(parsed.query))
+                    self._send(content.encode("utf-8"), content_type)
+                    return
+                query = (parse_qs(parsed.query).get("q") or [""])[0]
+                organic = [{"position": i + 1, **item} for i, item in enumerate(server._items(query))]
+                self._send(json.dumps({"organic_results": organic}, ensure_ascii=False).encode("utf-8"), "application/json")
+
+        return Handler
+
+
+def route_search_sites(search: FakeSearchServer) -> None:
+    """
+    在 requests 层把 OFFLINE_ROUTED_HOSTS 的请求改投到模拟搜索服务（须在开启 cassette 之前调用，
+    cassette 仍以原始 URL 为请求键）；工具看到的 URL 不变，governor 预算键与缓存判断同真实运行一致
+    """
+    import requests
+
+    original = requests.Session.send
+
+    def send(session, request, **kwargs):
+        routed = search.route(request.url)
+        if routed is None:
+            return original(session, request, **kwargs)
+        request = request.copy()
+        request.url = routed
+        # 代理按原始 https URL 选择，改投到本地服务时不走代理
+        return original(session, request, **{**kwargs, "proxies": {}})
+
+    requests.Session.send = send
+
+
+def disable_duckduckgo() -> None:
+    """DuckDuckGo 库使用自己的 HTTP 客户端，无法改投到模拟服务：离线时停用，由 Bing/百度/知乎路径兜底"""
+    import src.tools.advanced_web_search_tool as advanced
+    import src.tools.web_search_crawl_tool as crawl
+
+    advanced.DDGS = None
+    crawl.DDGS = None
+
+
+# ---------------- 基准执行 ----------------
+
+def _override(config: Dict[str, Any], path: str, value: Any) -> None:
+    node = config
+    parts = path.split(".")
+    for part in parts[:-1]:
+        node = node.setdefault(part, {})
+    node[parts[-1]] = value
+
+
+def configure_offline(
+    llm: FakeLLMServer,
+    search: FakeSearchServer,
+    warm_caches: bool = False,
+    production_governor: bool = False,
+) -> None:
+    """把配置与环境变量指向本地模拟服务（须在创建 AgentOrchestrator 之前调用）"""
+    from src.config.config_loader import get_config
+
+    os.environ["LLM_API_BASE"] = llm.url
+    os.environ["LLM_API_KEY"] = "benchmark"
+    os.environ["SERPAPI_KEY"] = "benchmark"
+    os.environ["SERPAPI_BASE_URL"] = search.url
+    cfg = get_config().config
+    _override(cfg, "model.api_base", llm.url)
+    _override(cfg, "model.api_key", "benchmark")
+    _override(cfg, "mcps.enabled", False)
+    _override(cfg, "observability.enabled", True)
+    _override(cfg, "observability.include_in_response", False)
+    if not production_governor:
+        # 面向真实服务的限速与礼貌延迟不适用于本地模拟服务，保留时并发测量的是限速本身
+        _override(cfg, "performance.governor.budgets", OFFLINE_GOVERNOR_BUDGETS)
+        _override(cfg, "tools.crawl.politeness_delay", 0.0)
+    if not warm_caches:
+        _override(cfg, "performance.cache_enabled", False)
+        _override(cfg, "performance.serp_cache.enabled", False)
+        _override(cfg, "performance.http_cache.enabled", False)
+    route_search_sites(search)
+    disable_duckduckgo()
+
+
+def configure_live(warm_caches: bool = False) -> None:
+    """使用 config.yaml 中的真实服务（用于录制 cassette），只开启 trace 与按需关闭缓存"""
+    from src.config.config_loader import get_config
+
+    cfg = get_config().config
+    _override(cfg, "observability.enabled", True)
+    _override(cfg, "observability.include_in_response", False)
+    if not warm_caches:
+        _override(cfg, "performance.cache_enabled", False)
+        _override(cfg, "performance.serp_cache.enabled", False)
+        _override(cfg, "performance.http_cache.enabled", False)
+
+
+def load_questions(path: Path, limit: Optional[int]) -> List[Dict[str, Any]]:
+    questions = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                item = json.loads(line)
+                questions.append({
+                    "id": item.get("id", len(questions)),
+                    "question": item.get("Question") or item.get("question") or item.get("task") or "",
+                    "expected": item.get("expected", item.get("answer")),
+                })
+    return questions[:limit] if limit else questions
+
+
+def _governor_waits() -> Dict[str, Dict[str, float]]:
+    """各预算累计的排队次数与排队总时长（秒）"""
+    from src.utils.governor import get_governor
+
+    return {
+        key: {"queued": snap["queued"], "wait": snap["wait_total"]}
+        for key, snap in get_governor().stats().items()
+    }
+
+
+def _governor_delta(before: Dict[str, Dict[str, float]], after: Dict[str, Dict[str, float]], n: int) -> Dict[str, Any]:
+    by_key = {}
+    for key, snap in after.items():
+        old = before.get(key) or {"queued": 0, "wait": 0.0}
+        queued, wait = snap["queued"] - old["queued"], snap["wait"] - old["wait"]
+        if queued:
+            by_key[key] = {"queued": queued, "wait_ms": round(wait * 1000, 1)}
+    total_ms = sum(v["wait_ms"] for v in by_key.values())
+    return {
+        "queued": sum(v["queued"] for v in by_key.values()),
+        "wait_ms": round(total_ms, 1),
+        "wait_ms_per_question": round(total_ms / n, 1),
+        "by_key": by_key,
+    }
+
+
+def _cassette_usage(stats: Dict[str, Dict[str, int]]) -> Dict[str, Any]:
+    """回放时以 cassette 统计代替模拟服务端统计"""
+    llm = stats.get("llm") or {}
+    return {
+        "calls": llm.get("replayed", 0) + llm.get("recorded", 0),
+        "prompt_tokens": llm.get("prompt_tokens", 0),
+        "completion_tokens": llm.get("completion_tokens", 0),
+        "by_kind": {},
+    }
+
+
+async def run_level(
+    agent: Any,
+    questions: List[Dict[str, Any]],
+    concurrency: int,
+    llm: Optional[FakeLLMServer],
+    cassette: Any = None,
+) -> Dict[str, Any]:
+    """以给定并发回放全部问题，返回该级别的统计"""
+    from src.observability import TraceContext
+    from src.observability.benchmark import PhaseRecorder, merge_samples, summarize
+    from evaluate import evaluate_result
+
+    if llm is not None:
+        llm.reset()
+    if cassette is not None:
+        cassette.reset_stats()
+    agent.clear_memory()
+    governor_before = _governor_waits()
+    semaphore = asyncio.Semaphore(concurrency)
+    phases: Dict[str, List[float]] = {}
+    end_to_end: List[float] = []
+    outcome = {"success": 0, "matched": 0, "with_expected": 0, "errors": 0}
+
+    async def _one(item: Dict[str, Any]) -> None:
+        async with semaphore:
+            trace = TraceContext(max_events=5000)
+            recorder = PhaseRecorder()
+            trace.add_listener(recorder)
+            start = time.perf_counter()
+            try:
+                result = await agent.process_task(item["question"], {"_trace": trace})
+            except Exception as e:
+                outcome["errors"] += 1
+                result = {"success": False, "error": str(e)}
+            end_to_end.append((time.perf_counter() - start) * 1000)
+            merge_samples(phases, recorder.finish())
+            outcome["success"] += int(bool(result.get("success")))
+            if item.get("expected") is not None:
+                outcome["with_expected"] += 1
+                outcome["matched"] += int(evaluate_result(result, item["expected"]))
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*[_one(item) for item in questions])
+    wall = time.perf_counter() - wall_start
+    governor = _governor_delta(governor_before, _governor_waits(), len(questions) or 1)
+
+    if llm is not None and (cassette is None or cassette.mode == "record"):
+        usage = llm.snapshot()
+    else:
+        usage = _cassette_usage(cassette.stats() if cassette is not None else {})
+    n = len(questions) or 1
+    latency = {"end_to_end": summarize(end_to_end)}
+    latency.update({phase: summarize(values) for phase, values in sorted(phases.items())})
+    extra = {"cassette": cassette.stats()} if cassette is not None else {}
+    return {
+        "questions": len(questions),
+        "wall_seconds": round(wall, 3),
+        "throughput_qps": round(len(questions) / wall, 4) if wall > 0 else 0.0,
+        **outcome,
+        "latency": latency,
+        "llm": {
+            **usage,
+            "calls_per_question": round(usage["calls"] / n, 3),
+            "tokens_per_question": round((usage["prompt_tokens"] + usage["completion_tokens"]) / n, 1),
+        },
+        "governor": governor,
+        **extra,
+    }
+
+
+def print_level(level: int, stats: Dict[str, Any]) -> None:
+    llm = stats["llm"]
+    print(f"\n== concurrency {level}: {stats['questions']} questions in {stats['wall_seconds']}s "
+          f"({stats['throughput_qps']} q/s), success {stats['success']}, errors {stats['errors']}")
+    print(f"   LLM calls {llm['calls']} ({llm['calls_per_question']}/q), tokens prompt {llm['prompt_tokens']} "
+          f"+ completion {llm['completion_tokens']} ({llm['tokens_per_question']}/q), by kind {llm['by_kind']}")
+    governor = stats.get("governor") or {}
+    print(f"   governor wait {governor.get('wait_ms', 0.0)} ms total ({governor.get('wait_ms_per_question', 0.0)} ms/q, "
+          f"{governor.get('queued', 0)} queued), by key {governor.get('by_key', {})}")
+    print(f"   {'phase':<28} {'count':>6} {'p50':>9} {'p95':>9} {'p99':>9}  (ms)")
+    for phase, s in stats["latency"].items():
+        if s.get("count"):
+            print(f"   {phase:<28} {s['count']:>6} {s['p50']:>9.1f} {s['p95']:>9.1f} {s['p99']:>9.1f}")
+
+
+def print_diff(rows: List[Dict[str, Any]]) -> int:
+    regressions = [r for r in rows if r["regression"]]
+    print(f"\n== comparison with baseline: {len(rows)} metrics, {len(regressions)} regressions")
+    for r in rows:
+        if r["regression"] or abs(r["change"]) >= 0.05:
+            flag = "REGRESSION" if r["regression"] else ""
+            print(f"   c={r['concurrency']:<3} {r['metric']:<40} {r['old']:>10} -> {r['new']:>10} ({r['change']:+.1%}) {flag}")
+    return len(regressions)
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    from loguru import logger
+    from src.observability.benchmark import BASELINE_VERSION, diff_baselines
+
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level)
+    llm = search = cassette = None
+    if not args.live:
+        llm = FakeLLMServer(latency_ms=args.llm_latency_ms, ms_per_token=args.llm_ms_per_token, jitter=args.jitter)
+        # 录制/回放时搜索服务需固定端口：URL（含端口）是 HTTP 请求键的一部分
+        port = args.search_port or (SEARCH_PORT_FOR_CASSETTE if args.cassette else 0)
+        search = FakeSearchServer(latency_ms=args.search_latency_ms, port=port)
+    try:
+        if args.live:
+            configure_live(warm_caches=args.warm_caches)
+        else:
+            configure_offline(llm, search, warm_caches=args.warm_caches, production_governor=args.production_governor)
+        if args.cassette:
+            from src.utils.cassette import Cassette, set_cassette
+
+            latency = {"default": args.replay_latency} if args.replay_latency else {}
+            cassette = Cassette(args.cassette, mode=args.cassette_mode, latency=latency, seed=args.seed)
+            set_cassette(cassette)
+        from src.agent.orchestrator import AgentOrchestrator
+
+        agent = AgentOrchestrator(use_multi_agent=True)
+
+        questions = load_questions(Path(args.questions), args.limit)
+        levels = [int(x) for x in str(args.concurrency).split(",") if x.strip()]
+        report = {
+            "version": BASELINE_VERSION,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "settings": {
+                "questions_file": str(args.questions),
+                "questions": len(questions),
+                "llm_latency_ms": args.llm_latency_ms,
+                "llm_ms_per_token": args.llm_ms_per_token,
+                "search_latency_ms": args.search_latency_ms,
+                "jitter": args.jitter,
+                "warm_caches": args.warm_caches,
+                "production_governor": args.production_governor,
+                "live": args.live,
+                "cassette_mode": args.cassette_mode if args.cassette else None,
+                "replay_latency": args.replay_latency,
+            },
+            "levels": {},
+        }
+        for level in levels:
+            stats = await run_level(agent, questions, level, llm, cassette)
+            report["levels"][str(level)] = stats
+            print_level(level, stats)
+        await agent.aclose()
+    finally:
+        if llm is not None:
+            llm.close()
+            search.close()
+        if cassette is not None:
+            print(f"\ncassette {args.cassette}: {cassette.store.stats()}")
+
+    if args.out:
+        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.out).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\nbaseline written to {args.out}")
+    if args.compare:
+        old = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = print_diff(diff_baselines(old, report, threshold=args.threshold))
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", default=str(PROJECT_ROOT / "question.jsonl"))
+    parser.add_argument("--limit", type=int, default=10, help="最多回放的问题数（0 表示全部）")
+    parser.add_argument("--concurrency", default="1,4,8", help="逗号分隔的并发级别")
+    parser.add_argument("--llm-latency-ms", type=float, default=80.0)
+    parser.add_argument("--llm-ms-per-token", type=float, default=0.5)
+    parser.add_argument("--search-latency-ms", type=float, default=30.0)
+    parser.add_argument("--search-port", type=int, default=0, help=f"模拟搜索服务端口（默认随机，使用 --cassette 时为 {SEARCH_PORT_FOR_CASSETTE}）")
+    parser.add_argument("--jitter", type=float, default=0.2, help="延迟的相对抖动（按提示词哈希确定）")
+    parser.add_argument("--warm-caches", action="store_true", help="保留请求级/搜索/HTTP 缓存（默认关闭以测量完整路径）")
+    parser.add_argument("--production-governor", action="store_true",
+                        help="离线时保留 config.yaml 中的 governor 预算与爬取礼貌延迟（默认不限速）")
+    parser.add_argument("--live", action="store_true", help="不启动模拟服务，使用 config.yaml 中的真实服务（配合 --cassette record 录制）")
+    parser.add_argument("--cassette", help="cassette 文件路径（SQLite），开启 LLM/HTTP 录制或回放")
+    parser.add_argument("--cassette-mode", default="replay", choices=["record", "replay", "auto"])
+    parser.add_argument("--replay-latency", help="回放延迟分布：recorded[:scale] / none / fixed:ms / uniform:min:max / lognormal:median:sigma")
+    parser.add_argument("--seed", type=int, default=0, help="回放合成延迟的随机种子")
+    parser.add_argument("--out", help="输出 JSON 基线路径")
+    parser.add_argument("--compare", help="与已有 JSON 基线对比")
+    parser.add_argument("--threshold", type=float, default=0.10, help="判定回退的相对变化阈值")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+启动耗时基准：对比立即注册与延迟注册（tools.lazy_registration）下 AgentOrchestrator 的冷启动时间。
+
+每次测量在独立子进程中进行（模块导入同样计入），分三种模式：
+  eager       关闭注册清单，所有工具/skill 立即加载（原行为）
+  lazy-cold   开启注册清单但清单为空（首次启动，同时生成清单）
+  lazy-warm   清单有效，未变化的工具/skill 以占位注册
+
+"首个回答" 以通过 ToolHub 调用计算器工具为准（不依赖 LLM/网络）。
+
+Run:
+  python scripts/benchmark_startup.py --runs 5
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+_CHILD = r"""
+import asyncio, json, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {root!r})
+from loguru import logger
+logger.remove()
+from src.config.config_loader import get_config
+cfg = get_config().config.setdefault("tools", {{}}).setdefault("lazy_registration", {{}})
+cfg.update({{"enabled": {enabled!r}, "manifest_path": {manifest!r}}})
+from src.agent.orchestrator import AgentOrchestrator
+t1 = time.perf_counter()
+agent = AgentOrchestrator(use_multi_agent=True)
+t2 = time.perf_counter()
+result = asyncio.run(agent.tool_hub.execute("calculate", "1+2"))
+t3 = time.perf_counter()
+print(json.dumps({{"import": t1 - t0, "init": t2 - t1, "first_answer": t3 - t2,
+                   "total": t3 - t0, "ok": bool(result.get("success"))}}))
+"""
+
+
+def run_once(enabled: bool, manifest: str) -> dict:
+    code = _CHILD.format(root=str(PROJECT_ROOT), enabled=enabled, manifest=manifest)
+    out = subprocess.run([sys.executable, "-c", code], cwd=str(PROJECT_ROOT), capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="每种模式的测量次数（取中位数）")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manifest = str(Path(tmp) / "tool_manifest.json")
+        samples = {"eager": [], "lazy-cold": [], "lazy-warm": []}
+        for _ in range(args.runs):
+            samples["eager"].append(run_once(False, manifest))
+            Path(manifest).unlink(missing_ok=True)
+            samples["lazy-cold"].append(run_once(True, manifest))
+            samples["lazy-warm"].append(run_once(True, manifest))
+
+    print(f"{'mode':<10} {'import':>9} {'init':>9} {'first':>9} {'total':>9}  (median of {args.runs}, ms)")
+    medians = {}
+    for mode, rows in samples.items():
+        med = {k: statistics.median(r[k] for r in rows) * 1000 for k in ("import", "init", "first_answer", "total")}
+        medians[mode] = med
+        ok = all(r["ok"] for r in rows)
+        print(f"{mode:<10} {med['import']:>9.1f} {med['init']:>9.1f} {med['first_answer']:>9.1f} {med['total']:>9.1f}"
+              + ("" if ok else "  (first answer failed)"))
+    eager, warm = medians["eager"], medians["lazy-warm"]
+    print(f"\nlazy-warm vs eager: init {eager['init'] - warm['init']:+.1f} ms saved, "
+          f"init+first answer {eager['init'] + eager['first_answer'] - warm['init'] - warm['first_answer']:+.1f} ms saved")
+
+
+if __name__ == "__main__":
+    main()
@@ -50,14 +50,46 @@ async def evaluate_agent(test_cases: list):
     return results
 
 
-def evaluate_result(result: dict, expected: dict) -> bool:
+def _answer_matches(answer: str, expected_answer) -> bool:
+    """归一化后比较答案；期望值可以是单个值或可接受值列表，多实体答案按集合比较（忽略顺序）"""
+    from src.utils.normalize import normalize_answer
+
+    got = normalize_answer(str(answer or ""))
+    options = expected_answer if isinstance(expected_answer, (list, tuple, set)) else [expected_answer]
+    for option in options:
+        want = normalize_answer(str(option))
+        if got == want:
+            return True
+        if "," in want and {p.strip() for p in got.split(",")} == {p.strip() for p in want.split(",")}:
+            return True
+    return False
+
+
+def evaluate_result(result: dict, expected) -> bool:
     """
     评估结果是否符合预期
-    
-    TODO: 实现具体的评估逻辑
+
+    expected 支持：
+    - None：只要求执行成功
+    - 字符串/数字（或其列表）：归一化后的答案与任一期望值一致
+    - dict：success（期望的成功标志）、answer（同上）、contains（答案必须包含的片段列表），均为可选
     """
-    # 占位实现
-    return result.get("success", False)
+    result = result or {}
+    if expected is None:
+        return bool(result.get("success", False))
+    if not isinstance(expected, dict):
+        expected = {"answer": expected}
+
+    if bool(result.get("success", False)) != bool(expected.get("success", True)):
+        return False
+    answer = result.get("answer")
+    if "answer" in expected and not _answer_matches(answer, expected["answer"]):
+        return False
+    contains = expected.get("contains") or []
+    if isinstance(contains, str):
+        contains = [contains]
+    text = str(answer or "").lower()
+    return all(str(part).lower() in text for part in contains)
 
 
 def print_evaluation_report(results: list):
@@ -1,17 +1,24 @@
 """
 根据比赛要求，读取项目根目录下的 question.jsonl，
-调用 AgentOrchestrator 逐题生成答案，并输出提交用 JSONL：
+调用 AgentOrchestrator 并发生成答案，并输出提交用 JSONL：
 
 {"id": 0, "answer": "answer_1"}
 {"id": 1, "answer": "answer_2"}
 ...
+
+每题完成即追加写入输出文件；中途崩溃后重新运行会跳过已作答的题目。
+
+用法：
+    python scripts/generate_submission.py [--input question.jsonl] [--output submission.jsonl]
+                                          [--concurrency 4] [--no-resume]
 """
 
+import argparse
 import asyncio
 import json
 from pathlib import Path
 import sys
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 from loguru import logger
 
@@ -23,6 +30,7 @@ from src.utils.python_version import check_python_version  # noqa: E402
 check_python_version()
 
 from src.agent import AgentOrchestrator  # noqa: E402
+from src.agent.batch_runner import BatchRunner, default_concurrency, log_report  # noqa: E402
 
 
 async def run_once(agent: AgentOrchestrator, q: Dict[str, Any]) -> Dict[str, Any]:
@@ -57,8 +65,10 @@ async def run_once(agent: AgentOrchestrator, q: Dict[str, Any]) -> Dict[str, Any
 async def main(
     input_path: Path = Path("question.jsonl"),
     output_path: Path = Path("submission.jsonl"),
+    concurrency: Optional[int] = None,
+    resume: bool = True,
 ) -> None:
-    """主入口：读取 JSONL，逐题调用 Agent，写出提交文件。"""
+    """主入口：读取 JSONL，并发调用 Agent，流式写出提交文件。"""
     if not input_path.exists():
         raise FileNotFoundError(f"找不到题目文件: {input_path}")
 
@@ -71,26 +81,28 @@ async def main(
                 continue
             questions.append(json.loads(line))
 
-    logger.info(f"共读取 {len(questions)} 道题目")
+    concurrency = concurrency or default_concurrency()
+    logger.info(f"共读取 {len(questions)} 道题目，并发数 {concurrency}")
 
     # 初始化 Agent（使用现有配置，多 Agent 模式）
     agent = AgentOrchestrator(use_multi_agent=True)
 
-    results: List[Dict[str, Any]] = []
-    for idx, q in enumerate(questions):
-        logger.info(f"===== 处理第 {idx + 1}/{len(questions)} 题 =====")
-        res = await run_once(agent, q)
-        results.append(res)
+    runner = BatchRunner(lambda q: run_once(agent, q), concurrency=concurrency, resume=resume)
+    report = await runner.run(questions, output_path)
 
-    logger.info(f"写出提交文件: {output_path}")
-    with output_path.open("w", encoding="utf-8") as f:
-        for item in results:
-            # 按比赛要求：每行一个 json，包含 id 和 answer 字段
-            f.write(json.dumps(item, ensure_ascii=False) + "\n")
+    log_report(report)
+    logger.info(f"生成提交文件完成: {output_path}")
 
-    logger.info("生成提交文件完成")
 
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="生成比赛提交文件")
+    parser.add_argument("--input", type=Path, default=Path("question.jsonl"), help="题目文件路径")
+    parser.add_argument("--output", type=Path, default=Path("submission.jsonl"), help="提交文件路径")
+    parser.add_argument("--concurrency", type=int, default=None, help="同时处理的题目数（默认读取配置）")
+    parser.add_argument("--no-resume", action="store_true", help="忽略已有输出，从头开始")
+    return parser.parse_args()
 
-if __name__ == "__main__":
-    asyncio.run(main())
 
+if __name__ == "__main__":
+    args = _parse_args()
+    asyncio.run(main(args.input, args.output, args.concurrency, resume=not args.no_resume))
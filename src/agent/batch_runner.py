@@ -0,0 +1,173 @@
+"""
+批量运行器：在信号量约束下并发处理多道题目。
+
+- 每题完成后立即把 {id, answer} 追加写入输出文件（流式落盘），崩溃时已完成的题目不会丢失
+- 启动时读取已有输出文件作为检查点，仅处理尚未作答（或答案为空）的 id（断点续跑）
+- 结束时按题目原始顺序重写输出文件，并汇报单题耗时与整体吞吐
+"""
+
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+
+from loguru import logger
+
+
+@dataclass
+class BatchReport:
+    """批量运行统计"""
+    total: int = 0
+    skipped: int = 0          # 检查点中已完成、本次跳过的题目数
+    completed: int = 0        # 本次完成的题目数
+    failed: int = 0           # 本次答案为空的题目数
+    wall_time: float = 0.0    # 本次批量运行总耗时（秒）
+    per_question: Dict[Any, float] = field(default_factory=dict)  # id -> 单题耗时（秒）
+
+    @property
+    def throughput(self) -> float:
+        """吞吐（题/秒）"""
+        if self.wall_time <= 0:
+            return 0.0
+        return self.completed / self.wall_time
+
+    def to_dict(self) -> Dict[str, Any]:
+        times = sorted(self.per_question.values())
+        return {
+            "total": self.total,
+            "skipped": self.skipped,
+            "completed": self.completed,
+            "failed": self.failed,
+            "wall_time": round(self.wall_time, 3),
+            "throughput": round(self.throughput, 4),
+            "avg_question_time": round(sum(times) / len(times), 3) if times else 0.0,
+            "max_question_time": round(times[-1], 3) if times else 0.0,
+        }
+
+
+def load_checkpoint(output_path: Path) -> Dict[Any, Dict[str, Any]]:
+    """读取已有输出文件，返回 id -> 结果；忽略损坏的行（如崩溃时写了一半的最后一行）。"""
+    done: Dict[Any, Dict[str, Any]] = {}
+    if not output_path.exists():
+        return done
+    with output_path.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"检查点中存在无法解析的行，已忽略: {line[:80]}")
+                continue
+            if isinstance(item, dict) and "id" in item:
+                done[item["id"]] = item
+    return done
+
+
+class BatchRunner:
+    """
+    并发批量运行器。
+
+    worker 为单题处理协程：接收题目 dict，返回 {"id": ..., "answer": ...}。
+    """
+
+    def __init__(
+        self,
+        worker: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+        concurrency: int = 4,
+        resume: bool = True,
+    ):
+        self.worker = worker
+        self.concurrency = max(1, int(concurrency))
+        self.resume = resume
+
+    async def run(self, questions: List[Dict[str, Any]], output_path: Path) -> BatchReport:
+        """并发处理所有题目，流式写出结果，返回统计报告。"""
+        report = BatchReport(total=len(questions))
+        done = load_checkpoint(output_path) if self.resume else {}
+        if not self.resume and output_path.exists():
+            output_path.unlink()
+
+        # 空答案视为未作答，续跑时重新处理
+        answered = {qid for qid, item in done.items() if str(item.get("answer") or "").strip()}
+        pending = [q for q in questions if q.get("id") not in answered]
+        report.skipped = len(questions) - len(pending)
+        if report.skipped:
+            logger.info(f"从检查点恢复：已完成 {report.skipped} 题，剩余 {len(pending)} 题")
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        write_lock = asyncio.Lock()
+        results: Dict[Any, Dict[str, Any]] = dict(done)
+
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        started = time.perf_counter()
+
+        with output_path.open("a", encoding="utf-8") as out:
+
+            async def _run_one(q: Dict[str, Any]) -> None:
+                qid = q.get("id")
+                async with semaphore:
+                    t0 = time.perf_counter()
+                    try:
+                        item = await self.worker(q)
+                    except Exception as e:
+                        logger.error(f"处理问题 id={qid} 时出错: {e}")
+                        item = {"id": qid, "answer": ""}
+                    elapsed = time.perf_counter() - t0
+
+                async with write_lock:
+                    out.write(json.dumps(item, ensure_ascii=False) + "\n")
+                    out.flush()
+                    os.fsync(out.fileno())
+                    results[qid] = item
+                    report.per_question[qid] = elapsed
+                    report.completed += 1
+                    if not str(item.get("answer") or "").strip():
+                        report.failed += 1
+                    logger.info(
+                        f"问题 id={qid} 完成，耗时 {elapsed:.2f}s "
+                        f"（进度 {report.skipped + report.completed}/{report.total}）"
+                    )
+
+            await asyncio.gather(*(_run_one(q) for q in pending))
+
+        report.wall_time = time.perf_counter() - started
+
+        # 按原始题目顺序重写输出文件（先写临时文件再替换，避免中途崩溃损坏检查点）
+        tmp_path = output_path.with_suffix(output_path.suffix + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            for q in questions:
+                qid = q.get("id")
+                if qid in results:
+                    f.write(json.dumps(results[qid], ensure_ascii=False) + "\n")
+        os.replace(tmp_path, output_path)
+
+        return report
+
+
+def log_report(report: BatchReport, top_n: int = 5) -> None:
+    """输出单题耗时（最慢的若干题）与整体吞吐"""
+    summary = report.to_dict()
+    logger.info(
+        f"批量运行结束：本次完成 {summary['completed']} 题（跳过 {summary['skipped']}，空答案 {summary['failed']}），"
+        f"总耗时 {summary['wall_time']}s，吞吐 {summary['throughput']} 题/秒，"
+        f"平均单题 {summary['avg_question_time']}s，最慢单题 {summary['max_question_time']}s"
+    )
+    slowest = sorted(report.per_question.items(), key=lambda kv: kv[1], reverse=True)[:top_n]
+    for qid, t in slowest:
+        logger.info(f"  id={qid}: {t:.2f}s")
+
+
+def default_concurrency() -> int:
+    """从配置 task.batch_concurrency 读取默认并发数（未配置时回退到 task.max_parallel_tasks）"""
+    try:
+        from ..config.config_loader import get_config
+        config = get_config()
+        value = config.get("task.batch_concurrency") or config.get("task.max_parallel_tasks", 4)
+        return max(1, int(value))
+    except Exception:
+        return 4
@@ -0,0 +1,165 @@
+"""
+DAG 执行器 - 按步骤依赖关系并行调度计划步骤
+
+- 依赖全部成功的步骤立即启动，并发数受 max_parallel 约束
+- 支持单步超时（步骤字段 timeout 优先，其次全局 step_timeout）
+- 步骤硬失败（返回 success=False、抛异常或超时）时，取消其全部下游步骤
+- 依赖不存在或存在环的步骤不会执行，标记为跳过
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from loguru import logger
+
+
+# 步骤执行函数：(step, 依赖步骤的结果列表) -> 结果 dict（需包含 success 字段）
+StepRunner = Callable[[Dict[str, Any], List[Dict[str, Any]]], Awaitable[Dict[str, Any]]]
+
+
+@dataclass
+class DagRunResult:
+    """DAG 执行结果"""
+    results: Dict[Any, Dict[str, Any]] = field(default_factory=dict)   # step_id -> 结果（含跳过的步骤）
+    completion_order: List[Any] = field(default_factory=list)          # 实际执行完成的顺序
+    skipped: List[Any] = field(default_factory=list)                   # 未执行的步骤
+    wall_time: float = 0.0
+
+    def ordered(self, steps: List[Dict[str, Any]], include_skipped: bool = False) -> List[Dict[str, Any]]:
+        """按计划顺序返回结果"""
+        out = []
+        for step in steps:
+            step_id = step.get("id")
+            if step_id in self.results and (include_skipped or step_id not in self.skipped):
+                out.append(self.results[step_id])
+        return out
+
+
+def _skipped_result(step_id: Any, reason: str) -> Dict[str, Any]:
+    return {"step_id": step_id, "success": False, "skipped": True, "error": reason}
+
+
+class DagExecutor:
+    """按依赖关系并行执行计划步骤"""
+
+    def __init__(
+        self,
+        run_step: StepRunner,
+        max_parallel: int = 5,
+        step_timeout: Optional[float] = None,
+    ):
+        """
+        Args:
+            run_step: 步骤执行协程函数
+            max_parallel: 同时执行的步骤数上限
+            step_timeout: 单步默认超时（秒），None/0 表示不限
+        """
+        self.run_step = run_step
+        self.max_parallel = max(1, int(max_parallel))
+        self.step_timeout = step_timeout or None
+
+    async def run(self, steps: List[Dict[str, Any]]) -> DagRunResult:
+        """执行全部步骤，返回执行结果"""
+        started = time.perf_counter()
+        run = DagRunResult()
+        by_id: Dict[Any, Dict[str, Any]] = {}
+        for step in steps:
+            by_id[step.get("id")] = step
+
+        dependents: Dict[Any, Set[Any]] = {step_id: set() for step_id in by_id}
+        for step_id, step in by_id.items():
+            for dep in step.get("dependencies") or []:
+                if dep in dependents:
+                    dependents[dep].add(step_id)
+
+        pending: List[Any] = list(by_id.keys())
+        succeeded: Set[Any] = set()
+        running: Dict[asyncio.Task, Any] = {}
+
+        def _cancel_downstream(root: Any, reason: str) -> None:
+            stack = list(dependents.get(root, ()))
+            while stack:
+                step_id = stack.pop()
+                if step_id in pending:
+                    pending.remove(step_id)
+                    run.results[step_id] = _skipped_result(step_id, reason)
+                    run.skipped.append(step_id)
+                    logger.warning(f"DAG: 步骤 {step_id} 的上游步骤 {root} 失败，取消执行")
+                    stack.extend(dependents.get(step_id, ()))
+
+        try:
+            while pending or running:
+                # 启动所有依赖已满足的步骤（按计划顺序，受并发上限约束）
+                for step_id in list(pending):
+                    if len(running) >= self.max_parallel:
+                        break
+                    step = by_id[step_id]
+                    deps = step.get("dependencies") or []
+                    if all(dep in succeeded for dep in deps):
+                        pending.remove(step_id)
+                        dep_results = [run.results[dep] for dep in deps]
+                        task = asyncio.ensure_future(self._run_one(step, dep_results))
+                        running[task] = step_id
+
+                if not running:
+                    # 剩余步骤的依赖永远无法满足（依赖不存在或存在环）
+                    for step_id in pending:
+                        run.results[step_id] = _skipped_result(step_id, "依赖未满足")
+                        run.skipped.append(step_id)
+                        logger.warning(f"DAG: 步骤 {step_id} 的依赖未满足，跳过")
+                    pending.clear()
+                    break
+
+                done, _ = await asyncio.wait(running.keys(), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    step_id = running.pop(task)
+                    result = task.result()
+                    run.results[step_id] = result
+                    run.completion_order.append(step_id)
+                    if result.get("success"):
+                        succeeded.add(step_id)
+                    else:
+                        _cancel_downstream(step_id, f"上游步骤 {step_id} 失败: {result.get('error', '')}")
+        finally:
+            for task in running:
+                task.cancel()
+
+        run.wall_time = time.perf_counter() - started
+        return run
+
+    async def _run_one(self, step: Dict[str, Any], dep_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """执行单个步骤，统一处理超时与异常"""
+        step_id = step.get("id")
+        timeout = step.get("timeout") or self.step_timeout
+        try:
+            if timeout:
+                result = await asyncio.wait_for(self.run_step(step, dep_results), timeout=float(timeout))
+            else:
+                result = await self.run_step(step, dep_results)
+        except asyncio.TimeoutError:
+            logger.error(f"DAG: 步骤 {step_id} 执行超时（{timeout}s）")
+            return {"step_id": step_id, "success": False, "error": f"步骤执行超时（{timeout}s）"}
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"DAG: 步骤 {step_id} 执行异常: {e}")
+            return {"step_id": step_id, "success": False, "error": str(e)}
+        if not isinstance(result, dict):
+            return {"step_id": step_id, "success": False, "error": "执行返回空结果"}
+        return result
+
+
+def get_dag_config() -> Dict[str, Any]:
+    """读取 DAG 调度配置：task.max_parallel_tasks / task.step_timeout"""
+    try:
+        from ..config.config_loader import get_config
+        task_cfg = get_config().get_section("task") or {}
+    except Exception:
+        task_cfg = {}
+    parallel = task_cfg.get("parallel_execution", True)
+    return {
+        "max_parallel": int(task_cfg.get("max_parallel_tasks", 5)) if parallel else 1,
+        "step_timeout": float(task_cfg.get("step_timeout", 0) or 0) or None,
+    }
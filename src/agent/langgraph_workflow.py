@@ -2,9 +2,29 @@
 LangGraph工作流编排 - 基于LangGraph的状态机工作流
 """
 
+import asyncio
+import re
+import time
 from typing import Dict, Any, List, Optional, TypedDict, Annotated
 from loguru import logger
 
+from ..utils.request_context import ensure_request_context
+from ..observability.token_ledger import (
+    ACTION_SKIP_JUDGES,
+    ACTION_STOP,
+    estimate_tokens,
+    get_token_ledger,
+    note_budget_action,
+)
+from ..utils.governor import (
+    PRIORITY_HIGH,
+    PRIORITY_LOW,
+    PRIORITY_NORMAL,
+    PriorityTicket,
+    prioritized,
+    run_with_priority,
+)
+
 # 尝试导入 LangGraph（兼容 0.2x 与 1.x）：先确保 StateGraph/END 可用，再可选 add_messages
 LANGGRAPH_AVAILABLE = False
 add_messages = None
@@ -40,6 +60,7 @@ if LANGGRAPH_AVAILABLE and add_messages is not None:
             step_results: List[Dict[str, Any]]
             evidence_list: List[str]
             fused_evidence: Optional[str]
+            fused_hops: int
             final_answer: Optional[str]
             errors: List[str]
             metadata: Dict[str, Any]
@@ -59,6 +80,7 @@ if LANGGRAPH_AVAILABLE and add_messages is None:
         step_results: List[Dict[str, Any]]
         evidence_list: List[str]
         fused_evidence: Optional[str]
+        fused_hops: int
         final_answer: Optional[str]
         errors: List[str]
         metadata: Dict[str, Any]
@@ -75,11 +97,106 @@ if not LANGGRAPH_AVAILABLE:
         step_results: List[Dict[str, Any]]
         evidence_list: List[str]
         fused_evidence: Optional[str]
+        fused_hops: int
         final_answer: Optional[str]
         errors: List[str]
         metadata: Dict[str, Any]
 
 
+# 跳目标中出现这些指代前面结果的短语时视为依赖，不能提前执行。
+# 只用明确的多字短语：单字代词（其/此/这…）会命中“其他”“尤其”等普通词，导致预取几乎全部关闭
+_HOP_REFERENCE_MARKERS = (
+    "上一跳", "前一跳", "上一步", "前一步", "上述", "前述", "上面的", "之前的", "前面的",
+    "该人", "该公司", "该国", "该城市", "该地", "该书", "该作品", "该机构", "此人", "其中",
+    "{",
+)
+_HOP_REFERENCE_WORDS = re.compile(r"\b(?:previous|above|aforementioned|prior\s+(?:hop|step|result)s?)\b", re.IGNORECASE)
+_HOP_INDEX_PATTERN = re.compile(r"第\s*(\d+)\s*[跳步]|(?:hop|step)\s*#?\s*(\d+)|#(\d+)", re.IGNORECASE)
+
+
+def hop_depends_on_previous(hop_info: Dict[str, Any], index: int) -> bool:
+    """
+    判断第 index 跳（从 0 开始）是否依赖前面跳的输出。
+
+    计划中显式给出 dependencies/depends_on 时以其为准，否则按跳目标文本启发式判断。
+    """
+    if index <= 0:
+        return False
+    explicit = hop_info.get("dependencies", hop_info.get("depends_on"))
+    if isinstance(explicit, (list, tuple)):
+        return len(explicit) > 0
+    target = str(hop_info.get("target") or "").lower()
+    if any(marker in target for marker in _HOP_REFERENCE_MARKERS) or _HOP_REFERENCE_WORDS.search(target):
+        return True
+    for match in _HOP_INDEX_PATTERN.finditer(target):
+        num = int(match.group(1) or match.group(2) or match.group(3))
+        if num <= index:
+            return True
+    return False
+
+
+def _get_speculative_config() -> Dict[str, Any]:
+    """读取多跳预取配置：task.speculative_hops / task.max_prefetch_hops"""
+    try:
+        from ..config.config_loader import get_config
+        config = get_config()
+        return {
+            "enabled": bool(config.get("task.speculative_hops", True)),
+            "max_prefetch": max(0, int(config.get("task.max_prefetch_hops", 2))),
+        }
+    except Exception:
+        return {"enabled": True, "max_prefetch": 2}
+
+
+def _get_fusion_config() -> Dict[str, Any]:
+    """读取增量证据融合配置：performance.incremental_fusion"""
+    try:
+        from ..config.config_loader import get_config
+        cfg = get_config().get("performance.incremental_fusion", {}) or {}
+        return {
+            "enabled": bool(cfg.get("enabled", True)),
+            "max_summary_tokens": max(0, int(cfg.get("max_summary_tokens", 800))),
+        }
+    except Exception:
+        return {"enabled": True, "max_summary_tokens": 800}
+
+
+def _running_summary(state: Dict[str, Any], covered: int, config: Dict[str, Any]) -> str:
+    """
+    可用于增量融合的融合汇总：汇总恰好覆盖前 covered 条证据且未超过大小上限时返回，否则返回空串
+    （汇总过长时回到全量融合，避免逐跳合并带来的信息漂移与提示词膨胀）
+    """
+    summary = state.get("fused_evidence")
+    if not config["enabled"] or covered <= 0 or not summary or state.get("fused_hops", 0) != covered:
+        return ""
+    limit = config["max_summary_tokens"]
+    if limit and estimate_tokens(str(summary)) > limit:
+        _count_fusion("evidence_fusion.refuse_oversize")
+        return ""
+    return str(summary)
+
+
+def _count_fusion(name: str, seconds: Optional[float] = None) -> None:
+    """记录证据融合次数与耗时（指标 evidence_fusion.full / evidence_fusion.delta 等）"""
+    try:
+        from ..utils.metrics import get_metrics
+        metrics = get_metrics()
+        metrics.increment(name)
+        if seconds is not None:
+            metrics.record_performance(name, seconds)
+    except Exception:
+        pass
+
+
+def _count_hop_assessment(combined: bool) -> None:
+    """记录单跳综合评估命中/回退次数（指标 hop_assessment.combined / hop_assessment.fallback）"""
+    try:
+        from ..utils.metrics import get_metrics
+        get_metrics().increment("hop_assessment.combined" if combined else "hop_assessment.fallback")
+    except Exception:
+        pass
+
+
 class LangGraphWorkflow:
     """
     基于LangGraph的工作流编排器
@@ -179,68 +296,154 @@ class LangGraphWorkflow:
             current_hop = state.get("current_hop", 0)
             evidence_list = state.get("evidence_list", [])
             
+            trace = (state.get("metadata") or {}).get("_trace")
+            total_complete: Optional[bool] = None
+            
+            # 单题 token 预算：用尽时不再开始新的跳，直接合成；接近上限时跳过可选的校验/终止判断
+            ledger = get_token_ledger()
+            if ledger is not None and ledger.should_stop() and current_hop < len(hops):
+                note_budget_action(ledger, ACTION_STOP, f"剩余 {len(hops) - current_hop} 跳未执行")
+                state["current_hop"] = len(hops)
+                self._cancel_hop_prefetch()
+                return state
+            skip_judges = ledger is not None and ledger.should_skip_judges()
+            if skip_judges:
+                note_budget_action(ledger, ACTION_SKIP_JUDGES)
+            
             if current_hop < len(hops):
                 hop_info = hops[current_hop]
                 logger.info(f"执行第 {current_hop + 1} 跳: {hop_info.get('target')}")
-                
-                # 创建步骤信息
-                step = {
-                    "id": current_hop + 1,
-                    "description": hop_info.get('target'),
-                    "tool_type": hop_info.get('tool'),
-                    "dependencies": []
-                }
+                if trace and hasattr(trace, "on_hop_start"):
+                    trace.on_hop_start(current_hop + 1, hop_info.get('target') or "", hop_info.get('tool') or "")
                 
                 # 传入 metadata（含 _trace、task_ctx）以便执行层记录工具调用/推理事件
                 ctx = {**(state.get("metadata") or {}), "step_results": state.get("step_results", [])}
-                result = await execution_agent.execute_step(step, ctx)
+                prefetched = self._hop_prefetch().pop(current_hop, None)
+                # 后续不依赖前面结果的跳提前并发执行，与本跳的执行和校验重叠
+                self._launch_hop_prefetch(execution_agent, hops, current_hop + 1, state)
+                result = await self._take_prefetched(prefetched, current_hop)
+                if result is None:
+                    result = await execution_agent.execute_step(self._hop_step(hops, current_hop), ctx)
                 
                 if "step_results" not in state:
                     state["step_results"] = []
                 state["step_results"].append(result)
                 
-                # 处理多跳逻辑
+                # 处理多跳逻辑（校验/融合/终止判断为阻塞的 LLM 调用，放到线程中执行，不阻塞预取中的工具调用）
                 if result.get("success"):
                     hop_result = result.get("result", "")
                     
-                    # 中间结果校验与纠错
-                    if hasattr(execution_agent, "validate_hop_result"):
-                        is_valid, correct_result = execution_agent.validate_hop_result(
-                            hop_info.get('target'), hop_result
+                    # 增量融合：已有覆盖前面全部证据的融合汇总时，只把本跳新证据合并进去
+                    fusion_config = _get_fusion_config()
+                    running_summary = _running_summary(state, len(evidence_list), fusion_config)
+                    
+                    # 单跳综合评估：一次调用得到校验、单跳终止、证据融合与整体终止结果
+                    assessment = None
+                    assess_ms = None
+                    if hasattr(execution_agent, "assess_hop") and not skip_judges:
+                        assess_started = time.perf_counter()
+                        assessment = await asyncio.to_thread(
+                            execution_agent.assess_hop,
+                            state.get("question"),
+                            hop_info,
+                            hop_result,
+                            list(evidence_list),
+                            multi_hop_plan.get("total_stop_condition", ""),
+                            running_summary,
                         )
+                        assess_ms = (time.perf_counter() - assess_started) * 1000
+                        # 判定无效时走回退路径（单独纠错、融合与终止校验），计为回退
+                        _count_hop_assessment(bool(assessment and assessment["valid"]))
+                    
+                    if assessment and assessment["valid"]:
+                        evidence_list.append(hop_result)
+                        state["evidence_list"] = evidence_list
+                        state["fused_evidence"] = assessment["fused_evidence"]
+                        state["fused_hops"] = len(evidence_list)
+                        if trace and hasattr(trace, "on_evidence_fused"):
+                            trace.on_evidence_fused(
+                                current_hop + 1, assessment["fused_evidence"], len(evidence_list),
+                                mode="combined", duration_ms=assess_ms,
+                            )
+                        if assessment["hop_complete"]:
+                            logger.info(f"第 {current_hop + 1} 跳满足终止条件，进入下一跳")
+                            state["current_hop"] = current_hop + 1
+                        else:
+                            logger.info(f"第 {current_hop + 1} 跳未满足终止条件，继续该跳")
+                        total_complete = assessment["total_complete"]
+                    else:
+                        # 中间结果校验与纠错（综合评估已判定无效时不再重复校验）
+                        is_valid, correct_result = True, hop_result
+                        assessed_correction = None
+                        if assessment is not None:
+                            is_valid = False
+                            assessed_correction = assessment["corrected_result"]
+                            correct_result = assessed_correction or hop_result
+                        elif hasattr(execution_agent, "validate_hop_result") and not skip_judges:
+                            is_valid, correct_result = await asyncio.to_thread(
+                                execution_agent.validate_hop_result, hop_info.get('target'), hop_result
+                            )
                         if not is_valid:
                             logger.warning(f"第 {current_hop + 1} 跳结果错误，触发纠错")
-                            if hasattr(execution_agent, "correct_hop_result"):
+                            # 综合评估已给出纠正结果时直接采用，不再单独调用纠错
+                            if not assessed_correction and hasattr(execution_agent, "correct_hop_result"):
                                 correct_result = await execution_agent.correct_hop_result(
                                     hop_info.get('target'), hop_result, hop_info.get('tool')
                                 )
                         hop_result = correct_result
-                    
-                    # 添加到证据列表
-                    evidence_list.append(hop_result)
-                    state["evidence_list"] = evidence_list
-                    
-                    # 证据融合 - 只在需要时进行
-                    if hasattr(execution_agent, "fuse_hop_evidence") and len(evidence_list) > 0:
-                        fused_evidence = execution_agent.fuse_hop_evidence(evidence_list)
-                        state["fused_evidence"] = fused_evidence
-                    
-                    # 单跳终止校验
-                    if hasattr(execution_agent, "check_single_hop_complete"):
-                        if execution_agent.check_single_hop_complete(hop_info, hop_result):
-                            logger.info(f"第 {current_hop + 1} 跳满足终止条件，进入下一跳")
-                            state["current_hop"] = current_hop + 1
+                        
+                        # 添加到证据列表
+                        evidence_list.append(hop_result)
+                        state["evidence_list"] = evidence_list
+                        
+                        # 证据融合与单跳终止校验互不依赖，并发执行
+                        question = state.get("question") or ""
+                        fuse_job = None
+                        fusion_mode = ""
+                        if running_summary and hasattr(execution_agent, "merge_hop_evidence"):
+                            fusion_mode = "delta"
+                            fuse_job = self._timed_fusion(
+                                execution_agent.merge_hop_evidence,
+                                running_summary, str(hop_result), len(evidence_list), query=question,
+                            )
+                        elif hasattr(execution_agent, "fuse_hop_evidence") and len(evidence_list) > 0:
+                            fusion_mode = "full"
+                            fuse_job = self._timed_fusion(
+                                execution_agent.fuse_hop_evidence, list(evidence_list), query=question
+                            )
+                        check_job = None
+                        if hasattr(execution_agent, "check_single_hop_complete") and not skip_judges:
+                            check_job = asyncio.to_thread(execution_agent.check_single_hop_complete, hop_info, hop_result)
+                        jobs = [job for job in (fuse_job, check_job) if job is not None]
+                        outcomes = list(await asyncio.gather(*jobs)) if jobs else []
+                        
+                        if fuse_job is not None:
+                            fused_evidence, fusion_secs, fusion_tokens = outcomes.pop(0)
+                            state["fused_evidence"] = fused_evidence
+                            state["fused_hops"] = len(evidence_list)
+                            _count_fusion(f"evidence_fusion.{fusion_mode}", fusion_secs)
+                            if trace and hasattr(trace, "on_evidence_fused"):
+                                trace.on_evidence_fused(
+                                    current_hop + 1, str(fused_evidence or ""), len(evidence_list),
+                                    mode=fusion_mode, duration_ms=fusion_secs * 1000, tokens=fusion_tokens,
+                                )
+                        
+                        # 单跳终止校验
+                        if check_job is not None:
+                            if outcomes.pop(0):
+                                logger.info(f"第 {current_hop + 1} 跳满足终止条件，进入下一跳")
+                                state["current_hop"] = current_hop + 1
+                            else:
+                                logger.info(f"第 {current_hop + 1} 跳未满足终止条件，继续该跳")
                         else:
-                            logger.info(f"第 {current_hop + 1} 跳未满足终止条件，继续该跳")
-                    else:
-                        # 无终止校验时，直接进入下一跳
-                        state["current_hop"] = current_hop + 1
+                            # 无终止校验时，直接进入下一跳
+                            state["current_hop"] = current_hop + 1
                 else:
                     logger.error(f"第 {current_hop + 1} 跳执行失败: {result.get('error')}")
                     state["current_hop"] = current_hop + 1
             
-            # 整体多跳终止校验
-            if hasattr(execution_agent, "check_total_hop_complete"):
+            # 整体多跳终止校验（综合评估已给出结论时不再单独调用）
+            if total_complete is None and hasattr(execution_agent, "check_total_hop_complete") and not skip_judges:
                 total_stop_condition = multi_hop_plan.get("total_stop_condition", "")
                 # 确保evidence_list中的所有元素都是字符串
                 string_evidence = []
@@ -250,19 +453,26 @@ class LangGraphWorkflow:
                     else:
                         string_evidence.append(str(evidence))
                 fused_evidence = state.get("fused_evidence", "\n".join(string_evidence))
-                if execution_agent.check_total_hop_complete(
+                total_complete = await asyncio.to_thread(
+                    execution_agent.check_total_hop_complete,
                     state.get("question"),
                     total_stop_condition,
                     fused_evidence
-                ):
-                    logger.info("满足整体多跳终止条件，终止推理")
-                    state["final_answer"] = fused_evidence
+                )
+            if total_complete:
+                logger.info("满足整体多跳终止条件，终止推理")
+                state["final_answer"] = state.get("fused_evidence") or "\n".join(str(e) for e in evidence_list)
+                self._cancel_hop_prefetch()
         elif execution_agent and plan:
             # 传统任务计划执行（兼容）
             steps = plan.get("steps", [])
             current_step = state.get("current_step", 0)
             
-            if current_step < len(steps):
+            ledger = get_token_ledger()
+            if ledger is not None and ledger.should_stop() and current_step < len(steps):
+                note_budget_action(ledger, ACTION_STOP, f"剩余 {len(steps) - current_step} 步未执行")
+                state["current_step"] = len(steps)
+            elif current_step < len(steps):
                 step = steps[current_step]
                 # 传入 metadata（含 _trace、task_ctx）以便执行层记录工具调用/推理事件
                 ctx = {**(state.get("metadata") or {}), "step_results": state.get("step_results", [])}
@@ -274,6 +484,98 @@ class LangGraphWorkflow:
         
         return state
     
+    @staticmethod
+    def _hop_step(hops: List[Dict[str, Any]], index: int) -> Dict[str, Any]:
+        """把多跳计划中的一跳转换为执行步骤"""
+        hop_info = hops[index]
+        return {
+            "id": index + 1,
+            "description": hop_info.get('target'),
+            "tool_type": hop_info.get('tool'),
+            "dependencies": []
+        }
+
+    @staticmethod
+    async def _timed_fusion(func: Any, *args: Any, **kwargs: Any) -> tuple:
+        """在线程中执行一次证据融合，返回 (融合结果, 耗时秒数, 融合阶段新增 token；无账本时为 None)"""
+        ledger = get_token_ledger()
+        tokens_before = ledger.phase_tokens("fusion") if ledger is not None else 0
+        started = time.perf_counter()
+        fused = await asyncio.to_thread(func, *args, **kwargs)
+        seconds = time.perf_counter() - started
+        tokens = ledger.phase_tokens("fusion") - tokens_before if ledger is not None else None
+        return fused, seconds, tokens
+
+    @staticmethod
+    def _hop_prefetch() -> Dict[int, "asyncio.Task"]:
+        """当前请求的预取任务表：跳序号 -> Task（存放在请求上下文中，并发请求互不干扰）"""
+        return ensure_request_context().extras.setdefault("hop_prefetch", {})
+
+    @staticmethod
+    def _hop_prefetch_tickets() -> Dict[int, PriorityTicket]:
+        """当前请求中预取任务的优先级票据：跳序号 -> PriorityTicket"""
+        return ensure_request_context().extras.setdefault("hop_prefetch_tickets", {})
+
+    def _launch_hop_prefetch(self, execution_agent: Any, hops: List[Dict[str, Any]], start: int, state: WorkflowState) -> None:
+        """为 start 之后不依赖前面结果的跳启动预取（受 task.max_prefetch_hops 限制）"""
+        config = _get_speculative_config()
+        if not config["enabled"] or config["max_prefetch"] <= 0:
+            return
+        registry = self._hop_prefetch()
+        tickets = self._hop_prefetch_tickets()
+        in_flight = sum(1 for task in registry.values() if not task.done())
+        ctx = {**(state.get("metadata") or {}), "step_results": []}
+        for index in range(start, len(hops)):
+            if in_flight >= config["max_prefetch"]:
+                break
+            if index in registry or hop_depends_on_previous(hops[index], index):
+                continue
+            logger.info(f"预取第 {index + 1} 跳: {hops[index].get('target')}")
+            # 预取属于推测性工作：出站调用以低优先级排队，让位于当前跳与答案合成；
+            # 轮到该跳时提升为普通优先级（见 _take_prefetched）
+            ticket = PriorityTicket(PRIORITY_LOW)
+            task = asyncio.ensure_future(run_with_priority(
+                ticket,
+                execution_agent.execute_step(self._hop_step(hops, index), dict(ctx)),
+            ))
+            tickets[index] = ticket
+            task.add_done_callback(lambda _t, i=index: tickets.pop(i, None))
+            registry[index] = task
+            in_flight += 1
+
+    async def _take_prefetched(self, task: Optional["asyncio.Task"], index: int) -> Optional[Dict[str, Any]]:
+        """
+        等待预取结果；预取失败（异常/取消）时返回 None，由调用方重新执行。
+        预取已成为当前跳：先把它的优先级提升为普通，已在 governor 排队的请求不再按低优先级等待
+        """
+        if task is None:
+            return None
+        ticket = self._hop_prefetch_tickets().pop(index, None)
+        if ticket is not None:
+            ticket.promote(PRIORITY_NORMAL)
+        try:
+            result = await task
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                raise
+            return None
+        except Exception as e:
+            logger.warning(f"第 {index + 1} 跳预取失败，重新执行: {e}")
+            return None
+        if isinstance(result, dict):
+            logger.info(f"第 {index + 1} 跳使用预取结果")
+            return result
+        return None
+
+    def _cancel_hop_prefetch(self) -> None:
+        """取消当前请求中尚未完成的预取任务（提前终止或流程结束时调用）"""
+        registry = ensure_request_context().extras.pop("hop_prefetch", None) or {}
+        ensure_request_context().extras.pop("hop_prefetch_tickets", None)
+        for index, task in registry.items():
+            if not task.done():
+                logger.debug(f"取消第 {index + 1} 跳的预取")
+                task.cancel()
+
     def _should_verify(self, state: WorkflowState) -> str:
         """判断是否应该验证"""
         plan = state.get("task_plan")
@@ -338,6 +640,7 @@ class LangGraphWorkflow:
 
         return state
     
+    @prioritized(PRIORITY_HIGH)
     async def _synthesis_node(self, state: WorkflowState) -> WorkflowState:
         """合成节点（证据整合）"""
         logger.info("工作流: 进入合成节点")
@@ -366,6 +669,10 @@ class LangGraphWorkflow:
         else:
             state["final_answer"] = "无法生成答案"
 
+        # 多跳流程的最终答案来自已融合的证据，无需再次调用 LLM，整体作为一次答案增量推送
+        if trace and hasattr(trace, "on_answer_delta") and state.get("final_answer"):
+            trace.on_answer_delta(str(state.get("final_answer")))
+
         if trace and hasattr(trace, "on_synthesis_end"):
             trace.on_synthesis_end(
                 success=bool(state.get("final_answer")),
@@ -385,9 +692,14 @@ class LangGraphWorkflow:
         Returns:
             处理结果
         """
+        # 绑定请求上下文，使各节点共享同一张预取任务表
+        ensure_request_context()
         if not LANGGRAPH_AVAILABLE:
             # 使用简化工作流
-            return await self._simple_workflow(question, context)
+            try:
+                return await self._simple_workflow(question, context)
+            finally:
+                self._cancel_hop_prefetch()
         
         # 初始化状态
         initial_state: WorkflowState = {
@@ -400,6 +712,7 @@ class LangGraphWorkflow:
             "step_results": [],
             "evidence_list": [],
             "fused_evidence": None,
+            "fused_hops": 0,
             "final_answer": None,
             "errors": [],
             "metadata": context or {}
@@ -421,6 +734,8 @@ class LangGraphWorkflow:
                 "success": False,
                 "error": str(e)
             }
+        finally:
+            self._cancel_hop_prefetch()
     
     async def _simple_workflow(self, question: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         """简化工作流（当LangGraph不可用时）"""
@@ -436,6 +751,7 @@ class LangGraphWorkflow:
             "step_results": [],
             "evidence_list": [],
             "fused_evidence": None,
+            "fused_hops": 0,
             "final_answer": None,
             "errors": [],
             "metadata": context or {}
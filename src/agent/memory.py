@@ -7,6 +7,8 @@ from datetime import datetime
 from collections import deque
 from loguru import logger
 
+from ..utils.request_context import ensure_request_context, get_request_context
+
 
 class ShortTermMemory:
     """
@@ -18,7 +20,7 @@ class ShortTermMemory:
         self.conversation_history: deque = deque(maxlen=max_size)
         self.current_context: Dict[str, Any] = {}
         # 历史快照：用于在处理任务时提供"处理前"的历史视图
-        self._history_snapshot: Optional[List[Dict[str, Any]]] = None
+        # 快照保存在请求级上下文中（见 src/utils/request_context.py），并发请求互不覆盖
         logger.info(f"ShortTermMemory initialized (max_size={max_size})")
     
     def add_message(self, role: str, content: str, metadata: Dict[str, Any] = None):
@@ -38,17 +40,21 @@ class ShortTermMemory:
         
         当开始处理新任务时，创建快照，这样工具可以访问"处理当前任务之前"的历史
         """
-        self._history_snapshot = list(self.conversation_history)
-        logger.debug(f"创建历史快照，包含 {len(self._history_snapshot)} 条消息")
+        snapshot = list(self.conversation_history)
+        ensure_request_context().history_snapshot = snapshot
+        logger.debug(f"创建历史快照，包含 {len(snapshot)} 条消息")
     
     def clear_snapshot(self):
         """清除历史快照"""
-        self._history_snapshot = None
+        ctx = get_request_context()
+        if ctx is not None:
+            ctx.history_snapshot = None
         logger.debug("清除历史快照")
     
     def get_snapshot(self) -> Optional[List[Dict[str, Any]]]:
         """获取历史快照（处理当前任务之前的历史）"""
-        return self._history_snapshot
+        ctx = get_request_context()
+        return ctx.history_snapshot if ctx is not None else None
     
     def get_recent_history(self, n: int = 10, use_snapshot: bool = False) -> List[Dict[str, Any]]:
         """
@@ -58,8 +64,9 @@ class ShortTermMemory:
             n: 获取最近N条消息
             use_snapshot: 如果为True，使用快照（处理前历史），否则使用当前历史
         """
-        if use_snapshot and self._history_snapshot is not None:
-            history = self._history_snapshot
+        snapshot = self.get_snapshot() if use_snapshot else None
+        if snapshot is not None:
+            history = snapshot
         else:
             history = list(self.conversation_history)
         
@@ -72,8 +79,9 @@ class ShortTermMemory:
         Args:
             use_snapshot: 如果为True，使用快照（处理前历史），否则使用当前历史
         """
-        if use_snapshot and self._history_snapshot is not None:
-            return list(self._history_snapshot)
+        snapshot = self.get_snapshot() if use_snapshot else None
+        if snapshot is not None:
+            return list(snapshot)
         return list(self.conversation_history)
     
     def update_context(self, key: str, value: Any):
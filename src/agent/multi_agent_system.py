@@ -2,7 +2,7 @@
 多Agent系统 - 基于LangGraph的协作式智能体系统
 """
 
-from typing import Dict, Any, List, Optional, TypedDict, Annotated
+from typing import Dict, Any, List, Optional, Tuple, TypedDict, Annotated
 from datetime import datetime
 import json
 import time
@@ -10,6 +10,17 @@ from loguru import logger
 
 # 导入提示词加载器
 from ..prompts.loader import get_prompt
+from ..utils.governor import PRIORITY_HIGH, prioritized
+from ..utils.evidence_compressor import get_evidence_compressor, join_passages
+from ..observability.token_ledger import (
+    ACTION_SHRINK,
+    ACTION_STOP,
+    estimate_tokens,
+    get_token_ledger,
+    note_budget_action,
+    record_tool_tokens,
+    token_phase,
+)
 
 # LangGraph 相关导入（兼容 0.2x 与 1.x）：先 StateGraph/END，再可选 add_messages
 LANGGRAPH_AVAILABLE = False
@@ -113,6 +124,7 @@ class PlanningAgent:
             pass
         self.available_tools = sorted(base)
     
+    @token_phase("planning")
     def decompose_task(self, question: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         将复杂问题分解为子任务
@@ -140,6 +152,7 @@ class PlanningAgent:
         logger.info(f"PlanningAgent: 任务分解完成，共{len(plan.get('steps', []))}个步骤")
         return plan
     
+    @token_phase("planning")
     def parse_multi_hop_plan(self, user_question):
         """
         解析用户问题，生成结构化多跳计划
@@ -409,6 +422,7 @@ class ExecutionAgent:
                 logger.warning(f"无法初始化LLM客户端: {e}")
         logger.info("ExecutionAgent initialized")
     
+    @token_phase("hop")
     async def execute_step(self, step: Dict[str, Any], context: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         执行单个步骤
@@ -491,14 +505,22 @@ class ExecutionAgent:
         Returns:
             执行结果列表
         """
-        import asyncio
+        from .dag_executor import DagExecutor, get_dag_config
         logger.info(f"ExecutionAgent: 并行执行 {len(steps)} 个步骤")
+        base_context = dict(context or {})
+
+        async def _run(step: Dict[str, Any], dep_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+            # 有依赖的步骤只看到其依赖步骤的结果
+            step_context = dict(base_context)
+            if dep_results:
+                step_context["step_results"] = list(base_context.get("step_results") or []) + dep_results
+            return await self.execute_step(step, step_context)
+
+        # 按依赖关系调度：依赖满足即启动，上游失败则取消下游
+        run = await DagExecutor(_run, **get_dag_config()).run(steps)
+        results = run.ordered(steps, include_skipped=True)
         
-        # 并行执行所有步骤
-        tasks = [self.execute_step(step, context) for step in steps]
-        results = await asyncio.gather(*tasks)
-        
-        logger.info(f"ExecutionAgent: 并行执行完成，共 {len(results)} 个结果")
+        logger.info(f"ExecutionAgent: 并行执行完成，共 {len(results)} 个结果，耗时 {run.wall_time:.2f}s")
         return results
     
     async def _direct_reasoning(self, step: Dict[str, Any], context: Dict[str, Any] = None) -> Dict[str, Any]:
@@ -624,6 +646,10 @@ class ExecutionAgent:
             return ""
         
         formatted = []
+        if context.get("question"):
+            formatted.append(f"原始问题: {context['question']}")
+        if context.get("plan"):
+            formatted.append("任务计划: " + "；".join(str(p) for p in context["plan"]))
         step_results = context.get("step_results", [])
         for i, result in enumerate(step_results):
             if result.get("success"):
@@ -723,7 +749,9 @@ class ExecutionAgent:
                 elif not isinstance(tool_result, dict):
                     tool_result = {"success": True, "result": tool_result}
 
-                formatted_result = self._format_tool_result(tool_result, tool_type)
+                formatted_result = self._format_tool_result(
+                    tool_result, tool_type, self._evidence_query(step, tool_input)
+                )
                 if trace and hasattr(trace, "on_tool_call_end"):
                     trace.on_tool_call_end(
                         step_id or 0,
@@ -759,7 +787,9 @@ class ExecutionAgent:
                         inferred_cap, tool_input, max_parallel=3, llm_client=self.llm, task_ctx=task_ctx
                     )
                     if tool_result.get("success"):
-                        formatted_result = self._format_tool_result(tool_result, tool_type)
+                        formatted_result = self._format_tool_result(
+                            tool_result, tool_type, self._evidence_query(step, tool_input)
+                        )
                         return {
                             "step_id": step.get("id"),
                             "success": True,
@@ -827,7 +857,9 @@ class ExecutionAgent:
                         tool_result = {"success": True, "result": tool_result}
 
                     # 格式化工具结果供后续使用
-                    formatted_result = self._format_tool_result(tool_result, tool_type)
+                    formatted_result = self._format_tool_result(
+                        tool_result, tool_type, self._evidence_query(step, tool_input)
+                    )
                     
                     return {
                         "step_id": step.get("id"),
@@ -884,7 +916,9 @@ class ExecutionAgent:
             # 执行跨数据源搜索
             if hasattr(search_tool, "search_across_sources"):
                 result = await search_tool.search_across_sources(tool_input, sources)
-                formatted_result = self._format_tool_result(result, "search_across_sources")
+                formatted_result = self._format_tool_result(
+                    result, "search_across_sources", self._evidence_query(step, tool_input)
+                )
                 if trace and hasattr(trace, "on_tool_call_end"):
                     trace.on_tool_call_end(
                         step_id or 0, 
@@ -906,7 +940,9 @@ class ExecutionAgent:
                 # 回退到普通搜索
                 logger.warning(f"[步骤{step_id}] 搜索工具不支持跨数据源搜索，回退到普通搜索")
                 result = await search_tool.execute(tool_input)
-                formatted_result = self._format_tool_result(result, "search_web")
+                formatted_result = self._format_tool_result(
+                    result, "search_web", self._evidence_query(step, tool_input)
+                )
                 if trace and hasattr(trace, "on_tool_call_end"):
                     trace.on_tool_call_end(
                         step_id or 0, 
@@ -931,16 +967,75 @@ class ExecutionAgent:
             logger.warning(f"[步骤{step_id}] 跨数据源搜索失败，降级到直接推理")
             return await self._direct_reasoning(step, context)
     
-    def _format_tool_result(self, tool_result: Dict[str, Any], tool_type: str) -> str:
+    @staticmethod
+    def _evidence_query(step: Dict[str, Any], tool_input: Any = None) -> str:
+        """证据压缩使用的查询：步骤（跳）目标加工具输入"""
+        parts = [str(step.get("description") or "")]
+        if isinstance(tool_input, dict):
+            parts.extend(v for v in tool_input.values() if isinstance(v, str))
+        elif tool_input:
+            parts.append(str(tool_input))
+        return " ".join(p for p in parts if p).strip()
+
+    @staticmethod
+    def _evidence_documents(tool_result: Dict[str, Any]) -> Tuple[List[Any], List[str]]:
+        """
+        从工具结果中取出可供压缩的文本：直接答案、全部搜索结果与页面摘要（按来源区分）。
+        同时返回每个文档的标注：搜索结果为“标题（URL）”，其余为空
+        """
+        documents: List[Any] = []
+        labels: List[str] = []
+        for key in ("direct_answer", "answer", "content", "text"):
+            value = tool_result.get(key)
+            if isinstance(value, str) and value.strip():
+                documents.append((key, value))
+                labels.append("")
+        for r in tool_result.get("results") or []:
+            if isinstance(r, dict):
+                title = str(r.get("title") or "").strip()
+                url = str(r.get("link") or r.get("url") or "").strip()
+                text = str(r.get("snippet") or "").strip() or title
+                if text:
+                    documents.append((url or title, text))
+                    labels.append(f"{title}（{url}）" if title and url else title or url)
+            elif r:
+                documents.append(("result", str(r)))
+                labels.append("")
+        for summary in tool_result.get("summaries") or []:
+            if summary:
+                documents.append(("summary", str(summary)))
+                labels.append("")
+        return documents, labels
+
+    @staticmethod
+    def _compress_documents(compressor: Any, query: str, documents: List[Any], labels: List[str], budget: int) -> str:
+        """按相关性挑选段落，每行保留来源标注（标题与 URL）；标注占用的 token 计入预算"""
+        overhead = [estimate_tokens(label) + 1 if label else 0 for label in labels]
+        by_doc: Dict[int, List[Any]] = {}
+        for passage in compressor.select(query, documents, budget_tokens=budget, doc_overhead=overhead):
+            by_doc.setdefault(passage.doc_index, []).append(passage)
+        lines = []
+        for doc_index, passages in by_doc.items():
+            text = join_passages(passages)
+            lines.append(f"{labels[doc_index]}: {text}" if labels[doc_index] else text)
+        return "\n".join(lines)
+
+    def _format_tool_result(self, tool_result: Dict[str, Any], tool_type: str, query: str = "") -> str:
         """
         格式化工具结果，并应用长度限制以控制token消耗。
         
-        根据工具类型设置不同的最大长度：
+        给出 query（跳目标）且开启证据压缩（performance.evidence_compression）时，
+        把全部结果切段后按与 query 的相关性挑选，装入按工具类型配置的 token 预算并跨来源去重
+        （搜索结果保留标题与 URL）；
+        否则根据工具类型设置不同的最大长度：
         - 计算类: 100字符
         - 时间类: 200字符
         - 搜索类: 500字符（已优化，只取前3个结果）
         - 历史类: 1000字符
         - 其他: 500字符
+        
+        单题 token 预算进入压缩阶段（performance.token_budget.shrink_at）时按 shrink_ratio 缩短上限；
+        结果的 token 数记入请求账本。
         """
         # 定义工具类型的最大长度限制
         MAX_LENGTHS = {
@@ -970,6 +1065,12 @@ class ExecutionAgent:
         
         result_text = ""
         max_len = MAX_LENGTHS.get(tool_type, MAX_LENGTHS["default"])
+        scale = 1.0
+        ledger = get_token_ledger()
+        if ledger is not None and ledger.should_shrink():
+            note_budget_action(ledger, ACTION_SHRINK)
+            scale = ledger.context_scale()
+            max_len = max(50, int(max_len * scale))
         
         if tool_type in ("search_web", "advanced_web_search"):
             results = tool_result.get("results", [])
@@ -1006,9 +1107,24 @@ class ExecutionAgent:
         else:
             result_text = str(tool_result)
         
-        # 应用长度限制
-        return _truncate(result_text, max_len)
+        compressor = get_evidence_compressor() if query and tool_type not in ("calculate", "get_time") else None
+        if compressor is not None:
+            # 查询感知压缩：代替按字符截断
+            documents, labels = self._evidence_documents(tool_result)
+            if not documents:
+                documents, labels = [(tool_type, result_text)], [""]
+            budget = max(50, int(compressor.budget_for(tool_type) * scale))
+            result_text = (
+                self._compress_documents(compressor, query, documents, labels, budget)
+                or _truncate(result_text, max_len)
+            )
+        else:
+            # 应用长度限制
+            result_text = _truncate(result_text, max_len)
+        record_tool_tokens(tool_type, result_text)
+        return result_text
     
+    @token_phase("judge")
     def check_single_hop_complete(self, hop_info, current_observation):
         """
         单跳终止校验：判断当前跳是否满足终止条件
@@ -1054,6 +1170,7 @@ class ExecutionAgent:
             logger.error(f"单跳终止校验失败: {e}")
             return True
     
+    @token_phase("judge")
     def check_total_hop_complete(self, user_question, total_stop_condition, current_evidence):
         """
         整体多跳终止校验：判断是否满足整体多跳终止条件
@@ -1083,6 +1200,7 @@ class ExecutionAgent:
             logger.error(f"整体多跳终止校验失败: {e}")
             return False
     
+    @token_phase("judge")
     def validate_hop_result(self, hop_target, hop_result):
         """
         中间结果校验：验证单跳结果的准确性
@@ -1144,6 +1262,7 @@ class ExecutionAgent:
             logger.error(f"中间结果校验失败：{e}，默认判定为有效")
             return True, hop_result
     
+    @token_phase("judge")
     async def correct_hop_result(self, hop_target, hop_result, tool):
         """
         中间结果纠错：结果错误时，重新检索或返回兜底
@@ -1175,12 +1294,16 @@ class ExecutionAgent:
             logger.error(f"纠错失败：{str(e)}，返回兜底结果")
             return f"该跳未获取到准确信息（目标：{hop_target}）"
     
-    def fuse_hop_evidence(self, evidence_list):
+    @token_phase("fusion")
+    def fuse_hop_evidence(self, evidence_list, query=""):
         """
         多跳证据融合：过滤噪声，加权融合，生成精准中间结果
         :param evidence_list: 所有跳的证据列表
+        :param query: 原问题；开启证据压缩且证据总量超出 fusion_budget 时，
+                      按与问题的相关性挑选各跳段落（每跳至少保留一段，跨跳去重）后再融合
         :return: 融合后的证据汇总
         """
+        prompt_evidence = self._compress_hop_evidence(evidence_list, query)
         fuse_prompt = f"""
         以下是多跳推理的所有跳证据列表，要求：
         1. 过滤噪声证据（与原问题无关、错误的证据）；
@@ -1189,7 +1312,7 @@ class ExecutionAgent:
         4. 仅输出融合后的证据汇总，无任何额外解释。
 
         证据列表：
-        {chr(10).join([f"第{i+1}跳：{evidence}" for i, evidence in enumerate(evidence_list)])}
+        {chr(10).join([f"第{i+1}跳：{evidence}" for i, evidence in enumerate(prompt_evidence)])}
         """
         llm_prompt = [
             {"role": "system", "content": "仅输出融合后的证据汇总，简洁、连贯，无额外解释"},
@@ -1228,6 +1351,149 @@ class ExecutionAgent:
                     string_evidence.append(str(evidence))
             return "\n".join(string_evidence)
     
+    @token_phase("fusion")
+    def merge_hop_evidence(self, fused_summary, new_evidence, hop_num, query=""):
+        """
+        增量证据融合：把第 hop_num 跳的新证据合并进已有的融合汇总，只需一次与跳数无关的调用
+        :param fused_summary: 前序各跳证据的融合汇总
+        :param new_evidence: 当前跳的证据
+        :param hop_num: 当前跳序号（从 1 开始）
+        :param query: 原问题
+        :return: 更新后的证据汇总；调用失败时返回汇总与新证据的拼接
+        """
+        merge_prompt = get_prompt(
+            "execution_hop_evidence_merge",
+            user_question=query or "",
+            fused_summary=fused_summary,
+            hop_num=hop_num,
+            new_evidence=new_evidence,
+        )
+        fallback = f"{fused_summary}\n{new_evidence}"
+        if not merge_prompt or not self.llm:
+            return fallback
+        llm_prompt = [
+            {"role": "system", "content": "仅输出融合后的证据汇总，简洁、连贯，无额外解释"},
+            {"role": "user", "content": merge_prompt}
+        ]
+        try:
+            if hasattr(self.llm, 'chat') and callable(self.llm.chat):
+                response = self.llm.chat(llm_prompt, max_tokens=1024, temperature=0.1)
+                if isinstance(response, dict) and 'choices' in response and response['choices']:
+                    choice = response['choices'][0]
+                    merged = (choice.get('message') or {}).get('content') or choice.get('content', '')
+                elif isinstance(response, dict):
+                    merged = response.get('content') or response.get('text') or ""
+                else:
+                    merged = str(response)
+            else:
+                merged = self.llm.generate(merge_prompt)
+        except Exception as e:
+            logger.error(f"增量证据融合失败: {e}")
+            return fallback
+        return (merged or "").strip() or fallback
+
+    @staticmethod
+    def _compress_hop_evidence(evidence_list, query=""):
+        """融合前压缩各跳证据；未开启压缩、没有 query 或未超出预算时原样返回"""
+        texts = [str(evidence) for evidence in evidence_list]
+        compressor = get_evidence_compressor() if query else None
+        if compressor is None:
+            return texts
+        ledger = get_token_ledger()
+        budget = max(100, int(compressor.fusion_budget * (ledger.context_scale() if ledger is not None else 1.0)))
+        if sum(estimate_tokens(t) for t in texts) <= budget:
+            return texts
+        kept: Dict[int, List[Any]] = {}
+        for passage in compressor.select(query, list(enumerate(texts)), budget_tokens=budget, min_per_source=1):
+            kept.setdefault(passage.doc_index, []).append(passage)
+        return [join_passages(kept.get(i, [])) or "（与问题无关，已省略）" for i in range(len(texts))]
+
+    @token_phase("judge")
+    def assess_hop(self, user_question, hop_info, hop_result, previous_evidence, total_stop_condition="",
+                   fused_summary=""):
+        """
+        单跳综合评估：一次 LLM 调用同时完成中间结果校验、单跳终止校验、证据融合与整体终止校验，
+        替代 validate_hop_result / check_single_hop_complete / fuse_hop_evidence / check_total_hop_complete
+        的四次调用。
+        :param user_question: 原用户问题
+        :param hop_info: 当前跳的信息（来自多跳计划）
+        :param hop_result: 当前跳的工具调用结果
+        :param previous_evidence: 之前各跳的证据列表
+        :param total_stop_condition: 整体终止条件
+        :param fused_summary: 之前各跳证据的融合汇总（增量融合）；给出时代替逐跳证据放入提示词
+        :return: {"valid", "corrected_result", "hop_complete", "fused_evidence", "total_complete"}；
+                 LLM 不可用或输出无法解析时返回 None，由调用方回退到逐项调用
+        """
+        if not self.llm:
+            return None
+        if fused_summary:
+            previous = f"（第1-{len(previous_evidence or [])}跳证据的融合汇总）{fused_summary}"
+        else:
+            previous = "\n".join(f"第{i+1}跳：{evidence}" for i, evidence in enumerate(previous_evidence or [])) or "（无）"
+        assess_prompt = get_prompt(
+            "execution_hop_assessment",
+            user_question=user_question or "",
+            total_stop_condition=total_stop_condition or "",
+            hop_target=hop_info.get('target', ''),
+            stop_condition=hop_info.get('stop_condition', ''),
+            previous_evidence=previous,
+            hop_result=hop_result,
+        )
+        if not assess_prompt:
+            return None
+        llm_prompt = [
+            {"role": "system", "content": "仅输出JSON格式评估结果，无任何额外文本，确保JSON语法正确"},
+            {"role": "user", "content": assess_prompt}
+        ]
+        try:
+            if hasattr(self.llm, 'chat') and callable(self.llm.chat):
+                response = self.llm.chat(llm_prompt, max_tokens=1024, temperature=0.1)
+                if isinstance(response, dict) and 'choices' in response and response['choices']:
+                    choice = response['choices'][0]
+                    response_text = (choice.get('message') or {}).get('content') or choice.get('content', '')
+                elif isinstance(response, dict):
+                    response_text = response.get('content') or response.get('text') or ""
+                else:
+                    response_text = str(response)
+            else:
+                response_text = self.llm.generate(assess_prompt)
+        except Exception as e:
+            logger.error(f"单跳综合评估调用失败: {e}")
+            return None
+        return self._parse_hop_assessment(response_text)
+
+    @staticmethod
+    def _parse_hop_assessment(response_text):
+        """解析单跳综合评估的 JSON 输出，字段缺失或类型不符时返回 None"""
+        import re
+        match = re.search(r'\{.*\}', str(response_text or ""), re.DOTALL)
+        if not match:
+            logger.warning(f"单跳综合评估输出无法解析: {str(response_text)[:200]}")
+            return None
+        try:
+            data = json.loads(match.group())
+        except json.JSONDecodeError as e:
+            logger.warning(f"单跳综合评估JSON解析失败: {e}")
+            return None
+
+        def _as_bool(value):
+            if isinstance(value, bool):
+                return value
+            if isinstance(value, str) and value.strip().upper() in ("TRUE", "YES", "FALSE", "NO"):
+                return value.strip().upper() in ("TRUE", "YES")
+            return None
+
+        flags = {key: _as_bool(data.get(key)) for key in ("valid", "hop_complete", "total_complete")}
+        fused = data.get("fused_evidence")
+        if any(flag is None for flag in flags.values()) or not isinstance(fused, str) or not fused.strip():
+            logger.warning(f"单跳综合评估字段不完整: {data}")
+            return None
+        return {
+            **flags,
+            "corrected_result": str(data.get("corrected_result") or "").strip(),
+            "fused_evidence": fused.strip(),
+        }
+    
     def _prepare_tool_input(self, step: Dict[str, Any], context: Dict[str, Any] = None) -> str:
         """准备工具输入"""
         tool_type = step.get("tool_type", "")
@@ -1481,8 +1747,19 @@ class CoordinationAgent:
         self.planning_agent = planning_agent
         self.execution_agent = execution_agent
         self.verification_agent = verification_agent
-        self.state: Optional[AgentState] = None
         logger.info("CoordinationAgent initialized")
+
+    @property
+    def state(self) -> Optional[AgentState]:
+        """当前请求的运行状态（保存在请求级上下文中，实例本身可被并发请求共享）"""
+        from ..utils.request_context import get_request_context
+        ctx = get_request_context()
+        return ctx.state if ctx is not None else None
+
+    @state.setter
+    def state(self, value: Optional[AgentState]) -> None:
+        from ..utils.request_context import ensure_request_context
+        ensure_request_context().state = value
     
     
     async def process_question(self, question: str, context: Dict[str, Any] = None) -> Dict[str, Any]:
@@ -1556,23 +1833,34 @@ class CoordinationAgent:
                     "errors": []
                 }
             
-            for step in steps:
-                # 检查依赖
-                if not self._check_dependencies(step, self.state["step_results"]):
-                    logger.warning(f"步骤 {step.get('id')} 的依赖未满足，跳过")
-                    continue
-                
-                # 执行步骤
+            # 按依赖关系并行执行（DAG 调度），每步执行完立即验证
+            from .dag_executor import DagExecutor, get_dag_config
+            step_context = {k: v for k, v in (context or {}).items() if k != "step_results"}
+            # 每个步骤都能看到原始问题与计划概要（无依赖的步骤据此理解自己在整体中的作用）
+            step_context["question"] = question
+            step_context["plan"] = [
+                f"{s.get('id')}. {s.get('description', '')}" for s in steps if isinstance(s, dict)
+            ]
+
+            async def _run_and_verify(step: Dict[str, Any], dep_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+                # 单题 token 预算已用尽：不再开始新步骤，直接用已有结果合成答案
+                ledger = get_token_ledger()
+                if ledger is not None and ledger.should_stop():
+                    note_budget_action(ledger, ACTION_STOP)
+                    return {"step_id": step.get("id"), "success": False, "error": "单题 token 预算已用尽，跳过该步骤"}
+                # 步骤结果只取其声明的依赖；无依赖的步骤只有问题与计划概要，
+                # 不随并发执行时哪些兄弟步骤先完成而变化
+                visible = list(dep_results)
                 step_result = await self.execution_agent.execute_step(
-                    step, 
-                    {"step_results": self.state["step_results"]}
+                    step,
+                    {**step_context, "step_results": visible}
                 )
                 self.state["step_results"].append(step_result)
                 
                 # 验证结果
                 verification = await self.verification_agent.verify_result(
                     step_result,
-                    {"step_results": self.state["step_results"]}
+                    {"step_results": visible + [step_result]}
                 )
                 self.state["verification_results"].append(verification)
                 
@@ -1581,6 +1869,17 @@ class CoordinationAgent:
                     self.state["errors"].append(
                         f"步骤 {step.get('id')} 验证失败: {verification.get('issues', [])}"
                     )
+                return step_result
+
+            run = await DagExecutor(_run_and_verify, **get_dag_config()).run(steps)
+            for step_id in run.skipped:
+                self.state["errors"].append(f"步骤 {step_id} 未执行: {run.results[step_id].get('error', '')}")
+            # 按计划顺序整理结果（含超时/异常的步骤），便于合成答案
+            self.state["step_results"] = run.ordered(steps)
+            logger.info(
+                f"CoordinationAgent: {len(run.completion_order)}/{len(steps)} 个步骤执行完成，"
+                f"耗时 {run.wall_time:.2f}s"
+            )
             
             # 3. 合成最终答案
             final_answer = await self._synthesize_answer()
@@ -1606,15 +1905,8 @@ class CoordinationAgent:
                 "question": question
             }
     
-    def _check_dependencies(self, step: Dict[str, Any], completed_results: List[Dict[str, Any]]) -> bool:
-        """检查步骤依赖是否满足"""
-        dependencies = step.get("dependencies", [])
-        if not dependencies:
-            return True
-        
-        completed_ids = {r.get("step_id") for r in completed_results if r.get("success")}
-        return all(dep_id in completed_ids for dep_id in dependencies)
-    
+    @token_phase("synthesis")
+    @prioritized(PRIORITY_HIGH)
     async def _synthesize_answer(self) -> str:
         """合成最终答案"""
         # 使用LLM整合所有步骤结果，生成最终答案
@@ -1663,8 +1955,10 @@ class CoordinationAgent:
         if hasattr(self.planning_agent, 'llm') and self.planning_agent.llm:
             try:
                 # 构建合成提示词
+                ledger = get_token_ledger()
+                per_step = int(200 * (ledger.context_scale() if ledger is not None else 1.0))
                 context = "\n".join([
-                    f"步骤{i+1}: {str(r.get('result', ''))[:200]}"  # 限制长度避免过长
+                    f"步骤{i+1}: {str(r.get('result', ''))[:per_step]}"  # 限制长度避免过长（预算紧张时进一步压缩）
                     for i, r in enumerate(successful_results)
                 ])
                 
@@ -1681,8 +1975,12 @@ class CoordinationAgent:
                 if not prompt:
                     prompt = f"基于以下步骤的结果，请生成最终答案。\n\n步骤结果：\n{context}\n\n问题：{question}\n\n请直接给出最终答案。"
                 
+                # 有流式订阅方（如 SSE 接口）时按 token 推送答案增量，否则一次性生成
+                trace = self._current_trace()
+                if getattr(trace, "has_listeners", False) and hasattr(self.planning_agent.llm, 'generate_stream'):
+                    answer = await self._stream_answer(prompt, trace)
                 # 使用异步方法（如果可用），否则在线程池中执行同步方法
-                if hasattr(self.planning_agent.llm, 'generate_async'):
+                elif hasattr(self.planning_agent.llm, 'generate_async'):
                     answer = await self.planning_agent.llm.generate_async(prompt)
                 else:
                     # 在线程池中执行同步方法，避免阻塞事件循环
@@ -1710,6 +2008,30 @@ class CoordinationAgent:
         
         return "无法生成答案"
     
+    def _current_trace(self) -> Any:
+        """当前请求的 TraceContext（可能为 NullTraceContext）"""
+        from ..observability import get_trace_context_from_context
+        return get_trace_context_from_context((self.state or {}).get("metadata"))
+    
+    async def _stream_answer(self, prompt: str, trace: Any) -> str:
+        """
+        流式生成答案，每个增量通过 trace.on_answer_delta 推送。
+        已推送增量后失败或结果为空时先推送 answer_reset，客户端丢弃已收到的部分，再接收降级答案
+        """
+        parts: List[str] = []
+        try:
+            async for delta in self.planning_agent.llm.generate_stream(prompt):
+                parts.append(delta)
+                trace.on_answer_delta(delta)
+        except Exception as e:
+            if parts:
+                trace.on_answer_reset(str(e))
+            raise
+        answer = "".join(parts)
+        if parts and not answer.strip():
+            trace.on_answer_reset("empty_answer")
+        return answer
+    
     def _calculate_overall_confidence(self) -> float:
         """计算整体置信度"""
         if not self.state["verification_results"]:
@@ -1788,5 +2110,5 @@ class MultiAgentSystem:
         return await self.coordination_agent.process_question(question, context)
     
     def get_state(self) -> Optional[AgentState]:
-        """获取当前状态"""
+        """获取当前请求的状态"""
         return self.coordination_agent.state
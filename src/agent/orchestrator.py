@@ -10,8 +10,7 @@ from loguru import logger
 from .multi_agent_system import MultiAgentSystem
 from .langgraph_workflow import LangGraphWorkflow
 from .memory import MemoryManager
-from ..tools import ToolRegistry, SearchTool, CalculatorTool, WorkspaceFilesTool
-from ..tools.time_tool import TimeTool
+from ..tools.tool_registry import ToolRegistry
 from ..config.config_loader import get_config
 from ..toolhub import ToolHub, ToolCandidate
 from pathlib import Path
@@ -71,47 +70,67 @@ class AgentOrchestrator:
             self.workflow = None
             logger.info("AgentOrchestrator initialized (Single-Agent mode)")
     
-    def _register_default_tools(self):
-        """注册默认工具"""
-        from ..tools import ConversationHistoryTool, AdvancedWebSearchTool, WebSearchCrawlTool
-        
-        # 注册搜索工具
-        search_tool = SearchTool()
-        self.tool_registry.register(search_tool)
-
-        # 注册高级搜索工具（多引擎 + 正文抓取），用于复杂检索与信息抽取
-        try:
-            adv_search_tool = AdvancedWebSearchTool()
-            self.tool_registry.register(adv_search_tool)
-        except Exception as e:
-            logger.warning(f"AdvancedWebSearchTool 初始化失败，跳过: {e}")
-
-        # 注册网络搜索爬取工具（百度/知乎，多步深度，无需 API Key）
-        try:
-            crawl_tool = WebSearchCrawlTool()
-            self.tool_registry.register(crawl_tool)
-        except Exception as e:
-            logger.warning(f"WebSearchCrawlTool 初始化失败，跳过: {e}")
-        
-        # 注册计算工具
-        calc_tool = CalculatorTool()
-        self.tool_registry.register(calc_tool)
-        
-        # 注册时间工具
-        time_tool = TimeTool()
-        self.tool_registry.register(time_tool)
-        
-        # 注册对话历史工具
-        history_tool = ConversationHistoryTool(memory_manager=self.memory)
-        self.tool_registry.register(history_tool)
+    def _open_tool_manifest(self) -> Optional[Any]:
+        """工具注册清单（tools.lazy_registration）；关闭时返回 None，所有工具立即加载"""
+        lazy_cfg = get_config().get("tools.lazy_registration", {}) or {}
+        if not lazy_cfg.get("enabled", True):
+            return None
+        from ..tools.lazy_tool import ToolManifest
+        manifest_path = Path(lazy_cfg.get("manifest_path") or "data/cache/tool_manifest.json")
+        if not manifest_path.is_absolute():
+            manifest_path = Path(__file__).resolve().parents[2] / manifest_path
+        return ToolManifest(str(manifest_path))
+
+    @staticmethod
+    def _make_native_tool(module_name: str, class_name: str, kwargs: Dict[str, Any], manifest: Optional[Any]) -> Any:
+        """
+        创建内置工具：清单命中（模块文件未变化）时返回 LazyTool 占位，首次调用才导入并实例化；
+        否则立即实例化并把 name/description 写入清单。
+        """
+        import importlib
+
+        def _factory():
+            module = importlib.import_module(f"..tools.{module_name}", __package__)
+            return getattr(module, class_name)(**kwargs)
+
+        if manifest is None:
+            return _factory()
+        from ..tools.lazy_tool import LazyTool
+        source = Path(__file__).resolve().parents[1] / "tools" / f"{module_name}.py"
+        key = f"tool:{class_name}"
+        cached = manifest.lookup(key, source)
+        if cached is not None:
+            return LazyTool(name=cached["name"], description=cached.get("description", ""), factory=_factory)
+        tool = _factory()
+        manifest.store(key, source, {"name": tool.name, "description": tool.description})
+        return tool
 
-        # 注册工作区文件列表工具（用于回答“当前目录/根目录下有哪些文件”）
-        try:
-            project_root = Path(__file__).resolve().parents[2]
-            fs_tool = WorkspaceFilesTool(workspace_root=project_root)
-            self.tool_registry.register(fs_tool)
-        except Exception as e:
-            logger.warning(f"WorkspaceFilesTool 初始化失败: {e}")
+    def _register_default_tools(self):
+        """注册默认工具（启用注册清单时，未变化的工具/skill 以延迟加载占位注册）"""
+        manifest = self._open_tool_manifest()
+        project_root = Path(__file__).resolve().parents[2]
+
+        native_tools = [
+            # 搜索工具
+            ("search_tool", "SearchTool", {}),
+            # 高级搜索工具（多引擎 + 正文抓取），用于复杂检索与信息抽取
+            ("advanced_web_search_tool", "AdvancedWebSearchTool", {}),
+            # 网络搜索爬取工具（百度/知乎，多步深度，无需 API Key）
+            ("web_search_crawl_tool", "WebSearchCrawlTool", {}),
+            # 计算工具
+            ("calculator_tool", "CalculatorTool", {}),
+            # 时间工具
+            ("time_tool", "TimeTool", {}),
+            # 对话历史工具
+            ("conversation_history_tool", "ConversationHistoryTool", {"memory_manager": self.memory}),
+            # 工作区文件列表工具（用于回答“当前目录/根目录下有哪些文件”）
+            ("workspace_files_tool", "WorkspaceFilesTool", {"workspace_root": project_root}),
+        ]
+        for module_name, class_name, kwargs in native_tools:
+            try:
+                self.tool_registry.register(self._make_native_tool(module_name, class_name, kwargs, manifest))
+            except Exception as e:
+                logger.warning(f"{class_name} 初始化失败，跳过: {e}")
         
         # 将工具注册表传递给执行Agent
         if self.multi_agent:
@@ -137,8 +156,7 @@ class AgentOrchestrator:
 
             # skills tools (scan src/skills)
             try:
-                from ..skills.loader import load_skill_tools, load_skills_from_skillmd
-                from ..skills.skill_tool import SkillTool
+                from ..skills.loader import load_skill_tools, load_skillmd_tools
                 skills_cfg = (get_config().get_section("skills") or {})
                 skills_enabled = bool(skills_cfg.get("enabled", True))
                 skills_dir_cfg = skills_cfg.get("directory") or "src/skills"
@@ -153,7 +171,7 @@ class AgentOrchestrator:
 
                 if skills_enabled:
                     # legacy python-based skills
-                    for st in load_skill_tools(skills_dir):
+                    for st in load_skill_tools(skills_dir, manifest=manifest):
                         n = getattr(st, "name", None)
                         if n:
                             desc = getattr(st, "description", "") or ""
@@ -170,14 +188,14 @@ class AgentOrchestrator:
                             )
 
                     # Claude-style SKILL.md skills
-                    for doc in load_skills_from_skillmd(skills_dir):
-                        st = SkillTool(document=doc, llm_client=self.multi_agent.execution_agent.llm)
-                        desc = doc.meta.description or ""
+                    llm = self.multi_agent.execution_agent.llm
+                    for st in load_skillmd_tools(skills_dir, llm, manifest=manifest):
+                        desc = st.description or ""
                         from ..toolhub import _extract_capabilities_from_description
-                        caps = _extract_capabilities_from_description(desc, doc.meta.name)
+                        caps = _extract_capabilities_from_description(desc, st.name)
                         hub.register_candidate(
                             ToolCandidate(
-                                name=doc.meta.name,
+                                name=st.name,
                                 source="skills",
                                 tool=st,
                                 priority=1,
@@ -203,12 +221,21 @@ class AgentOrchestrator:
                                 source="mcps",
                                 tool=mt,
                                 priority=2,
-                                meta={"type": "mcp", "capabilities": caps, "description": desc},
+                                meta={
+                                    "type": "mcp",
+                                    "capabilities": caps,
+                                    "description": desc,
+                                    "server": getattr(mt, "server_name", None),
+                                },
                             )
                         )
             except Exception as e:
                 logger.warning(f"MCP loading skipped: {e}")
 
+            if manifest is not None:
+                manifest.save()
+                logger.debug(f"工具注册清单: {manifest.stats()}")
+
             # 保存 ToolHub 引用，便于其他模块（如快速路径、自描述）使用
             self.tool_hub = hub
             self.multi_agent.execution_agent.tool_hub = hub
@@ -227,6 +254,9 @@ class AgentOrchestrator:
         """
         处理任务的主入口
         
+        每次调用在独立的请求级上下文中运行（AgentState、历史快照、trace 均为请求私有），
+        因此同一个 AgentOrchestrator 实例可以安全地并发处理多个请求。
+        
         Args:
             task: 任务描述
             context: 上下文信息
@@ -234,14 +264,22 @@ class AgentOrchestrator:
         Returns:
             处理结果
         """
+        from ..utils.request_context import request_scope
+        with request_scope():
+            return await self._process_task(task, context)
+
+    async def _process_task(self, task: str, context: Optional[Dict] = None) -> Dict[str, Any]:
+        """process_task 的实现（已处于请求作用域内）"""
         logger.info(f"Processing task: {task}")
+        # 写入对话历史的元数据不携带 trace 等运行期对象
+        history_meta = {k: v for k, v in (context or {}).items() if k != "_trace"} or None
 
         # 轻量级问题快速路径（闲聊/自我介绍/能力说明等）
         fast_result = self._maybe_fast_path(task, context)
         if fast_result is not None:
             logger.info("使用快速路径直接返回结果")
             # 写入对话历史（不使用 snapshot）
-            self.memory.add_conversation("user", task, context)
+            self.memory.add_conversation("user", task, history_meta)
             if fast_result.get("answer"):
                 self.memory.add_conversation("assistant", fast_result["answer"], {
                     "confidence": fast_result.get("confidence", 0.0),
@@ -253,12 +291,13 @@ class AgentOrchestrator:
         self.memory.create_snapshot()
         
         # 添加到对话历史
-        self.memory.add_conversation("user", task, context)
+        self.memory.add_conversation("user", task, history_meta)
 
         # 请求级缓存（适用于“同问题重复问”的业务/压测场景）
         try:
             from ..config.config_loader import get_config
             from ..utils.cache import get_cache
+            from ..utils.disk_cache import TieredCache
 
             cfg = get_config()
             perf = cfg.get_section("performance") or {}
@@ -278,7 +317,11 @@ class AgentOrchestrator:
             if cache_enabled and not skip_cache:
                 cache = get_cache()
                 cache_key = cache._generate_key("process_task", task)
-                cached_result = cache.get(cache_key)
+                # 两级缓存的 SQLite 读取不占用事件循环
+                if isinstance(cache, TieredCache):
+                    cached_result = await cache.get_async(cache_key)
+                else:
+                    cached_result = cache.get(cache_key)
                 if isinstance(cached_result, dict) and cached_result.get("answer"):
                     logger.info("命中请求级缓存，直接返回缓存答案")
                     # 添加助手回复到对话历史
@@ -301,7 +344,12 @@ class AgentOrchestrator:
             from ..observability import TraceContext, NullTraceContext
             cfg = get_config()
             obs = (cfg.get_section("observability") or {}) if cfg else {}
-            if obs.get("enabled"):
+            provided_trace = run_context.get("_trace")
+            if isinstance(provided_trace, TraceContext):
+                # 调用方（如流式接口）已提供 trace，直接复用以接收实时事件
+                if obs.get("enabled"):
+                    trace_ctx = provided_trace
+            elif obs.get("enabled"):
                 trace_ctx = TraceContext(
                     max_events=int(obs.get("max_events", 200)),
                     max_preview=int(obs.get("max_preview", 500)),
@@ -312,6 +360,18 @@ class AgentOrchestrator:
         except Exception as e:
             logger.debug(f"可观测性初始化失败（忽略）: {e}")
             run_context["_trace"] = None
+        try:
+            from ..utils.request_context import get_request_context
+            from ..observability.token_ledger import get_token_ledger
+            req_ctx = get_request_context()
+            if req_ctx is not None:
+                req_ctx.trace = run_context["_trace"]
+                if trace_ctx is not None:
+                    trace_ctx.request_id = req_ctx.request_id
+                    # token 账本随 trace 一并返回（按阶段、工具结果细分与预算动作）
+                    trace_ctx.tokens = get_token_ledger()
+        except Exception:
+            pass
 
         # 豆包策略：任务先验路由（可选）。若启用且判断为「无需调工具」则直接 LLM 回答后返回
         try:
@@ -377,6 +437,7 @@ class AgentOrchestrator:
                 try:
                     from ..config.config_loader import get_config
                     from ..utils.cache import get_cache
+                    from ..utils.disk_cache import TieredCache
                     cfg = get_config()
                     perf = cfg.get_section("performance") or {}
                     cache_enabled = bool(perf.get("cache_enabled", True))
@@ -392,7 +453,10 @@ class AgentOrchestrator:
                     if cache_enabled and not skip_cache:
                         cache = get_cache()
                         cache_key = cache._generate_key("process_task", task)
-                        cache.set(cache_key, result, ttl=cache_ttl)
+                        if isinstance(cache, TieredCache):
+                            await cache.set_async(cache_key, result, ttl=cache_ttl)
+                        else:
+                            cache.set(cache_key, result, ttl=cache_ttl)
                 except Exception as e:
                     logger.debug(f"写入请求级缓存失败（忽略）: {e}")
             
@@ -456,6 +520,27 @@ class AgentOrchestrator:
         self.memory.short_term.clear_context()
         logger.info("Memory cleared")
 
+    async def aclose(self) -> None:
+        """释放异步资源（LLM 连接池、HTML 解析进程池、MCP 连接池等），服务关闭时调用"""
+        llm = None
+        if self.multi_agent is not None:
+            llm = getattr(getattr(self.multi_agent, "execution_agent", None), "llm", None)
+        if llm is not None and hasattr(llm, "aclose"):
+            try:
+                await llm.aclose()
+            except Exception as e:
+                logger.debug(f"关闭LLM连接池失败（忽略）: {e}")
+        try:
+            from ..utils.html_parse import shutdown_html_parse_pool
+            shutdown_html_parse_pool()
+        except Exception as e:
+            logger.debug(f"关闭HTML解析进程池失败（忽略）: {e}")
+        try:
+            from ..mcps.loader import close_mcp_sessions
+            await close_mcp_sessions()
+        except Exception as e:
+            logger.debug(f"关闭MCP连接池失败（忽略）: {e}")
+
     # ---------------- 快速路径 & 自我描述 ----------------
     def _maybe_fast_path(self, task: str, context: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
         """
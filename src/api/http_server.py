@@ -3,7 +3,6 @@ HTTP服务 - Research Agent API服务
 """
 
 import asyncio
-import json
 from typing import Dict, Any, Optional
 from fastapi import FastAPI, HTTPException, Header, Request
 from fastapi.responses import JSONResponse, StreamingResponse
@@ -127,6 +126,13 @@ async def startup_event():
         logger.warning("⚠️ Agent未初始化，服务将以降级模式运行（首次请求时会重试）")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """关闭时释放Agent持有的连接池"""
+    if agent is not None and hasattr(agent, "aclose"):
+        await agent.aclose()
+
+
 @app.get("/")
 async def root():
     """根路径"""
@@ -140,9 +146,12 @@ async def root():
 @app.get("/health")
 async def health_check():
     """健康检查"""
+    from src.utils.circuit_breaker import get_health_registry
+
     return {
         "status": "healthy",
-        "agent_ready": agent is not None
+        "agent_ready": agent is not None,
+        "tools": get_health_registry().snapshot()
     }
 
 
@@ -232,45 +241,57 @@ async def predict_stream(
     authorization: Optional[str] = Header(None)
 ):
     """
-    流式返回答案（SSE格式）
+    流式返回处理进度与答案（SSE格式）
+    
+    事件随处理过程实时推送：planning（规划完成）、hop（开始某一跳）、tool_call/tool_result（工具调用）、
+    evidence（证据融合）、token（答案增量）、reset（流式生成失败，丢弃已收到的答案增量），
+    最后推送 answer（归一化后的完整答案）与 done。
     """
     if agent is None:
         raise HTTPException(status_code=503, detail="Agent未初始化")
     
+    from src.observability import TraceContext, TraceEventStream, format_sse
+    
     async def generate_stream():
         try:
-            logger.info(f"收到流式请求: {request.question}")
-            
-            # 处理问题
-            result = await agent.process_task(request.question)
+            question = validate_question(request.question, max_length=5000)
+        except ValueError as e:
+            yield format_sse("error", {"error": str(e)})
+            return
+        
+        logger.info(f"收到流式请求: {question[:100]}...")
+        obs = get_config().get_section("observability") or {}
+        trace = TraceContext(
+            max_events=int(obs.get("max_events", 200)),
+            max_preview=int(obs.get("max_preview", 500)),
+        )
+        stream = TraceEventStream(trace, max_preview=trace.max_preview)
+        try:
+            work = asyncio.wait_for(agent.process_task(question, {"_trace": trace}), timeout=300.0)
+            async for message in stream.relay(work):
+                yield message
             
+            result = stream.result or {}
             if result.get("success"):
-                raw_answer = result.get("answer", "")
-                answer = normalize_answer(raw_answer)
-                
-                # 流式返回（简单实现：分块返回）
-                chunk_size = 10
-                for i in range(0, len(answer), chunk_size):
-                    chunk = answer[i:i+chunk_size]
-                    yield f"data: {json.dumps({'answer': chunk})}\n\n"
-                    await asyncio.sleep(0.1)
-                
-                # 发送最终完整答案
-                yield f"data: {json.dumps({'answer': answer})}\n\n"
+                answer = normalize_answer(result.get("answer", "") or "")
+                yield format_sse("answer", {"answer": answer})
             else:
-                error_msg = result.get("error", "处理失败")
-                yield f"data: {json.dumps({'error': error_msg})}\n\n"
-        
+                yield format_sse("error", {"error": result.get("error", "处理失败")})
+        except asyncio.TimeoutError:
+            logger.error("流式处理超时")
+            yield format_sse("error", {"error": "处理超时，请稍后重试"})
         except Exception as e:
             logger.error(f"流式处理失败: {e}")
-            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+            yield format_sse("error", {"error": str(e)})
+        yield format_sse("done", {"request_id": trace.request_id})
     
     return StreamingResponse(
         generate_stream(),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
-            "Connection": "keep-alive"
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no"
         }
     )
 
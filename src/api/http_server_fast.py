@@ -95,6 +95,13 @@ async def _ensure_agent_initialized():
         _agent_initializing = False
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """关闭时释放Agent持有的连接池"""
+    if agent is not None and hasattr(agent, "aclose"):
+        await agent.aclose()
+
+
 @app.get("/")
 async def root():
     """根路径"""
@@ -109,6 +116,7 @@ async def root():
 async def health_check():
     """健康检查 - 增强版，包含详细指标"""
     from src.utils.metrics import get_metrics
+    from src.utils.circuit_breaker import get_health_registry
     
     try:
         # 检查Agent是否已初始化
@@ -123,6 +131,7 @@ async def health_check():
             "agent_status": agent_status,
             "agent_initializing": _agent_initializing,
             "timestamp": datetime.now().isoformat(),
+            "tools": get_health_registry().snapshot(),
             "metrics": {
                 "uptime": summary["uptime_formatted"],
                 "requests": {
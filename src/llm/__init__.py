@@ -7,7 +7,8 @@ from .model_provider import (
     BaseModelProvider,
     APIModelProvider,
     LocalModelProvider,
-    ModelProviderFactory
+    ModelProviderFactory,
+    ChatStream
 )
 
 __all__ = [
@@ -15,5 +16,6 @@ __all__ = [
     'BaseModelProvider',
     'APIModelProvider',
     'LocalModelProvider',
-    'ModelProviderFactory'
+    'ModelProviderFactory',
+    'ChatStream'
 ]
@@ -5,10 +5,10 @@ LLM客户端 - 封装LLM调用（支持API云上模型和本地部署模型）
 import os
 import json
 import asyncio
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterator, List, Optional
 from loguru import logger
 
-from .model_provider import ModelProviderFactory, BaseModelProvider, LocalModelProvider
+from .model_provider import ModelProviderFactory, BaseModelProvider, LocalModelProvider, APIModelProvider, ChatStream
 
 
 class LLMClient:
@@ -68,6 +68,10 @@ class LLMClient:
             ),
             "timeout": config.get("timeout", 60)
         }
+        # 连接池配置（API提供者使用；未配置时由提供者使用默认值）
+        for key in ("max_connections", "max_connections_per_host", "keepalive_timeout", "connect_timeout"):
+            if config.get(key) is not None:
+                provider_config[key] = config.get(key)
         
         # 根据提供者类型添加特定配置
         if provider_type in ["api", "openai", "custom", "cloud"]:
@@ -186,19 +190,81 @@ class LLMClient:
             logger.exception(f"generate方法执行失败: {e}")
             raise
     
-    async def generate_async(self, prompt: str, system_prompt: str = None) -> str:
+    async def chat_async(self,
+                         messages: List[Dict[str, str]],
+                         temperature: Optional[float] = None,
+                         max_tokens: Optional[int] = None,
+                         timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        发送聊天请求（异步版本，API提供者使用连接池且不占用线程）
+        
+        Args:
+            messages: 消息列表
+            temperature: 温度参数（可选）
+            max_tokens: 最大token数（可选）
+            timeout: 本次调用的截止时间（秒，可选）
+        
+        Returns:
+            API响应
+        """
+        return await self.provider.chat_async(messages, temperature, max_tokens, timeout=timeout)
+    
+    async def generate_async(self, prompt: str, system_prompt: str = None, timeout: Optional[float] = None) -> str:
         """
         生成文本（异步版本）
         
         Args:
             prompt: 用户提示词
             system_prompt: 系统提示词（可选）
+            timeout: 本次调用的截止时间（秒，可选；仅API提供者生效）
         
         Returns:
             生成的文本
         """
+        if timeout is not None and isinstance(self.provider, APIModelProvider):
+            return await self.provider.generate_async(prompt, system_prompt, timeout=timeout)
         return await self.provider.generate_async(prompt, system_prompt)
     
+    def chat_stream_async(self,
+                          messages: List[Dict[str, str]],
+                          temperature: Optional[float] = None,
+                          max_tokens: Optional[int] = None,
+                          timeout: Optional[float] = None) -> ChatStream:
+        """
+        流式聊天：返回 ChatStream，异步迭代得到增量文本，结束后可读取 content/usage
+        
+        Args:
+            messages: 消息列表
+            temperature: 温度参数（可选）
+            max_tokens: 最大token数（可选）
+            timeout: 整个流的截止时间（秒，可选）
+        """
+        return self.provider.chat_stream_async(messages, temperature, max_tokens, timeout=timeout)
+    
+    async def generate_stream(self, prompt: str, system_prompt: str = None,
+                              timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """
+        生成文本（流式）：首个 token 到达即开始产出增量文本
+        
+        Args:
+            prompt: 用户提示词
+            system_prompt: 系统提示词（可选）
+            timeout: 整个流的截止时间（秒，可选）
+        
+        Yields:
+            增量文本
+        """
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        async for delta in self.chat_stream_async(messages, timeout=timeout):
+            yield delta
+    
+    async def aclose(self) -> None:
+        """释放提供者持有的异步连接池"""
+        await self.provider.aclose()
+    
     def generate_with_tools(self, 
                            prompt: str,
                            tools: List[Dict[str, Any]] = None,
@@ -2,12 +2,115 @@
 模型提供者抽象层 - 支持API云上模型和本地部署模型
 """
 
+import asyncio
 import json
 import time
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterator, Callable, Iterable, List, Optional, Tuple
 from loguru import logger
 
+# 异步 HTTP 客户端（可选）：可用时 chat_async/generate_async 走原生 asyncio 连接池，不占用线程
+from ..utils.optional_imports import load_aiohttp
+
+# SSE 流结束标记（[DONE]）
+_SENTINEL = object()
+
+
+def _parse_sse_line(line: Any) -> Optional[Any]:
+    """
+    解析一行 SSE/分块响应。
+
+    Returns:
+        解析出的 JSON 对象；遇到 [DONE] 返回 _SENTINEL；空行/注释/无法解析的行返回 None
+    """
+    if isinstance(line, (bytes, bytearray)):
+        line = line.decode("utf-8", errors="ignore")
+    line = (line or "").strip()
+    if not line or line.startswith(":"):
+        return None
+    if line.startswith("data:"):
+        line = line[5:].strip()
+    elif line.startswith(("event:", "id:", "retry:")):
+        return None
+    if line == "[DONE]":
+        return _SENTINEL
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError:
+        return None
+
+
+def _decode_stream_chunk(payload: Any) -> Tuple[str, Optional[Dict[str, Any]], Optional[str]]:
+    """从一个流式分片中提取 (增量文本, usage, finish_reason)，兼容代理的 {"body": {...}} 包装"""
+    if not isinstance(payload, dict):
+        return "", None, None
+    if isinstance(payload.get("body"), dict):
+        payload = payload["body"]
+    delta_text = ""
+    finish_reason = None
+    choices = payload.get("choices")
+    if isinstance(choices, list) and choices:
+        choice = choices[0] or {}
+        delta = choice.get("delta") or choice.get("message") or {}
+        delta_text = delta.get("content") or ""
+        finish_reason = choice.get("finish_reason")
+    usage = payload.get("usage") if isinstance(payload.get("usage"), dict) else None
+    return delta_text, usage, finish_reason
+
+
+async def _empty_source(_stream: "ChatStream") -> AsyncIterator[str]:
+    return
+    yield
+
+
+class ChatStream:
+    """
+    流式聊天结果：异步迭代得到增量文本；迭代结束后可读取完整内容、usage 与 finish_reason。
+
+    用法:
+        stream = provider.chat_stream_async(messages)
+        async for delta in stream:
+            ...
+        stream.content, stream.usage
+
+    on_complete 在流正常结束后以 stream 为参数回调一次（用于记录 token 用量）。
+    """
+
+    def __init__(self,
+                 source: Callable[["ChatStream"], AsyncIterator[str]],
+                 on_complete: Optional[Callable[["ChatStream"], None]] = None):
+        self._source = source
+        self.on_complete = on_complete
+        self.content = ""
+        self.usage: Optional[Dict[str, Any]] = None
+        self.finish_reason: Optional[str] = None
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        async for delta in self._source(self):
+            if delta:
+                self.content += delta
+                yield delta
+        if self.on_complete is not None:
+            self.on_complete(self)
+
+    @classmethod
+    def empty(cls) -> "ChatStream":
+        """不产生任何增量的流（用于同步解码时复用 feed 累积 usage / finish_reason）"""
+        return cls(_empty_source)
+
+    def feed(self, payloads: Iterable[Any]) -> List[str]:
+        """处理一批已解析的分片，返回其中的增量文本（供同步/异步解码共用）"""
+        deltas = []
+        for payload in payloads:
+            delta, usage, finish_reason = _decode_stream_chunk(payload)
+            if usage:
+                self.usage = usage
+            if finish_reason:
+                self.finish_reason = finish_reason
+            if delta:
+                deltas.append(delta)
+        return deltas
+
 
 class BaseModelProvider(ABC):
     """模型提供者基类"""
@@ -45,6 +148,43 @@ class BaseModelProvider(ABC):
         """
         pass
     
+    async def chat_async(self,
+                         messages: List[Dict[str, str]],
+                         temperature: Optional[float] = None,
+                         max_tokens: Optional[int] = None,
+                         timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        发送聊天请求（异步版本）。默认在线程池中执行同步 chat，子类可提供原生异步实现。
+        
+        Args:
+            messages: 消息列表
+            temperature: 温度参数
+            max_tokens: 最大token数
+            timeout: 本次调用的截止时间（秒），默认使用配置的 timeout
+        
+        Returns:
+            API响应
+        """
+        return await asyncio.to_thread(self.chat, messages, temperature, max_tokens)
+    
+    def chat_stream_async(self,
+                          messages: List[Dict[str, str]],
+                          temperature: Optional[float] = None,
+                          max_tokens: Optional[int] = None,
+                          timeout: Optional[float] = None) -> ChatStream:
+        """
+        流式聊天（异步迭代增量文本）。默认实现不支持流式，完整结果作为一次增量返回。
+        """
+        async def _source(stream: ChatStream) -> AsyncIterator[str]:
+            response = await self.chat_async(messages, temperature, max_tokens, timeout=timeout)
+            for delta in stream.feed([response]):
+                yield delta
+        return ChatStream(_source)
+    
+    async def aclose(self) -> None:
+        """释放异步资源（连接池等），默认无操作"""
+        return None
+    
     @abstractmethod
     def generate(self, prompt: str, system_prompt: str = None) -> str:
         """
@@ -94,55 +234,103 @@ class APIModelProvider(BaseModelProvider):
         if not (self.model_name or "").strip():
             raise ValueError("APIModelProvider requires model.model_name (or env LLM_MODEL)")
         
+        # 连接池配置：同一 provider 的所有调用复用 keep-alive 连接，避免每次调用重新握手
+        self.max_connections = int(config.get("max_connections", 100))
+        self.max_connections_per_host = int(config.get("max_connections_per_host", 20))
+        self.keepalive_timeout = float(config.get("keepalive_timeout", 30))
+        self.connect_timeout = float(config.get("connect_timeout", 10))
+        
         # 确保requests可用
         try:
             import requests
+            from requests.adapters import HTTPAdapter
             self.requests = requests
-            REQUESTS_AVAILABLE = True
+            self._session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=4,
+                pool_maxsize=self.max_connections_per_host,
+            )
+            self._session.mount("http://", adapter)
+            self._session.mount("https://", adapter)
         except ImportError:
-            REQUESTS_AVAILABLE = False
+            self._session = None
             logger.error("requests库未安装，API模型提供者将无法工作")
         
+        # aiohttp 会话绑定事件循环，首次异步调用时按当前循环懒创建
+        self._async_session = None
+        self._async_session_loop = None
+        
+        # 出站调用管控：同一 LLM 服务共享并发/速率预算
+        from urllib.parse import urlsplit
+        self.governor_key = f"llm:{urlsplit(self.api_base).hostname or 'default'}"
+        
+        # 录制/回放：尽早加载，使 requests 挂钩在工具发出首个请求前生效
+        from ..utils.cassette import get_cassette
+        get_cassette()
+        
         logger.info(f"APIModelProvider initialized: model={self.model_name}, api_base={self.api_base[:50]}...")
     
+    def _cassette_request(self,
+                          messages: List[Dict[str, str]],
+                          temperature: Optional[float],
+                          max_tokens: Optional[int]) -> Dict[str, Any]:
+        """录制/回放的请求键：模型、消息与采样参数（与是否流式、服务地址无关）"""
+        payload = self._build_payload(messages, temperature, max_tokens, False)
+        payload.pop("stream", None)
+        return payload
+    
     def chat(self, 
              messages: List[Dict[str, str]],
              temperature: Optional[float] = None,
              max_tokens: Optional[int] = None,
              stream: bool = False) -> Dict[str, Any]:
-        """发送聊天请求（同步）"""
+        """
+        发送聊天请求（同步）；开启录制/回放（performance.cassette）时经 cassette。
+        响应中的 usage 记入当前请求的 token 账本（回放的调用同样计入）。
+        """
+        from ..utils.cassette import get_cassette
+        from ..observability.token_ledger import record_llm_response
+        cassette = get_cassette()
+        if cassette is not None:
+            response = cassette.call_sync(
+                "llm",
+                self._cassette_request(messages, temperature, max_tokens),
+                lambda: self._chat_live(messages, temperature, max_tokens, stream),
+            )
+        else:
+            response = self._chat_live(messages, temperature, max_tokens, stream)
+        record_llm_response(messages, response)
+        return response
+    
+    def _chat_live(self,
+                   messages: List[Dict[str, str]],
+                   temperature: Optional[float],
+                   max_tokens: Optional[int],
+                   stream: bool) -> Dict[str, Any]:
         if not hasattr(self, 'requests'):
             raise Exception("requests库不可用，请安装requests库")
         
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
-        if stream:
-            headers["Accept"] = "text/event-stream"
-        
-        data = {
-            "model": self.model_name,
-            "messages": messages,
-            "temperature": temperature if temperature is not None else self.temperature,
-            "max_tokens": max_tokens if max_tokens is not None else self.max_tokens,
-            "stream": stream
-        }
+        headers = self._build_headers(stream)
+        data = self._build_payload(messages, temperature, max_tokens, stream)
         
         # 记录性能指标
         from ..utils.metrics import get_metrics
+        from ..utils.governor import get_governor, retry_after_seconds
+        governor = get_governor()
         start_time = time.time()
         
         try:
             logger.info(f"发送LLM API请求: {self.api_base}, model: {self.model_name}")
-            response = self.requests.post(
-                self.api_base,
-                headers=headers,
-                json=data,
-                timeout=self.timeout,
-                stream=stream
-            )
+            with governor.limit_sync(self.governor_key):
+                response = self._session.post(
+                    self.api_base,
+                    headers=headers,
+                    json=data,
+                    timeout=self.timeout,
+                    stream=stream
+                )
+            if response.status_code == 429:
+                governor.penalize(self.governor_key, retry_after_seconds(response.headers))
             duration = time.time() - start_time
             get_metrics().record_performance("llm_api_call", duration)
             
@@ -155,14 +343,7 @@ class APIModelProvider(BaseModelProvider):
                 result = response.json()
                 logger.info(f"解析JSON响应成功，包含keys: {list(result.keys()) if isinstance(result, dict) else 'N/A'}")
                 
-                if not isinstance(result, dict):
-                    raise Exception(f"LLM响应格式错误: 期望dict，得到{type(result)}")
-                
-                # 兼容某些代理把OpenAI响应包在 body 里：{"status":"200","body":{...choices...}}
-                if "body" in result and isinstance(result.get("body"), dict):
-                    return result["body"]
-                
-                return result
+                return self._unwrap_response(result)
                 
         except self.requests.exceptions.Timeout:
             duration = time.time() - start_time
@@ -195,16 +376,173 @@ class APIModelProvider(BaseModelProvider):
             logger.error(f"LLM响应JSON解析失败: {e}")
             raise Exception(f"LLM响应格式错误: JSON解析失败")
     
-    def _handle_stream_response(self, response):
-        """处理流式响应"""
-        # TODO: 实现流式响应处理
-        return {"error": "流式响应暂未实现"}
+    def _handle_stream_response(self, response) -> Dict[str, Any]:
+        """
+        处理流式响应（同步）：逐行解码 SSE 分片并拼接，返回与非流式一致的 OpenAI 格式结果（含 usage）。
+        需要边收边处理增量时使用 chat_stream_async。
+        """
+        stream = ChatStream.empty()
+        content_parts: List[str] = []
+        try:
+            # 按字节读取后统一以 UTF-8 解码：SSE 响应常不带 charset，requests 会误按 ISO-8859-1 解码
+            for line in response.iter_lines():
+                payload = _parse_sse_line(line)
+                if payload is _SENTINEL:
+                    break
+                if payload is None:
+                    continue
+                content_parts.extend(stream.feed([payload]))
+        finally:
+            response.close()
+        result: Dict[str, Any] = {
+            "choices": [{
+                "message": {"role": "assistant", "content": "".join(content_parts)},
+                "finish_reason": stream.finish_reason or "stop",
+            }]
+        }
+        if stream.usage:
+            result["usage"] = stream.usage
+        return result
+    
+    def _build_headers(self, stream: bool = False) -> Dict[str, str]:
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        if stream:
+            headers["Accept"] = "text/event-stream"
+        return headers
+    
+    def _build_payload(self,
+                       messages: List[Dict[str, str]],
+                       temperature: Optional[float],
+                       max_tokens: Optional[int],
+                       stream: bool) -> Dict[str, Any]:
+        return {
+            "model": self.model_name,
+            "messages": messages,
+            "temperature": temperature if temperature is not None else self.temperature,
+            "max_tokens": max_tokens if max_tokens is not None else self.max_tokens,
+            "stream": stream
+        }
+    
+    @staticmethod
+    def _unwrap_response(result: Any) -> Dict[str, Any]:
+        """校验响应类型，并展开代理包装：{"status":"200","body":{...choices...}}"""
+        if not isinstance(result, dict):
+            raise Exception(f"LLM响应格式错误: 期望dict，得到{type(result)}")
+        if "body" in result and isinstance(result.get("body"), dict):
+            return result["body"]
+        return result
+    
+    def _get_async_session(self):
+        """获取（或为当前事件循环创建）带连接池的 aiohttp 会话"""
+        loop = asyncio.get_running_loop()
+        session = self._async_session
+        if session is not None and not session.closed and self._async_session_loop is loop:
+            return session
+        aiohttp = load_aiohttp()
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            limit_per_host=self.max_connections_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=300,
+        )
+        self._async_session = aiohttp.ClientSession(connector=connector)
+        self._async_session_loop = loop
+        logger.debug(
+            f"创建LLM异步连接池: limit={self.max_connections}, "
+            f"limit_per_host={self.max_connections_per_host}, keepalive={self.keepalive_timeout}s"
+        )
+        return self._async_session
+    
+    async def aclose(self) -> None:
+        """关闭异步连接池（需在创建它的事件循环中调用）"""
+        session = self._async_session
+        self._async_session = None
+        self._async_session_loop = None
+        if session is not None and not session.closed:
+            await session.close()
+    
+    async def chat_async(self,
+                         messages: List[Dict[str, str]],
+                         temperature: Optional[float] = None,
+                         max_tokens: Optional[int] = None,
+                         timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        发送聊天请求（原生异步）：复用 keep-alive 连接池，等待网络时不占用线程。
+        aiohttp 不可用时回退到线程池中的同步 chat。
+        """
+        if load_aiohttp() is None:
+            return await asyncio.to_thread(self.chat, messages, temperature, max_tokens)
+        from ..utils.cassette import get_cassette
+        from ..observability.token_ledger import record_llm_response
+        cassette = get_cassette()
+        if cassette is not None:
+            response = await cassette.call_async(
+                "llm",
+                self._cassette_request(messages, temperature, max_tokens),
+                lambda: self._chat_async_live(messages, temperature, max_tokens, timeout),
+            )
+        else:
+            response = await self._chat_async_live(messages, temperature, max_tokens, timeout)
+        record_llm_response(messages, response)
+        return response
+    
+    async def _chat_async_live(self,
+                               messages: List[Dict[str, str]],
+                               temperature: Optional[float],
+                               max_tokens: Optional[int],
+                               timeout: Optional[float]) -> Dict[str, Any]:
+        from ..utils.metrics import get_metrics
+        from ..utils.governor import get_governor, retry_after_seconds
+        aiohttp = load_aiohttp()
+        governor = get_governor()
+        headers = self._build_headers(False)
+        data = self._build_payload(messages, temperature, max_tokens, False)
+        deadline = float(timeout if timeout is not None else self.timeout)
+        client_timeout = aiohttp.ClientTimeout(total=deadline, connect=min(self.connect_timeout, deadline))
+        start_time = time.time()
+        
+        try:
+            logger.info(f"发送LLM API异步请求: {self.api_base}, model: {self.model_name}")
+            session = self._get_async_session()
+            async with governor.limit(self.governor_key), \
+                    session.post(self.api_base, headers=headers, json=data, timeout=client_timeout) as response:
+                text = await response.text()
+                get_metrics().record_performance("llm_api_call", time.time() - start_time)
+                logger.info(f"收到LLM API响应，状态码: {response.status}")
+                if response.status == 429:
+                    governor.penalize(self.governor_key, retry_after_seconds(response.headers))
+                if response.status >= 400:
+                    get_metrics().record_error(f"HTTPError_{response.status}", text[:200])
+                    logger.error(f"LLM API HTTP错误: {response.status} - {text}")
+                    raise Exception(f"LLM API HTTP错误: {response.status}")
+            try:
+                result = json.loads(text)
+            except json.JSONDecodeError as e:
+                get_metrics().record_error("JSONDecodeError", str(e))
+                logger.error(f"LLM响应JSON解析失败: {e}")
+                raise Exception("LLM响应格式错误: JSON解析失败")
+            return self._unwrap_response(result)
+        except asyncio.TimeoutError:
+            get_metrics().record_performance("llm_api_call", time.time() - start_time)
+            get_metrics().record_error("TimeoutError", "LLM API调用超时")
+            logger.error(f"LLM API调用超时（deadline={deadline}s）")
+            raise Exception("LLM API调用超时，请稍后重试")
+        except aiohttp.ClientConnectionError as e:
+            get_metrics().record_performance("llm_api_call", time.time() - start_time)
+            get_metrics().record_error("ConnectionError", str(e))
+            logger.error(f"LLM API连接失败: {e}")
+            raise Exception(f"无法连接到LLM服务: {str(e)}")
+        except aiohttp.ClientError as e:
+            get_metrics().record_performance("llm_api_call", time.time() - start_time)
+            get_metrics().record_error("RequestException", str(e))
+            logger.error(f"LLM API调用失败: {e}")
+            raise Exception(f"LLM API调用失败: {str(e)}")
     
     def generate(self, prompt: str, system_prompt: str = None) -> str:
         """生成文本（同步）"""
-        import json
-        from ..utils.retry import RetryableError, NonRetryableError
-        
         messages = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
@@ -213,6 +551,124 @@ class APIModelProvider(BaseModelProvider):
         logger.info(f"调用LLM chat方法，消息数量: {len(messages)}")
         response = self.chat(messages)
         logger.info(f"LLM chat返回，响应类型: {type(response)}")
+        return self._extract_content(response)
+    
+    def chat_stream_async(self,
+                          messages: List[Dict[str, str]],
+                          temperature: Optional[float] = None,
+                          max_tokens: Optional[int] = None,
+                          timeout: Optional[float] = None) -> ChatStream:
+        """
+        流式聊天（原生异步）：按 SSE 分片实时产出增量文本，处理 [DONE] 与 body 包装，累计 usage。
+        aiohttp 不可用时回退为一次性返回完整结果。
+        """
+        if load_aiohttp() is None:
+            return super().chat_stream_async(messages, temperature, max_tokens, timeout=timeout)
+        from ..utils.cassette import get_cassette
+        from ..observability.token_ledger import record_llm_usage
+        cassette = get_cassette()
+        if cassette is not None:
+            stream = self._cassette_stream(cassette, messages, temperature, max_tokens, timeout)
+        else:
+            stream = self._chat_stream_live(messages, temperature, max_tokens, timeout)
+        stream.on_complete = lambda s: record_llm_usage(messages, s.usage, s.content)
+        return stream
+    
+    def _cassette_stream(self,
+                         cassette: Any,
+                         messages: List[Dict[str, str]],
+                         temperature: Optional[float],
+                         max_tokens: Optional[int],
+                         timeout: Optional[float]) -> ChatStream:
+        """流式聊天的录制/回放：回放时一次性产出录制的完整回答，录制时在流结束后保存拼接结果"""
+        request = self._cassette_request(messages, temperature, max_tokens)
+        
+        async def _source(stream: ChatStream) -> AsyncIterator[str]:
+            interaction = await cassette.replay_async("llm", request)
+            if interaction is not None:
+                for delta in stream.feed([interaction.response]):
+                    yield delta
+                return
+            live = self._chat_stream_live(messages, temperature, max_tokens, timeout)
+            start = time.perf_counter()
+            async for delta in live:
+                yield delta
+            stream.usage, stream.finish_reason = live.usage, live.finish_reason
+            result: Dict[str, Any] = {
+                "choices": [{
+                    "message": {"role": "assistant", "content": live.content},
+                    "finish_reason": live.finish_reason or "stop",
+                }]
+            }
+            if live.usage:
+                result["usage"] = live.usage
+            cassette.record("llm", request, result, (time.perf_counter() - start) * 1000)
+        
+        return ChatStream(_source)
+    
+    def _chat_stream_live(self,
+                          messages: List[Dict[str, str]],
+                          temperature: Optional[float],
+                          max_tokens: Optional[int],
+                          timeout: Optional[float]) -> ChatStream:
+        async def _source(stream: ChatStream) -> AsyncIterator[str]:
+            from ..utils.metrics import get_metrics
+            from ..utils.governor import get_governor, retry_after_seconds
+            aiohttp = load_aiohttp()
+            governor = get_governor()
+            headers = self._build_headers(True)
+            data = self._build_payload(messages, temperature, max_tokens, True)
+            # 兼容支持 stream_options 的服务端：在最后一个分片返回 usage
+            data["stream_options"] = {"include_usage": True}
+            deadline = float(timeout if timeout is not None else self.timeout)
+            client_timeout = aiohttp.ClientTimeout(total=deadline, connect=min(self.connect_timeout, deadline))
+            start_time = time.time()
+            first_token = True
+            try:
+                session = self._get_async_session()
+                async with governor.limit(self.governor_key), \
+                        session.post(self.api_base, headers=headers, json=data, timeout=client_timeout) as response:
+                    if response.status >= 400:
+                        if response.status == 429:
+                            governor.penalize(self.governor_key, retry_after_seconds(response.headers))
+                        text = await response.text()
+                        get_metrics().record_error(f"HTTPError_{response.status}", text[:200])
+                        logger.error(f"LLM API HTTP错误: {response.status} - {text}")
+                        raise Exception(f"LLM API HTTP错误: {response.status}")
+                    content_type = response.headers.get("Content-Type", "")
+                    if "text/event-stream" not in content_type and "ndjson" not in content_type:
+                        # 服务端忽略了 stream 参数，按普通 JSON 响应处理
+                        result = self._unwrap_response(json.loads(await response.text()))
+                        for delta in stream.feed([result]):
+                            yield delta
+                        return
+                    async for raw_line in response.content:
+                        payload = _parse_sse_line(raw_line)
+                        if payload is _SENTINEL:
+                            break
+                        if payload is None:
+                            continue
+                        for delta in stream.feed([payload]):
+                            if first_token:
+                                first_token = False
+                                get_metrics().record_performance("llm_first_token", time.time() - start_time)
+                            yield delta
+            except asyncio.TimeoutError:
+                get_metrics().record_error("TimeoutError", "LLM API流式调用超时")
+                logger.error(f"LLM API流式调用超时（deadline={deadline}s）")
+                raise Exception("LLM API调用超时，请稍后重试")
+            except aiohttp.ClientError as e:
+                get_metrics().record_error("RequestException", str(e))
+                logger.error(f"LLM API流式调用失败: {e}")
+                raise Exception(f"LLM API调用失败: {str(e)}")
+            finally:
+                get_metrics().record_performance("llm_api_call", time.time() - start_time)
+        
+        return ChatStream(_source)
+    
+    def _extract_content(self, response: Any) -> str:
+        """从 chat 响应中提取回复内容；网关错误格式转换为可重试/不可重试异常"""
+        from ..utils.retry import RetryableError, NonRetryableError
         
         # 提取回复内容（兼容OpenAI格式）
         if isinstance(response, dict) and "choices" in response and isinstance(response["choices"], list) and len(response["choices"]) > 0:
@@ -247,21 +703,25 @@ class APIModelProvider(BaseModelProvider):
         logger.error(f"LLM响应格式错误，缺少choices字段: {response}")
         raise Exception(f"LLM响应格式错误: {response}")
     
-    async def generate_async(self, prompt: str, system_prompt: str = None) -> str:
-        """生成文本（异步版本）"""
-        import asyncio
-        from ..utils.retry import retry_with_backoff, RetryableError, NonRetryableError
+    async def generate_async(self, prompt: str, system_prompt: str = None, timeout: Optional[float] = None) -> str:
+        """生成文本（异步版本）：aiohttp 可用时走原生异步连接池，timeout 为单次调用的截止时间"""
+        from ..utils.retry import retry_with_backoff, RetryableError
+        
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
         
-        loop = asyncio.get_event_loop()
         try:
-            async def _call_in_thread():
-                if hasattr(asyncio, 'to_thread'):
+            async def _call():
+                if load_aiohttp() is None:
                     return await asyncio.to_thread(self.generate, prompt, system_prompt)
-                return await loop.run_in_executor(None, lambda: self.generate(prompt, system_prompt))
+                response = await self.chat_async(messages, timeout=timeout)
+                return self._extract_content(response)
             
             # 对可重试错误自动重试（尤其是限流/临时网关错误）
             return await retry_with_backoff(
-                _call_in_thread,
+                _call,
                 max_retries=2,
                 initial_delay=1.0,
                 max_delay=8.0,
@@ -381,7 +841,7 @@ class LocalModelProvider(BaseModelProvider):
         response_text = generated_text[len(prompt):].strip()
         
         # 返回OpenAI兼容格式
-        return {
+        response = {
             "choices": [{
                 "message": {
                     "role": "assistant",
@@ -395,6 +855,9 @@ class LocalModelProvider(BaseModelProvider):
                 "total_tokens": len(outputs[0])
             }
         }
+        from ..observability.token_ledger import record_llm_response
+        record_llm_response(messages, response)
+        return response
     
     def _format_messages(self, messages: List[Dict[str, str]]) -> str:
         """格式化消息为提示词"""
@@ -7,55 +7,371 @@ For this demo we support a simple "http_json" MCP tool definition:
   "type": "http_json",
   "url": "http://host/path",
   "method": "POST",
-  "timeout": 10
+  "timeout": 10,
+  "max_batch_size": 8,          # optional: endpoint accepts {"inputs": [...]} -> {"results": [...]}
+  "max_response_bytes": 8388608 # optional
 }
 """
 
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 from pathlib import Path
+import asyncio
 import json
+import threading
 from loguru import logger
 
+# 异步 HTTP 客户端（可选）：可用时 MCP 调用走原生 asyncio 连接池；否则在线程中使用 requests.Session。
+# 首次调用时才导入（导入较慢），避免拖慢工具注册
+from src.utils.optional_imports import load_aiohttp
+
+
+# 响应大小限制
+DEFAULT_MAX_RESPONSE_BYTES = 8 * 1024 * 1024
+DEFAULT_MAX_LINE_BYTES = 1024 * 1024
+DEFAULT_MAX_ITEMS = 1000
+# 端点通过该响应头声明支持的批量大小
+BATCH_HEADER = "X-MCP-Max-Batch"
+_NDJSON_TYPES = ("application/x-ndjson", "application/jsonl", "application/json-seq", "application/stream+json")
+
+
+class McpResponseTooLarge(Exception):
+    """MCP 响应超过大小限制"""
+
+
+def _decode_body(status: int, text: str) -> Any:
+    """解码响应正文：2xx 按 JSON 解码，非 JSON 或错误状态时返回原文本"""
+    if status >= 400:
+        return text
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+# ---------------- 连接池 ----------------
+
+_session_lock = threading.Lock()
+_async_sessions: Dict[int, Tuple[asyncio.AbstractEventLoop, Any]] = {}
+_sync_session: Any = None
+
+
+def _get_async_session() -> Any:
+    """获取（或为当前事件循环创建）所有 MCP 工具共享的 aiohttp 会话（keep-alive 连接池）"""
+    loop = asyncio.get_running_loop()
+    entry = _async_sessions.get(id(loop))
+    if entry is not None and entry[0] is loop and not entry[1].closed:
+        return entry[1]
+    cfg: Dict[str, Any] = {}
+    try:
+        from src.config.config_loader import get_config
+        cfg = get_config().get("mcps.http", {}) or {}
+    except Exception:
+        pass
+    aiohttp = load_aiohttp()
+    connector = aiohttp.TCPConnector(
+        limit=int(cfg.get("max_connections", 50)),
+        limit_per_host=int(cfg.get("max_connections_per_host", 10)),
+        keepalive_timeout=float(cfg.get("keepalive_timeout", 30)),
+    )
+    session = aiohttp.ClientSession(connector=connector)
+    with _session_lock:
+        # 清理已关闭事件循环的会话记录
+        for key in [k for k, (lp, _) in _async_sessions.items() if lp.is_closed()]:
+            _async_sessions.pop(key, None)
+        _async_sessions[id(loop)] = (loop, session)
+    return session
+
+
+def _get_sync_session() -> Any:
+    """aiohttp 不可用时使用的共享 requests.Session（线程安全地懒创建）"""
+    global _sync_session
+    if _sync_session is None:
+        with _session_lock:
+            if _sync_session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=8, pool_maxsize=20)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _sync_session = session
+    return _sync_session
+
+
+async def close_mcp_sessions() -> None:
+    """关闭当前事件循环上的 MCP 连接池及 MCP 协议会话（服务关闭时调用）"""
+    global _sync_session
+    loop = asyncio.get_running_loop()
+    with _session_lock:
+        entry = _async_sessions.pop(id(loop), None)
+        sync_session, _sync_session = _sync_session, None
+    if entry is not None and not entry[1].closed:
+        await entry[1].close()
+    if sync_session is not None:
+        sync_session.close()
+    from .session import shutdown_mcp_session_manager
+    await asyncio.to_thread(shutdown_mcp_session_manager)
+
+
+# ---------------- 响应解码 ----------------
+
+def decode_ndjson(lines: Any, max_line_bytes: int = DEFAULT_MAX_LINE_BYTES, max_items: int = DEFAULT_MAX_ITEMS) -> List[Any]:
+    """逐行解码 JSON Lines；单行或条目数超限时抛出 McpResponseTooLarge"""
+    items: List[Any] = []
+    for raw in lines:
+        if len(raw) > max_line_bytes:
+            raise McpResponseTooLarge(f"json line exceeds {max_line_bytes} bytes")
+        line = (raw.decode("utf-8", errors="replace") if isinstance(raw, (bytes, bytearray)) else str(raw)).strip()
+        line = line.lstrip("\x1e")  # application/json-seq 记录分隔符
+        if not line:
+            continue
+        items.append(json.loads(line))
+        if len(items) > max_items:
+            raise McpResponseTooLarge(f"more than {max_items} json items")
+    return items
+
 
 class HttpJsonMcpTool:
-    """A lightweight MCP tool wrapper calling an HTTP JSON endpoint."""
+    """
+    A lightweight MCP tool wrapper calling an HTTP JSON endpoint.
 
-    def __init__(self, name: str, description: str, url: str, method: str = "POST", timeout: int = 10):
+    - 非阻塞：aiohttp 连接池（keep-alive）；未安装 aiohttp 时在线程中使用共享 requests.Session
+    - 响应按块读取并限制总大小；JSON Lines 响应逐行增量解码（限制单行大小与条目数）
+    - 批量：端点声明支持（配置 max_batch_size 或响应头 X-MCP-Max-Batch）时，
+      batch_window 内的并发调用合并为一次 POST {"inputs": [...]}，期望返回 {"results": [...]}
+    """
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        url: str,
+        method: str = "POST",
+        timeout: int = 10,
+        max_batch_size: int = 1,
+        batch_window: float = 0.01,
+        max_response_bytes: int = DEFAULT_MAX_RESPONSE_BYTES,
+        max_line_bytes: int = DEFAULT_MAX_LINE_BYTES,
+        max_items: int = DEFAULT_MAX_ITEMS,
+    ):
         self.name = name
         self.description = description
         self.url = url
         self.method = method.upper()
         self.timeout = timeout
+        self.max_batch_size = max(1, int(max_batch_size or 1))
+        self.batch_window = max(0.0, float(batch_window))
+        self.max_response_bytes = int(max_response_bytes)
+        self.max_line_bytes = int(max_line_bytes)
+        self.max_items = int(max_items)
+        # 出站调用管控：每个 MCP 端点单独计预算
+        self.governor_key = f"mcp:{name}"
+        # 批量收集：[(input, future)]，按事件循环区分
+        self._pending: List[Tuple[Any, "asyncio.Future"]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._pending_loop: Optional[asyncio.AbstractEventLoop] = None
+        # 在途的批量发送任务（保持引用，避免被回收）
+        self._batch_tasks: Set["asyncio.Future"] = set()
 
         try:
             import requests
             self._requests = requests
         except Exception as e:
             self._requests = None
-            logger.warning(f"requests not available for MCP tool {name}: {e}")
+            if load_aiohttp() is None:
+                logger.warning(f"requests not available for MCP tool {name}: {e}")
+
+    @property
+    def batching(self) -> bool:
+        return self.method == "POST" and self.max_batch_size > 1
 
     async def execute(self, input_data: Any) -> Dict[str, Any]:
-        if self._requests is None:
+        if load_aiohttp() is None and self._requests is None:
             return {"success": False, "error": "requests_not_available"}
+        if self.batching:
+            return await self._submit(input_data)
+        status, data = await self._request({"input": input_data})
+        return self._normalize(status, data)
+
+    async def execute_batch(self, inputs: List[Any]) -> List[Dict[str, Any]]:
+        """批量调用：端点支持批量时合并为一个请求，否则并发逐个调用"""
+        if not inputs:
+            return []
+        if not self.batching:
+            return list(await asyncio.gather(*[self.execute(x) for x in inputs]))
+        results: List[Dict[str, Any]] = []
+        for start in range(0, len(inputs), self.max_batch_size):
+            results.extend(await self._send_batch(inputs[start:start + self.max_batch_size]))
+        return results
+
+    # ---------------- 批量合并 ----------------
+
+    async def _submit(self, input_data: Any) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        if self._pending_loop is not loop:
+            self._pending, self._flush_handle, self._pending_loop = [], None, loop
+        future = loop.create_future()
+        self._pending.append((input_data, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
 
-        payload = {"input": input_data}
+    async def _run_batch(self, batch: List[Tuple[Any, "asyncio.Future"]]) -> None:
+        live = [(x, f) for x, f in batch if not f.done()]
+        if not live:
+            return
         try:
-            if self.method == "GET":
-                r = self._requests.get(self.url, params=payload, timeout=self.timeout)
-            else:
-                r = self._requests.post(self.url, json=payload, timeout=self.timeout)
-            if r.status_code >= 400:
-                return {"success": False, "error": f"http_{r.status_code}", "body": r.text[:300]}
-            data = r.json()
-            # normalize
-            if isinstance(data, dict) and "success" in data:
-                return data
-            return {"success": True, "result": data}
+            results = await self._send_batch([x for x, _ in live])
+        except Exception as e:
+            results = [{"success": False, "error": str(e)}] * len(live)
+        for (_, future), res in zip(live, results):
+            if not future.done():
+                future.set_result(res)
+
+    async def _send_batch(self, inputs: List[Any]) -> List[Dict[str, Any]]:
+        if len(inputs) == 1:
+            status, data = await self._request({"input": inputs[0]})
+            return [self._normalize(status, data)]
+        status, data = await self._request({"inputs": inputs})
+        if status < 0 or status >= 400:
+            # 网络错误/限流/服务端错误：逐项返回错误，不重发
+            return [self._normalize(status, data) for _ in inputs]
+        results = data.get("results") if isinstance(data, dict) else None
+        if isinstance(results, list) and len(results) == len(inputs):
+            return [self._normalize(status, item) for item in results]
+        # 2xx 但没有匹配的 results：端点不支持批量协议，退回逐个调用
+        logger.warning(f"MCP tool {self.name} 批量响应不符合协议，改为逐个调用")
+        self.max_batch_size = 1
+        return list(await asyncio.gather(*[self.execute(x) for x in inputs]))
+
+    # ---------------- HTTP ----------------
+
+    def _normalize(self, status: int, data: Any) -> Dict[str, Any]:
+        if status < 0:
+            return {"success": False, "error": str(data)}
+        if status >= 400:
+            return {"success": False, "error": f"http_{status}", "body": str(data)[:300]}
+        # normalize
+        if isinstance(data, dict) and "success" in data:
+            return data
+        return {"success": True, "result": data}
+
+    def _note_batch_header(self, headers: Any) -> None:
+        try:
+            advertised = int((headers or {}).get(BATCH_HEADER) or 0)
+        except (TypeError, ValueError):
+            return
+        if advertised > 1 and self.method == "POST" and advertised != self.max_batch_size:
+            logger.info(f"MCP tool {self.name} 支持批量调用（max_batch={advertised}）")
+            self.max_batch_size = advertised
+
+    async def _request(self, payload: Dict[str, Any]) -> Tuple[int, Any]:
+        """发送请求，返回 (status, data)；网络/解码错误时 status 为 -1、data 为错误信息"""
+        from src.utils.governor import get_governor, retry_after_seconds
+
+        governor = get_governor()
+        try:
+            async with governor.limit(self.governor_key):
+                if load_aiohttp() is not None:
+                    status, headers, data = await self._request_async(payload)
+                else:
+                    status, headers, data = await asyncio.to_thread(self._request_sync, payload)
+        except asyncio.TimeoutError:
+            return -1, f"timeout after {self.timeout}s"
         except Exception as e:
-            return {"success": False, "error": str(e)}
+            return -1, e
+        if status == 429:
+            governor.penalize(self.governor_key, retry_after_seconds(headers))
+        self._note_batch_header(headers)
+        return status, data
+
+    @staticmethod
+    def _query_params(payload: Dict[str, Any]) -> Dict[str, str]:
+        """GET 请求的查询参数：非字符串输入按 JSON 编码"""
+        value = payload.get("input")
+        return {"input": value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)}
+
+    async def _request_async(self, payload: Dict[str, Any]) -> Tuple[int, Any, Any]:
+        aiohttp = load_aiohttp()
+        session = _get_async_session()
+        client_timeout = aiohttp.ClientTimeout(total=float(self.timeout))
+        kwargs = {"params": self._query_params(payload)} if self.method == "GET" else {"json": payload}
+        async with session.request(self.method, self.url, timeout=client_timeout, **kwargs) as resp:
+            content_type = (resp.headers.get("Content-Type") or "").lower()
+            if resp.status < 400 and any(t in content_type for t in _NDJSON_TYPES):
+                data = await self._read_ndjson(resp)
+            else:
+                data = await self._read_body(resp)
+            return resp.status, resp.headers, data
+
+    async def _read_body(self, resp: Any) -> Any:
+        """按块读取响应并限制总大小，再解码 JSON（非 JSON 时返回文本）"""
+        if resp.content_length is not None and resp.content_length > self.max_response_bytes:
+            raise McpResponseTooLarge(f"response exceeds {self.max_response_bytes} bytes")
+        chunks: List[bytes] = []
+        size = 0
+        async for chunk in resp.content.iter_chunked(64 * 1024):
+            size += len(chunk)
+            if size > self.max_response_bytes:
+                raise McpResponseTooLarge(f"response exceeds {self.max_response_bytes} bytes")
+            chunks.append(chunk)
+        text = b"".join(chunks).decode(resp.charset or "utf-8", errors="replace")
+        return _decode_body(resp.status, text)
+
+    async def _read_ndjson(self, resp: Any) -> List[Any]:
+        """JSON Lines 响应逐行增量解码（限制单行大小、条目数与总大小）"""
+        items: List[Any] = []
+        size = 0
+        buffer = b""
+        async for chunk in resp.content.iter_chunked(64 * 1024):
+            size += len(chunk)
+            if size > self.max_response_bytes:
+                raise McpResponseTooLarge(f"response exceeds {self.max_response_bytes} bytes")
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            if len(buffer) > self.max_line_bytes:
+                raise McpResponseTooLarge(f"json line exceeds {self.max_line_bytes} bytes")
+            items.extend(decode_ndjson(lines, self.max_line_bytes, self.max_items - len(items)))
+        items.extend(decode_ndjson([buffer], self.max_line_bytes, self.max_items - len(items)))
+        return items
+
+    def _request_sync(self, payload: Dict[str, Any]) -> Tuple[int, Any, Any]:
+        """aiohttp 不可用时在线程中执行：共享 requests.Session，流式读取并限制大小"""
+        session = _get_sync_session()
+        if self.method == "GET":
+            r = session.get(self.url, params=self._query_params(payload), timeout=self.timeout, stream=True)
+        else:
+            r = session.post(self.url, json=payload, timeout=self.timeout, stream=True)
+        with r:
+            content_type = (r.headers.get("Content-Type") or "").lower()
+            if r.status_code < 400 and any(t in content_type for t in _NDJSON_TYPES):
+                return r.status_code, r.headers, decode_ndjson(
+                    r.iter_lines(chunk_size=64 * 1024), self.max_line_bytes, self.max_items
+                )
+            chunks: List[bytes] = []
+            size = 0
+            for chunk in r.iter_content(chunk_size=64 * 1024):
+                size += len(chunk)
+                if size > self.max_response_bytes:
+                    raise McpResponseTooLarge(f"response exceeds {self.max_response_bytes} bytes")
+                chunks.append(chunk)
+            text = b"".join(chunks).decode(r.encoding or "utf-8", errors="replace")
+            return r.status_code, r.headers, _decode_body(r.status_code, text)
 
 
 class ConfigOnlyMcpTool:
@@ -80,6 +396,47 @@ class ConfigOnlyMcpTool:
         }
 
 
+def load_server_tools(
+    servers: Dict[str, Any],
+    sessions_cfg: Optional[Dict[str, Any]] = None,
+    manager: Any = None,
+) -> List[Any]:
+    """
+    mcpServers 配置 -> ToolHub 工具列表。
+    有 mcp SDK（或传入 manager）时为每个服务器建立长连接会话，每个远端工具注册为一个候选；
+    SDK 不可用、会话被禁用或连接失败的服务器退回 ConfigOnlyMcpTool。
+    """
+    from .session import MCP_AVAILABLE, McpRemoteTool, get_mcp_session_manager
+
+    tools: List[Any] = []
+    sessions_cfg = sessions_cfg or {}
+    discovered: Dict[str, List[Dict[str, Any]]] = {}
+    if servers and bool(sessions_cfg.get("enabled", True)) and (manager is not None or MCP_AVAILABLE):
+        manager = manager or get_mcp_session_manager(sessions_cfg)
+        connectable = {
+            name: cfg for name, cfg in servers.items()
+            if isinstance(cfg, dict) and (cfg.get("command") or cfg.get("url"))
+        }
+        discovered = manager.start(connectable) if connectable else {}
+        for server_name, remote_tools in discovered.items():
+            for remote in remote_tools:
+                tools.append(McpRemoteTool(manager, server_name, remote))
+            logger.info(f"Loaded MCP server via session: {server_name} ({len(remote_tools)} tools)")
+    elif servers and not MCP_AVAILABLE:
+        logger.warning("mcp SDK 未安装，mcpServers 仅以配置回显工具的形式注册")
+
+    for server_name, server_cfg in servers.items():
+        if server_name in discovered:
+            continue
+        tools.append(ConfigOnlyMcpTool(
+            name=server_name,
+            description=f"MCP server from config_file: {server_name}",
+            server_config=server_cfg or {},
+        ))
+        logger.info(f"Loaded MCP server from config_file as tool: {server_name}")
+    return tools
+
+
 def load_mcp_tools(mcp_config: Dict[str, Any]) -> List[Any]:
     tools: List[Any] = []
     logger.debug(f"load_mcp_tools called with config: {mcp_config}")
@@ -108,15 +465,7 @@ def load_mcp_tools(mcp_config: Dict[str, Any]) -> List[Any]:
                     # 容错：去掉首尾空白后再尝试一次
                     data = json.loads(raw.strip())
                 servers = (data.get("mcpServers") or {}) if isinstance(data, dict) else {}
-                for server_name, server_cfg in servers.items():
-                    desc = f"MCP server from config_file: {server_name}"
-                    tool = ConfigOnlyMcpTool(
-                        name=server_name,
-                        description=desc,
-                        server_config=server_cfg or {},
-                    )
-                    tools.append(tool)
-                    logger.info(f"Loaded MCP server from config_file as tool: {server_name}")
+                tools.extend(load_server_tools(servers, mcp_config.get("sessions") or {}))
         except Exception as e:
             logger.warning(f"Failed to load MCP tools from config_file: {e}")
 
@@ -135,6 +484,9 @@ def load_mcp_tools(mcp_config: Dict[str, Any]) -> List[Any]:
                     url=item.get("url", ""),
                     method=item.get("method", "POST"),
                     timeout=int(item.get("timeout", 10)),
+                    max_batch_size=int(item.get("max_batch_size", 1)),
+                    batch_window=float(item.get("batch_window", 0.01)),
+                    max_response_bytes=int(item.get("max_response_bytes", DEFAULT_MAX_RESPONSE_BYTES)),
                 )
                 tools.append(tool)
             else:
@@ -0,0 +1,413 @@
+"""
+MCP 协议客户端 - 每个 MCP 服务器一个长连接会话，供 ToolHub 候选复用
+
+- 会话运行在独立的事件循环线程中：启动时建立，之后所有调用（来自任意事件循环/线程）复用同一连接，
+  并发的 call_tool 在同一会话上按请求 ID 复用（无需每次启动进程或重新握手）
+- list_tools 结果按服务器配置哈希缓存到磁盘（带 TTL），重启后可直接注册工具，连接在后台建立
+- 连接断开时自动重连并重试一次
+- 依赖官方 mcp SDK（可选）；未安装时 MCP_AVAILABLE 为 False，由 loader 退回仅回显配置的工具
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+
+try:
+    from mcp import ClientSession, StdioServerParameters
+    from mcp.client.sse import sse_client
+    from mcp.client.stdio import stdio_client
+    MCP_AVAILABLE = True
+except ImportError:
+    ClientSession = StdioServerParameters = sse_client = stdio_client = None
+    MCP_AVAILABLE = False
+
+try:
+    from mcp.client.streamable_http import streamablehttp_client
+except ImportError:
+    streamablehttp_client = None
+
+
+def resolve_transport(config: Dict[str, Any]) -> str:
+    """根据服务器配置判断传输方式：stdio / sse / http（streamable HTTP）"""
+    transport = str(config.get("transport") or config.get("type") or "").lower()
+    if transport in ("stdio", "sse"):
+        return transport
+    if transport in ("http", "streamable_http", "streamable-http"):
+        return "http"
+    if config.get("command"):
+        return "stdio"
+    url = str(config.get("url") or "")
+    return "sse" if url.rstrip("/").endswith("/sse") else "http"
+
+
+@asynccontextmanager
+async def open_mcp_session(config: Dict[str, Any]):
+    """按配置建立 MCP 连接并完成 initialize，产出 ClientSession"""
+    if not MCP_AVAILABLE:
+        raise RuntimeError("mcp SDK 未安装")
+    transport = resolve_transport(config)
+    if transport == "stdio":
+        # env 原样传入：未配置时由 SDK 使用默认的安全环境变量，不把进程的全部环境（含密钥）交给子进程
+        ctx = stdio_client(StdioServerParameters(
+            command=config["command"], args=list(config.get("args") or []), env=config.get("env"),
+        ))
+    elif transport == "sse":
+        ctx = sse_client(url=config["url"], headers=config.get("headers") or {})
+    else:
+        if streamablehttp_client is None:
+            raise RuntimeError("当前 mcp SDK 不支持 streamable HTTP")
+        ctx = streamablehttp_client(url=config["url"], headers=config.get("headers") or {})
+    async with ctx as streams:
+        async with ClientSession(streams[0], streams[1]) as session:
+            await session.initialize()
+            yield session
+
+
+def _tool_to_dict(tool: Any) -> Dict[str, Any]:
+    if isinstance(tool, dict):
+        return {
+            "name": tool.get("name"),
+            "description": tool.get("description") or "",
+            "input_schema": tool.get("input_schema") or tool.get("inputSchema") or {},
+        }
+    return {
+        "name": getattr(tool, "name", None),
+        "description": getattr(tool, "description", "") or "",
+        "input_schema": getattr(tool, "inputSchema", None) or {},
+    }
+
+
+def _config_hash(config: Dict[str, Any]) -> str:
+    return hashlib.sha1(json.dumps(config, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class McpServerSession:
+    """单个 MCP 服务器的长连接（所有方法都在管理器的事件循环线程中执行）"""
+
+    def __init__(self, name: str, config: Dict[str, Any], connect: Callable[[Dict[str, Any]], Any]):
+        self.name = name
+        self.config = config
+        self._connect = connect
+        self.session: Any = None
+        self.tools: Optional[List[Dict[str, Any]]] = None
+        self.last_error = ""
+        self.connects = 0
+        self.calls = 0
+        self._owner: Optional[asyncio.Task] = None
+        self._ready: Optional[asyncio.Event] = None
+        self._stop: Optional[asyncio.Event] = None
+
+    async def _run(self) -> None:
+        """持有连接上下文的任务：连接建立后等待关闭信号（上下文必须在同一任务中进入与退出）"""
+        try:
+            async with self._connect(self.config) as session:
+                self.session = session
+                self.connects += 1
+                logger.info(f"MCP server 已连接: {self.name}")
+                self._ready.set()
+                await self._stop.wait()
+        except asyncio.CancelledError:
+            raise
+        except BaseException as e:
+            self.last_error = str(e) or type(e).__name__
+            logger.warning(f"MCP server 连接中断: {self.name}: {self.last_error}")
+        finally:
+            self.session = None
+            self._ready.set()
+
+    @property
+    def connected(self) -> bool:
+        return self.session is not None and self._owner is not None and not self._owner.done()
+
+    async def ensure(self, timeout: float) -> Any:
+        """返回可用会话；未连接或已断开时（重新）连接"""
+        if self.connected:
+            return self.session
+        if self._owner is None or self._owner.done():
+            self._ready = asyncio.Event()
+            self._stop = asyncio.Event()
+            self._owner = asyncio.create_task(self._run())
+        await asyncio.wait_for(self._ready.wait(), timeout)
+        if self.session is None:
+            raise ConnectionError(f"MCP server {self.name} 连接失败: {self.last_error}")
+        return self.session
+
+    async def list_tools(self, timeout: float) -> List[Dict[str, Any]]:
+        session = await self.ensure(timeout)
+        response = await asyncio.wait_for(session.list_tools(), timeout)
+        self.tools = [t for t in (_tool_to_dict(x) for x in response.tools) if t.get("name")]
+        return self.tools
+
+    async def call_tool(self, tool_name: str, arguments: Dict[str, Any], timeout: float) -> Any:
+        for attempt in range(2):
+            session = await self.ensure(timeout)
+            self.calls += 1
+            try:
+                return await asyncio.wait_for(session.call_tool(tool_name, arguments=arguments), timeout)
+            except asyncio.TimeoutError:
+                raise
+            except Exception:
+                await asyncio.sleep(0)
+                # 会话仍然存活说明是工具本身的错误；连接已断开则重连后重试一次
+                if attempt or self.connected:
+                    raise
+                logger.info(f"MCP server {self.name} 连接已断开，重连后重试")
+
+    async def close(self) -> None:
+        if self._stop is not None:
+            self._stop.set()
+        if self._owner is not None and not self._owner.done():
+            try:
+                await asyncio.wait_for(self._owner, 5)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                pass
+            except Exception:
+                pass
+
+
+class McpSessionManager:
+    """管理所有 MCP 服务器会话：独立事件循环线程 + list_tools 缓存"""
+
+    def __init__(
+        self,
+        connect: Optional[Callable[[Dict[str, Any]], Any]] = None,
+        connect_timeout: float = 20.0,
+        call_timeout: float = 60.0,
+        cache_path: Optional[str] = None,
+        cache_ttl: int = 3600,
+    ):
+        """
+        Args:
+            connect: 连接工厂（异步上下文管理器，产出具备 list_tools/call_tool 的会话），默认使用 mcp SDK
+            connect_timeout: 建立连接/获取工具列表的超时（秒）
+            call_timeout: 单次 call_tool 超时（秒）
+            cache_path: list_tools 缓存文件，None 表示不持久化
+            cache_ttl: list_tools 缓存有效期（秒）
+        """
+        self._connect = connect or open_mcp_session
+        self.connect_timeout = float(connect_timeout)
+        self.call_timeout = float(call_timeout)
+        self.cache_path = cache_path
+        self.cache_ttl = int(cache_ttl)
+        self.servers: Dict[str, McpServerSession] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    # ---------------- 事件循环线程 ----------------
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="mcp-sessions", daemon=True)
+                thread.start()
+                self._loop, self._thread = loop, thread
+        return self._loop
+
+    def _submit(self, coro: Any) -> concurrent.futures.Future:
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    # ---------------- list_tools 缓存 ----------------
+
+    def _load_cache(self) -> Dict[str, Any]:
+        if not self.cache_path or not Path(self.cache_path).exists():
+            return {}
+        try:
+            return json.loads(Path(self.cache_path).read_text(encoding="utf-8")) or {}
+        except Exception as e:
+            logger.debug(f"MCP 工具列表缓存读取失败（忽略）: {e}")
+            return {}
+
+    def _save_cache(self) -> None:
+        if not self.cache_path:
+            return
+        data = self._load_cache()
+        for name, srv in self.servers.items():
+            if srv.tools is not None:
+                data[name] = {"hash": _config_hash(srv.config), "at": time.time(), "tools": srv.tools}
+        try:
+            Path(self.cache_path).parent.mkdir(parents=True, exist_ok=True)
+            tmp = f"{self.cache_path}.tmp"
+            Path(tmp).write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self.cache_path)
+        except Exception as e:
+            logger.debug(f"MCP 工具列表缓存写入失败（忽略）: {e}")
+
+    # ---------------- 对外接口 ----------------
+
+    def start(self, servers: Dict[str, Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        为各服务器建立会话并获取工具列表（并发进行），返回 {server: tools}。
+        list_tools 缓存有效时直接使用缓存，连接在后台建立；连接失败的服务器不出现在结果中。
+        """
+        cached = self._load_cache()
+        pending: Dict[str, concurrent.futures.Future] = {}
+        result: Dict[str, List[Dict[str, Any]]] = {}
+        for name, config in servers.items():
+            srv = self.servers.get(name)
+            if srv is None:
+                srv = self.servers[name] = McpServerSession(name, config or {}, self._connect)
+            entry = cached.get(name) or {}
+            if (entry.get("hash") == _config_hash(srv.config)
+                    and time.time() - float(entry.get("at", 0)) < self.cache_ttl):
+                srv.tools = entry.get("tools") or []
+                result[name] = srv.tools
+                self._submit(srv.ensure(self.connect_timeout)).add_done_callback(
+                    lambda f, n=name: f.exception() and logger.warning(f"MCP server 后台连接失败: {n}: {f.exception()}")
+                )
+            else:
+                pending[name] = self._submit(srv.list_tools(self.connect_timeout))
+        for name, future in pending.items():
+            try:
+                result[name] = future.result(timeout=self.connect_timeout + 5)
+                logger.info(f"MCP server {name}: 发现 {len(result[name])} 个工具")
+            except Exception as e:
+                logger.warning(f"MCP server 初始化失败: {name}: {e}")
+        self._save_cache()
+        return result
+
+    async def call_tool(self, server: str, tool_name: str, arguments: Dict[str, Any]) -> Any:
+        """在任意事件循环中调用：请求提交到会话线程，等待期间不阻塞调用方"""
+        srv = self.servers.get(server)
+        if srv is None:
+            raise KeyError(f"unknown MCP server: {server}")
+        return await asyncio.wrap_future(self._submit(srv.call_tool(tool_name, arguments, self.call_timeout)))
+
+    def list_tools(self, server: str) -> List[Dict[str, Any]]:
+        srv = self.servers.get(server)
+        return list(srv.tools or []) if srv is not None else []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            name: {
+                "connected": srv.connected,
+                "tools": len(srv.tools or []),
+                "connects": srv.connects,
+                "calls": srv.calls,
+                "last_error": srv.last_error,
+            }
+            for name, srv in self.servers.items()
+        }
+
+    def close(self, timeout: float = 10.0) -> None:
+        """关闭所有会话并停止事件循环线程"""
+        loop, thread = self._loop, self._thread
+        if loop is None:
+            return
+
+        async def _close_all():
+            await asyncio.gather(*[srv.close() for srv in self.servers.values()], return_exceptions=True)
+
+        try:
+            asyncio.run_coroutine_threadsafe(_close_all(), loop).result(timeout=timeout)
+        except Exception as e:
+            logger.debug(f"关闭 MCP 会话失败（忽略）: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout=timeout)
+        if not loop.is_running():
+            loop.close()
+        self._loop = self._thread = None
+
+
+def _content_to_text(content: Any) -> str:
+    parts: List[str] = []
+    for item in content or []:
+        text = item.get("text") if isinstance(item, dict) else getattr(item, "text", None)
+        parts.append(text if text is not None else str(item))
+    return "\n".join(parts)
+
+
+class McpRemoteTool:
+    """MCP 服务器上的单个工具，作为 ToolHub 候选（通过共享会话调用）"""
+
+    def __init__(self, manager: McpSessionManager, server: str, tool: Dict[str, Any]):
+        self.manager = manager
+        self.server_name = server
+        self.remote_name = tool["name"]
+        self.name = tool["name"]
+        self.description = tool.get("description") or f"MCP tool {self.name} ({server})"
+        self.input_schema = tool.get("input_schema") or {}
+        # 出站调用管控：按 MCP 服务器计预算
+        self.governor_key = f"mcp:{server}"
+
+    def _arguments(self, input_data: Any) -> Dict[str, Any]:
+        """把 ToolHub 的输入映射为工具参数：dict 原样传入；字符串填入首个（必填的）字符串参数"""
+        if isinstance(input_data, dict):
+            return input_data
+        props = self.input_schema.get("properties") or {}
+        required = [p for p in (self.input_schema.get("required") or []) if p in props]
+        candidates = required + [p for p in props if p not in required]
+        for prop in candidates:
+            if (props.get(prop) or {}).get("type", "string") == "string":
+                return {prop: str(input_data)}
+        return {"input": input_data}
+
+    async def execute(self, input_data: Any) -> Dict[str, Any]:
+        from src.utils.governor import get_governor
+
+        try:
+            async with get_governor().limit(self.governor_key):
+                result = await self.manager.call_tool(self.server_name, self.remote_name, self._arguments(input_data))
+        except Exception as e:
+            return {"success": False, "error": str(e) or type(e).__name__}
+        is_error = result.get("isError") if isinstance(result, dict) else getattr(result, "isError", False)
+        content = result.get("content") if isinstance(result, dict) else getattr(result, "content", None)
+        structured = result.get("structuredContent") if isinstance(result, dict) else getattr(result, "structuredContent", None)
+        text = _content_to_text(content)
+        if is_error:
+            return {"success": False, "error": text or "mcp_tool_error", "_meta": {"server": self.server_name}}
+        return {
+            "success": True,
+            "result": structured if structured is not None else text,
+            "_meta": {"server": self.server_name},
+        }
+
+
+# 全局会话管理器
+_global_manager: Optional[McpSessionManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_mcp_session_manager(config: Optional[Dict[str, Any]] = None) -> McpSessionManager:
+    """获取全局 MCP 会话管理器（配置 mcps.sessions）"""
+    global _global_manager
+    if _global_manager is None:
+        with _manager_lock:
+            if _global_manager is None:
+                cfg = config
+                if cfg is None:
+                    try:
+                        from src.config.config_loader import get_config
+                        cfg = get_config().get("mcps.sessions", {}) or {}
+                    except Exception:
+                        cfg = {}
+                cache_cfg = cfg.get("list_tools_cache") or {}
+                _global_manager = McpSessionManager(
+                    connect_timeout=float(cfg.get("connect_timeout", 20)),
+                    call_timeout=float(cfg.get("call_timeout", 60)),
+                    cache_path=cache_cfg.get("path", "data/cache/mcp_tools.json") if cache_cfg.get("enabled", True) else None,
+                    cache_ttl=int(cache_cfg.get("ttl", 3600)),
+                )
+    return _global_manager
+
+
+def shutdown_mcp_session_manager() -> None:
+    """关闭全局 MCP 会话管理器"""
+    global _global_manager
+    with _manager_lock:
+        manager, _global_manager = _global_manager, None
+    if manager is not None:
+        manager.close()
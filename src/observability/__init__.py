@@ -3,6 +3,9 @@
 
 - TraceContext: 单次请求的追踪上下文，收集 planning / tool_call / reasoning / synthesis 等事件
 - 通过 config.observability.enabled 开启，结果中可携带 trace 供调试
+- TraceEventStream: 订阅 trace 事件并实时转成 SSE，供流式接口推送进度
+- PhaseRecorder / summarize / diff_baselines: 基准测试按阶段统计耗时分位数并对比基线
+- TokenLedger / token_phase: 按请求、阶段记录 LLM token 用量，单题预算超限时驱动工作流降级
 """
 
 from .trace_context import (
@@ -11,10 +14,31 @@ from .trace_context import (
     NullTraceContext,
     get_trace_context_from_context,
 )
+from .stream import TraceEventStream, format_sse, trace_event_to_sse
+from .benchmark import PhaseRecorder, summarize, percentile, diff_baselines
+from .token_ledger import (
+    TokenLedger,
+    token_phase,
+    get_token_ledger,
+    estimate_tokens,
+    record_llm_usage,
+)
 
 __all__ = [
     "TraceContext",
     "TraceEvent",
     "NullTraceContext",
     "get_trace_context_from_context",
+    "TraceEventStream",
+    "format_sse",
+    "trace_event_to_sse",
+    "PhaseRecorder",
+    "summarize",
+    "percentile",
+    "diff_baselines",
+    "TokenLedger",
+    "token_phase",
+    "get_token_ledger",
+    "estimate_tokens",
+    "record_llm_usage",
 ]
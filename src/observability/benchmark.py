@@ -0,0 +1,152 @@
+"""
+性能基准统计：从 TraceContext 事件收集各阶段耗时，汇总分位数，生成可对比的 JSON 基线。
+
+- PhaseRecorder：作为 TraceContext 监听器，按阶段（planning / hop_N / tool:<name> / synthesis 等）记录耗时
+- summarize：count / mean / p50 / p95 / p99 / max（最近秩分位数）
+- diff_baselines：对比两份基线，列出延迟、LLM 调用数、token 等指标的变化与回退项
+"""
+
+import math
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional
+
+from .trace_context import TraceEvent
+
+BASELINE_VERSION = 1
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """最近秩分位数（q 取 0~100）；无样本时返回 None"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(values: Iterable[float]) -> Dict[str, Any]:
+    """耗时样本汇总（毫秒，保留两位小数）"""
+    data = [float(v) for v in values]
+    if not data:
+        return {"count": 0}
+    return {
+        "count": len(data),
+        "mean": round(sum(data) / len(data), 2),
+        "p50": round(percentile(data, 50), 2),
+        "p95": round(percentile(data, 95), 2),
+        "p99": round(percentile(data, 99), 2),
+        "max": round(max(data), 2),
+    }
+
+
+class PhaseRecorder:
+    """
+    TraceContext 监听器：按阶段收集耗时（毫秒）。
+
+    trace 事件自带 duration_ms 的阶段直接记录；跳（hop）没有结束事件，
+    以相邻 hop_start（或进入证据合成）之间的间隔作为该跳耗时。
+    """
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self._hop: Optional[int] = None
+        self._hop_started = 0.0
+
+    def add(self, phase: str, duration_ms: Optional[float]) -> None:
+        if duration_ms is not None:
+            self.samples[phase].append(float(duration_ms))
+
+    def _close_hop(self, now: float) -> None:
+        if self._hop is not None:
+            elapsed = (now - self._hop_started) * 1000
+            self.add(f"hop_{self._hop}", elapsed)
+            self.add("hop", elapsed)
+            self._hop = None
+
+    def __call__(self, event: TraceEvent) -> None:
+        now = time.perf_counter()
+        phase = event.phase
+        ended = (event.extra or {}).get("status") == "end"
+        if phase == "planning_end":
+            self.add("planning", event.duration_ms)
+        elif phase == "hop_start":
+            self._close_hop(now)
+            self._hop, self._hop_started = event.step_id, now
+        elif phase == "tool_call" and ended:
+            self.add("tool_call", event.duration_ms)
+            if event.tool_type:
+                self.add(f"tool:{event.tool_type}", event.duration_ms)
+        elif phase == "step_end":
+            self.add("step", event.duration_ms)
+        elif phase == "reasoning" and ended:
+            self.add("reasoning", event.duration_ms)
+        elif phase == "verification" and ended:
+            self.add("verification", event.duration_ms)
+        elif phase == "evidence_fused":
+            self.add("fusion", event.duration_ms)
+            if (event.extra or {}).get("mode"):
+                self.add(f"fusion:{event.extra['mode']}", event.duration_ms)
+        elif phase == "evidence_synthesis":
+            if ended:
+                self.add("synthesis", event.duration_ms)
+            else:
+                self._close_hop(now)
+
+    def finish(self) -> Dict[str, List[float]]:
+        """结束记录（关闭未结束的跳），返回各阶段样本"""
+        self._close_hop(time.perf_counter())
+        return dict(self.samples)
+
+
+def merge_samples(target: Dict[str, List[float]], samples: Dict[str, List[float]]) -> None:
+    for phase, values in samples.items():
+        target.setdefault(phase, []).extend(values)
+
+
+# 对比时关注的指标：(路径, 越大越差)
+_COMPARED = [
+    ("throughput_qps", False),
+    ("llm.calls_per_question", True),
+    ("llm.tokens_per_question", True),
+]
+_LATENCY_STATS = ("p50", "p95", "p99")
+
+
+def _get(data: Dict[str, Any], path: str) -> Optional[float]:
+    for part in path.split("."):
+        if not isinstance(data, dict) or part not in data:
+            return None
+        data = data[part]
+    return data if isinstance(data, (int, float)) else None
+
+
+def diff_baselines(old: Dict[str, Any], new: Dict[str, Any], threshold: float = 0.10) -> List[Dict[str, Any]]:
+    """
+    对比两份基线（相同并发级别之间），返回指标变化列表。
+    变化超过 threshold（相对值）且方向变差的记为 regression。
+    """
+    rows: List[Dict[str, Any]] = []
+    for level, new_level in (new.get("levels") or {}).items():
+        old_level = (old.get("levels") or {}).get(level)
+        if not old_level:
+            continue
+        metrics = list(_COMPARED)
+        phases = set((new_level.get("latency") or {})) & set((old_level.get("latency") or {}))
+        for phase in sorted(phases):
+            metrics.extend((f"latency.{phase}.{stat}", True) for stat in _LATENCY_STATS)
+        for path, higher_is_worse in metrics:
+            before, after = _get(old_level, path), _get(new_level, path)
+            if before is None or after is None:
+                continue
+            change = (after - before) / before if before else (0.0 if after == before else math.inf)
+            worse = change > threshold if higher_is_worse else change < -threshold
+            rows.append({
+                "concurrency": level,
+                "metric": path,
+                "old": before,
+                "new": after,
+                "change": round(change, 4) if math.isfinite(change) else change,
+                "regression": bool(worse),
+            })
+    return rows
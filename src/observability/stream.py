@@ -0,0 +1,93 @@
+"""
+进度事件流：把 TraceContext 的事件实时转成 SSE，供流式接口推送规划、跳、工具结果、证据融合与答案增量。
+"""
+
+import asyncio
+import json
+from typing import Any, AsyncIterator, Awaitable, Dict, Optional
+
+from .trace_context import TraceContext, TraceEvent
+
+# trace phase -> SSE 事件名
+_SSE_EVENT_NAMES = {
+    "planning_end": "planning",
+    "hop_start": "hop",
+    "step_start": "step",
+    "step_end": "step_result",
+    "reasoning": "reasoning",
+    "evidence_fused": "evidence",
+    "answer_delta": "token",
+    "evidence_synthesis": "synthesis",
+    "verification": "verification",
+}
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """格式化一条 SSE 消息"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def trace_event_to_sse(event: TraceEvent, max_preview: int = 500) -> Optional[str]:
+    """把 TraceEvent 转成 SSE 消息；开始类的噪声事件返回 None"""
+    status = (event.extra or {}).get("status")
+    if event.phase == "answer_delta":
+        return format_sse("token", {"delta": event.output_preview or ""})
+    if event.phase == "answer_reset":
+        return format_sse("reset", {"reason": event.error or ""})
+    if event.phase == "tool_call":
+        name = "tool_result" if status == "end" else "tool_call"
+        return format_sse(name, event.to_dict(max_preview))
+    if event.phase in ("planning_start",):
+        return None
+    if status == "start" and event.phase in ("reasoning", "verification"):
+        return None
+    name = _SSE_EVENT_NAMES.get(event.phase, event.phase)
+    return format_sse(name, event.to_dict(max_preview))
+
+
+class TraceEventStream:
+    """
+    订阅 TraceContext 的事件并以异步迭代器形式输出 SSE 消息。
+
+    监听回调可能在工作线程中触发，统一通过 call_soon_threadsafe 投递到事件循环。
+    """
+
+    def __init__(self, trace: Optional[TraceContext] = None, max_preview: int = 500):
+        self.trace = trace or TraceContext(max_preview=max_preview)
+        self.max_preview = max_preview
+        self._loop = asyncio.get_running_loop()
+        self._queue: "asyncio.Queue[TraceEvent]" = asyncio.Queue()
+        self.trace.add_listener(self._on_event)
+
+    def _on_event(self, event: TraceEvent) -> None:
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, event)
+
+    async def relay(self, work: Awaitable[Any]) -> AsyncIterator[str]:
+        """
+        执行 work（通常为 agent.process_task），期间实时产出 SSE 消息；
+        work 结束后排空剩余事件。work 的结果通过 self.result 获取。
+        """
+        task = asyncio.ensure_future(work)
+        self.result: Any = None
+        try:
+            while True:
+                getter = asyncio.ensure_future(self._queue.get())
+                done, _ = await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+                if getter in done:
+                    message = trace_event_to_sse(getter.result(), self.max_preview)
+                    if message:
+                        yield message
+                    continue
+                getter.cancel()
+                break
+            # 让线程中投递的回调先执行，再排空队列
+            await asyncio.sleep(0)
+            while not self._queue.empty():
+                message = trace_event_to_sse(self._queue.get_nowait(), self.max_preview)
+                if message:
+                    yield message
+            self.result = task.result()
+        finally:
+            if not task.done():
+                # 客户端断开：取消后台处理
+                task.cancel()
@@ -0,0 +1,306 @@
+"""
+Token 账本：按请求记录 LLM 调用的 prompt / completion token（按阶段、按工具结果细分），
+并提供单题 token 预算的分级判断，供工作流在预算紧张时压缩上下文、跳过可选校验或停止多跳。
+
+- 用量优先取服务端返回的 usage；缺失时（网关未返回、流式服务端不支持 include_usage）按文本估算
+- 阶段通过 token_phase 标注（contextvars，随 asyncio Task / asyncio.to_thread 传递）
+- 账本挂在请求级上下文（RequestContext.tokens）上，orchestrator 再挂到 TraceContext.tokens，随 trace 返回
+- 全局累计计数写入 MetricsCollector：tokens.prompt / tokens.completion / tokens.phase.<阶段>.* 等
+"""
+
+import functools
+import inspect
+import math
+import re
+import threading
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+PHASE_OTHER = "other"
+
+# 预算分级动作（由轻到重）
+ACTION_SHRINK = "shrink_context"
+ACTION_SKIP_JUDGES = "skip_judges"
+ACTION_STOP = "stop_hops"
+
+_current_phase: ContextVar[str] = ContextVar("research_agent_token_phase", default=PHASE_OTHER)
+
+_CJK = re.compile(r"[\u3400-\u9fff\uf900-\ufaff]")
+
+
+def estimate_tokens(text: Any) -> int:
+    """粗略估算 token 数：中日韩字符按 1 个 token，其余按 4 个字符 1 个 token"""
+    text = "" if text is None else str(text)
+    cjk = len(_CJK.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def estimate_messages_tokens(messages: Any) -> int:
+    """估算聊天消息的 prompt token 数（每条消息另计 4 个 token 的格式开销）"""
+    if isinstance(messages, str):
+        return estimate_tokens(messages)
+    total = 0
+    for message in messages or []:
+        content = message.get("content", "") if isinstance(message, dict) else message
+        total += estimate_tokens(content) + 4
+    return total
+
+
+def current_phase() -> str:
+    """当前上下文的 token 计费阶段"""
+    return _current_phase.get()
+
+
+class token_phase:
+    """
+    标注 LLM 调用所属阶段（planning / hop / judge / fusion / synthesis ...）。
+
+    既可作为上下文管理器，也可装饰同步/异步函数：
+        with token_phase("planning"):
+            ...
+
+        @token_phase("judge")
+        def check(...): ...
+    """
+
+    def __init__(self, phase: str):
+        self.phase = phase
+        self._tokens: List[Any] = []
+
+    def __enter__(self) -> "token_phase":
+        self._tokens.append(_current_phase.set(self.phase))
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        _current_phase.reset(self._tokens.pop())
+
+    def __call__(self, fn: Any) -> Any:
+        phase = self.phase
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def _async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with token_phase(phase):
+                    return await fn(*args, **kwargs)
+            return _async_wrapper
+
+        @functools.wraps(fn)
+        def _wrapper(*args: Any, **kwargs: Any) -> Any:
+            with token_phase(phase):
+                return fn(*args, **kwargs)
+        return _wrapper
+
+
+class TokenLedger:
+    """
+    单次请求的 token 账本（线程安全：判官类调用在线程池中执行）。
+
+    budget 为单题 token 预算（prompt + completion，0 表示不限）；
+    shrink_at / skip_judges_at / stop_at 为触发各级动作的已用比例。
+    """
+
+    def __init__(self,
+                 budget: int = 0,
+                 shrink_at: float = 0.6,
+                 skip_judges_at: float = 0.8,
+                 stop_at: float = 1.0,
+                 shrink_ratio: float = 0.5):
+        self.budget = max(0, int(budget or 0))
+        self.shrink_at = float(shrink_at)
+        self.skip_judges_at = float(skip_judges_at)
+        self.stop_at = float(stop_at)
+        self.shrink_ratio = min(1.0, max(0.05, float(shrink_ratio)))
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.calls = 0
+        self.estimated_calls = 0
+        self.phases: Dict[str, Dict[str, int]] = {}
+        self.tool_results: Dict[str, Dict[str, int]] = {}
+        self.actions: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    # ---------- 记录 ----------
+    def record(self, phase: str, prompt_tokens: int, completion_tokens: int, estimated: bool = False) -> None:
+        with self._lock:
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.calls += 1
+            if estimated:
+                self.estimated_calls += 1
+            bucket = self.phases.setdefault(phase, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0})
+            bucket["calls"] += 1
+            bucket["prompt_tokens"] += prompt_tokens
+            bucket["completion_tokens"] += completion_tokens
+
+    def record_tool_result(self, tool: str, tokens: int) -> None:
+        """记录进入提示词的工具结果 token（已计入后续调用的 prompt，不再重复计入预算）"""
+        with self._lock:
+            bucket = self.tool_results.setdefault(tool or "unknown", {"count": 0, "tokens": 0})
+            bucket["count"] += 1
+            bucket["tokens"] += tokens
+
+    def note_action(self, action: str, detail: str = "") -> bool:
+        """记录一次预算动作；同一动作只记录首次，返回是否为首次"""
+        with self._lock:
+            if any(a["action"] == action for a in self.actions):
+                return False
+            self.actions.append({"action": action, "used": self.total_tokens, "detail": detail})
+        logger.info(f"token 预算触发 {action}：已用 {self.total_tokens}/{self.budget}{'，' + detail if detail else ''}")
+        _increment(f"tokens.budget.{action}")
+        return True
+
+    def phase_tokens(self, phase: str) -> int:
+        """某阶段累计的 prompt + completion token"""
+        with self._lock:
+            bucket = self.phases.get(phase) or {}
+            return bucket.get("prompt_tokens", 0) + bucket.get("completion_tokens", 0)
+
+    # ---------- 预算 ----------
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def used_fraction(self) -> float:
+        if self.budget <= 0:
+            return 0.0
+        return self.total_tokens / self.budget
+
+    def should_shrink(self) -> bool:
+        """已用比例达到 shrink_at：压缩进入提示词的上下文"""
+        return self.budget > 0 and self.used_fraction() >= self.shrink_at
+
+    def should_skip_judges(self) -> bool:
+        """已用比例达到 skip_judges_at：跳过可选的校验/终止判断调用"""
+        return self.budget > 0 and self.used_fraction() >= self.skip_judges_at
+
+    def should_stop(self) -> bool:
+        """已用比例达到 stop_at：不再开始新的跳/步骤，直接合成答案"""
+        return self.budget > 0 and self.used_fraction() >= self.stop_at
+
+    def context_scale(self) -> float:
+        """上下文长度系数：未触发压缩时为 1.0"""
+        return self.shrink_ratio if self.should_shrink() else 1.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "total_tokens": self.total_tokens,
+                "calls": self.calls,
+                "estimated_calls": self.estimated_calls,
+                "budget": self.budget,
+                "phases": {k: dict(v) for k, v in self.phases.items()},
+                "tool_results": {k: dict(v) for k, v in self.tool_results.items()},
+                "actions": list(self.actions),
+            }
+
+
+def _increment(name: str, value: int = 1) -> None:
+    try:
+        from ..utils.metrics import get_metrics
+        get_metrics().increment(name, value)
+    except Exception:
+        pass
+
+
+def _budget_config() -> Dict[str, Any]:
+    try:
+        from ..config.config_loader import get_config
+        return get_config().get("performance.token_budget", {}) or {}
+    except Exception:
+        return {}
+
+
+def new_token_ledger() -> TokenLedger:
+    """按配置 performance.token_budget 创建账本"""
+    cfg = _budget_config()
+    return TokenLedger(
+        budget=int(cfg.get("per_question", 0) or 0),
+        shrink_at=float(cfg.get("shrink_at", 0.6)),
+        skip_judges_at=float(cfg.get("skip_judges_at", 0.8)),
+        stop_at=float(cfg.get("stop_at", 1.0)),
+        shrink_ratio=float(cfg.get("shrink_ratio", 0.5)),
+    )
+
+
+def get_token_ledger() -> Optional[TokenLedger]:
+    """当前请求的 token 账本（首次访问时创建）；不在请求作用域内时返回 None"""
+    from ..utils.request_context import get_request_context
+    req = get_request_context()
+    if req is None:
+        return None
+    if req.tokens is None:
+        req.tokens = new_token_ledger()
+    return req.tokens
+
+
+def _usage_value(usage: Dict[str, Any], *keys: str) -> Optional[int]:
+    for key in keys:
+        value = usage.get(key)
+        if isinstance(value, (int, float)):
+            return int(value)
+    return None
+
+
+def record_llm_usage(messages: Any, usage: Optional[Dict[str, Any]] = None, completion: Any = "") -> None:
+    """
+    记录一次 LLM 调用的 token 用量：写入当前请求账本（按当前阶段）与全局计数器。
+    usage 缺失或不完整时按消息与回复文本估算。
+    """
+    usage = usage if isinstance(usage, dict) else {}
+    prompt_tokens = _usage_value(usage, "prompt_tokens", "input_tokens")
+    completion_tokens = _usage_value(usage, "completion_tokens", "output_tokens")
+    estimated = prompt_tokens is None or completion_tokens is None
+    if prompt_tokens is None:
+        prompt_tokens = estimate_messages_tokens(messages)
+    if completion_tokens is None:
+        completion_tokens = estimate_tokens(completion)
+
+    phase = current_phase()
+    _increment("tokens.calls")
+    _increment("tokens.prompt", prompt_tokens)
+    _increment("tokens.completion", completion_tokens)
+    _increment(f"tokens.phase.{phase}.prompt", prompt_tokens)
+    _increment(f"tokens.phase.{phase}.completion", completion_tokens)
+    if estimated:
+        _increment("tokens.estimated_calls")
+
+    ledger = get_token_ledger()
+    if ledger is not None:
+        ledger.record(phase, prompt_tokens, completion_tokens, estimated)
+
+
+def record_llm_response(messages: Any, response: Any) -> None:
+    """从 OpenAI 格式的 chat 响应中取 usage 与回复文本并记录（响应格式异常时忽略）"""
+    if not isinstance(response, dict):
+        return
+    body = response.get("body") if isinstance(response.get("body"), dict) else response
+    choices = body.get("choices")
+    if not isinstance(choices, list) or not choices:
+        return
+    choice = choices[0] if isinstance(choices[0], dict) else {}
+    content = (choice.get("message") or {}).get("content") or choice.get("text") or ""
+    record_llm_usage(messages, body.get("usage"), content)
+
+
+def note_budget_action(ledger: TokenLedger, action: str, detail: str = "") -> None:
+    """记录预算动作并（首次触发时）写入当前请求的 trace"""
+    if not ledger.note_action(action, detail):
+        return
+    from ..utils.request_context import get_request_context
+    req = get_request_context()
+    trace = req.trace if req is not None else None
+    if trace is not None and hasattr(trace, "on_token_budget"):
+        trace.on_token_budget(action, ledger.total_tokens, ledger.budget, detail)
+
+
+def record_tool_tokens(tool: str, text: Any) -> int:
+    """记录进入提示词的工具结果 token 数，返回估算值"""
+    tokens = estimate_tokens(text)
+    _increment(f"tokens.tool.{tool or 'unknown'}", tokens)
+    ledger = get_token_ledger()
+    if ledger is not None:
+        ledger.record_tool_result(tool, tokens)
+    return tokens
@@ -5,13 +5,13 @@
 import time
 import uuid
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 
 @dataclass
 class TraceEvent:
     """单条追踪事件"""
-    phase: str           # planning | step_start | tool_call | reasoning | evidence_synthesis | step_end | verification
+    phase: str           # planning | step_start | tool_call | reasoning | hop_start | evidence_fused | answer_delta | answer_reset | evidence_synthesis | step_end | verification | token_budget
     step_id: Optional[int] = None
     tool_type: Optional[str] = None
     input_preview: Optional[str] = None
@@ -61,10 +61,25 @@ class TraceContext:
         self.max_events = max_events
         self.max_preview = max_preview
         self._timers: Dict[str, float] = {}
+        self._listeners: List[Callable[[TraceEvent], None]] = []
+        self.tokens: Any = None  # TokenLedger，由 orchestrator 挂载
 
-    def _emit(self, event: TraceEvent) -> None:
-        if len(self.events) < self.max_events:
+    def add_listener(self, listener: Callable[[TraceEvent], None]) -> None:
+        """注册事件监听器：每条事件产生时立即回调（用于流式推送进度）"""
+        self._listeners.append(listener)
+
+    @property
+    def has_listeners(self) -> bool:
+        return bool(self._listeners)
+
+    def _emit(self, event: TraceEvent, record: bool = True) -> None:
+        if record and len(self.events) < self.max_events:
             self.events.append(event)
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception:
+                pass
 
     def _start_timer(self, key: str) -> None:
         self._timers[key] = time.perf_counter()
@@ -184,6 +199,50 @@ class TraceContext:
             extra={"status": "end"}
         ))
 
+    # ---------- 多跳 ----------
+    def on_hop_start(self, hop_num: int, target: str = "", tool_type: str = "") -> None:
+        self._emit(TraceEvent(
+            phase="hop_start",
+            step_id=hop_num,
+            tool_type=tool_type or None,
+            input_preview=_truncate(target, self.max_preview),
+        ))
+
+    def on_evidence_fused(
+        self,
+        hop_num: int,
+        fused_preview: str = "",
+        evidence_count: int = 0,
+        mode: str = "",
+        duration_ms: Optional[float] = None,
+        tokens: Optional[int] = None,
+    ) -> None:
+        """mode: full（全量融合）/ delta（增量融合）/ combined（随单跳综合评估完成）；tokens 为本跳融合消耗"""
+        extra: Dict[str, Any] = {"evidence_count": evidence_count}
+        if mode:
+            extra["mode"] = mode
+        if tokens is not None:
+            extra["tokens"] = tokens
+        self._emit(TraceEvent(
+            phase="evidence_fused",
+            step_id=hop_num,
+            output_preview=_truncate(fused_preview, self.max_preview),
+            duration_ms=duration_ms,
+            extra=extra,
+        ))
+
+    # ---------- 答案增量（仅推送给监听器，不写入 events） ----------
+    def on_answer_delta(self, delta: str) -> None:
+        if not delta or not self._listeners:
+            return
+        self._emit(TraceEvent(phase="answer_delta", output_preview=delta), record=False)
+
+    def on_answer_reset(self, reason: str = "") -> None:
+        """已推送的答案增量作废（流式生成中途失败，随后给出降级答案）"""
+        if not self._listeners:
+            return
+        self._emit(TraceEvent(phase="answer_reset", error=reason or None), record=False)
+
     # ---------- 证据整合/合成 ----------
     def on_synthesis_start(self, step_results_count: int = 0) -> None:
         self._start_timer("synthesis")
@@ -217,12 +276,22 @@ class TraceContext:
             extra={"status": "end", "confidence": confidence}
         ))
 
+    # ---------- token 预算 ----------
+    def on_token_budget(self, action: str, used: int = 0, budget: int = 0, detail: str = "") -> None:
+        self._emit(TraceEvent(
+            phase="token_budget",
+            extra={"action": action, "used": used, "budget": budget, **({"detail": detail} if detail else {})},
+        ))
+
     def to_dict(self) -> Dict[str, Any]:
-        return {
+        d = {
             "request_id": self.request_id,
             "events": [e.to_dict(self.max_preview) for e in self.events],
             "events_count": len(self.events),
         }
+        if self.tokens is not None and hasattr(self.tokens, "to_dict"):
+            d["tokens"] = self.tokens.to_dict()
+        return d
 
 
 class NullTraceContext:
@@ -275,6 +344,33 @@ class NullTraceContext:
     ) -> None:
         pass
 
+    def add_listener(self, listener: Any) -> None:
+        pass
+
+    @property
+    def has_listeners(self) -> bool:
+        return False
+
+    def on_hop_start(self, hop_num: int, target: str = "", tool_type: str = "") -> None:
+        pass
+
+    def on_evidence_fused(
+        self,
+        hop_num: int,
+        fused_preview: str = "",
+        evidence_count: int = 0,
+        mode: str = "",
+        duration_ms: Optional[float] = None,
+        tokens: Optional[int] = None,
+    ) -> None:
+        pass
+
+    def on_answer_delta(self, delta: str) -> None:
+        pass
+
+    def on_answer_reset(self, reason: str = "") -> None:
+        pass
+
     def on_synthesis_start(self, step_results_count: int = 0) -> None:
         pass
 
@@ -287,15 +383,22 @@ class NullTraceContext:
     def on_verification_end(self, step_id: int, verified: bool, confidence: float = 0.0) -> None:
         pass
 
+    def on_token_budget(self, action: str, used: int = 0, budget: int = 0, detail: str = "") -> None:
+        pass
+
     def to_dict(self) -> Dict[str, Any]:
         return {"request_id": "", "events": [], "events_count": 0}
 
 
 def get_trace_context_from_context(context: Optional[Dict[str, Any]]) -> Any:
-    """从 workflow/agent 的 context 中取出 TraceContext（可能为 NullTraceContext）。"""
-    if not context:
-        return NullTraceContext()
-    trace = context.get("_trace") or context.get("observability")
+    """从 workflow/agent 的 context 中取出 TraceContext（可能为 NullTraceContext）；context 中没有时回退到请求级上下文。"""
+    trace = None
+    if context:
+        trace = context.get("_trace") or context.get("observability")
+    if trace is None:
+        from ..utils.request_context import get_request_context
+        req = get_request_context()
+        trace = req.trace if req is not None else None
     if trace is None:
         return NullTraceContext()
     return trace
@@ -5,17 +5,47 @@ Skill loader - scans src/skills for python modules and loads tool objects.
 from __future__ import annotations
 
 import importlib.util
+import threading
 from pathlib import Path
-from typing import Any, List
+from typing import Any, Dict, List, Optional
 from loguru import logger
 
 from .skill_model import SkillDocument, parse_skill_md
 
+# 已执行的 skill 模块（延迟加载时同一模块的多个工具共享一次执行）
+_module_cache: Dict[str, Any] = {}
+_module_lock = threading.Lock()
 
-def load_skill_tools(skills_dir: Path) -> List[Any]:
+
+def _exec_skill_module(py: Path) -> Any:
+    key = str(py.resolve())
+    with _module_lock:
+        module = _module_cache.get(key)
+        if module is None:
+            spec = importlib.util.spec_from_file_location(f"skills.{py.stem}", str(py))
+            if not spec or not spec.loader:
+                raise ImportError(f"cannot load skill module: {py}")
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)  # type: ignore
+            _module_cache[key] = module
+    return module
+
+
+def _module_tools(module: Any) -> List[Any]:
+    tools: List[Any] = []
+    if hasattr(module, "TOOLS"):
+        tools.extend(getattr(module, "TOOLS"))
+    if hasattr(module, "TOOL"):
+        tools.append(getattr(module, "TOOL"))
+    return tools
+
+
+def load_skill_tools(skills_dir: Path, manifest: Optional[Any] = None) -> List[Any]:
     """
     Load Python-based skill tools for backward-compatibility.
     Expected pattern: each .py exposes TOOL or TOOLS compatible with BaseTool.
+
+    传入 manifest（ToolManifest）时：文件未变化的模块直接注册为 LazyTool，首次调用时才执行模块。
     """
     tools: List[Any] = []
     if not skills_dir.exists():
@@ -26,19 +56,25 @@ def load_skill_tools(skills_dir: Path) -> List[Any]:
     for py in skills_dir.glob("*.py"):
         if py.name in skip:
             continue
+        key = f"skill_py:{py.name}"
+        cached = manifest.lookup(key, py) if manifest is not None else None
+        if cached is not None:
+            from ..tools.lazy_tool import LazyTool
+            for index, item in enumerate(cached):
+                tools.append(LazyTool(
+                    name=item["name"],
+                    description=item.get("description", ""),
+                    factory=lambda py=py, index=index: _module_tools(_exec_skill_module(py))[index],
+                ))
+            continue
         try:
-            spec = importlib.util.spec_from_file_location(f"skills.{py.stem}", str(py))
-            if not spec or not spec.loader:
-                continue
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)  # type: ignore
-
-            if hasattr(module, "TOOLS"):
-                for t in getattr(module, "TOOLS"):
-                    tools.append(t)
-            if hasattr(module, "TOOL"):
-                tools.append(getattr(module, "TOOL"))
-
+            module_tools = _module_tools(_exec_skill_module(py))
+            tools.extend(module_tools)
+            if manifest is not None:
+                manifest.store(key, py, [
+                    {"name": getattr(t, "name", ""), "description": getattr(t, "description", "") or ""}
+                    for t in module_tools
+                ])
             logger.info(f"Loaded skills from {py.name}")
         except Exception as e:
             logger.warning(f"Failed to load skill module {py.name}: {e}")
@@ -72,3 +108,42 @@ def load_skills_from_skillmd(skills_root: Path) -> List[SkillDocument]:
             continue
 
     return docs
+
+
+def load_skillmd_tools(skills_root: Path, llm_client: Any, manifest: Optional[Any] = None) -> List[Any]:
+    """
+    SKILL.md -> SkillTool 列表。
+    传入 manifest 时：SKILL.md 未变化的 skill 直接用缓存的 name/description 注册为 LazyTool，
+    首次调用时才解析文件并创建 SkillTool。
+    """
+    from .skill_tool import SkillTool
+    from ..tools.lazy_tool import LazyTool
+
+    tools: List[Any] = []
+    if not skills_root.exists():
+        return tools
+    for skill_dir in skills_root.iterdir():
+        md_path = skill_dir / "SKILL.md"
+        if not skill_dir.is_dir() or not md_path.exists():
+            continue
+        key = f"skill_md:{skill_dir.name}"
+        cached = manifest.lookup(key, md_path) if manifest is not None else None
+        if cached is not None:
+            def _factory(md_path=md_path):
+                doc = parse_skill_md(md_path)
+                if doc is None:
+                    raise ValueError(f"invalid SKILL.md: {md_path}")
+                return SkillTool(document=doc, llm_client=llm_client)
+            tools.append(LazyTool(name=cached["name"], description=cached.get("description", ""), factory=_factory))
+            continue
+        try:
+            doc = parse_skill_md(md_path)
+        except Exception as e:
+            logger.warning(f"Failed to parse SKILL.md in {skill_dir}: {e}")
+            continue
+        if doc is None:
+            continue
+        tools.append(SkillTool(document=doc, llm_client=llm_client))
+        if manifest is not None:
+            manifest.store(key, md_path, {"name": doc.meta.name, "description": doc.meta.description or ""})
+    return tools
@@ -8,16 +8,26 @@ Conflict resolution:
 - global priority: tools > skills > mcps
 - within same source: try faster/last-success candidate first
 - if a candidate fails, fallback to next candidate (same source), then next source
+
+Scheduling:
+- per-candidate latency window + success rate drive the candidate order
+- hedged requests: start the historically fastest candidate, launch a backup
+  only when it runs past its p90 latency (or fails)
 """
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
 from loguru import logger
 import asyncio
-import random
+import math
 import re
+import time
+
+from src.utils.circuit_breaker import HealthRegistry, get_health_registry, is_transport_failure
+from src.utils.governor import PRIORITY_HIGH, prioritized
 
 
 def _extract_capabilities_from_description(description: str, name: str) -> List[str]:
@@ -82,8 +92,63 @@ class ToolCandidate:
     # 例如: ["search", "web", "research"] 表示这是一个搜索类工具
 
 
+@dataclass
+class CandidateStats:
+    """单个候选工具的延迟与成功率统计（最近 window 次调用的滑动窗口）"""
+    window: int = 100
+    latencies: Deque[float] = field(default_factory=deque)
+    outcomes: Deque[bool] = field(default_factory=deque)
+
+    def record(self, duration: float, success: bool, timed_out: bool = False) -> None:
+        """记录一次调用；失败调用只计入成功率（超时也计入延迟，代表长尾）"""
+        self.outcomes.append(bool(success))
+        if success or timed_out:
+            self.latencies.append(max(0.0, float(duration)))
+        while len(self.outcomes) > self.window:
+            self.outcomes.popleft()
+        while len(self.latencies) > self.window:
+            self.latencies.popleft()
+
+    @property
+    def samples(self) -> int:
+        return len(self.outcomes)
+
+    @property
+    def success_rate(self) -> float:
+        """平滑后的成功率（无样本时为 0.5）"""
+        return (sum(self.outcomes) + 1.0) / (len(self.outcomes) + 2.0)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """延迟分位数（最近秩法），无样本返回 None"""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        rank = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+        return ordered[rank]
+
+    def to_dict(self) -> Dict[str, Any]:
+        p50 = self.percentile(0.5)
+        p90 = self.percentile(0.9)
+        return {
+            "samples": self.samples,
+            "success_rate": round(self.success_rate, 3),
+            "p50": round(p50, 3) if p50 is not None else None,
+            "p90": round(p90, 3) if p90 is not None else None,
+        }
+
+
+_DEFAULT_HEDGING = {
+    "enabled": True,
+    "min_samples": 3,
+    "window": 100,
+    "default_delay": 2.0,
+    "min_delay": 0.2,
+    "max_delay": 10.0,
+}
+
+
 class ToolHub:
-    def __init__(self):
+    def __init__(self, health: Optional[HealthRegistry] = None):
         self._candidates_by_name: Dict[str, List[ToolCandidate]] = {}
         # performance cache: name -> index of last successful candidate
         self._last_success_index: Dict[str, int] = {}
@@ -95,6 +160,32 @@ class ToolHub:
         self._config_cache: Optional[Dict[str, Any]] = None
         self._config_cache_time: float = 0.0
         self._config_cache_ttl: float = 60.0  # 缓存60秒
+        # 延迟统计：(name, source) -> CandidateStats，用于排序与对冲调度
+        self._stats: Dict[Tuple[str, str], CandidateStats] = {}
+        # 熔断器/健康登记（默认使用全局实例，/health 可直接读取）
+        self._health = health
+
+    @property
+    def health(self) -> HealthRegistry:
+        if self._health is None:
+            self._health = get_health_registry()
+        return self._health
+
+    @staticmethod
+    def _health_key(cand: ToolCandidate) -> str:
+        return f"{cand.name}@{cand.source}"
+
+    def _available(self, cands: List[ToolCandidate]) -> List[ToolCandidate]:
+        """过滤掉熔断中的候选"""
+        return [c for c in cands if self.health.available(self._health_key(c))]
+
+    def _all_circuit_open(self, label: str, cands: List[ToolCandidate]) -> Dict[str, Any]:
+        logger.warning(f"ToolHub: {label} 的候选均处于熔断状态，跳过调用")
+        return {
+            "success": False,
+            "error": "all_candidates_circuit_open",
+            "_meta": {"name": label, "open": [self._health_key(c) for c in cands]},
+        }
 
     def register_candidate(self, candidate: ToolCandidate) -> None:
         arr = self._candidates_by_name.setdefault(candidate.name, [])
@@ -111,15 +202,35 @@ class ToolHub:
                     cap_lower = cap.strip().lower()
                     self._candidates_by_capability.setdefault(cap_lower, []).append(candidate)
 
+    def unregister(self, name: str) -> int:
+        """移除某名称下的全部候选（同时从能力索引中移除），返回移除数量"""
+        removed = self._candidates_by_name.pop(name, [])
+        if removed:
+            for cap, cands in list(self._candidates_by_capability.items()):
+                kept = [c for c in cands if c.name != name]
+                if kept:
+                    self._candidates_by_capability[cap] = kept
+                else:
+                    del self._candidates_by_capability[cap]
+            logger.info(f"ToolHub unregistered: {name} ({len(removed)} candidates)")
+        return len(removed)
+
     def list_tools(self) -> List[Dict[str, Any]]:
         out: List[Dict[str, Any]] = []
         for name, cands in self._candidates_by_name.items():
             out.append({
                 "name": name,
-                "candidates": [{"source": c.source, "priority": c.priority, "meta": c.meta} for c in cands],
+                "candidates": [
+                    {"source": c.source, "priority": c.priority, "meta": c.meta, "stats": self._stats_of(c).to_dict()}
+                    for c in cands
+                ],
             })
         return out
 
+    def latency_stats(self) -> Dict[str, Dict[str, Any]]:
+        """各候选的延迟/成功率统计，键为 "name@source"""
+        return {f"{name}@{source}": st.to_dict() for (name, source), st in self._stats.items()}
+
     def has_tool(self, name: str) -> bool:
         return name in self._candidates_by_name and len(self._candidates_by_name[name]) > 0
 
@@ -152,9 +263,9 @@ class ToolHub:
         返回 [(原始下标, candidate, score), ...] 按 score 降序。
         """
         if not task_ctx or not candidates:
-            # 不按固定priority排序，使用随机分数
-            import random
-            return [(i, c, random.uniform(0.0, 10.0)) for i, c in enumerate(candidates)]
+            # 无任务上下文：按历史延迟/成功率排序
+            order = self.rank_candidates(candidates)
+            return [(i, candidates[i], float(len(order) - pos)) for pos, i in enumerate(order)]
 
         capability_tags = task_ctx.get("capability_tags") or []
         attribute_tags = task_ctx.get("attribute_tags") or {}
@@ -172,10 +283,17 @@ class ToolHub:
                 return 0.0  # 不匹配则排除
             return min(10.0, 10.0 * inter / max(1, len(task_set)))
 
-        # 调用成本 (0-10)：不再根据来源固定打分，使用随机分数
+        # 调用成本 (0-10)：由历史延迟与成功率估算，样本不足时取中性分
+        hedging = self._get_hedging_config()
+        timeout = float(self._get_timeout_config() or 30.0)
+
         def cost_score(cand: ToolCandidate) -> float:
-            import random
-            return random.uniform(5.0, 10.0)
+            st = self._stats.get((cand.name, cand.source))
+            if st is None or st.samples < hedging["min_samples"]:
+                return 7.5
+            p50 = st.percentile(0.5)
+            speed = 1.0 - min(1.0, (p50 if p50 is not None else timeout) / max(timeout, 1e-6))
+            return 10.0 * speed * st.success_rate
 
         # 属性匹配 (0-10)：不根据工具来源加权，仅基于属性本身
         def attribute_match(cand: ToolCandidate) -> float:
@@ -234,14 +352,147 @@ class ToolHub:
             self._config_cache_time = current_time
             return default_timeout
 
+    def _get_hedging_config(self) -> Dict[str, Any]:
+        """获取对冲调度配置 tools.hedging（与超时配置共用缓存）"""
+        current_time = time.time()
+        if (self._config_cache is not None and "hedging" in self._config_cache and
+                current_time - self._config_cache_time < self._config_cache_ttl):
+            return self._config_cache["hedging"]
+        hedging = dict(_DEFAULT_HEDGING)
+        try:
+            from src.config.config_loader import get_config
+            tool_config = get_config().get_section("tools") or {}
+            hedging.update(tool_config.get("hedging") or {})
+        except (ImportError, AttributeError):
+            pass
+        self._get_timeout_config()
+        self._config_cache["hedging"] = hedging
+        return hedging
+
+    def _stats_of(self, cand: ToolCandidate) -> CandidateStats:
+        key = (cand.name, cand.source)
+        st = self._stats.get(key)
+        if st is None:
+            st = self._stats[key] = CandidateStats(window=int(self._get_hedging_config().get("window", 100)))
+        return st
+
+    def rank_candidates(self, candidates: List[ToolCandidate]) -> List[int]:
+        """
+        按历史表现排序候选，返回下标列表：
+        - 样本不足的候选排在前面（按 priority），以便尽快积累统计
+        - 其余按 p50 延迟 / 成功率 升序（越快越可靠越靠前）
+        - 同等条件下，最近一次成功的候选（_last_success_index）优先
+        """
+        min_samples = int(self._get_hedging_config().get("min_samples", 3))
+        last_idx = self._last_success_index.get(candidates[0].name) if candidates else None
+
+        def key(i: int) -> Tuple[int, float, int, int]:
+            cand = candidates[i]
+            not_last = 0 if i == last_idx else 1
+            st = self._stats.get((cand.name, cand.source))
+            if st is None or st.samples < min_samples:
+                return (0, float(cand.priority), not_last, i)
+            p50 = st.percentile(0.5)
+            expected = (p50 if p50 is not None else float(self._get_timeout_config() or 30.0)) / st.success_rate
+            return (1, expected, not_last, i)
+
+        return sorted(range(len(candidates)), key=key)
+
+    def _hedge_delay(self, cand: ToolCandidate) -> float:
+        """启动备份候选前等待的时间：该候选的 p90 延迟（样本不足时取默认值）"""
+        cfg = self._get_hedging_config()
+        if not cfg.get("enabled", True):
+            return 0.0
+        st = self._stats.get((cand.name, cand.source))
+        p90 = st.percentile(0.9) if st is not None and st.samples >= int(cfg.get("min_samples", 3)) else None
+        delay = float(cfg.get("default_delay", 2.0)) if p90 is None else p90
+        return max(float(cfg.get("min_delay", 0.2)), min(float(cfg.get("max_delay", 10.0)), delay))
+
+    async def _hedged_call(
+        self,
+        candidates: List[ToolCandidate],
+        input_data: Any,
+        max_parallel: int = 3,
+    ) -> Tuple[Optional[int], Dict[int, Dict[str, Any]]]:
+        """
+        对冲调用：按给定顺序先启动第一个候选，超过其 p90 延迟仍未返回时再启动下一个备份；
+        候选失败时立即启动下一个。同时在途的候选不超过 max_parallel。
+        未启用对冲（tools.hedging.enabled=false）时等价于一次并发启动 max_parallel 个。
+        返回 (首个成功候选的下标, 已完成候选的结果)。
+        """
+        results: Dict[int, Dict[str, Any]] = {}
+        running: Dict[asyncio.Task, int] = {}
+        next_pos = 0
+        last_launch = 0.0
+        max_parallel = max(1, max_parallel)
+
+        def launch() -> None:
+            nonlocal next_pos, last_launch
+            running[asyncio.create_task(self._call_candidate(candidates[next_pos], input_data))] = next_pos
+            next_pos += 1
+            last_launch = time.monotonic()
+
+        try:
+            launch()
+            while running:
+                timeout: Optional[float] = None
+                if next_pos < len(candidates) and len(running) < max_parallel:
+                    delay = self._hedge_delay(candidates[next_pos - 1])
+                    timeout = max(0.0, last_launch + delay - time.monotonic())
+                done, _ = await asyncio.wait(running.keys(), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # 当前候选超过 p90 仍未返回：启动备份
+                    launch()
+                    if self._get_hedging_config().get("enabled", True):
+                        self._count("toolhub.hedged")
+                    continue
+                for task in done:
+                    pos = running.pop(task)
+                    try:
+                        res = task.result()
+                        if not isinstance(res, dict):
+                            res = {"success": False, "error": f"unexpected_result_type: {type(res)}"}
+                    except Exception as e:
+                        logger.warning(f"ToolHub hedged task {pos} raised exception: {e}")
+                        res = {"success": False, "error": str(e)}
+                    results[pos] = res
+                    if res.get("success"):
+                        if pos > 0:
+                            self._count("toolhub.backup_wins")
+                        return pos, results
+                # 有候选失败：立即补位
+                for _ in done:
+                    if next_pos < len(candidates) and len(running) < max_parallel:
+                        launch()
+            return None, results
+        finally:
+            for task in running:
+                if not task.done():
+                    task.cancel()
+                    try:
+                        await task
+                    except (asyncio.CancelledError, Exception):
+                        pass
+
+    @staticmethod
+    def _count(name: str) -> None:
+        try:
+            from src.utils.metrics import get_metrics
+            get_metrics().increment(name)
+        except (ImportError, AttributeError):
+            pass
+
     async def _call_candidate(self, cand: ToolCandidate, input_data: Any, timeout: Optional[float] = None) -> Dict[str, Any]:
         """
         安全调用单个候选工具，统一结果结构。
         支持超时控制，防止工具执行时间过长。
-        优化：添加性能监控和资源清理。
+        优化：添加性能监控和资源清理；记录延迟/成功率统计（被取消的调用不计入）。
+        熔断中的候选直接返回 circuit_open，不等待超时；异常、超时与传输层错误计入熔断器，
+        工具正常返回的失败（如无结果）视为候选可用。
         """
-        import time
-        
+        health_key = self._health_key(cand)
+        if not self.health.allow(health_key):
+            return {"success": False, "error": "circuit_open", "_meta": {"source": cand.source, "circuit_open": True}}
         timeout = timeout or self._get_timeout_config()
         start_time = time.time()
         task: Optional[asyncio.Task] = None
@@ -283,6 +534,8 @@ class ToolHub:
             except (ImportError, AttributeError):
                 pass
             
+            self._stats_of(cand).record(duration, False, timed_out=True)
+            self.health.record_failure(health_key, f"timeout after {timeout}s", timed_out=True)
             return {"success": False, "error": f"tool_timeout_after_{timeout}s", "_meta": {"source": cand.source}}
         except asyncio.CancelledError:
                 # 任务被取消（正常情况）
@@ -293,6 +546,7 @@ class ToolHub:
                     metrics.record_performance(f"tool_execution_{cand.name}", duration)
                 except (ImportError, AttributeError):
                     pass  # 如果 metrics 不可用，忽略
+                self.health.release(health_key)
                 raise
         except Exception as e:
             duration = time.time() - start_time
@@ -307,6 +561,8 @@ class ToolHub:
             except (ImportError, AttributeError):
                 pass
             
+            self._stats_of(cand).record(duration, False)
+            self.health.record_failure(health_key, str(e))
             return {"success": False, "error": str(e), "_meta": {"source": cand.source}}
 
         if result is None:
@@ -320,66 +576,13 @@ class ToolHub:
 
         result.setdefault("_meta", {})
         result["_meta"].update({"source": cand.source})
+        self._stats_of(cand).record(duration, bool(result.get("success")))
+        if is_transport_failure(result):
+            self.health.record_failure(health_key, str(result.get("error")))
+        else:
+            self.health.record_success(health_key)
         return result
 
-    def _pick_best(self, results: Dict[int, Dict[str, Any]], cands: List[ToolCandidate]) -> Optional[int]:
-        """
-        从一批候选结果中挑选“最优”下标：
-        - success=True
-        - result 非空且长度尽量长
-        - 同等条件下优先 priority 更高的候选
-        """
-        best_idx: Optional[int] = None
-        best_score: float = -1.0
-
-        for idx, res in results.items():
-            if not res.get("success"):
-                continue
-            
-            # 检查是否有明显错误标记
-            error = res.get("error", "")
-            if error and any(kw in error.lower() for kw in ["timeout", "failed", "exception", "error"]):
-                continue
-            
-            val = res.get("result")
-            text = ""
-            if isinstance(val, str):
-                text = val.strip()
-            elif val is not None:
-                text = str(val).strip()
-
-            # 空结果或过短结果跳过
-            if not text or len(text) < 3:
-                continue
-
-            # 质量评分（检查是否有结构化数据）
-            quality_score = 0.0
-            if isinstance(val, dict):
-                quality_score = 0.2  # 结构化数据加分
-                # 检查是否有有用的字段
-                if any(k in val for k in ["results", "data", "content", "items"]):
-                    quality_score = 0.3
-
-            # 长度评分（优化：更智能的长度评估）
-            if len(text) < 10:
-                length_score = 0.3  # 过短结果降分
-            elif len(text) <= 500:
-                length_score = min(len(text), 500) / 500.0  # 0~1，理想长度
-            elif len(text) <= 2000:
-                length_score = 0.8 - (len(text) - 500) / 1500.0 * 0.3  # 逐渐降分
-            else:
-                length_score = 0.5 * (1.0 - min((len(text) - 2000) / 5000.0, 0.5))  # 过长结果大幅降分
-
-            # 不再使用优先级评分，更公平地评估
-            # 综合评分（可配置权重，当前：长度70% + 质量30%）
-            score = 0.7 * length_score + 0.3 * quality_score
-
-            if score > best_score:
-                best_score = score
-                best_idx = idx
-
-        return best_idx
-
     async def execute_by_capability(
         self,
         capability: str,
@@ -400,6 +603,11 @@ class ToolHub:
                 "error": f"no_tools_with_capability: {capability}",
                 "suggestions": self._suggest_similar_capabilities(capability)
             }
+        # 跳过熔断中的候选
+        available = self._available(cands)
+        if not available:
+            return self._all_circuit_open(capability, cands)
+        cands = available
 
         if task_ctx:
             # 豆包策略：按 task_ctx 动态打分排序
@@ -408,121 +616,43 @@ class ToolHub:
             if not sorted_cands:
                 sorted_cands = list(cands)
         else:
-            # 不按固定priority排序，随机顺序
-            sorted_cands = list(cands)
-            random.shuffle(sorted_cands)
+            # 按历史延迟/成功率排序（样本不足的候选优先试用）
+            sorted_cands = [cands[i] for i in self.rank_candidates(cands)]
 
         # 决定策略：如果相似工具 <= 2，全部调用；否则根据工具类型决定
         num_tools = len(sorted_cands)
         should_synthesize = self._should_synthesize(capability, capability, num_tools)
         
-        # 并发调用（如果应该综合，调用所有工具；否则最多 max_parallel 个）
-        if should_synthesize and num_tools <= 2:
-            # 全部调用
-            batch_size = num_tools
-        else:
-            batch_size = min(max_parallel, len(sorted_cands))
-        
-        first_batch = sorted_cands[:batch_size]
-        tasks = {i: asyncio.create_task(self._call_candidate(cand, input_data)) for i, cand in enumerate(first_batch)}
-        
-        # 根据策略决定等待方式
         if should_synthesize:
-            # 综合策略：等待所有任务完成
-            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            # 综合策略：并发调用一批（相似工具 <= 2 时全部调用），等待所有任务完成
+            batch_size = num_tools if num_tools <= 2 else min(max_parallel, num_tools)
+            first_batch = sorted_cands[:batch_size]
+            gathered = await asyncio.gather(
+                *[self._call_candidate(cand, input_data) for cand in first_batch],
+                return_exceptions=True,
+            )
             results: List[Dict[str, Any]] = []
-            for i in range(batch_size):
-                try:
-                    res = tasks[i].result()
-                    if isinstance(res, dict):
-                        results.append(res)
-                    else:
-                        results.append({"success": False, "error": f"unexpected_result_type: {type(res)}"})
-                except Exception as e:
-                    logger.warning(f"ToolHub capability task {i} raised exception: {e}")
-                    results.append({"success": False, "error": str(e)})
+            for i, res in enumerate(gathered):
+                if isinstance(res, dict):
+                    results.append(res)
+                elif isinstance(res, BaseException):
+                    logger.warning(f"ToolHub capability task {i} raised exception: {res}")
+                    results.append({"success": False, "error": str(res)})
+                else:
+                    results.append({"success": False, "error": f"unexpected_result_type: {type(res)}"})
             
             # 综合所有成功的结果
             return await self._synthesize_results(results, capability, input_data, llm_client)
-        else:
-            # 选最优策略：第一个成功后立即取消其他任务
-            try:
-                done, pending = await asyncio.wait(
-                    tasks.values(),
-                    return_when=asyncio.FIRST_COMPLETED,
-                    timeout=None
-                )
-                
-                # 检查是否有成功的结果
-                results: Dict[int, Dict[str, Any]] = {}
-                best_idx: Optional[int] = None
-                
-                for completed_task in done:
-                    for i, task in tasks.items():
-                        if task == completed_task:
-                            try:
-                                res = task.result()
-                                if isinstance(res, dict):
-                                    results[i] = res
-                                    if res.get("success") and best_idx is None:
-                                        best_idx = i
-                                else:
-                                    results[i] = {"success": False, "error": f"unexpected_result_type: {type(res)}"}
-                            except Exception as e:
-                                logger.warning(f"ToolHub capability task {i} raised exception: {e}")
-                                results[i] = {"success": False, "error": str(e)}
-                            break
-                
-                # 如果找到成功的结果，取消其他任务
-                if best_idx is not None:
-                    for task in pending:
-                        task.cancel()
-                        try:
-                            await task
-                        except asyncio.CancelledError:
-                            pass
-                    return results[best_idx]
-                
-                # 如果没有成功的结果，等待所有任务完成
-                if pending:
-                    await asyncio.gather(*pending, return_exceptions=True)
-                    for pending_task in pending:
-                        for i, task in tasks.items():
-                            if task == pending_task:
-                                try:
-                                    res = task.result()
-                                    if isinstance(res, dict):
-                                        results[i] = res
-                                    else:
-                                        results[i] = {"success": False, "error": f"unexpected_result_type: {type(res)}"}
-                                except Exception as e:
-                                    logger.warning(f"ToolHub capability task {i} raised exception: {e}")
-                                    results[i] = {"success": False, "error": str(e)}
-                                break
-                
-                # 重新选优
-                best_idx = self._pick_best(results, first_batch)
-                if best_idx is not None:
-                    return results[best_idx]
-            finally:
-                # 确保所有任务都被清理
-                for task in tasks.values():
-                    if not task.done():
-                        task.cancel()
-                        try:
-                            await task
-                        except (asyncio.CancelledError, Exception):
-                            pass
-
-        # 第一批失败，尝试剩余候选
-        remaining = sorted_cands[batch_size:]
-        all_errors: List[str] = []
-        for cand in remaining:
-            res = await self._call_candidate(cand, input_data)
-            if res.get("success"):
-                return res
-            all_errors.append(f"{cand.name}({cand.source}): {res.get('error', 'unknown')}")
 
+        # 选最优策略：对冲调用，首个成功结果即返回
+        best_pos, results_by_pos = await self._hedged_call(sorted_cands, input_data, max_parallel=max_parallel)
+        if best_pos is not None:
+            return results_by_pos[best_pos]
+
+        all_errors = [
+            f"{sorted_cands[pos].name}({sorted_cands[pos].source}): {res.get('error', 'unknown')}"
+            for pos, res in sorted(results_by_pos.items())
+        ]
         return {
             "success": False, 
             "error": "all_capability_tools_failed", 
@@ -583,6 +713,7 @@ class ToolHub:
         # 默认：如果有多个工具，综合回答（更安全）
         return num_tools > 1
 
+    @prioritized(PRIORITY_HIGH)
     async def _synthesize_results(
         self, 
         results: List[Dict[str, Any]], 
@@ -785,6 +916,10 @@ class ToolHub:
             # 全部被能力过滤掉，回退到按 priority 顺序
             ordered = [(i, c, 10.0 - c.priority) for i, c in enumerate(cands)]
             ordered.sort(key=lambda x: -x[2])
+        # 跳过熔断中的候选
+        ordered = [item for item in ordered if self.health.available(self._health_key(item[1]))]
+        if not ordered:
+            return self._all_circuit_open(name, cands)
 
         all_errors: List[str] = []
         for idx, cand, _ in ordered:
@@ -794,7 +929,9 @@ class ToolHub:
                     self._last_success_index[name] = idx
                 return res
             all_errors.append(f"{cand.source}: {res.get('error', 'unknown')}")
-            # 仅重试 1 次
+            # 仅重试 1 次（本次失败导致熔断时不再重试）
+            if not self.health.available(self._health_key(cand)):
+                continue
             res2 = await self._call_candidate(cand, input_data)
             if res2.get("success"):
                 async with self._update_lock:
@@ -822,6 +959,10 @@ class ToolHub:
         if task_ctx:
             return await self.execute_with_task_context(name, input_data, task_ctx, llm_client)
 
+        # 跳过熔断中的候选
+        if not self._available(cands):
+            return self._all_circuit_open(name, cands)
+
         # 单一候选保留原有顺序逻辑
         if len(cands) == 1:
             res = await self._call_candidate(cands[0], input_data)
@@ -830,48 +971,32 @@ class ToolHub:
                     self._last_success_index[name] = 0
             return res
 
+        # 构造候选顺序：按历史延迟/成功率排序（样本不足的候选优先试用），跳过熔断中的候选
+        base_order = [
+            idx for idx in self.rank_candidates(cands)
+            if self.health.available(self._health_key(cands[idx]))
+        ]
+
         # 决定策略
-        should_synthesize = self._should_synthesize(name, None, len(cands))
-
-        # 构造候选顺序：最近成功优先，不按固定priority排序
-        base_order = list(range(len(cands)))
-        # 移除固定的priority排序，让系统根据实际成功情况自动调整
-        start_idx = self._last_success_index.get(name)
-        if start_idx is not None and 0 <= start_idx < len(cands):
-            if start_idx in base_order:
-                base_order.remove(start_idx)
-            base_order.insert(0, start_idx)
-        # 随机打乱剩余顺序，避免固定模式
-        random.shuffle(base_order)
-
-        # 根据策略决定批次大小
-        if should_synthesize and len(cands) <= 2:
-            # 全部调用
-            batch_size = len(cands)
-        else:
-            # 最多3个
-            batch_size = min(3, len(base_order))
-        
-        first_batch = base_order[:batch_size]
-        # 在同一 priority 层内轻微打乱，避免总是固定同一个
-        random.shuffle(first_batch)
+        should_synthesize = self._should_synthesize(name, None, len(base_order))
 
-        tasks = {idx: asyncio.create_task(self._call_candidate(cands[idx], input_data)) for idx in first_batch}
-        
         if should_synthesize:
-            # 综合策略：等待所有任务完成
-            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            # 综合策略：并发调用一批（候选 <= 2 时全部调用，否则最多 3 个），等待所有任务完成
+            batch_size = len(base_order) if len(base_order) <= 2 else 3
+            first_batch = base_order[:batch_size]
+            gathered = await asyncio.gather(
+                *[self._call_candidate(cands[idx], input_data) for idx in first_batch],
+                return_exceptions=True,
+            )
             results: List[Dict[str, Any]] = []
-            for idx in first_batch:
-                try:
-                    res = tasks[idx].result()
-                    if isinstance(res, dict):
-                        results.append(res)
-                    else:
-                        results.append({"success": False, "error": f"unexpected_result_type: {type(res)}"})
-                except Exception as e:
-                    logger.warning(f"ToolHub parallel task {idx} raised exception: {e}")
-                    results.append({"success": False, "error": str(e)})
+            for idx, res in zip(first_batch, gathered):
+                if isinstance(res, dict):
+                    results.append(res)
+                elif isinstance(res, BaseException):
+                    logger.warning(f"ToolHub parallel task {idx} raised exception: {res}")
+                    results.append({"success": False, "error": str(res)})
+                else:
+                    results.append({"success": False, "error": f"unexpected_result_type: {type(res)}"})
             
             # 综合所有成功的结果
             synthesized = await self._synthesize_results(results, name, input_data, llm_client)
@@ -883,97 +1008,23 @@ class ToolHub:
                             self._last_success_index[name] = first_batch[i]
                         break
             return synthesized
-        else:
-            # 选最优策略：第一个成功后立即取消其他任务
-            try:
-                done, pending = await asyncio.wait(
-                    tasks.values(),
-                    return_when=asyncio.FIRST_COMPLETED,
-                    timeout=None
-                )
-                
-                # 检查是否有成功的结果
-                parallel_results: Dict[int, Dict[str, Any]] = {}
-                best_idx: Optional[int] = None
-                
-                for completed_task in done:
-                    for idx, task in tasks.items():
-                        if task == completed_task:
-                            try:
-                                res = task.result()
-                                if isinstance(res, dict):
-                                    parallel_results[idx] = res
-                                    if res.get("success") and best_idx is None:
-                                        best_idx = idx
-                                else:
-                                    parallel_results[idx] = {"success": False, "error": f"unexpected_result_type: {type(res)}"}
-                            except Exception as e:
-                                logger.warning(f"ToolHub parallel task {idx} raised exception: {e}")
-                                parallel_results[idx] = {"success": False, "error": str(e)}
-                            break
-                
-                # 如果找到成功的结果，取消其他任务
-                if best_idx is not None:
-                    for task in pending:
-                        task.cancel()
-                        try:
-                            await task
-                        except asyncio.CancelledError:
-                            pass
-                    
-                    async with self._update_lock:
-                        self._last_success_index[name] = best_idx
-                    return parallel_results[best_idx]
-                
-                # 如果没有成功的结果，等待所有任务完成
-                if pending:
-                    await asyncio.gather(*pending, return_exceptions=True)
-                    for pending_task in pending:
-                        for idx, task in tasks.items():
-                            if task == pending_task:
-                                try:
-                                    res = task.result()
-                                    if isinstance(res, dict):
-                                        parallel_results[idx] = res
-                                    else:
-                                        parallel_results[idx] = {"success": False, "error": f"unexpected_result_type: {type(res)}"}
-                                except Exception as e:
-                                    logger.warning(f"ToolHub parallel task {idx} raised exception: {e}")
-                                    parallel_results[idx] = {"success": False, "error": str(e)}
-                                break
-                
-                # 重新选优
-                best_idx = self._pick_best(parallel_results, cands)
-                if best_idx is not None:
-                    async with self._update_lock:
-                        self._last_success_index[name] = best_idx
-                    return parallel_results[best_idx]
-            finally:
-                # 确保所有任务都被清理
-                for task in tasks.values():
-                    if not task.done():
-                        task.cancel()
-                        try:
-                            await task
-                        except (asyncio.CancelledError, Exception):
-                            pass
-
-        # 并发批次没有成功结果，对剩余候选按顺序依次尝试
-        remaining = [i for i in base_order if i not in first_batch]
+
+        # 选最优策略：先启动历史最快的候选，超过其 p90 仍未返回再启动备份，首个成功结果即返回
+        ordered = [cands[idx] for idx in base_order]
+        best_pos, results_by_pos = await self._hedged_call(ordered, input_data, max_parallel=3)
+        if best_pos is not None:
+            async with self._update_lock:
+                self._last_success_index[name] = base_order[best_pos]
+            return results_by_pos[best_pos]
+
         all_errors: List[str] = []
-        for idx in remaining:
-            res = await self._call_candidate(cands[idx], input_data)
-            if res.get("success"):
-                async with self._update_lock:
-                    self._last_success_index[name] = idx
-                return res
+        for pos, res in sorted(results_by_pos.items()):
             error_msg = str(res.get("error") or "tool_failed")
-            all_errors.append(f"{cands[idx].source}: {error_msg}")
-            logger.warning(f"ToolHub candidate failed: {name} from {cands[idx].source}: {error_msg}")
+            all_errors.append(f"{ordered[pos].source}: {error_msg}")
+            logger.warning(f"ToolHub candidate failed: {name} from {ordered[pos].source}: {error_msg}")
 
         return {
             "success": False, 
             "error": "all_candidates_failed", 
             "_meta": {"name": name, "errors": all_errors[:5]}  # 只保留前5个错误
         }
-
@@ -1,23 +1,36 @@
 """
 工具模块
+
+工具类按需导入（模块级 __getattr__）：导入 src.tools 或其中单个工具模块不会连带导入
+bs4、duckduckgo_search 等重量级依赖，延迟注册的工具占位因此真正推迟了这些导入
 """
 
-from .tool_registry import ToolRegistry
-from .search_tool import SearchTool
-from .calculator_tool import CalculatorTool
-from .time_tool import TimeTool
-from .conversation_history_tool import ConversationHistoryTool
-from .workspace_files_tool import WorkspaceFilesTool
-from .advanced_web_search_tool import AdvancedWebSearchTool
-from .web_search_crawl_tool import WebSearchCrawlTool
-
-__all__ = [
-    "ToolRegistry",
-    "SearchTool",
-    "CalculatorTool",
-    "TimeTool",
-    "ConversationHistoryTool",
-    "WorkspaceFilesTool",
-    "AdvancedWebSearchTool",
-    "WebSearchCrawlTool",
-]
+import importlib
+from typing import Any
+
+# 导出名 -> 所在子模块
+_EXPORTS = {
+    "ToolRegistry": "tool_registry",
+    "SearchTool": "search_tool",
+    "CalculatorTool": "calculator_tool",
+    "TimeTool": "time_tool",
+    "ConversationHistoryTool": "conversation_history_tool",
+    "WorkspaceFilesTool": "workspace_files_tool",
+    "AdvancedWebSearchTool": "advanced_web_search_tool",
+    "WebSearchCrawlTool": "web_search_crawl_tool",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
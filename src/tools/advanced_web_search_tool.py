@@ -63,8 +63,16 @@ class DuckDuckGoSimpleEngine:
         if DDGS is None:
             logger.warning("duckduckgo_search 未安装，DuckDuckGoSimpleEngine 不可用")
             return []
+        from ..utils.cassette import cassette_call
+        from ..utils.governor import get_governor
+
         results: List[AdvSearchItem] = []
-        raw_results = DDGS().text(query, max_results=num_results)
+        with get_governor().limit_sync("search:duckduckgo"):
+            raw_results = cassette_call(
+                "search",
+                {"engine": "duckduckgo", "query": query, "max_results": num_results},
+                lambda: list(DDGS().text(query, max_results=num_results)),
+            )
         for i, item in enumerate(raw_results):
             if isinstance(item, dict):
                 title = item.get("title") or f"DuckDuckGo Result {i+1}"
@@ -117,40 +125,53 @@ class BingSimpleEngine:
         try:
             url = "https://www.bing.com/search"
             params = {"q": query}
-            res = self.session.get(url, params=params, timeout=10)
+            from ..utils.governor import get_governor
+            with get_governor().limit_sync("search:bing"):
+                res = self.session.get(url, params=params, timeout=10)
             res.raise_for_status()
         except Exception as e:
+            # 请求失败向上抛出，由调用方兜底（失败结果不进入搜索结果缓存）
             logger.warning(f"BingSimpleEngine 请求失败: {e}")
+            raise
+
+        # 结果页解析交给 HTML 解析进程池（本方法已在工作线程中执行）
+        from ..utils.html_parse import get_html_parse_pool
+        return get_html_parse_pool().run_sync(parse_bing_html, res.text, num_results, label=url) or []
+
+
+def parse_bing_html(html: str, num_results: int = 10) -> List[AdvSearchItem]:
+    """解析 Bing 结果页的标题/URL/摘要（模块级函数，便于在解析进程池中执行）"""
+    if BeautifulSoup is None or not html:
+        return []
+    from ..utils.html_parse import make_soup
+    try:
+        soup = make_soup(html)
+        ol = soup.find("ol", id="b_results")
+        if not ol:
             return []
-
-        try:
-            soup = BeautifulSoup(res.text, "html.parser")  # type: ignore[arg-type]
-            ol = soup.find("ol", id="b_results")
-            if not ol:
-                return []
-            items: List[AdvSearchItem] = []
-            for li in ol.find_all("li", class_="b_algo"):
-                if len(items) >= num_results:
-                    break
-                h2 = li.find("h2")
-                if not h2 or not h2.a:
-                    continue
-                title = h2.get_text(strip=True) or "Bing Result"
-                link = h2.a.get("href", "")
-                p = li.find("p")
-                desc = p.get_text(strip=True) if p else ""
-                items.append(
-                    AdvSearchItem(
-                        title=title,
-                        url=link,
-                        description=desc,
-                        source="bing",
-                    )
+        items: List[AdvSearchItem] = []
+        for li in ol.find_all("li", class_="b_algo"):
+            if len(items) >= num_results:
+                break
+            h2 = li.find("h2")
+            if not h2 or not h2.a:
+                continue
+            title = h2.get_text(strip=True) or "Bing Result"
+            link = h2.a.get("href", "")
+            p = li.find("p")
+            desc = p.get_text(strip=True) if p else ""
+            items.append(
+                AdvSearchItem(
+                    title=title,
+                    url=link,
+                    description=desc,
+                    source="bing",
                 )
-            return items
-        except Exception as e:
-            logger.warning(f"BingSimpleEngine 解析失败: {e}")
-            return []
+            )
+        return items
+    except Exception as e:
+        logger.warning(f"BingSimpleEngine 解析失败: {e}")
+        return []
 
 
 class AdvancedWebSearchTool(BaseTool):
@@ -235,20 +256,16 @@ class AdvancedWebSearchTool(BaseTool):
             f"AdvancedWebSearchTool: 搜索 query='{query}', num_results={num_results}, fetch_content={fetch_content}"
         )
 
-        # 先用 DuckDuckGo，若无结果再用 Bing 兜底
+        # 先用 DuckDuckGo，若无结果再用 Bing 兜底（均经搜索结果缓存，返回副本可直接修改）
         results: List[AdvSearchItem] = []
         try:
-            results = await asyncio.get_event_loop().run_in_executor(
-                None, lambda: self.ddg_engine.perform_search(query, num_results)
-            )
+            results = await self._search("duckduckgo", self.ddg_engine, query, num_results)
         except Exception as e:
             logger.warning(f"DuckDuckGo 搜索失败: {e}")
 
         if not results:
             try:
-                results = await asyncio.get_event_loop().run_in_executor(
-                    None, lambda: self.bing_engine.perform_search(query, num_results)
-                )
+                results = await self._search("bing", self.bing_engine, query, num_results)
             except Exception as e:
                 logger.warning(f"Bing 搜索失败: {e}")
 
@@ -286,6 +303,19 @@ class AdvancedWebSearchTool(BaseTool):
             "count": len(norm_results),
         }
 
+    async def _search(self, engine_name: str, engine: Any, query: str, num_results: int) -> List[AdvSearchItem]:
+        """在线程中执行 engine.perform_search，按 (引擎, 规范化查询, 结果数) 缓存"""
+        from ..utils.serp_cache import get_serp_cache
+
+        serp_cache = get_serp_cache()
+        if serp_cache is None:
+            return await asyncio.get_event_loop().run_in_executor(
+                None, lambda: engine.perform_search(query, num_results)
+            )
+        return await serp_cache.get_or_search(
+            engine_name, query, lambda: engine.perform_search(query, num_results), num_results=num_results
+        ) or []
+
     async def _fetch_contents(self, items: List[AdvSearchItem]) -> None:
         """为若干结果抓取网页正文（简单版本，注意超时与长度控制）。"""
 
@@ -295,20 +325,36 @@ class AdvancedWebSearchTool(BaseTool):
             if not it.url:
                 return
             try:
-                def _req() -> Optional[str]:
-                    resp = requests.get(it.url, timeout=8)  # type: ignore[call-arg]
-                    if resp.status_code != 200:
-                        return None
-                    soup = BeautifulSoup(resp.text, "html.parser")
-                    for tag in soup(["script", "style", "header", "footer", "nav"]):
-                        tag.extract()
-                    text = soup.get_text(separator="\n", strip=True)
-                    if not text:
-                        return None
-                    # 控制正文长度，避免 token 爆炸
-                    return " ".join(text.split())[:8000]
-
-                content = await asyncio.get_event_loop().run_in_executor(None, _req)
+                from ..utils.governor import get_governor
+                from ..utils.html_parse import get_html_parse_pool
+                from ..utils.http_cache import get_http_cache
+
+                http_cache = get_http_cache()
+                # 页面未变化时直接复用已提取的正文，跳过网络请求与 HTML 解析（SQLite 读写在线程中进行）
+                content = None
+                if http_cache is not None:
+                    content = await asyncio.to_thread(http_cache.get_extracted, it.url, "adv_search_text")
+                if content is None:
+                    def _req() -> Optional[str]:
+                        if http_cache is not None:
+                            html, _ = http_cache.fetch(it.url, timeout=8)
+                            return html
+                        with get_governor().limit_sync("fetch"):
+                            resp = requests.get(it.url, timeout=8)  # type: ignore[call-arg]
+                        if resp.status_code != 200:
+                            return None
+                        return resp.text
+
+                    html = await asyncio.get_event_loop().run_in_executor(None, _req)
+                    if html:
+                        # 正文提取在 HTML 解析进程池中进行，控制正文长度，避免 token 爆炸
+                        page = await get_html_parse_pool().parse_page(
+                            html, it.url, max_text_chars=8000, with_links=False,
+                            strip_tags=("script", "style", "header", "footer", "nav"),
+                        )
+                        content = page.text or None
+                        if content and http_cache is not None:
+                            await asyncio.to_thread(http_cache.set_extracted, it.url, "adv_search_text", content)
                 if content:
                     # 这里不单独暴露 raw_content，避免结构过重；
                     # 直接把前一部分给到 description，后续再由 ExecutionAgent 截断。
@@ -0,0 +1,209 @@
+"""
+异步爬取引擎 - 优先级 frontier + 并发抓取
+
+- frontier 为按相关性得分排序的优先队列，得分最高的链接先抓取
+- 同时最多 max_in_flight 个页面在途，单个站点最多 per_host_limit 个并发
+- 同一站点相邻两次请求间隔至少 politeness_delay 秒
+- 页面处理回调判定已找到答案时立即停止，并取消所有在途请求
+
+取消的限制：同步抓取函数（requests）经 thread_fetcher 放到有界线程池中执行。取消只能丢弃尚未开始的抓取；
+已在线程中进行的请求无法中断，会跑到其自身超时为止（结果被丢弃）。线程池大小即为这类残留请求的上限。
+"""
+
+import asyncio
+import contextvars
+import heapq
+import inspect
+import itertools
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from loguru import logger
+
+
+# 抓取函数：url -> (html 或 None, 错误信息)
+Fetcher = Callable[[str], Awaitable[Tuple[Optional[str], Optional[str]]]]
+# 链接打分函数：(url, 链接文本) -> 得分
+LinkScorer = Callable[[str, str], float]
+# 页面处理回调：(url, html) -> (待跟进链接 [(url, 链接文本)], 是否已找到答案)；可为同步或异步函数
+PageHandler = Callable[[str, str], Any]
+
+
+def thread_fetcher(fetch_sync: Callable[[str], Tuple[Optional[str], Optional[str]]], executor: Executor) -> Fetcher:
+    """
+    把同步抓取函数包装为异步 Fetcher，在给定的（有界）线程池中执行。
+
+    与 asyncio.to_thread 相比：线程池有上限，取消时排队中尚未开始的抓取会被直接丢弃；
+    同样会复制当前 contextvars（请求上下文、governor 优先级）到工作线程。
+    """
+    async def fetch(url: str) -> Tuple[Optional[str], Optional[str]]:
+        loop = asyncio.get_running_loop()
+        ctx = contextvars.copy_context()
+        return await loop.run_in_executor(executor, ctx.run, fetch_sync, url)
+    return fetch
+
+
+@dataclass
+class CrawlResult:
+    """一次爬取的统计"""
+    pages_fetched: int = 0        # 成功抓取并处理的页面数
+    pages_failed: int = 0         # 抓取失败的页面数
+    cancelled: int = 0            # 提前终止时取消的在途请求数
+    answer_found: bool = False    # 是否因找到答案而提前终止
+    answer_url: Optional[str] = None
+    elapsed: float = 0.0
+    fetched_urls: List[str] = field(default_factory=list)
+
+
+class AsyncCrawlEngine:
+    """按优先级并发扩展 frontier 的爬取引擎"""
+
+    def __init__(
+        self,
+        fetch: Fetcher,
+        score: LinkScorer,
+        on_page: PageHandler,
+        max_in_flight: int = 4,
+        per_host_limit: int = 2,
+        politeness_delay: float = 0.5,
+        max_pages: int = 30,
+    ):
+        """
+        Args:
+            fetch: 异步抓取函数
+            score: 链接相关性打分函数（得分越高越先抓取）
+            on_page: 页面处理回调，返回后续链接与是否已找到答案
+            max_in_flight: 同时在途的页面数上限
+            per_host_limit: 单个站点的并发上限
+            politeness_delay: 同一站点相邻请求的最小间隔（秒）
+            max_pages: 最多抓取（启动）的页面数
+        """
+        self.fetch = fetch
+        self.score = score
+        self.on_page = on_page
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.per_host_limit = max(1, int(per_host_limit))
+        self.politeness_delay = max(0.0, float(politeness_delay))
+        self.max_pages = max(0, int(max_pages))
+
+        self._frontier: List[Tuple[float, int, str, str]] = []
+        self._seq = itertools.count()
+        self._seen: Set[str] = set()
+        self._host_in_flight: Dict[str, int] = {}
+        self._host_next_slot: Dict[str, float] = {}
+
+    def add_links(self, links: Iterable[Tuple[str, str]]) -> int:
+        """把链接加入 frontier（已见过的跳过），返回新增数量"""
+        added = 0
+        for url, link_text in links:
+            if not url or url in self._seen:
+                continue
+            self._seen.add(url)
+            try:
+                score = float(self.score(url, link_text or ""))
+            except Exception:
+                score = 0.0
+            heapq.heappush(self._frontier, (-score, next(self._seq), url, link_text or ""))
+            added += 1
+        return added
+
+    def mark_seen(self, urls: Iterable[str]) -> None:
+        """标记无需再抓取的 URL（如已处理过的第一层结果）"""
+        self._seen.update(u for u in urls if u)
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return urlparse(url).netloc.lower()
+
+    def _next_candidate(self) -> Optional[Tuple[str, str]]:
+        """取出得分最高、且所在站点未达并发上限的链接"""
+        deferred = []
+        chosen = None
+        while self._frontier:
+            item = heapq.heappop(self._frontier)
+            if self._host_in_flight.get(self._host(item[2]), 0) < self.per_host_limit:
+                chosen = (item[2], item[3])
+                break
+            deferred.append(item)
+        for item in deferred:
+            heapq.heappush(self._frontier, item)
+        return chosen
+
+    async def _fetch_polite(self, url: str, delay: float) -> Tuple[Optional[str], Optional[str]]:
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return await self.fetch(url)
+
+    async def _handle(self, url: str, html: str) -> Tuple[List[Tuple[str, str]], bool]:
+        outcome = self.on_page(url, html)
+        if inspect.isawaitable(outcome):
+            outcome = await outcome
+        links, found = outcome if outcome else ([], False)
+        return list(links or []), bool(found)
+
+    async def crawl(self, seeds: Iterable[Tuple[str, str]] = ()) -> CrawlResult:
+        """从 seeds（及此前 add_links 加入的链接）开始爬取，直到找到答案、frontier 耗尽或达到页面上限"""
+        result = CrawlResult()
+        started = time.perf_counter()
+        self.add_links(seeds)
+        running: Dict[asyncio.Task, str] = {}
+        launched = 0
+
+        try:
+            while True:
+                # 补满在途请求
+                while len(running) < self.max_in_flight and launched < self.max_pages:
+                    candidate = self._next_candidate()
+                    if candidate is None:
+                        break
+                    url, _ = candidate
+                    host = self._host(url)
+                    now = time.monotonic()
+                    slot = max(now, self._host_next_slot.get(host, 0.0))
+                    self._host_next_slot[host] = slot + self.politeness_delay
+                    self._host_in_flight[host] = self._host_in_flight.get(host, 0) + 1
+                    task = asyncio.ensure_future(self._fetch_polite(url, slot - now))
+                    running[task] = url
+                    launched += 1
+
+                if not running:
+                    break
+
+                done, _ = await asyncio.wait(running.keys(), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    url = running.pop(task)
+                    host = self._host(url)
+                    self._host_in_flight[host] = max(0, self._host_in_flight.get(host, 1) - 1)
+                    try:
+                        html, err = task.result()
+                    except Exception as e:
+                        html, err = None, str(e)
+                    if err or not html:
+                        result.pages_failed += 1
+                        logger.debug(f"爬取失败 {url}: {err}")
+                        continue
+                    result.pages_fetched += 1
+                    result.fetched_urls.append(url)
+                    links, found = await self._handle(url, html)
+                    if found:
+                        result.answer_found = True
+                        result.answer_url = url
+                        break
+                    self.add_links(links)
+                if result.answer_found:
+                    break
+        finally:
+            for task in running:
+                if not task.done():
+                    task.cancel()
+                    result.cancelled += 1
+            if running:
+                await asyncio.gather(*running.keys(), return_exceptions=True)
+            if result.cancelled:
+                logger.info(f"爬取提前终止，取消 {result.cancelled} 个在途请求")
+
+        result.elapsed = time.perf_counter() - started
+        return result
@@ -0,0 +1,136 @@
+"""
+延迟加载工具与注册清单 - 缩短 AgentOrchestrator 启动时间
+
+- LazyTool：只持有 name/description 的轻量占位，首次 execute 时才导入模块/实例化真实工具
+  （在线程中进行，不阻塞事件循环）
+- ToolManifest：磁盘上的注册清单（JSON），按源文件 mtime+size 缓存工具元数据；
+  文件未变化时无需导入模块、执行 skill 脚本或解析 SKILL.md 即可完成注册
+"""
+
+import asyncio
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from loguru import logger
+
+from .tool_registry import BaseTool
+
+# 清单格式版本：元数据结构变化时递增，旧清单自动失效
+MANIFEST_VERSION = 1
+
+
+class LazyTool(BaseTool):
+    """延迟实例化的工具占位"""
+
+    def __init__(self, name: str, description: str, factory: Callable[[], Any]):
+        super().__init__(name=name, description=description)
+        self._factory = factory
+        self._tool: Any = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._tool is not None
+
+    def resolve(self) -> Any:
+        """导入/实例化真实工具（只执行一次）"""
+        if self._tool is None:
+            with self._lock:
+                if self._tool is None:
+                    tool = self._factory()
+                    if tool is None:
+                        raise RuntimeError(f"lazy tool factory returned None: {self.name}")
+                    self._tool = tool
+                    logger.debug(f"延迟加载工具完成: {self.name}")
+        return self._tool
+
+    async def execute(self, input_data: Any) -> Dict[str, Any]:
+        try:
+            tool = self._tool if self._tool is not None else await asyncio.to_thread(self.resolve)
+        except Exception as e:
+            logger.warning(f"延迟加载工具失败: {self.name}: {e}")
+            return {"success": False, "error": f"tool_load_failed: {e}"}
+        return await tool.execute(input_data)
+
+    def get_schema(self) -> Dict[str, Any]:
+        return self.resolve().get_schema() if self.loaded else super().get_schema()
+
+    def __getattr__(self, item: str) -> Any:
+        # 仅在常规属性查找失败时触发：把工具特有的属性/方法转发给真实工具
+        if item.startswith("_"):
+            raise AttributeError(item)
+        return getattr(self.resolve(), item)
+
+
+def file_signature(path: Path) -> Optional[list]:
+    """文件签名 [mtime_ns, size]；文件不存在时返回 None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+class ToolManifest:
+    """按文件签名缓存工具元数据的注册清单"""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: 清单文件路径，None 表示只在内存中使用（不持久化）
+        """
+        self.path = Path(path) if path else None
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self) -> None:
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8")) or {}
+            if data.get("version") == MANIFEST_VERSION:
+                self._entries = data.get("entries") or {}
+        except Exception as e:
+            logger.debug(f"工具注册清单读取失败（忽略）: {e}")
+
+    def lookup(self, key: str, source: Path) -> Optional[Any]:
+        """源文件签名与清单一致时返回缓存的元数据，否则返回 None"""
+        entry = self._entries.get(key)
+        sig = file_signature(source)
+        if entry is not None and sig is not None and entry.get("sig") == sig:
+            self.hits += 1
+            return entry.get("data")
+        self.misses += 1
+        return None
+
+    def store(self, key: str, source: Path, data: Any) -> None:
+        sig = file_signature(source)
+        if sig is None:
+            return
+        self._entries[key] = {"sig": sig, "data": data}
+        self._dirty = True
+
+    def save(self) -> None:
+        """有变化时写回磁盘（原子替换）"""
+        if self.path is None or not self._dirty:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            tmp.write_text(
+                json.dumps({"version": MANIFEST_VERSION, "entries": self._entries}, ensure_ascii=False),
+                encoding="utf-8",
+            )
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except Exception as e:
+            logger.debug(f"工具注册清单写入失败（忽略）: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -8,6 +8,8 @@ import requests
 from typing import Dict, Any, Optional, List, Union
 from loguru import logger
 from .tool_registry import BaseTool
+from ..utils.serp_cache import get_serp_cache
+from ..utils.governor import get_governor, retry_after_seconds
 
 # 确保requests可用
 try:
@@ -20,13 +22,14 @@ except ImportError:
 class SearchTool(BaseTool):
     """网络搜索工具"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
         super().__init__(
             name="search_web",
             description="使用搜索引擎搜索网络信息，适用于查找事实、最新信息、学术资料等"
         )
         self.api_key = api_key or os.getenv("SERPAPI_KEY")
-        self.base_url = "https://serpapi.com/search"
+        # SERPAPI_BASE_URL 可指向兼容 SerpAPI 的服务（如本地基准测试的模拟搜索服务）
+        self.base_url = base_url or os.getenv("SERPAPI_BASE_URL") or "https://serpapi.com/search"
     
     async def execute(self, input_data: Any) -> Dict[str, Any]:
         """
@@ -72,6 +75,19 @@ class SearchTool(BaseTool):
                 "results": []
             }
         
+        # 按规范化查询命中搜索结果缓存时不再请求 SerpAPI
+        serp_cache = get_serp_cache()
+        if serp_cache is not None:
+            cached_results = serp_cache.get("serpapi", query, hl="zh-cn", gl="cn", num=5)
+            if cached_results is not None:
+                return {
+                    "success": True,
+                    "query": query,
+                    "results": cached_results,
+                    "count": len(cached_results),
+                    "cached": True,
+                }
+
         try:
             # 在异步环境中运行同步的requests调用
             loop = asyncio.get_event_loop()
@@ -84,11 +100,15 @@ class SearchTool(BaseTool):
                 "num": 5  # 返回前5个结果
             }
             
-            # 使用 run_in_executor 避免阻塞事件循环
-            response = await loop.run_in_executor(
-                None,
-                lambda: requests.get(self.base_url, params=params, timeout=10)
-            )
+            # 使用 run_in_executor 避免阻塞事件循环；请求经出站调用管控（search:serpapi 预算）
+            governor = get_governor()
+            async with governor.limit("search:serpapi"):
+                response = await loop.run_in_executor(
+                    None,
+                    lambda: requests.get(self.base_url, params=params, timeout=10)
+                )
+            if response.status_code == 429:
+                governor.penalize("search:serpapi", retry_after_seconds(response.headers))
             response.raise_for_status()
             
             # 检查响应内容是否为空
@@ -118,6 +138,8 @@ class SearchTool(BaseTool):
             
             if not results:
                 logger.warning(f"搜索 '{query}' 未返回结果")
+            if serp_cache is not None:
+                serp_cache.set("serpapi", query, results, hl="zh-cn", gl="cn", num=5)
             
             return {
                 "success": True,
@@ -11,8 +11,9 @@ from __future__ import annotations
 import asyncio
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, List, Optional, Set, Tuple
-from urllib.parse import quote, urljoin, urlparse
+from urllib.parse import quote, urlsplit
 
 from loguru import logger
 
@@ -31,6 +32,13 @@ try:
 except ImportError:
     DDGS = None
 
+from ..utils.html_parse import extract_links, extract_page, get_html_parse_pool, make_soup
+from ..utils.http_cache import get_http_cache
+from ..utils.serp_cache import get_serp_cache
+from ..utils.cassette import cassette_call
+from ..utils.evidence_compressor import compress_text
+from ..utils.governor import get_governor
+from .crawl_engine import AsyncCrawlEngine, thread_fetcher
 from .tool_registry import BaseTool
 
 
@@ -40,6 +48,9 @@ DEFAULT_MAX_DEPTH = 30
 DEFAULT_MAX_RESULTS_PER_SOURCE = 10
 DEFAULT_MAX_CHARS_PER_PAGE = 8000
 DEFAULT_MAX_TOTAL_CHARS = 16000
+DEFAULT_MAX_IN_FLIGHT = 4
+DEFAULT_PER_HOST_LIMIT = 2
+DEFAULT_POLITENESS_DELAY = 0.5
 ANSWER_KEYWORDS = ("公里", "千米", "米", "千米", "km", "米", "厘米", "毫米", "年", "月", "日", "时", "分", "秒", "元", "美元", "人", "个", "条", "次")
 # 问答句式与数字+单位模式
 ANSWER_PATTERNS = (
@@ -48,8 +59,151 @@ ANSWER_PATTERNS = (
     r"约为?\s*\d+[\d.]*\s*(?:公里|千米|米|km|元|人|个)",
     r"\d+[\d.]*\s*(?:公里|千米|米|km)\s*(?:左右|约)?",
 )
-# “查看更多/展开”等可点击文本
-MORE_BUTTON_TEXTS = ("查看更多", "展开", "展开更多", "阅读全文", "查看全部", "more", "expand", "read more")
+# 搜索结果页所在站点：从这些页面出发时允许跟进跨域链接
+SEARCH_HOSTS = ("www.baidu.com", "www.zhihu.com", "m.baidu.com")
+
+
+# 搜索结果页（含接口）路径：这类响应随查询变化、可能是反爬验证页，不进入 HTTP 缓存（由搜索结果缓存按引擎 TTL 缓存解析结果）
+_SERP_PATHS = ("/s", "/api/v4/search_v3")
+# 反爬/验证页特征：命中时不写入 HTTP 缓存
+_BLOCKED_PAGE_MARKERS = ("百度安全验证", "安全验证", "网络不给力，请稍后重试", "访问过于频繁", "captcha", "unusual traffic")
+
+
+def _is_search_result_url(url: str) -> bool:
+    """是否为搜索引擎结果页 URL"""
+    parts = urlsplit(url)
+    return (parts.hostname or "") in SEARCH_HOSTS and parts.path.rstrip("/") in _SERP_PATHS
+
+
+def _is_cacheable_page(text: str) -> bool:
+    """页面可写入 HTTP 缓存：非空且不是反爬/验证页"""
+    if not text or not text.strip():
+        return False
+    head = text[:4096].lower()
+    return not any(marker.lower() in head for marker in _BLOCKED_PAGE_MARKERS)
+
+
+def _governor_key_for(url: str) -> str:
+    """出站调用管控的预算键：搜索引擎结果页为 search:<engine>，其余为 fetch"""
+    host = urlsplit(url).hostname or ""
+    if host in SEARCH_HOSTS:
+        return "search:zhihu" if "zhihu" in host else "search:baidu"
+    return "fetch"
+
+
+# 搜索结果页解析为模块级函数，便于在 HTML 解析进程池中执行
+def parse_baidu_html(html: str, query: str = "") -> List[Dict[str, Any]]:
+    """解析百度 PC 搜索结果页。若页面为动态加载无结果块，则整页兜底提取外链。"""
+    if BeautifulSoup is None or not html:
+        return []
+    try:
+        soup = make_soup(html)
+        results: List[Dict[str, Any]] = []
+        seen_hrefs: Set[str] = set()
+        content_left = soup.find(id="content_left")
+        if content_left:
+            for div in content_left.find_all("div", class_=re.compile(r"c-container|result")):
+                if len(results) >= DEFAULT_MAX_RESULTS_PER_SOURCE:
+                    break
+                title_el = div.find("h3") or div.find("a")
+                link_el = div.find("a", href=True)
+                if not link_el:
+                    continue
+                href = link_el.get("href", "").strip()
+                if not href.startswith("http"):
+                    continue
+                title = (title_el.get_text(strip=True) if title_el else "") or "无标题"
+                snippet_el = div.find("div", class_=re.compile(r"c-abstract|content-right"))
+                snippet = (snippet_el.get_text(strip=True) if snippet_el else "")[:500]
+                results.append({
+                    "title": title,
+                    "snippet": snippet,
+                    "link": href,
+                    "source": "baidu",
+                })
+                seen_hrefs.add(href)
+        if results:
+            return results
+        # 兜底：无 content_left 或未匹配到块时，整页提取外链（与移动端类似）
+        for a in soup.find_all("a", href=re.compile(r"^https?://")):
+            if len(results) >= DEFAULT_MAX_RESULTS_PER_SOURCE:
+                break
+            href = a.get("href", "").strip()
+            if "baidu.com" in href and ("link?" in href or "baidu.com/s?" in href):
+                continue
+            if href in seen_hrefs:
+                continue
+            seen_hrefs.add(href)
+            title = a.get_text(strip=True) or "无标题"
+            if len(title) < 2:
+                continue
+            results.append({
+                "title": title[:200],
+                "snippet": "",
+                "link": href,
+                "source": "baidu",
+            })
+        return results
+    except Exception as e:
+        logger.warning(f"百度解析失败: {e}")
+        return []
+
+
+def parse_baidu_mobile_html(html: str, query: str = "") -> List[Dict[str, Any]]:
+    """解析百度移动端 m.baidu.com 结果页；多种选择器兜底。"""
+    if BeautifulSoup is None or not html:
+        return []
+    try:
+        soup = make_soup(html)
+        results = []
+        seen_hrefs: Set[str] = set()
+        for div in soup.find_all("div", class_=re.compile(r"result|c-container|result-op|c-result|item")):
+            if len(results) >= DEFAULT_MAX_RESULTS_PER_SOURCE:
+                break
+            link_el = div.find("a", href=True)
+            if not link_el:
+                continue
+            href = link_el.get("href", "").strip()
+            if not href.startswith("http") or "baidu.com" in href and "link?" in href:
+                continue
+            if href in seen_hrefs:
+                continue
+            seen_hrefs.add(href)
+            title = link_el.get_text(strip=True) or "无标题"
+            snippet_el = div.find(class_=re.compile(r"content|abstract|desc|c-abstract|text"))
+            snippet = (snippet_el.get_text(strip=True) if snippet_el else "")[:500]
+            if not snippet:
+                snippet = div.get_text(strip=True)[:500]
+            results.append({
+                "title": title[:200],
+                "snippet": snippet,
+                "link": href,
+                "source": "baidu_m",
+            })
+        if results:
+            return results
+        for a in soup.find_all("a", href=re.compile(r"^https?://")):
+            if len(results) >= DEFAULT_MAX_RESULTS_PER_SOURCE:
+                break
+            href = a.get("href", "").strip()
+            if "baidu.com" in href and ("link?" in href or "baidu.com/s?" in href):
+                continue
+            if href in seen_hrefs:
+                continue
+            seen_hrefs.add(href)
+            title = a.get_text(strip=True) or "无标题"
+            if len(title) < 2:
+                continue
+            results.append({
+                "title": title[:200],
+                "snippet": "",
+                "link": href,
+                "source": "baidu_m",
+            })
+        return results
+    except Exception as e:
+        logger.warning(f"百度移动端解析失败: {e}")
+        return []
 
 
 class WebSearchCrawlTool(BaseTool):
@@ -68,6 +222,9 @@ class WebSearchCrawlTool(BaseTool):
         timeout: int = DEFAULT_TIMEOUT,
         max_depth: int = DEFAULT_MAX_DEPTH,
         max_result_tokens: int = 4000,
+        max_in_flight: Optional[int] = None,
+        per_host_limit: Optional[int] = None,
+        politeness_delay: Optional[float] = None,
     ):
         super().__init__(
             name="web_search_crawl",
@@ -80,6 +237,28 @@ class WebSearchCrawlTool(BaseTool):
         self.max_depth = max_depth
         self.max_result_chars = max_result_tokens * 4
         self._session: Optional[requests.Session] = None
+        # 深度爬取并发配置（tools.crawl），参数显式传入时优先
+        crawl_cfg: Dict[str, Any] = {}
+        try:
+            from ..config.config_loader import get_config
+            crawl_cfg = get_config().get("tools.crawl", {}) or {}
+        except Exception:
+            pass
+        self.max_in_flight = int(max_in_flight or crawl_cfg.get("max_in_flight", DEFAULT_MAX_IN_FLIGHT))
+        self.per_host_limit = int(per_host_limit or crawl_cfg.get("per_host_limit", DEFAULT_PER_HOST_LIMIT))
+        self.politeness_delay = float(
+            politeness_delay if politeness_delay is not None
+            else crawl_cfg.get("politeness_delay", DEFAULT_POLITENESS_DELAY)
+        )
+        self._fetch_executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_fetch_executor(self) -> ThreadPoolExecutor:
+        """深度爬取的抓取线程池：大小为 max_in_flight，取消后仍在运行的请求不会超过该数量"""
+        if self._fetch_executor is None:
+            self._fetch_executor = ThreadPoolExecutor(
+                max_workers=self.max_in_flight, thread_name_prefix="crawl-fetch"
+            )
+        return self._fetch_executor
 
     def _get_session(self) -> requests.Session:
         if self._session is None and requests is not None:
@@ -114,147 +293,60 @@ class WebSearchCrawlTool(BaseTool):
         if not requests:
             return None, "requests 未安装"
         session = self._get_session()
-        orig_headers = dict(session.headers)
+        # 按请求传入 headers，不修改共享 session（并发抓取时互不影响）
+        headers = None
         if mobile_ua:
-            session.headers["User-Agent"] = (
-                "Mozilla/5.0 (Linux; Android 10; Mobile) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Mobile Safari/537.36"
+            headers = {
+                "User-Agent": (
+                    "Mozilla/5.0 (Linux; Android 10; Mobile) "
+                    "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Mobile Safari/537.36"
+                )
+            }
+        # 出站调用管控：搜索结果页按搜索引擎计预算，其余页面计入 fetch
+        governor_key = _governor_key_for(url)
+        # 启用 HTTP 缓存时（仅内容页）：新鲜命中不发请求，过期则条件请求重新验证；
+        # 搜索结果页不经 HTTP 缓存，反爬/空页面不写入缓存
+        http_cache = get_http_cache() if not _is_search_result_url(url) else None
+        if http_cache is not None:
+            return http_cache.fetch(
+                url, session=session, timeout=self.timeout, headers=headers, retries=retries,
+                governor_key=governor_key, cacheable=_is_cacheable_page,
             )
-        try:
-            for attempt in range(retries):
-                try:
-                    resp = session.get(url, timeout=self.timeout)
-                    resp.raise_for_status()
-                    if resp.encoding is None or resp.encoding.lower() == "iso-8859-1":
-                        resp.encoding = resp.apparent_encoding or "utf-8"
-                    return resp.text, None
-                except Exception as e:
-                    err = str(e)
-                    logger.warning(f"请求失败 {url} attempt={attempt + 1}: {err}")
-            return None, "请求失败或超时"
-        finally:
-            if mobile_ua:
-                session.headers.update(orig_headers)
+        governor = get_governor()
+        for attempt in range(retries):
+            try:
+                with governor.limit_sync(governor_key):
+                    resp = session.get(url, timeout=self.timeout, headers=headers)
+                resp.raise_for_status()
+                if resp.encoding is None or resp.encoding.lower() == "iso-8859-1":
+                    resp.encoding = resp.apparent_encoding or "utf-8"
+                return resp.text, None
+            except Exception as e:
+                err = str(e)
+                logger.warning(f"请求失败 {url} attempt={attempt + 1}: {err}")
+        return None, "请求失败或超时"
 
     def _parse_baidu(self, html: str, query: str) -> List[Dict[str, Any]]:
-        """解析百度 PC 搜索结果页。若页面为动态加载无结果块，则整页兜底提取外链。"""
-        if not BeautifulSoup or not html:
-            return []
-        try:
-            soup = BeautifulSoup(html, "html.parser")
-            results: List[Dict[str, Any]] = []
-            seen_hrefs: Set[str] = set()
-            content_left = soup.find(id="content_left")
-            if content_left:
-                for div in content_left.find_all("div", class_=re.compile(r"c-container|result")):
-                    if len(results) >= DEFAULT_MAX_RESULTS_PER_SOURCE:
-                        break
-                    title_el = div.find("h3") or div.find("a")
-                    link_el = div.find("a", href=True)
-                    if not link_el:
-                        continue
-                    href = link_el.get("href", "").strip()
-                    if not href.startswith("http"):
-                        continue
-                    title = (title_el.get_text(strip=True) if title_el else "") or "无标题"
-                    snippet_el = div.find("div", class_=re.compile(r"c-abstract|content-right"))
-                    snippet = (snippet_el.get_text(strip=True) if snippet_el else "")[:500]
-                    results.append({
-                        "title": title,
-                        "snippet": snippet,
-                        "link": href,
-                        "source": "baidu",
-                    })
-                    seen_hrefs.add(href)
-            if results:
-                return results
-            # 兜底：无 content_left 或未匹配到块时，整页提取外链（与移动端类似）
-            for a in soup.find_all("a", href=re.compile(r"^https?://")):
-                if len(results) >= DEFAULT_MAX_RESULTS_PER_SOURCE:
-                    break
-                href = a.get("href", "").strip()
-                if "baidu.com" in href and ("link?" in href or "baidu.com/s?" in href):
-                    continue
-                if href in seen_hrefs:
-                    continue
-                seen_hrefs.add(href)
-                title = a.get_text(strip=True) or "无标题"
-                if len(title) < 2:
-                    continue
-                results.append({
-                    "title": title[:200],
-                    "snippet": "",
-                    "link": href,
-                    "source": "baidu",
-                })
-            return results
-        except Exception as e:
-            logger.warning(f"百度解析失败: {e}")
-            return []
+        """解析百度 PC 搜索结果页（见 parse_baidu_html）。"""
+        return parse_baidu_html(html, query)
 
     def _parse_baidu_mobile(self, html: str, query: str) -> List[Dict[str, Any]]:
-        """解析百度移动端 m.baidu.com 结果页；多种选择器兜底。"""
-        if not BeautifulSoup or not html:
-            return []
-        try:
-            soup = BeautifulSoup(html, "html.parser")
-            results = []
-            seen_hrefs: Set[str] = set()
-            for div in soup.find_all("div", class_=re.compile(r"result|c-container|result-op|c-result|item")):
-                if len(results) >= DEFAULT_MAX_RESULTS_PER_SOURCE:
-                    break
-                link_el = div.find("a", href=True)
-                if not link_el:
-                    continue
-                href = link_el.get("href", "").strip()
-                if not href.startswith("http") or "baidu.com" in href and "link?" in href:
-                    continue
-                if href in seen_hrefs:
-                    continue
-                seen_hrefs.add(href)
-                title = link_el.get_text(strip=True) or "无标题"
-                snippet_el = div.find(class_=re.compile(r"content|abstract|desc|c-abstract|text"))
-                snippet = (snippet_el.get_text(strip=True) if snippet_el else "")[:500]
-                if not snippet:
-                    snippet = div.get_text(strip=True)[:500]
-                results.append({
-                    "title": title[:200],
-                    "snippet": snippet,
-                    "link": href,
-                    "source": "baidu_m",
-                })
-            if results:
-                return results
-            for a in soup.find_all("a", href=re.compile(r"^https?://")):
-                if len(results) >= DEFAULT_MAX_RESULTS_PER_SOURCE:
-                    break
-                href = a.get("href", "").strip()
-                if "baidu.com" in href and ("link?" in href or "baidu.com/s?" in href):
-                    continue
-                if href in seen_hrefs:
-                    continue
-                seen_hrefs.add(href)
-                title = a.get_text(strip=True) or "无标题"
-                if len(title) < 2:
-                    continue
-                results.append({
-                    "title": title[:200],
-                    "snippet": "",
-                    "link": href,
-                    "source": "baidu_m",
-                })
-            return results
-        except Exception as e:
-            logger.warning(f"百度移动端解析失败: {e}")
-            return []
+        """解析百度移动端 m.baidu.com 结果页（见 parse_baidu_mobile_html）。"""
+        return parse_baidu_mobile_html(html, query)
 
-    def _fetch_duckduckgo(self, query: str) -> List[Dict[str, Any]]:
-        """DuckDuckGo 兜底：当百度/知乎均无结果时调用，返回与第一层相同结构。"""
+    def _fetch_duckduckgo(self, query: str) -> Optional[List[Dict[str, Any]]]:
+        """DuckDuckGo 兜底：当百度/知乎均无结果时调用，返回与第一层相同结构；请求失败返回 None。"""
         if not query or DDGS is None:
             return []
         try:
             results: List[Dict[str, Any]] = []
-            for item in DDGS().text(query, max_results=DEFAULT_MAX_RESULTS_PER_SOURCE):
+            with get_governor().limit_sync("search:duckduckgo"):
+                raw_results = cassette_call(
+                    "search",
+                    {"engine": "duckduckgo", "query": query, "max_results": DEFAULT_MAX_RESULTS_PER_SOURCE},
+                    lambda: list(DDGS().text(query, max_results=DEFAULT_MAX_RESULTS_PER_SOURCE)),
+                )
+            for item in raw_results:
                 if isinstance(item, dict):
                     title = item.get("title") or ""
                     href = item.get("href") or item.get("link") or ""
@@ -272,7 +364,7 @@ class WebSearchCrawlTool(BaseTool):
             return results
         except Exception as e:
             logger.warning(f"DuckDuckGo 搜索失败: {e}")
-            return []
+            return None
 
     def _parse_zhihu_api(self, text: str, query: str) -> List[Dict[str, Any]]:
         """解析知乎搜索 API 返回的 JSON。"""
@@ -362,9 +454,13 @@ class WebSearchCrawlTool(BaseTool):
         return text[:max_chars] + "..."
 
     def _smart_truncate(self, text: str, max_chars: int, query: str) -> str:
-        """智能截断：保留含关键词的句子、开头和结尾重要部分，移除明显无关内容。"""
-        if not text or len(text) <= max_chars:
-            return text
+        """
+        智能截断：开启证据压缩时把正文切段后按与 query 的相关性（BM25）挑选段落；
+        否则保留含关键词的句子、开头和结尾重要部分，移除明显无关内容。
+        """
+        compressed = compress_text(text, query, max_chars)
+        if compressed is not None:
+            return compressed
         query_words = set(re.findall(r"[\w\u4e00-\u9fff]+", query.lower()))
         query_words.discard("")
         lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
@@ -387,61 +483,8 @@ class WebSearchCrawlTool(BaseTool):
         return combined or text[:max_chars] + "..."
 
     def _extract_links(self, soup: Any, base_url: str, visited: Set[str]) -> List[Tuple[str, str]]:
-        """提取可跟进链接：<a href>、查看更多/展开旁的 <a>、.more/.expand 内 <a>，以及 onclick 中的 URL（仅记录）。"""
-        if not soup:
-            return []
-        seen_urls: Set[str] = set()
-        out: List[Tuple[str, str]] = []
-        try:
-            base_domain = urlparse(base_url).netloc
-
-            def _add_link(href: str, link_text: str) -> None:
-                if not href or href.startswith("#") or href.startswith("javascript:"):
-                    return
-                full_url = urljoin(base_url, href)
-                if not full_url.startswith("http"):
-                    return
-                parsed = urlparse(full_url)
-                if parsed.netloc != base_domain and base_domain not in ("www.baidu.com", "www.zhihu.com", "m.baidu.com"):
-                    return
-                if full_url in visited or full_url in seen_urls:
-                    return
-                if any(x in full_url.lower() for x in ("login", "signin", "logout", "javascript", "void(0)")):
-                    return
-                seen_urls.add(full_url)
-                out.append((full_url, link_text or ""))
-
-            for a in soup.find_all("a", href=True):
-                href = a.get("href", "").strip()
-                link_text = a.get_text(strip=True) or ""
-                _add_link(href, link_text)
-
-            for tag in soup.find_all(True, class_=re.compile(r"more|expand|read-more|show-more", re.I)):
-                a = tag.find("a", href=True)
-                if a:
-                    _add_link(a.get("href", "").strip(), a.get_text(strip=True) or tag.get_text(strip=True)[:50])
-
-            for node in soup.find_all(string=re.compile("|".join(re.escape(t) for t in MORE_BUTTON_TEXTS))):
-                parent = getattr(node, "parent", None)
-                if not parent:
-                    continue
-                a = None
-                if getattr(parent, "name", None) == "a" and parent.get("href"):
-                    a = parent
-                else:
-                    a = parent.find("a", href=True) if hasattr(parent, "find") else None
-                if a:
-                    txt = a.get_text(strip=True) if hasattr(a, "get_text") else ""
-                    _add_link(a.get("href", "").strip(), txt[:80])
-
-            for tag in soup.find_all(attrs={"onclick": True}):
-                onclick = (tag.get("onclick") or "").strip()
-                m = re.search(r"['\"](https?://[^'\"]+)['\"]", onclick)
-                if m:
-                    _add_link(m.group(1), tag.get_text(strip=True)[:80] or "onclick")
-        except Exception as e:
-            logger.debug(f"_extract_links error: {e}")
-        return out
+        """提取可跟进链接（见 html_parse.extract_links）；搜索结果页允许跨域跳转。"""
+        return extract_links(soup, base_url, visited, cross_domain_hosts=SEARCH_HOSTS)
 
     def _score_link_relevance(self, url: str, link_text: str, query: str) -> float:
         """简单相关性：query 词在 url + link_text 中出现越多得分越高。"""
@@ -453,38 +496,42 @@ class WebSearchCrawlTool(BaseTool):
         return sum(1 for w in query_words if len(w) > 1 and w in combined) / max(1, len(query_words))
 
     def _parse_page_text_and_links(self, html: str, page_url: str) -> Tuple[str, List[Tuple[str, str]]]:
-        """从 HTML 提取正文与链接。用于深度爬取时的子页面。"""
-        if not BeautifulSoup or not html:
-            return "", []
+        """从 HTML 提取正文与链接（同步版本；异步路径使用 HTML 解析进程池）。"""
         try:
-            soup = BeautifulSoup(html, "html.parser")
-            for tag in soup(["script", "style", "nav", "header", "footer"]):
-                tag.decompose()
-            text = soup.get_text(separator="\n", strip=True)
-            text = " ".join(text.split())[:DEFAULT_MAX_CHARS_PER_PAGE]
-            links = self._extract_links(soup, page_url, set())
-            return text, links
+            page = extract_page(html, page_url, DEFAULT_MAX_CHARS_PER_PAGE, cross_domain_hosts=SEARCH_HOSTS)
+            return page.text, page.links
         except Exception as e:
             logger.debug(f"_parse_page_text_and_links: {e}")
             return "", []
 
+    async def _cached_search(self, engine: str, query: str, search) -> Optional[List[Dict[str, Any]]]:
+        """经搜索结果缓存执行 search()；search 返回 None 表示请求失败（不缓存）"""
+        serp_cache = get_serp_cache()
+        if serp_cache is None:
+            if asyncio.iscoroutinefunction(search):
+                return await search()
+            return await asyncio.to_thread(search)
+        return await serp_cache.get_or_search(engine, query, search)
+
     async def _fetch_first_layer(self, query: str) -> List[Dict[str, Any]]:
-        """第一层：并发请求百度与知乎，合并结果。"""
+        """第一层：并发请求百度与知乎，合并结果（按规范化查询缓存）。"""
         all_results: List[Dict[str, Any]] = []
         loop = asyncio.get_event_loop()
 
-        def do_baidu():
+        async def do_baidu():
+            # 抓取在线程中进行，结果页解析交给 HTML 解析进程池
+            pool = get_html_parse_pool()
             url = self._build_url("baidu", query)
-            text, err = self._fetch_page(url)
+            text, err = await loop.run_in_executor(None, lambda: self._fetch_page(url))
             if err:
                 logger.warning(f"百度请求失败: {err}")
-                return []
-            results = self._parse_baidu(text or "", query)
+                return None
+            results = await pool.run(parse_baidu_html, text or "", query, label=url) or []
             if not results:
                 url_m = self._build_url("baidu", query, mobile=True)
-                text_m, err_m = self._fetch_page(url_m, mobile_ua=True)
+                text_m, err_m = await loop.run_in_executor(None, lambda: self._fetch_page(url_m, mobile_ua=True))
                 if not err_m and text_m:
-                    results = self._parse_baidu_mobile(text_m, query)
+                    results = await pool.run(parse_baidu_mobile_html, text_m, query, label=url_m) or []
                     if results:
                         logger.info("百度 PC 无结果块，使用移动端解析成功")
             return results
@@ -494,13 +541,13 @@ class WebSearchCrawlTool(BaseTool):
             text, err = self._fetch_page(url)
             if err:
                 logger.warning(f"知乎请求失败: {err}")
-                return []
+                return None
             return self._parse_zhihu_api(text or "", query)
 
         try:
             baidu_r, zhihu_r = await asyncio.gather(
-                loop.run_in_executor(None, do_baidu),
-                loop.run_in_executor(None, do_zhihu),
+                self._cached_search("baidu", query, do_baidu),
+                self._cached_search("zhihu", query, do_zhihu),
             )
             all_results.extend(baidu_r or [])
             all_results.extend(zhihu_r or [])
@@ -509,9 +556,8 @@ class WebSearchCrawlTool(BaseTool):
 
         if not all_results and DDGS is not None:
             try:
-                ddg_results = await loop.run_in_executor(
-                    None,
-                    lambda: self._fetch_duckduckgo(query),
+                ddg_results = await self._cached_search(
+                    "duckduckgo", query, lambda: self._fetch_duckduckgo(query)
                 )
                 all_results.extend(ddg_results or [])
                 if ddg_results:
@@ -528,7 +574,6 @@ class WebSearchCrawlTool(BaseTool):
         max_depth: int,
     ) -> Dict[str, Any]:
         """多步深度：从第一层结果中找直接答案或选链接继续抓取。"""
-        visited: Set[str] = set()
         summaries: List[str] = []
         sources: List[str] = []
         total_chars = 0
@@ -552,49 +597,61 @@ class WebSearchCrawlTool(BaseTool):
         if max_depth <= 1:
             return {"direct_answer": None, "sources": sources[:20], "summaries": summaries[:30], "confidence": 0.5, "search_depth": 1}
 
-        current_depth = 1
-        candidates: List[Tuple[str, str, float]] = []
-        for r in first_layer_results:
-            link = r.get("link", "")
-            if link and link not in visited:
-                title = r.get("title", "")
-                score = self._score_link_relevance(link, title, query)
-                candidates.append((link, title, score))
-        candidates.sort(key=lambda x: -x[2])
-
-        loop = asyncio.get_event_loop()
-        while candidates and current_depth < max_depth:
-            url, link_text, _ = candidates.pop(0)
-            if url in visited:
-                continue
-            visited.add(url)
-            result = await loop.run_in_executor(None, lambda u=url: self._fetch_page(u))
-            if result is None:
-                continue
-            text, err = result
-            if err or not text:
-                continue
-            current_depth += 1
-            page_text, next_links = self._parse_page_text_and_links(text or "", url)
+        # 后续层：按相关性优先级并发抓取，找到答案即取消在途请求
+        found: Dict[str, Any] = {}
+
+        pool = get_html_parse_pool()
+
+        async def on_page(url: str, html: str) -> Tuple[List[Tuple[str, str]], bool]:
+            nonlocal total_chars
+            # 页面未变化时复用已缓存的提取结果，跳过 HTML 解析
+            # （SQLite 读写放到线程中，不阻塞事件循环）
+            http_cache = get_http_cache()
+            page = None
+            if http_cache is not None:
+                page = await asyncio.to_thread(http_cache.get_extracted, url, "crawl_page")
+            if page is None:
+                page = await pool.parse_page(
+                    html, url, max_text_chars=DEFAULT_MAX_CHARS_PER_PAGE, cross_domain_hosts=SEARCH_HOSTS
+                )
+                if http_cache is not None and (page.text or page.links):
+                    await asyncio.to_thread(http_cache.set_extracted, url, "crawl_page", page)
+            page_text, next_links = page.text, page.links
             truncated = self._smart_truncate(page_text, 1500, query)
             if truncated and total_chars + len(truncated) <= self.max_result_chars:
                 summaries.append(truncated)
                 total_chars += len(truncated)
             sources.append(url)
             if self._is_answer_found(page_text, query):
-                return {
-                    "direct_answer": self._smart_truncate(page_text, 2000, query),
-                    "sources": sources[:20],
-                    "summaries": summaries[:30],
-                    "confidence": 0.8,
-                    "search_depth": current_depth,
-                }
-            for next_url, next_text in next_links:
-                if next_url in visited:
-                    continue
-                score = self._score_link_relevance(next_url, next_text, query)
-                candidates.append((next_url, next_text, score))
-            candidates.sort(key=lambda x: -x[2])
+                found["direct_answer"] = self._smart_truncate(page_text, 2000, query)
+                return [], True
+            return next_links, False
+
+        engine = AsyncCrawlEngine(
+            fetch=thread_fetcher(self._fetch_page, self._get_fetch_executor()),
+            score=lambda url, text: self._score_link_relevance(url, text, query),
+            on_page=on_page,
+            max_in_flight=self.max_in_flight,
+            per_host_limit=self.per_host_limit,
+            politeness_delay=self.politeness_delay,
+            max_pages=max_depth - 1,
+        )
+        crawl = await engine.crawl(
+            (r.get("link", ""), r.get("title", "")) for r in first_layer_results if r.get("link")
+        )
+        current_depth = 1 + crawl.pages_fetched
+        logger.info(
+            f"深度爬取完成：抓取 {crawl.pages_fetched} 页，失败 {crawl.pages_failed} 页，"
+            f"耗时 {crawl.elapsed:.2f}s，{'已找到答案' if crawl.answer_found else '未找到直接答案'}"
+        )
+        if crawl.answer_found:
+            return {
+                "direct_answer": found["direct_answer"],
+                "sources": sources[:20],
+                "summaries": summaries[:30],
+                "confidence": 0.8,
+                "search_depth": current_depth,
+            }
 
         return {
             "direct_answer": None,
@@ -23,6 +23,7 @@ from .cache import (
     get_cache,
     cached
 )
+from .disk_cache import DiskCache, TieredCache
 from .metrics import (
     MetricsCollector,
     get_metrics,
@@ -30,6 +31,33 @@ from .metrics import (
     ErrorMetric,
     PerformanceMetric
 )
+from .http_cache import HttpCache, get_http_cache, normalize_url
+from .serp_cache import SerpCache, get_serp_cache, normalize_query
+from .cassette import Cassette, CassetteMiss, LatencyModel, get_cassette, set_cassette
+from .evidence_compressor import EvidenceCompressor, get_evidence_compressor, compress_text
+from .circuit_breaker import CircuitBreaker, HealthRegistry, get_health_registry
+from .governor import (
+    Governor,
+    GovernorTimeout,
+    get_governor,
+    priority_scope,
+    prioritized,
+    PRIORITY_HIGH,
+    PRIORITY_NORMAL,
+    PRIORITY_LOW
+)
+from .html_parse import (
+    HtmlParsePool,
+    ParsedPage,
+    get_html_parse_pool,
+    shutdown_html_parse_pool
+)
+from .request_context import (
+    RequestContext,
+    get_request_context,
+    ensure_request_context,
+    request_scope
+)
 
 __all__ = [
     # 验证工具
@@ -51,10 +79,53 @@ __all__ = [
     'SimpleCache',
     'get_cache',
     'cached',
+    'DiskCache',
+    'TieredCache',
     # 指标
     'MetricsCollector',
     'get_metrics',
     'track_performance',
     'ErrorMetric',
     'PerformanceMetric',
+    # HTTP 缓存
+    'HttpCache',
+    'get_http_cache',
+    'normalize_url',
+    # 搜索结果缓存
+    'SerpCache',
+    'get_serp_cache',
+    'normalize_query',
+    # 录制/回放
+    'Cassette',
+    'CassetteMiss',
+    'LatencyModel',
+    'get_cassette',
+    'set_cassette',
+    # 证据压缩
+    'EvidenceCompressor',
+    'get_evidence_compressor',
+    'compress_text',
+    # 熔断器/工具健康
+    'CircuitBreaker',
+    'HealthRegistry',
+    'get_health_registry',
+    # 出站调用管控
+    'Governor',
+    'GovernorTimeout',
+    'get_governor',
+    'priority_scope',
+    'prioritized',
+    'PRIORITY_HIGH',
+    'PRIORITY_NORMAL',
+    'PRIORITY_LOW',
+    # HTML 解析
+    'HtmlParsePool',
+    'ParsedPage',
+    'get_html_parse_pool',
+    'shutdown_html_parse_pool',
+    # 请求级上下文
+    'RequestContext',
+    'get_request_context',
+    'ensure_request_context',
+    'request_scope',
 ]
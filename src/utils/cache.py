@@ -3,29 +3,96 @@
 """
 
 import hashlib
+import heapq
 import json
+import sys
+import threading
 import time
-from typing import Any, Dict, Optional, Callable
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Callable, Tuple
 from functools import wraps
-from datetime import datetime, timedelta
 from loguru import logger
 
 
+class _CacheEntry:
+    """缓存条目（__slots__ 减少每条目的内存开销）"""
+    __slots__ = ("value", "expire_time", "size")
+
+    def __init__(self, value: Any, expire_time: float, size: int):
+        self.value = value
+        self.expire_time = expire_time
+        self.size = size
+
+
+_SIZE_SAMPLE = 32  # 估算容器大小时最多抽查的元素数，其余按平均值外推
+
+
+def _estimate_size(value: Any, depth: int = 0) -> int:
+    """
+    粗略估算缓存值占用的字节数（写入热路径上不做序列化）：
+    字符串按字符数（非 ASCII 按 UTF-8 最多 3 字节计），容器抽查前若干元素按平均值外推，其余用 sys.getsizeof
+    """
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value) if value.isascii() else len(value) * 3
+    if depth >= 3 or not isinstance(value, (dict, list, tuple, set, frozenset)):
+        return sys.getsizeof(value)
+    count = len(value)
+    if not count:
+        return sys.getsizeof(value)
+    items = value.items() if isinstance(value, dict) else value
+    sampled = total = 0
+    for item in items:
+        if isinstance(item, tuple) and isinstance(value, dict):
+            total += _estimate_size(item[0], depth + 1) + _estimate_size(item[1], depth + 1)
+        else:
+            total += _estimate_size(item, depth + 1)
+        sampled += 1
+        if sampled >= _SIZE_SAMPLE:
+            break
+    return sys.getsizeof(value) + total * count // sampled
+
+
 class SimpleCache:
-    """简单的内存缓存"""
+    """
+    内存缓存：LRU + TTL。
+
+    - get/set/delete 均为 O(1)（OrderedDict 维护访问顺序，淘汰时弹出队首）
+    - TTL 惰性过期：读取时检查过期；写入时从过期时间小顶堆弹出已到期条目（均摊 O(log n)）
+    - 同时受条目数（max_size）与字节预算（max_bytes，0 表示不限）约束
+    - 命中/未命中/淘汰/过期计数同步到 MetricsCollector（cache.<name>.*）
+    """
     
-    def __init__(self, default_ttl: int = 3600, max_size: int = 1000):
+    def __init__(self, default_ttl: int = 3600, max_size: int = 1000, max_bytes: int = 0, name: str = "default"):
         """
         初始化缓存
         
         Args:
             default_ttl: 默认过期时间（秒）
             max_size: 最大缓存条目数
+            max_bytes: 缓存值总字节预算（估算值），0 表示不限制
+            name: 缓存名称，用于指标前缀
         """
-        self.cache: Dict[str, Dict[str, Any]] = {}
+        self._data: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._lock = threading.RLock()
         self.default_ttl = default_ttl
         self.max_size = max_size
-        logger.info(f"SimpleCache initialized (ttl={default_ttl}s, max_size={max_size})")
+        self.max_bytes = max_bytes
+        self.name = name
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        logger.info(f"SimpleCache initialized (name={name}, ttl={default_ttl}s, max_size={max_size}, max_bytes={max_bytes})")
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def __contains__(self, key: str) -> bool:
+        return self._lookup(key, count=False) is not None
     
     def _generate_key(self, *args, **kwargs) -> str:
         """生成缓存键"""
@@ -38,6 +105,14 @@ class SimpleCache:
         # 使用MD5生成短键
         return hashlib.md5(key_str.encode('utf-8')).hexdigest()
     
+    def _count(self, event: str, n: int = 1) -> None:
+        """累加计数并同步到全局指标"""
+        try:
+            from .metrics import get_metrics
+            get_metrics().increment(f"cache.{self.name}.{event}", n)
+        except Exception:
+            pass
+    
     def get(self, key: str) -> Optional[Any]:
         """
         获取缓存值
@@ -48,22 +123,37 @@ class SimpleCache:
         Returns:
             缓存值，如果不存在或已过期返回None
         """
-        if key not in self.cache:
-            return None
-        
-        entry = self.cache[key]
-        expire_time = entry.get("expire_time")
-        
-        # 检查是否过期
-        if expire_time and time.time() > expire_time:
-            logger.debug(f"缓存键 {key} 已过期")
-            del self.cache[key]
-            return None
-        
-        # 更新访问时间
-        entry["access_time"] = time.time()
-        logger.debug(f"缓存命中: {key}")
-        return entry.get("value")
+        return self._lookup(key, count=True)
+    
+    def _lookup(self, key: str, count: bool) -> Optional[Any]:
+        """查找条目；count=False 时不计入命中率，也不更新 LRU 顺序"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                if count:
+                    self.misses += 1
+                    self._count("misses")
+                return None
+            
+            # 检查是否过期（惰性过期）
+            if entry.expire_time and time.time() > entry.expire_time:
+                logger.debug(f"缓存键 {key} 已过期")
+                self._remove(key)
+                self.expirations += 1
+                if count:
+                    self.misses += 1
+                    self._count("misses")
+                self._count("expirations")
+                return None
+            
+            if not count:
+                return entry.value
+            # 移到队尾，表示最近使用
+            self._data.move_to_end(key)
+            self.hits += 1
+            self._count("hits")
+            logger.debug(f"缓存命中: {key}")
+            return entry.value
     
     def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
         """
@@ -74,82 +164,145 @@ class SimpleCache:
             value: 缓存值
             ttl: 过期时间（秒），None使用默认值
         """
-        # 如果缓存已满，删除最旧的条目
-        if len(self.cache) >= self.max_size:
-            self._evict_oldest()
-        
         ttl = ttl or self.default_ttl
-        expire_time = time.time() + ttl
+        size = _estimate_size(value) if self.max_bytes else 0
+        if self.max_bytes and size > self.max_bytes:
+            logger.debug(f"缓存值超过字节预算，跳过: {key} ({size} bytes)")
+            return
         
-        self.cache[key] = {
-            "value": value,
-            "expire_time": expire_time,
-            "access_time": time.time(),
-            "created_time": time.time()
-        }
+        now = time.time()
+        expire_time = now + ttl
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._purge_expired(now)
+            
+            self._data[key] = _CacheEntry(value, expire_time, size)
+            self.current_bytes += size
+            heapq.heappush(self._expiry_heap, (expire_time, key))
+            
+            # 超出条目数或字节预算时，从最久未使用的一端淘汰
+            evicted = 0
+            while len(self._data) > self.max_size or (self.max_bytes and self.current_bytes > self.max_bytes):
+                oldest_key = next(iter(self._data))
+                self._remove(oldest_key)
+                evicted += 1
+                logger.debug(f"缓存淘汰: {oldest_key}")
+            if evicted:
+                self.evictions += evicted
+                self._count("evictions", evicted)
+            
+            # 堆中残留的失效项过多时重建，避免无限增长
+            if len(self._expiry_heap) > 2 * len(self._data) + 64:
+                self._expiry_heap = [(e.expire_time, k) for k, e in self._data.items()]
+                heapq.heapify(self._expiry_heap)
         logger.debug(f"缓存设置: {key} (ttl={ttl}s)")
     
-    def _evict_oldest(self):
-        """删除最旧的缓存条目"""
-        if not self.cache:
-            return
-        
-        # 找到最久未访问的条目
-        oldest_key = min(
-            self.cache.keys(),
-            key=lambda k: self.cache[k].get("access_time", 0)
-        )
-        del self.cache[oldest_key]
-        logger.debug(f"缓存淘汰: {oldest_key}")
+    def _remove(self, key: str) -> None:
+        """删除条目（调用方需持有锁；过期堆中的对应项惰性失效）"""
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry.size
+    
+    def _purge_expired(self, now: float) -> None:
+        """从过期堆顶部弹出已到期条目（调用方需持有锁）"""
+        heap = self._expiry_heap
+        expired = 0
+        while heap and heap[0][0] <= now:
+            expire_time, key = heapq.heappop(heap)
+            entry = self._data.get(key)
+            # 条目已被覆盖/删除时，堆中的旧项直接丢弃
+            if entry is not None and entry.expire_time == expire_time:
+                self._remove(key)
+                expired += 1
+        if expired:
+            self.expirations += expired
+            self._count("expirations", expired)
     
     def delete(self, key: str) -> None:
         """删除缓存条目"""
-        if key in self.cache:
-            del self.cache[key]
-            logger.debug(f"缓存删除: {key}")
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+                logger.debug(f"缓存删除: {key}")
     
     def clear(self) -> None:
         """清空所有缓存"""
-        count = len(self.cache)
-        self.cache.clear()
+        with self._lock:
+            count = len(self._data)
+            self._data.clear()
+            self._expiry_heap = []
+            self.current_bytes = 0
         logger.info(f"缓存清空: 删除了 {count} 条条目")
     
     def stats(self) -> Dict[str, Any]:
-        """获取缓存统计信息"""
-        now = time.time()
-        valid_entries = sum(
-            1 for entry in self.cache.values()
-            if not entry.get("expire_time") or entry.get("expire_time", 0) > now
-        )
-        
-        return {
-            "total_entries": len(self.cache),
-            "valid_entries": valid_entries,
-            "expired_entries": len(self.cache) - valid_entries,
-            "max_size": self.max_size,
-            "default_ttl": self.default_ttl
-        }
+        """获取缓存统计信息（先清理到期条目，不遍历全部缓存）"""
+        with self._lock:
+            self._purge_expired(time.time())
+            lookups = self.hits + self.misses
+            return {
+                "total_entries": len(self._data),
+                "valid_entries": len(self._data),
+                "expired_entries": 0,
+                "max_size": self.max_size,
+                "total_bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "default_ttl": self.default_ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
 
 
 # 全局缓存实例
-_global_cache: Optional[SimpleCache] = None
+_global_cache: Optional[Any] = None
 
 
 def get_cache() -> SimpleCache:
-    """获取全局缓存实例"""
+    """
+    获取全局缓存实例。
+
+    配置 performance.disk_cache.enabled 时返回两级缓存（内存 + SQLite 持久化，
+    见 disk_cache.TieredCache），接口与 SimpleCache 一致。
+    """
     global _global_cache
     if _global_cache is None:
         try:
             from ..config.config_loader import get_config
             config = get_config()
             perf_config = config.get_section("performance") or {}
-            cache_ttl = perf_config.get("cache_ttl", 3600)
         except Exception:
-            cache_ttl = 3600
-        _global_cache = SimpleCache(default_ttl=cache_ttl, max_size=1000)
+            perf_config = {}
+        cache_ttl = perf_config.get("cache_ttl", 3600)
+        max_size = int(perf_config.get("cache_max_size", 1000))
+        max_bytes = int(perf_config.get("cache_max_bytes", 64 * 1024 * 1024))
+        memory_cache = SimpleCache(default_ttl=cache_ttl, max_size=max_size, max_bytes=max_bytes)
+        _global_cache = _build_tiered_cache(memory_cache, perf_config.get("disk_cache") or {}) or memory_cache
     return _global_cache
 
 
+def _build_tiered_cache(memory_cache: SimpleCache, disk_config: Dict[str, Any]) -> Optional[Any]:
+    """按配置创建持久化第二级缓存；未启用或初始化失败时返回 None（仅使用内存缓存）"""
+    if not disk_config.get("enabled"):
+        return None
+    try:
+        from .disk_cache import DiskCache, TieredCache
+        disk = DiskCache(
+            path=disk_config.get("path", "data/cache/results.sqlite3"),
+            default_ttl=memory_cache.default_ttl,
+            max_bytes=int(disk_config.get("max_bytes", 512 * 1024 * 1024)),
+        )
+        tiered = TieredCache(memory_cache, disk)
+        if disk_config.get("warm_up_on_start", True):
+            tiered.warm_up(limit=int(disk_config.get("warm_up_limit", 500)))
+        return tiered
+    except Exception as e:
+        logger.warning(f"持久化缓存初始化失败，仅使用内存缓存: {e}")
+        return None
+
+
 def cached(
     ttl: Optional[int] = None,
     key_func: Optional[Callable] = None
@@ -0,0 +1,638 @@
+"""
+录制/回放（cassette）- 录制 LLM 与 HTTP 流量，离线回放以获得可复现的性能测量
+
+- 存储：单个 SQLite 文件，按内容寻址（sha256）：请求键 -> 响应元数据/正文的摘要，
+  正文 zlib 压缩后去重存储，相同页面/回答只保存一份
+- 录制范围：APIModelProvider 的 chat / chat_async / chat_stream_async（按模型+消息+采样参数为键）、
+  经 requests 发出的全部请求（搜索/爬取/正文抓取，挂钩 requests.Session.send）、DuckDuckGo 库调用
+- 模式：off（关闭）/ record（总是真实请求并录制）/ replay（只回放，未命中抛出 CassetteMiss）/
+  auto（命中回放，未命中真实请求并录制）
+- 只录制白名单内的响应头（不含 Set-Cookie 等凭据）；stream=True 的响应不提前读取正文，
+  录制调用方实际读取的部分（与调用方的大小上限一致，回放时同样触发上限）
+- 开启时向 governor 安装 limit_sync 推迟钩子，只在需要真实请求时才排队，回放命中不受限速
+- 回放时按类别（llm / http / search）注入合成延迟：recorded（录制时的耗时×scale）/ none / fixed /
+  uniform / lognormal；随机延迟由 seed + 请求键 + 出现次数决定，多次运行结果一致
+"""
+
+import asyncio
+import contextvars
+import hashlib
+import json
+import math
+import os
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from .governor import set_sync_limit_deferrer
+
+
+MODE_OFF = "off"
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+MODE_AUTO = "auto"
+_MODES = (MODE_OFF, MODE_RECORD, MODE_REPLAY, MODE_AUTO)
+
+# 为 True 时 requests 挂钩直接放行（LLM 调用已在 provider 层录制，避免重复录制）
+_bypass_http: contextvars.ContextVar[bool] = contextvars.ContextVar("cassette_bypass_http", default=False)
+# 被推迟的 governor 限流 (governor, key, priority)：真实请求前才排队
+_deferred_limit: contextvars.ContextVar[Optional[Tuple[Any, str, Optional[str]]]] = contextvars.ContextVar(
+    "cassette_deferred_limit", default=None
+)
+
+
+class CassetteMiss(Exception):
+    """回放模式下请求不在 cassette 中"""
+
+
+# 不写入 cassette 的查询参数（凭据），同时不参与请求键
+_SECRET_PARAMS = {"api_key", "apikey", "key", "token", "access_token", "auth", "signature"}
+
+
+def _scrub_url(url: str) -> str:
+    """规范化 URL 并去掉凭据类查询参数"""
+    from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+    from .http_cache import normalize_url
+
+    parts = urlsplit(normalize_url(url))
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k.lower() not in _SECRET_PARAMS]
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+
+
+# 录制的响应头白名单（Set-Cookie、认证等头不写入 cassette）
+_RECORDED_HEADERS = (
+    "content-type", "content-language", "etag", "last-modified",
+    "cache-control", "expires", "location", "retry-after",
+)
+
+
+def _recorded_headers(headers: Any) -> Dict[str, str]:
+    return {k: v for k, v in (headers or {}).items() if k.lower() in _RECORDED_HEADERS}
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _canonical(obj: Any) -> bytes:
+    return json.dumps(obj, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+@dataclass
+class Interaction:
+    """一次录制的交互"""
+    key: str
+    kind: str
+    response: Any
+    body: bytes
+    latency_ms: float
+
+
+class LatencyModel:
+    """
+    回放延迟分布（毫秒）。
+
+    distribution:
+        recorded  录制时的实际耗时 × scale（默认）
+        none      不等待，用于测量 agent 自身的 CPU 开销
+        fixed     固定 ms
+        uniform   [min_ms, max_ms] 均匀分布
+        lognormal 中位数 median_ms、对数标准差 sigma
+    """
+
+    def __init__(
+        self,
+        distribution: str = "recorded",
+        scale: float = 1.0,
+        ms: float = 0.0,
+        min_ms: float = 0.0,
+        max_ms: float = 0.0,
+        median_ms: float = 100.0,
+        sigma: float = 0.5,
+    ):
+        self.distribution = (distribution or "recorded").lower()
+        self.scale = float(scale)
+        self.ms = float(ms)
+        self.min_ms = float(min_ms)
+        self.max_ms = float(max_ms)
+        self.median_ms = float(median_ms)
+        self.sigma = float(sigma)
+
+    @classmethod
+    def from_spec(cls, spec: Any) -> "LatencyModel":
+        """
+        从配置构造：dict（字段同构造参数）或字符串简写：
+        "recorded[:scale]" / "none" / "fixed:ms" / "uniform:min:max" / "lognormal:median:sigma"
+        """
+        if isinstance(spec, LatencyModel):
+            return spec
+        if isinstance(spec, dict):
+            return cls(**spec)
+        parts = str(spec or "recorded").split(":")
+        name, args = parts[0].strip().lower(), [float(p) for p in parts[1:] if p.strip()]
+        if name == "fixed":
+            return cls("fixed", ms=args[0] if args else 0.0)
+        if name == "uniform":
+            low = args[0] if args else 0.0
+            return cls("uniform", min_ms=low, max_ms=args[1] if len(args) > 1 else low)
+        if name == "lognormal":
+            return cls("lognormal", median_ms=args[0] if args else 100.0, sigma=args[1] if len(args) > 1 else 0.5)
+        if name == "recorded":
+            return cls("recorded", scale=args[0] if args else 1.0)
+        return cls(name)
+
+    def sample_ms(self, recorded_ms: float, rng: random.Random) -> float:
+        if self.distribution == "none":
+            return 0.0
+        if self.distribution == "fixed":
+            return max(0.0, self.ms)
+        if self.distribution == "uniform":
+            return max(0.0, rng.uniform(self.min_ms, max(self.min_ms, self.max_ms)))
+        if self.distribution == "lognormal":
+            return max(0.0, self.median_ms * math.exp(rng.gauss(0.0, self.sigma)))
+        return max(0.0, recorded_ms * self.scale)
+
+
+class CassetteStore:
+    """按内容寻址的 SQLite 存储：interactions 记录请求键到摘要的映射，blobs 保存压缩后的内容"""
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        self._local = threading.local()
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._init_schema()
+
+    def _conn(self) -> sqlite3.Connection:
+        """每个线程（以及 fork 出的子进程）使用独立连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _init_schema(self) -> None:
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS blobs ("
+            " digest TEXT PRIMARY KEY,"
+            " data BLOB NOT NULL,"
+            " size INTEGER NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS interactions ("
+            " key TEXT PRIMARY KEY,"
+            " kind TEXT NOT NULL,"
+            " request TEXT NOT NULL,"
+            " response TEXT NOT NULL,"
+            " body TEXT NOT NULL,"
+            " latency_ms REAL NOT NULL,"
+            " recorded_at REAL NOT NULL)"
+        )
+
+    def _put_blob(self, conn: sqlite3.Connection, data: bytes) -> str:
+        digest = _digest(data)
+        conn.execute(
+            "INSERT OR IGNORE INTO blobs(digest, data, size) VALUES (?, ?, ?)",
+            (digest, sqlite3.Binary(zlib.compress(data, 6)), len(data)),
+        )
+        return digest
+
+    def _get_blob(self, conn: sqlite3.Connection, digest: str) -> Optional[bytes]:
+        row = conn.execute("SELECT data FROM blobs WHERE digest = ?", (digest,)).fetchone()
+        return zlib.decompress(row[0]) if row else None
+
+    def put(self, key: str, kind: str, request: Any, response: Any, body: bytes, latency_ms: float) -> None:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO interactions(key, kind, request, response, body, latency_ms, recorded_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key, kind,
+                    self._put_blob(conn, _canonical(request)),
+                    self._put_blob(conn, _canonical(response)),
+                    self._put_blob(conn, body or b""),
+                    float(latency_ms), time.time(),
+                ),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get(self, key: str) -> Optional[Interaction]:
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT kind, response, body, latency_ms FROM interactions WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        kind, response_digest, body_digest, latency_ms = row
+        response = self._get_blob(conn, response_digest)
+        body = self._get_blob(conn, body_digest)
+        if response is None or body is None:
+            return None
+        return Interaction(key, kind, json.loads(response), body, latency_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._conn()
+        by_kind = dict(conn.execute("SELECT kind, COUNT(*) FROM interactions GROUP BY kind").fetchall())
+        blobs, raw_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+        stored = conn.execute("SELECT COALESCE(SUM(LENGTH(data)), 0) FROM blobs").fetchone()[0]
+        return {
+            "interactions": by_kind,
+            "blobs": blobs,
+            "raw_bytes": raw_bytes,
+            "stored_bytes": stored,
+        }
+
+
+class Cassette:
+    """录制/回放控制器：按模式决定走网络还是回放，并统计各类别的录制/回放次数"""
+
+    def __init__(
+        self,
+        path: str,
+        mode: str = MODE_REPLAY,
+        latency: Optional[Dict[str, Any]] = None,
+        seed: int = 0,
+    ):
+        """
+        Args:
+            path: SQLite 文件路径
+            mode: record / replay / auto
+            latency: 按类别（llm / http / search / default）的延迟分布配置，见 LatencyModel.from_spec
+            seed: 合成延迟的随机种子
+        """
+        if mode not in _MODES or mode == MODE_OFF:
+            raise ValueError(f"invalid cassette mode: {mode}")
+        self.mode = mode
+        self.store = CassetteStore(path)
+        self.seed = seed
+        self.latency: Dict[str, LatencyModel] = {
+            kind: LatencyModel.from_spec(spec) for kind, spec in (latency or {}).items()
+        }
+        self._occurrences: Dict[str, int] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        logger.info(f"Cassette initialized (path={path}, mode={mode})")
+
+    @staticmethod
+    def make_key(kind: str, request: Any) -> str:
+        return _digest(kind.encode("utf-8") + b"\0" + _canonical(request))
+
+    # ---------------- 统计 ----------------
+
+    def _count(self, kind: str, event: str, n: int = 1) -> None:
+        with self._lock:
+            counters = self._counters.setdefault(kind, {})
+            counters[event] = counters.get(event, 0) + n
+        try:
+            from .metrics import get_metrics
+            get_metrics().increment(f"cassette.{kind}.{event}", n)
+        except Exception:
+            pass
+
+    def _count_usage(self, kind: str, response: Any) -> None:
+        usage = response.get("usage") if isinstance(response, dict) else None
+        if isinstance(usage, dict):
+            self._count(kind, "prompt_tokens", int(usage.get("prompt_tokens") or 0))
+            self._count(kind, "completion_tokens", int(usage.get("completion_tokens") or 0))
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """本进程内各类别的 recorded / replayed / misses 及 token 计数"""
+        with self._lock:
+            return {kind: dict(c) for kind, c in sorted(self._counters.items())}
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._occurrences.clear()
+
+    # ---------------- 查找与录制 ----------------
+
+    def _delay_seconds(self, interaction: Interaction) -> float:
+        model = self.latency.get(interaction.kind) or self.latency.get("default") or LatencyModel()
+        with self._lock:
+            n = self._occurrences.get(interaction.key, 0)
+            self._occurrences[interaction.key] = n + 1
+        rng = random.Random(f"{self.seed}:{interaction.key}:{n}")
+        return model.sample_ms(interaction.latency_ms, rng) / 1000.0
+
+    def _lookup(self, kind: str, request: Any) -> Optional[Interaction]:
+        """按模式查找：record 模式总是返回 None；replay 模式未命中抛出 CassetteMiss"""
+        if self.mode == MODE_RECORD:
+            return None
+        interaction = self.store.get(self.make_key(kind, request))
+        if interaction is None:
+            self._count(kind, "misses")
+            if self.mode == MODE_REPLAY:
+                raise CassetteMiss(f"cassette 中没有该 {kind} 请求: {_canonical(request)[:200].decode('utf-8', 'ignore')}")
+            return None
+        self._count(kind, "replayed")
+        if kind == "llm":
+            self._count_usage(kind, interaction.response)
+        return interaction
+
+    def replay_sync(self, kind: str, request: Any) -> Optional[Interaction]:
+        """同步回放：命中时按延迟模型阻塞等待后返回录制的交互，需要真实请求时返回 None"""
+        interaction = self._lookup(kind, request)
+        if interaction is not None:
+            delay = self._delay_seconds(interaction)
+            if delay > 0:
+                time.sleep(delay)
+        return interaction
+
+    async def replay_async(self, kind: str, request: Any) -> Optional[Interaction]:
+        """异步回放：等待期间不占用事件循环"""
+        interaction = self._lookup(kind, request)
+        if interaction is not None:
+            delay = self._delay_seconds(interaction)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        return interaction
+
+    def record(self, kind: str, request: Any, response: Any, latency_ms: float, body: bytes = b"") -> None:
+        try:
+            self.store.put(self.make_key(kind, request), kind, request, response, body, latency_ms)
+        except Exception as e:
+            logger.warning(f"Cassette 录制失败（忽略）: {e}")
+            return
+        self._count(kind, "recorded")
+        if kind == "llm":
+            self._count_usage(kind, response)
+
+    def call_sync(self, kind: str, request: Any, fn: Callable[[], Any]) -> Any:
+        """回放或执行 fn 并录制其（可 JSON 序列化的）返回值"""
+        interaction = self.replay_sync(kind, request)
+        if interaction is not None:
+            return interaction.response
+        with _apply_deferred_limit():
+            start = time.perf_counter()
+            with bypass_http():
+                response = fn()
+        self.record(kind, request, response, (time.perf_counter() - start) * 1000)
+        return response
+
+    async def call_async(self, kind: str, request: Any, fn: Callable[[], Awaitable[Any]]) -> Any:
+        interaction = await self.replay_async(kind, request)
+        if interaction is not None:
+            return interaction.response
+        start = time.perf_counter()
+        with bypass_http():
+            response = await fn()
+        self.record(kind, request, response, (time.perf_counter() - start) * 1000)
+        return response
+
+    # ---------------- requests 挂钩 ----------------
+
+    def send_requests(self, session: Any, prepared: Any, kwargs: Dict[str, Any], send: Callable) -> Any:
+        """requests.Session.send 的录制/回放实现"""
+        body = prepared.body or b""
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        request = {
+            "method": prepared.method,
+            "url": _scrub_url(prepared.url),
+            "body": _digest(body) if body else "",
+        }
+        interaction = self.replay_sync("http", request)
+        if interaction is not None:
+            return _build_response(prepared, interaction)
+        with _apply_deferred_limit():
+            start = time.perf_counter()
+            response = send(session, prepared, **kwargs)
+        if response.status_code == 304:
+            return response
+        meta = {
+            "status": response.status_code,
+            "reason": response.reason,
+            "url": _scrub_url(response.url),
+            "headers": _recorded_headers(response.headers),
+            "encoding": response.encoding,
+        }
+
+        def _record(body: bytes) -> None:
+            self.record("http", request, meta, (time.perf_counter() - start) * 1000, body=body)
+
+        if kwargs.get("stream"):
+            # 不提前读取正文：录制调用方实际读取的部分（调用方按块读取并限制大小）
+            response.raw = _RecordingRaw(response.raw, _record)
+        else:
+            _record(response.content)
+        return response
+
+
+class _RecordingRaw:
+    """stream=True 响应的 raw 包装：累积调用方读取的正文，读完或关闭连接时录制一次"""
+
+    def __init__(self, raw: Any, on_done: Callable[[bytes], None]):
+        self._raw = raw
+        self._on_done = on_done
+        self._chunks: List[bytes] = []
+        self._done = False
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._raw, name)
+
+    def _finish(self) -> None:
+        if not self._done:
+            self._done = True
+            self._on_done(b"".join(self._chunks))
+            self._chunks = []
+
+    def stream(self, amt: int = 2 ** 16, decode_content: Optional[bool] = None):
+        for chunk in self._raw.stream(amt, decode_content=decode_content):
+            self._chunks.append(chunk)
+            yield chunk
+        self._finish()
+
+    def read(self, *args, **kwargs) -> bytes:
+        data = self._raw.read(*args, **kwargs)
+        if data:
+            self._chunks.append(data)
+        else:
+            self._finish()
+        return data
+
+    def close(self) -> None:
+        self._finish()
+        self._raw.close()
+
+    def release_conn(self) -> None:
+        self._finish()
+        release = getattr(self._raw, "release_conn", None)
+        if release is not None:
+            release()
+
+
+def _build_response(prepared: Any, interaction: Interaction) -> Any:
+    """用录制内容构造 requests.Response"""
+    import requests
+    from requests.structures import CaseInsensitiveDict
+
+    meta = interaction.response or {}
+    response = requests.Response()
+    response.status_code = int(meta.get("status", 200))
+    response.reason = meta.get("reason") or ""
+    response.url = meta.get("url") or prepared.url
+    response.headers = CaseInsensitiveDict(meta.get("headers") or {})
+    # 正文已解压，去掉编码相关头避免调用方误判
+    response.headers.pop("Content-Encoding", None)
+    response.encoding = meta.get("encoding")
+    response.request = prepared
+    response._content = interaction.body
+    response._content_consumed = True
+    return response
+
+
+@contextmanager
+def defer_limit(governor: Any, key: str, priority: Optional[str]):
+    """
+    cassette 开启时推迟 governor.limit_sync 的排队：作用域内经 requests 挂钩或 cassette_call
+    发出的请求只在需要真实请求时才占用预算。产出 True 表示已推迟
+    """
+    if _global_cassette is None or _bypass_http.get() or _deferred_limit.get() is not None:
+        yield False
+        return
+    token = _deferred_limit.set((governor, key, priority))
+    try:
+        yield True
+    finally:
+        _deferred_limit.reset(token)
+
+
+@contextmanager
+def _apply_deferred_limit():
+    """真实请求前补上被推迟的 governor 限流"""
+    deferred = _deferred_limit.get()
+    if deferred is None:
+        yield
+        return
+    governor, key, priority = deferred
+    token = _deferred_limit.set(None)
+    try:
+        with governor.hold_sync(key, priority):
+            yield
+    finally:
+        _deferred_limit.reset(token)
+
+
+@contextmanager
+def bypass_http():
+    """作用域内 requests 挂钩不录制/回放（上层已按更高层语义录制）"""
+    token = _bypass_http.set(True)
+    try:
+        yield
+    finally:
+        _bypass_http.reset(token)
+
+
+_original_send: Optional[Callable] = None
+_hook_lock = threading.Lock()
+
+
+def _install_requests_hook() -> None:
+    """挂钩 requests.Session.send（模块级 requests.get 等同样经过 Session.send）"""
+    global _original_send
+    with _hook_lock:
+        if _original_send is not None:
+            return
+        try:
+            import requests
+        except ImportError:
+            return
+        original = requests.Session.send
+
+        def send(session, request, **kwargs):
+            cassette = _global_cassette
+            if cassette is None or _bypass_http.get():
+                return original(session, request, **kwargs)
+            return cassette.send_requests(session, request, kwargs, original)
+
+        _original_send = original
+        requests.Session.send = send
+
+
+def _uninstall_requests_hook() -> None:
+    global _original_send
+    with _hook_lock:
+        if _original_send is None:
+            return
+        import requests
+        requests.Session.send = _original_send
+        _original_send = None
+
+
+def _install_hooks() -> None:
+    _install_requests_hook()
+    set_sync_limit_deferrer(defer_limit)
+
+
+def _uninstall_hooks() -> None:
+    set_sync_limit_deferrer(None)
+    _uninstall_requests_hook()
+
+
+# 全局 cassette 实例
+_global_cassette: Optional[Cassette] = None
+_cassette_loaded = False
+_cassette_lock = threading.Lock()
+
+
+def get_cassette() -> Optional[Cassette]:
+    """获取全局 cassette（配置 performance.cassette）；mode 为 off 时返回 None"""
+    global _global_cassette, _cassette_loaded
+    if not _cassette_loaded:
+        with _cassette_lock:
+            if not _cassette_loaded:
+                try:
+                    from ..config.config_loader import get_config
+                    cfg = get_config().get("performance.cassette", {}) or {}
+                    mode = str(cfg.get("mode", MODE_OFF) or MODE_OFF).lower()
+                    if mode != MODE_OFF:
+                        _global_cassette = Cassette(
+                            path=cfg.get("path", "data/cassettes/default.sqlite3"),
+                            mode=mode,
+                            latency=cfg.get("latency") or {},
+                            seed=int(cfg.get("seed", 0)),
+                        )
+                        _install_hooks()
+                except Exception as e:
+                    logger.warning(f"Cassette 初始化失败，已禁用: {e}")
+                    _global_cassette = None
+                _cassette_loaded = True
+    return _global_cassette
+
+
+def cassette_call(kind: str, request: Any, fn: Callable[[], Any]) -> Any:
+    """经全局 cassette 执行同步调用（未开启时直接执行），用于不走 requests 的第三方库（如 DuckDuckGo）"""
+    cassette = get_cassette()
+    if cassette is None:
+        return fn()
+    return cassette.call_sync(kind, request, fn)
+
+
+def set_cassette(cassette: Optional[Cassette]) -> None:
+    """显式设置全局 cassette（None 表示关闭），供基准脚本与测试使用"""
+    global _global_cassette, _cassette_loaded
+    with _cassette_lock:
+        _global_cassette = cassette
+        _cassette_loaded = True
+        if cassette is None:
+            _uninstall_hooks()
+        else:
+            _install_hooks()
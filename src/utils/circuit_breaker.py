@@ -0,0 +1,238 @@
+"""
+熔断器与工具健康登记 - 对持续失败/超时的工具候选快速失败，冷却后放行探测请求
+
+状态：
+- closed：正常放行，累计连续失败/连续超时
+- open：达到阈值后熔断，冷却期内直接跳过（不再等待完整超时）
+- half_open：冷却期结束后只放行一个探测请求；成功则恢复 closed，失败则重新熔断并加倍冷却时间
+
+只有传输层故障（异常、超时、连接错误、服务端 5xx/429）计入失败；工具正常返回的
+success=False（如“无结果”、参数错误）说明候选可用，不计入熔断。
+"""
+
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# 工具返回的 error 命中这些模式时视为传输层故障
+_TRANSPORT_ERROR_RE = re.compile(
+    r"timeout|timed out|connect|refused|reset by peer|unreachable|ssl|name resolution"
+    r"|http_(?:429|5\d\d)|tool_load_failed|requests_not_available",
+    re.IGNORECASE,
+)
+
+
+def is_transport_failure(result: Dict[str, Any]) -> bool:
+    """工具返回的失败结果是否属于传输层故障（应计入熔断）"""
+    if result.get("success"):
+        return False
+    return bool(_TRANSPORT_ERROR_RE.search(str(result.get("error") or "")))
+
+
+@dataclass
+class CircuitBreaker:
+    """单个工具候选的熔断器"""
+    name: str
+    failure_threshold: int = 5
+    timeout_threshold: int = 3
+    cool_down: float = 30.0
+    max_cool_down: float = 300.0
+    state: str = CLOSED
+    consecutive_failures: int = 0
+    consecutive_timeouts: int = 0
+    opened_at: float = 0.0
+    current_cool_down: float = 0.0
+    probe_in_flight: bool = False
+    total_failures: int = 0
+    total_successes: int = 0
+    times_opened: int = 0
+    last_error: str = ""
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def _refresh(self, now: float) -> None:
+        if self.state == OPEN and now - self.opened_at >= self.current_cool_down:
+            self.state = HALF_OPEN
+            self.probe_in_flight = False
+
+    def available(self) -> bool:
+        """是否可以调用（不占用探测名额，用于候选筛选）"""
+        with self._lock:
+            self._refresh(time.time())
+            if self.state == OPEN:
+                return False
+            if self.state == HALF_OPEN:
+                return not self.probe_in_flight
+            return True
+
+    def allow(self) -> bool:
+        """申请一次调用；半开状态下只放行一个探测请求"""
+        with self._lock:
+            self._refresh(time.time())
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.total_successes += 1
+            self.consecutive_failures = 0
+            self.consecutive_timeouts = 0
+            if self.state != CLOSED:
+                logger.info(f"熔断器恢复: {self.name}")
+            self.state = CLOSED
+            self.probe_in_flight = False
+            self.current_cool_down = 0.0
+
+    def record_failure(self, error: str = "", timed_out: bool = False) -> None:
+        with self._lock:
+            self.total_failures += 1
+            self.consecutive_failures += 1
+            self.consecutive_timeouts = self.consecutive_timeouts + 1 if timed_out else 0
+            self.last_error = str(error)[:200]
+            if self.state == HALF_OPEN:
+                # 探测失败：重新熔断，冷却时间加倍
+                self._open(min(self.max_cool_down, max(self.cool_down, self.current_cool_down * 2)))
+            elif self.state == CLOSED and (
+                self.consecutive_failures >= self.failure_threshold
+                or (timed_out and self.consecutive_timeouts >= self.timeout_threshold)
+            ):
+                self._open(self.cool_down)
+
+    def release(self) -> None:
+        """调用被取消（未得出结论）：归还探测名额"""
+        with self._lock:
+            self.probe_in_flight = False
+
+    def _open(self, cool_down: float) -> None:
+        self.state = OPEN
+        self.opened_at = time.time()
+        self.current_cool_down = cool_down
+        self.probe_in_flight = False
+        self.times_opened += 1
+        logger.warning(
+            f"熔断器打开: {self.name}（连续失败 {self.consecutive_failures}，"
+            f"连续超时 {self.consecutive_timeouts}），冷却 {cool_down:.0f}s"
+        )
+        try:
+            from .metrics import get_metrics
+            get_metrics().increment("circuit_breaker.opened")
+        except Exception:
+            pass
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refresh(time.time())
+            retry_in = max(0.0, self.opened_at + self.current_cool_down - time.time()) if self.state == OPEN else 0.0
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "consecutive_timeouts": self.consecutive_timeouts,
+                "total_failures": self.total_failures,
+                "total_successes": self.total_successes,
+                "times_opened": self.times_opened,
+                "retry_in": round(retry_in, 1),
+                "last_error": self.last_error,
+            }
+
+
+class HealthRegistry:
+    """工具健康登记：按候选键（name@source）管理熔断器"""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        failure_threshold: int = 5,
+        timeout_threshold: int = 3,
+        cool_down: float = 30.0,
+        max_cool_down: float = 300.0,
+    ):
+        self.enabled = enabled
+        self.failure_threshold = failure_threshold
+        self.timeout_threshold = timeout_threshold
+        self.cool_down = cool_down
+        self.max_cool_down = max_cool_down
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, key: str) -> CircuitBreaker:
+        br = self._breakers.get(key)
+        if br is None:
+            with self._lock:
+                br = self._breakers.get(key)
+                if br is None:
+                    br = self._breakers[key] = CircuitBreaker(
+                        name=key,
+                        failure_threshold=self.failure_threshold,
+                        timeout_threshold=self.timeout_threshold,
+                        cool_down=self.cool_down,
+                        max_cool_down=self.max_cool_down,
+                    )
+        return br
+
+    def available(self, key: str) -> bool:
+        return not self.enabled or self.breaker(key).available()
+
+    def allow(self, key: str) -> bool:
+        return not self.enabled or self.breaker(key).allow()
+
+    def record_success(self, key: str) -> None:
+        if self.enabled:
+            self.breaker(key).record_success()
+
+    def record_failure(self, key: str, error: str = "", timed_out: bool = False) -> None:
+        if self.enabled:
+            self.breaker(key).record_failure(error, timed_out=timed_out)
+
+    def release(self, key: str) -> None:
+        if self.enabled:
+            self.breaker(key).release()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """所有熔断器状态（供 /health 展示）"""
+        with self._lock:
+            items = list(self._breakers.items())
+        breakers = {key: br.snapshot() for key, br in sorted(items)}
+        return {
+            "enabled": self.enabled,
+            "open": sorted(k for k, v in breakers.items() if v["state"] == OPEN),
+            "breakers": breakers,
+        }
+
+
+# 全局健康登记实例
+_global_registry: Optional[HealthRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_health_registry() -> HealthRegistry:
+    """获取全局工具健康登记（配置 tools.circuit_breaker）"""
+    global _global_registry
+    if _global_registry is None:
+        with _registry_lock:
+            if _global_registry is None:
+                cfg: Dict[str, Any] = {}
+                try:
+                    from ..config.config_loader import get_config
+                    cfg = get_config().get("tools.circuit_breaker", {}) or {}
+                except Exception:
+                    pass
+                _global_registry = HealthRegistry(
+                    enabled=bool(cfg.get("enabled", True)),
+                    failure_threshold=int(cfg.get("failure_threshold", 5)),
+                    timeout_threshold=int(cfg.get("timeout_threshold", 3)),
+                    cool_down=float(cfg.get("cool_down", 30.0)),
+                    max_cool_down=float(cfg.get("max_cool_down", 300.0)),
+                )
+    return _global_registry
@@ -0,0 +1,317 @@
+"""
+持久化缓存 - 基于 SQLite 的第二级缓存
+
+- 进程重启后缓存仍然有效，多个 worker 进程共享同一份缓存文件
+- WAL 模式 + busy_timeout 保证多进程/多线程并发读写安全
+- 支持 TTL、按字节预算的 LRU 淘汰，以及启动时预热到内存层
+"""
+
+import asyncio
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from loguru import logger
+
+
+class SqliteCacheStore(ABC):
+    """
+    SQLite 缓存存储的公共部分：按线程的 WAL 连接、写入计数触发的容量检查、过期/按访问时间淘汰、清空与统计。
+
+    子类通过 table / expire_column 指定表结构，实现 _init_schema，并可覆盖 _expired_cutoff 与 _metric_name。
+    表需包含 key、size、access_at 列以及 expire_column。
+    """
+
+    table = "entries"
+    expire_column = "expire_at"
+
+    def __init__(self, path: str, max_bytes: int, evict_interval: int = 50):
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self.evict_interval = max(1, evict_interval)
+        self._writes = 0
+        self._local = threading.local()
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._init_schema()
+
+    def _conn(self) -> sqlite3.Connection:
+        """每个线程（以及 fork 出的子进程）使用独立连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @abstractmethod
+    def _init_schema(self) -> None:
+        """建表（子类实现）"""
+
+    def _metric_name(self, event: str) -> str:
+        return f"cache.{event}"
+
+    def _count(self, event: str, n: int = 1) -> None:
+        try:
+            from .metrics import get_metrics
+            get_metrics().increment(self._metric_name(event), n)
+        except Exception:
+            pass
+
+    def _expired_cutoff(self) -> float:
+        """过期时间早于该时刻的条目在淘汰时删除"""
+        return time.time()
+
+    def _note_write(self) -> None:
+        """记录一次写入，每 evict_interval 次检查一次容量"""
+        self._writes += 1
+        if self._writes % self.evict_interval == 0:
+            self.evict()
+
+    def evict(self) -> int:
+        """删除过期条目，并在超出字节上限时按最近访问时间淘汰，返回删除条数"""
+        removed = 0
+        try:
+            conn = self._conn()
+            cur = conn.execute(
+                f"DELETE FROM {self.table} WHERE {self.expire_column} <= ?", (self._expired_cutoff(),)
+            )
+            expired = cur.rowcount or 0
+            removed += expired
+            if expired:
+                self._count("expirations", expired)
+            if self.max_bytes:
+                total = conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+                if total > self.max_bytes:
+                    # 淘汰到预算的 90%，避免每次写入都触发淘汰
+                    target = int(self.max_bytes * 0.9)
+                    rows = conn.execute(f"SELECT key, size FROM {self.table} ORDER BY access_at ASC").fetchall()
+                    victims = []
+                    for key, size in rows:
+                        if total <= target:
+                            break
+                        victims.append((key,))
+                        total -= size
+                    if victims:
+                        conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", victims)
+                        removed += len(victims)
+                        self._count("evictions", len(victims))
+        except Exception as e:
+            logger.debug(f"{type(self).__name__} 淘汰失败（忽略）: {e}")
+        return removed
+
+    def clear(self) -> None:
+        """清空缓存"""
+        try:
+            self._conn().execute(f"DELETE FROM {self.table}")
+        except Exception as e:
+            logger.debug(f"{type(self).__name__} 清空失败（忽略）: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        try:
+            count, total = self._conn().execute(
+                f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.table}"
+            ).fetchone()
+        except Exception:
+            count, total = 0, 0
+        return {
+            "path": self.path,
+            "total_entries": count,
+            "total_bytes": total,
+            "max_bytes": self.max_bytes,
+        }
+
+
+class DiskCache(SqliteCacheStore):
+    """SQLite 持久化缓存（值使用 pickle 序列化）"""
+
+    def __init__(
+        self,
+        path: str,
+        default_ttl: int = 3600,
+        max_bytes: int = 512 * 1024 * 1024,
+        name: str = "disk",
+        evict_interval: int = 50,
+    ):
+        """
+        初始化持久化缓存
+
+        Args:
+            path: SQLite 文件路径
+            default_ttl: 默认过期时间（秒）
+            max_bytes: 缓存值总字节上限，超出后按最近访问时间淘汰
+            name: 缓存名称，用于指标前缀
+            evict_interval: 每写入多少次检查一次容量
+        """
+        self.default_ttl = default_ttl
+        self.name = name
+        super().__init__(path, max_bytes, evict_interval)
+        logger.info(f"DiskCache initialized (path={self.path}, ttl={default_ttl}s, max_bytes={max_bytes})")
+
+    def _init_schema(self) -> None:
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value BLOB NOT NULL,"
+            " expire_at REAL NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " access_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_access ON entries(access_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_expire ON entries(expire_at)")
+
+    def _metric_name(self, event: str) -> str:
+        return f"cache.{self.name}.{event}"
+
+    def get(self, key: str) -> Optional[Any]:
+        """获取缓存值，不存在或已过期返回 None"""
+        value, _ = self.get_with_ttl(key)
+        return value
+
+    def get_with_ttl(self, key: str) -> Tuple[Optional[Any], float]:
+        """获取缓存值及剩余有效期（秒）"""
+        now = time.time()
+        try:
+            conn = self._conn()
+            row = conn.execute("SELECT value, expire_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._count("misses")
+                return None, 0.0
+            blob, expire_at = row
+            if expire_at <= now:
+                conn.execute("DELETE FROM entries WHERE key = ? AND expire_at = ?", (key, expire_at))
+                self._count("misses")
+                self._count("expirations")
+                return None, 0.0
+            conn.execute("UPDATE entries SET access_at = ? WHERE key = ?", (now, key))
+            value = pickle.loads(blob)
+            self._count("hits")
+            return value, expire_at - now
+        except Exception as e:
+            logger.debug(f"DiskCache 读取失败（忽略）: {e}")
+            return None, 0.0
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """写入缓存值（不可序列化的值会被跳过）"""
+        ttl = ttl or self.default_ttl
+        try:
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logger.debug(f"DiskCache 值不可序列化，跳过: {e}")
+            return
+        if self.max_bytes and len(blob) > self.max_bytes:
+            return
+        now = time.time()
+        try:
+            self._conn().execute(
+                "INSERT OR REPLACE INTO entries(key, value, expire_at, size, access_at) VALUES (?, ?, ?, ?, ?)",
+                (key, sqlite3.Binary(blob), now + ttl, len(blob), now),
+            )
+        except Exception as e:
+            logger.debug(f"DiskCache 写入失败（忽略）: {e}")
+            return
+        self._note_write()
+
+    def iter_recent(self, limit: int = 500) -> Iterator[Tuple[str, Any, float]]:
+        """按最近访问时间倒序遍历未过期条目：(key, value, 剩余有效期秒)，用于预热"""
+        now = time.time()
+        try:
+            rows = self._conn().execute(
+                "SELECT key, value, expire_at FROM entries WHERE expire_at > ? ORDER BY access_at DESC LIMIT ?",
+                (now, int(limit)),
+            ).fetchall()
+        except Exception as e:
+            logger.debug(f"DiskCache 预热读取失败（忽略）: {e}")
+            return
+        for key, blob, expire_at in rows:
+            try:
+                yield key, pickle.loads(blob), expire_at - now
+            except Exception:
+                continue
+
+    def delete(self, key: str) -> None:
+        """删除缓存条目"""
+        try:
+            self._conn().execute("DELETE FROM entries WHERE key = ?", (key,))
+        except Exception as e:
+            logger.debug(f"DiskCache 删除失败（忽略）: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        stats = super().stats()
+        stats["default_ttl"] = self.default_ttl
+        return stats
+
+
+class TieredCache:
+    """
+    两级缓存：内存 SimpleCache（L1）+ 持久化 DiskCache（L2）。
+
+    与 SimpleCache 接口一致（get/set/delete/clear/stats/_generate_key），可直接替换 get_cache() 的返回值。
+    L1 未命中时查询 L2，命中后按剩余有效期回填 L1。
+    """
+
+    def __init__(self, memory: Any, disk: DiskCache):
+        self.memory = memory
+        self.disk = disk
+        self.default_ttl = memory.default_ttl
+        self.name = memory.name
+
+    def _generate_key(self, *args, **kwargs) -> str:
+        return self.memory._generate_key(*args, **kwargs)
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+        value, remaining = self.disk.get_with_ttl(key)
+        if value is not None:
+            self.memory.set(key, value, ttl=max(1, int(remaining)))
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        self.memory.set(key, value, ttl=ttl)
+        self.disk.set(key, value, ttl=ttl)
+
+    async def get_async(self, key: str) -> Optional[Any]:
+        """协程中读取：L1 命中直接返回，L2 的 SQLite 读取在线程中执行"""
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+        return await asyncio.to_thread(self.get, key)
+
+    async def set_async(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """协程中写入：L2 的 SQLite 写入在线程中执行"""
+        self.memory.set(key, value, ttl=ttl)
+        await asyncio.to_thread(self.disk.set, key, value, ttl)
+
+    def delete(self, key: str) -> None:
+        self.memory.delete(key)
+        self.disk.delete(key)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        self.disk.clear()
+
+    def warm_up(self, limit: int = 500) -> int:
+        """把 L2 中最近使用的条目加载到 L1，返回加载条数"""
+        loaded = 0
+        for key, value, remaining in self.disk.iter_recent(limit):
+            self.memory.set(key, value, ttl=max(1, int(remaining)))
+            loaded += 1
+        logger.info(f"缓存预热完成：从 {self.disk.path} 加载 {loaded} 条")
+        return loaded
+
+    def stats(self) -> Dict[str, Any]:
+        stats = dict(self.memory.stats())
+        stats["disk"] = self.disk.stats()
+        return stats
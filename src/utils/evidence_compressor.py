@@ -0,0 +1,295 @@
+"""
+查询感知的证据压缩：工具结果进入 LLM 提示词前，按段落切分、以 BM25 对当前跳目标打分，
+在 token 预算内挑选最相关的段落，并跨来源去重。
+
+- 分词：拉丁字母/数字按词，中日韩文本按字二元组（无需分词词典）
+- 打分相同（如查询与正文无重叠）时按原始顺序保留，退化为原先的“取前段”；
+  有相关段落时，低于最高分 min_relevance 倍的段落不再用于填满预算
+- 输出按来源与段落的原始顺序拼接，保持可读性；同一来源中不相邻的段落以 “…” 连接
+- 配置 performance.evidence_compression，关闭时调用方回退到原有的截断逻辑
+"""
+
+import math
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from loguru import logger
+
+from ..observability.token_ledger import estimate_tokens
+
+_CJK_RUN = re.compile(r"[\u3400-\u9fff\uf900-\ufaff]+")
+_LATIN_WORD = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+_SENTENCE_END = re.compile(r"(?<=[。！？!?；;])|(?<=\.)\s+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from how in is it of on or the to was were what when where which who why with".split()
+)
+
+Document = Union[str, Tuple[Any, str]]
+
+
+def tokenize(text: str) -> List[str]:
+    """BM25 分词：英文按词（去停用词），中日韩按字二元组（单字片段保留单字）"""
+    text = (text or "").lower()
+    tokens = [w for w in _LATIN_WORD.findall(text) if w not in _STOPWORDS]
+    for run in _CJK_RUN.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def split_passages(text: str, passage_chars: int = 200) -> List[str]:
+    """按行与句子边界把文本切成不超过 passage_chars 的段落（过长的句子硬切）"""
+    pieces: List[str] = []
+    for line in (text or "").splitlines():
+        line = " ".join(line.split())
+        if not line:
+            continue
+        for sentence in _SENTENCE_END.split(line):
+            sentence = (sentence or "").strip()
+            while len(sentence) > passage_chars:
+                pieces.append(sentence[:passage_chars])
+                sentence = sentence[passage_chars:]
+            if sentence:
+                pieces.append(sentence)
+        pieces.append("\n")
+    passages: List[str] = []
+    current = ""
+    for piece in pieces:
+        if piece == "\n":
+            # 行边界：当前段已有一半长度时结束，避免把无关的短行拼在一起
+            if current and len(current) >= passage_chars // 2:
+                passages.append(current)
+                current = ""
+            continue
+        joined = f"{current} {piece}" if current else piece
+        if len(joined) > passage_chars and current:
+            passages.append(current)
+            current = piece
+        else:
+            current = joined
+    if current:
+        passages.append(current)
+    return passages
+
+
+@dataclass
+class Passage:
+    """候选段落"""
+    text: str
+    source: Any                 # 来源标识（URL、跳序号等）
+    doc_index: int              # 所属文档在输入中的位置
+    index: int                  # 段落在文档中的位置
+    tokens: int = 0             # 估算 token 数
+    score: float = 0.0
+    terms: List[str] = field(default_factory=list, repr=False)
+
+
+class BM25Scorer:
+    """Okapi BM25：以候选段落集合本身作为语料计算 IDF"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+
+    def score(self, query_terms: Sequence[str], documents: Sequence[Sequence[str]]) -> List[float]:
+        n = len(documents)
+        if n == 0:
+            return []
+        query = set(query_terms)
+        if not query:
+            return [0.0] * n
+        avg_len = sum(len(d) for d in documents) / n or 1.0
+        df: Counter = Counter()
+        for doc in documents:
+            df.update(query.intersection(doc))
+        idf = {t: math.log(1 + (n - df[t] + 0.5) / (df[t] + 0.5)) for t in query if df[t]}
+        scores = []
+        for doc in documents:
+            tf = Counter(t for t in doc if t in idf)
+            norm = self.k1 * (1 - self.b + self.b * len(doc) / avg_len)
+            scores.append(sum(idf[t] * f * (self.k1 + 1) / (f + norm) for t, f in tf.items()))
+        return scores
+
+
+class EvidenceCompressor:
+    """
+    证据压缩器：切段 → BM25 打分 → 去重 → 按预算装箱。
+
+    Args:
+        passage_chars: 段落最大字符数
+        dedup_threshold: 与已选段落的二元组 Jaccard 相似度达到该值视为重复
+        min_relevance: 相对最高分的最低得分比例，低于该比例的段落不入选
+        budgets: 按工具类型的 token 预算（default 为兜底）
+        fusion_budget: 多跳证据融合提示词中证据部分的 token 预算
+    """
+
+    def __init__(self,
+                 passage_chars: int = 200,
+                 dedup_threshold: float = 0.8,
+                 min_relevance: float = 0.1,
+                 budgets: Optional[Dict[str, int]] = None,
+                 fusion_budget: int = 1200):
+        self.passage_chars = max(20, int(passage_chars))
+        self.dedup_threshold = float(dedup_threshold)
+        self.min_relevance = float(min_relevance)
+        self.budgets = {"default": 300, **(budgets or {})}
+        self.fusion_budget = int(fusion_budget)
+        self.scorer = BM25Scorer()
+
+    def budget_for(self, tool_type: str) -> int:
+        return int(self.budgets.get(tool_type, self.budgets["default"]))
+
+    def select(self,
+               query: str,
+               documents: Iterable[Document],
+               budget_tokens: Optional[int] = None,
+               max_chars: Optional[int] = None,
+               min_per_source: int = 0,
+               doc_overhead: Optional[Sequence[int]] = None) -> List[Passage]:
+        """
+        挑选段落，返回按原始顺序排列的结果。
+
+        Args:
+            query: 当前跳目标/问题
+            documents: 文本或 (来源, 文本) 列表，越靠前的文档在同分时越优先
+            budget_tokens / max_chars: token 与字符上限（None 表示不限）
+            min_per_source: 每个来源至少保留的段落数（预算允许时），用于多跳证据融合
+            doc_overhead: 按文档下标的额外 token 开销（如来源标注），首次选中该文档的段落时计入 budget_tokens
+        """
+        passages: List[Passage] = []
+        for doc_index, doc in enumerate(documents):
+            source, text = doc if isinstance(doc, tuple) else (doc_index, doc)
+            for index, chunk in enumerate(split_passages(str(text or ""), self.passage_chars)):
+                passages.append(Passage(chunk, source, doc_index, index, estimate_tokens(chunk), terms=tokenize(chunk)))
+        if not passages:
+            return []
+        for passage, score in zip(passages, self.scorer.score(tokenize(query), [p.terms for p in passages])):
+            passage.score = score
+
+        ranked = sorted(passages, key=lambda p: (-p.score, p.doc_index, p.index))
+        floor = ranked[0].score * self.min_relevance
+        guaranteed = set()
+        if min_per_source > 0:
+            # 先保证每个来源最相关的若干段落，再按全局分数补齐
+            taken: Counter = Counter()
+            first: List[Passage] = []
+            for p in ranked:
+                if taken[p.doc_index] < min_per_source:
+                    taken[p.doc_index] += 1
+                    first.append(p)
+            guaranteed = {id(p) for p in first}
+            ranked = first + [p for p in ranked if id(p) not in guaranteed]
+
+        selected: List[Passage] = []
+        selected_terms: List[set] = []
+        seen_text = set()
+        used_tokens = used_chars = overhead_tokens = 0
+        charged = set()
+        for p in ranked:
+            key = p.text.lower()
+            if key in seen_text or (p.score < floor and id(p) not in guaranteed):
+                continue
+            extra = doc_overhead[p.doc_index] if doc_overhead and p.doc_index not in charged else 0
+            if budget_tokens is not None and used_tokens + overhead_tokens + extra + p.tokens > budget_tokens:
+                continue
+            if max_chars is not None and used_chars + len(p.text) + 3 > max_chars:
+                continue
+            terms = set(p.terms)
+            if terms and any(self._similar(terms, other) for other in selected_terms):
+                continue
+            selected.append(p)
+            selected_terms.append(terms)
+            seen_text.add(key)
+            used_tokens += p.tokens
+            overhead_tokens += extra
+            charged.add(p.doc_index)
+            used_chars += len(p.text) + 3  # 含拼接分隔符
+        selected.sort(key=lambda p: (p.doc_index, p.index))
+
+        tokens_in = sum(p.tokens for p in passages)
+        _count(tokens_in, used_tokens)
+        return selected
+
+    def compress(self,
+                 query: str,
+                 documents: Iterable[Document],
+                 budget_tokens: Optional[int] = None,
+                 max_chars: Optional[int] = None) -> str:
+        """挑选段落并拼接为文本：每个文档一行"""
+        return join_passages(self.select(query, documents, budget_tokens, max_chars))
+
+    def _similar(self, a: set, b: set) -> bool:
+        if not a or not b:
+            return False
+        return len(a & b) / len(a | b) >= self.dedup_threshold
+
+
+def join_passages(passages: Sequence[Passage]) -> str:
+    """按文档分行拼接段落；同一文档中不相邻的段落以 “…” 连接"""
+    lines: List[str] = []
+    last: Optional[Passage] = None
+    for p in passages:
+        if last is not None and last.doc_index == p.doc_index:
+            lines[-1] += (" " if p.index == last.index + 1 else " … ") + p.text
+        else:
+            lines.append(p.text)
+        last = p
+    return "\n".join(lines)
+
+
+def _count(tokens_in: int, tokens_out: int) -> None:
+    try:
+        from .metrics import get_metrics
+        metrics = get_metrics()
+        metrics.increment("compression.calls")
+        metrics.increment("compression.tokens_in", tokens_in)
+        metrics.increment("compression.tokens_out", tokens_out)
+    except Exception:
+        pass
+
+
+_global_compressor: Optional[EvidenceCompressor] = None
+_compressor_loaded = False
+_compressor_lock = threading.Lock()
+
+
+def get_evidence_compressor() -> Optional[EvidenceCompressor]:
+    """获取全局证据压缩器（配置 performance.evidence_compression）；未开启时返回 None"""
+    global _global_compressor, _compressor_loaded
+    if not _compressor_loaded:
+        with _compressor_lock:
+            if not _compressor_loaded:
+                try:
+                    from ..config.config_loader import get_config
+                    cfg = get_config().get("performance.evidence_compression", {}) or {}
+                    if cfg.get("enabled", True):
+                        _global_compressor = EvidenceCompressor(
+                            passage_chars=int(cfg.get("passage_chars", 200)),
+                            dedup_threshold=float(cfg.get("dedup_threshold", 0.8)),
+                            min_relevance=float(cfg.get("min_relevance", 0.1)),
+                            budgets=cfg.get("budgets") or {},
+                            fusion_budget=int(cfg.get("fusion_budget", 1200)),
+                        )
+                except Exception as e:
+                    logger.warning(f"证据压缩初始化失败，使用原有截断: {e}")
+                    _global_compressor = None
+                _compressor_loaded = True
+    return _global_compressor
+
+
+def compress_text(text: str, query: str, max_chars: int) -> Optional[str]:
+    """
+    单段文本按查询压缩到 max_chars 以内（供工具内部使用）。
+    压缩未开启时返回 None，由调用方使用原有的截断方式
+    """
+    if not text or len(text) <= max_chars:
+        return text
+    compressor = get_evidence_compressor()
+    if compressor is None:
+        return None
+    return compressor.compress(query, [text], max_chars=max_chars) or text[:max_chars]
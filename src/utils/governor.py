@@ -0,0 +1,510 @@
+"""
+出站调用并发/速率管控（governor）- 统一限制 LLM、搜索引擎、网页抓取与 MCP 的出站请求
+
+- 每个预算（budget）= 并发上限（信号量）+ 令牌桶（速率/突发），按键区分：
+  llm:<host>、search:<engine>、fetch、mcp:<name>；同一类别的键共享类别配置、各自计数
+- 等待中的请求按优先级放行：high（答案综合）> normal > low（推测性预取等后台任务），同级先到先得
+- 优先级通过 contextvar 传递（priority_scope / prioritized），asyncio.to_thread 启动的线程同样继承；
+  后台任务可用 PriorityTicket 启动，前台开始等待它时 promote 提升优先级（含已在排队的请求）
+- 同时支持协程（limit）与同步线程（limit_sync）；收到 429 时可调用 penalize 暂停该预算
+- limit_sync 可经 set_sync_limit_deferrer 安装的钩子推迟排队（如录制/回放只在需要真实请求时才占用预算）
+- 排队等待时间计入 MetricsCollector（governor_wait_<类别>）
+"""
+
+import asyncio
+import contextvars
+import functools
+import heapq
+import itertools
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from loguru import logger
+
+
+PRIORITY_HIGH = "high"
+PRIORITY_NORMAL = "normal"
+PRIORITY_LOW = "low"
+_PRIORITY_RANK = {PRIORITY_HIGH: 0, PRIORITY_NORMAL: 1, PRIORITY_LOW: 2}
+
+# 取值为优先级字符串或 PriorityTicket
+_current_priority: contextvars.ContextVar[Any] = contextvars.ContextVar(
+    "governor_priority", default=PRIORITY_NORMAL
+)
+
+
+# limit_sync 的推迟钩子：(governor, key, priority) -> 上下文管理器，产出 True 表示已接管排队
+_sync_limit_deferrer: Optional[Callable[["Governor", str, Optional[str]], Any]] = None
+
+
+def set_sync_limit_deferrer(deferrer: Optional[Callable[["Governor", str, Optional[str]], Any]]) -> None:
+    """安装（None 表示移除）limit_sync 的推迟钩子；钩子接管后须在真实请求前调用 governor.hold_sync"""
+    global _sync_limit_deferrer
+    _sync_limit_deferrer = deferrer
+
+
+class GovernorTimeout(Exception):
+    """排队等待超过 max_wait"""
+
+
+class PriorityTicket:
+    """
+    可提升的优先级：推测性任务以低优先级启动，前台开始等待其结果时调用 promote，
+    此后的出站调用与已在排队的请求都按新优先级放行，避免前台被低优先级排队拖住（优先级反转）
+    """
+
+    def __init__(self, priority: str = PRIORITY_LOW):
+        self.priority = priority if priority in _PRIORITY_RANK else PRIORITY_NORMAL
+        self._waiting: List[Tuple["Budget", "_Waiter"]] = []
+        self._lock = threading.Lock()
+
+    def promote(self, priority: str = PRIORITY_NORMAL) -> None:
+        """提升到 priority（只升不降），已在排队的请求重新按新优先级入队"""
+        with self._lock:
+            if _PRIORITY_RANK.get(priority, 1) >= _PRIORITY_RANK[self.priority]:
+                return
+            self.priority = priority
+            waiting, self._waiting = self._waiting, []
+        for budget, waiter in waiting:
+            budget._requeue(waiter, priority)
+
+
+def current_priority() -> str:
+    value = _current_priority.get()
+    return value.priority if isinstance(value, PriorityTicket) else value
+
+
+def _current_ticket() -> Optional[PriorityTicket]:
+    value = _current_priority.get()
+    return value if isinstance(value, PriorityTicket) else None
+
+
+@contextmanager
+def priority_scope(priority: Union[str, PriorityTicket]):
+    """在作用域内设置出站调用的优先级（字符串或可提升的 PriorityTicket）"""
+    if not isinstance(priority, PriorityTicket) and priority not in _PRIORITY_RANK:
+        priority = PRIORITY_NORMAL
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def prioritized(priority: str) -> Callable:
+    """协程函数装饰器：函数内发起的出站调用使用指定优先级"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with priority_scope(priority):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+async def run_with_priority(priority: Union[str, PriorityTicket], coro: Any) -> Any:
+    """以指定优先级执行协程（用于 create_task/ensure_future 启动的后台任务）"""
+    with priority_scope(priority):
+        return await coro
+
+
+class _Waiter:
+    __slots__ = ("granted", "cancelled", "event", "loop", "future")
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.granted = False
+        self.cancelled = False
+        self.loop = loop
+        self.future = loop.create_future() if loop is not None else None
+        self.event = threading.Event() if loop is None else None
+
+    def wake(self) -> None:
+        if self.future is not None:
+            try:
+                self.loop.call_soon_threadsafe(_resolve, self.future)
+            except RuntimeError:
+                # 事件循环已关闭：等待者不再存在，由其 cancelled 标记兜底
+                pass
+        else:
+            self.event.set()
+
+
+def _resolve(future: "asyncio.Future") -> None:
+    if not future.done():
+        future.set_result(True)
+
+
+class Budget:
+    """单个预算：并发上限 + 令牌桶 + 优先级等待队列（线程安全）"""
+
+    def __init__(self, name: str, max_concurrent: int = 0, rate: float = 0.0, burst: int = 0):
+        """
+        Args:
+            name: 预算键
+            max_concurrent: 并发上限，0 表示不限
+            rate: 每秒放行的请求数，0 表示不限速
+            burst: 令牌桶容量（允许的突发请求数），默认取 max(1, rate)
+        """
+        self.name = name
+        self.max_concurrent = int(max_concurrent or 0)
+        self.rate = float(rate or 0.0)
+        self.burst = float(burst or max(1.0, self.rate))
+        self.tokens = self.burst
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.granted_total = 0
+        self.queued_total = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._updated = time.monotonic()
+        self._queue: List[Tuple[int, int, _Waiter]] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    # ---------------- 锁内操作 ----------------
+
+    def _refill(self, now: float) -> None:
+        if self.rate > 0:
+            self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _blocked_for(self, now: float) -> Optional[float]:
+        """当前不能放行时返回需等待的秒数（等待释放时为 0），可以放行返回 None"""
+        if self.max_concurrent and self.in_flight >= self.max_concurrent:
+            return 0.0
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.rate > 0 and self.tokens < 1.0:
+            return (1.0 - self.tokens) / self.rate
+        return None
+
+    def _take(self) -> None:
+        self.in_flight += 1
+        self.granted_total += 1
+        if self.rate > 0:
+            self.tokens -= 1.0
+
+    def _dispatch(self) -> Optional[float]:
+        """按优先级放行等待者；返回下一个令牌可用前的等待秒数（等待释放或无需等待时为 None）"""
+        now = time.monotonic()
+        self._refill(now)
+        while self._queue:
+            waiter = self._queue[0][2]
+            if waiter.cancelled or waiter.granted:
+                # 已取消，或提升优先级后重新入队留下的旧条目
+                heapq.heappop(self._queue)
+                continue
+            blocked = self._blocked_for(now)
+            if blocked is not None:
+                return blocked or None
+            heapq.heappop(self._queue)
+            self._take()
+            waiter.granted = True
+            waiter.wake()
+        return None
+
+    def _try_fast(self) -> bool:
+        """无人排队且有余量时直接放行"""
+        now = time.monotonic()
+        self._refill(now)
+        if not self._queue and self._blocked_for(now) is None:
+            self._take()
+            return True
+        return False
+
+    def _nudge_head(self) -> None:
+        """唤醒队首等待者重新计算等待时间（由等待释放转为等待令牌时，队首不会再收到放行通知）"""
+        if self._queue:
+            self._queue[0][2].wake()
+
+    def _enqueue(self, waiter: _Waiter, priority: str, ticket: Optional[PriorityTicket] = None) -> Optional[float]:
+        self.queued_total += 1
+        if ticket is None:
+            heapq.heappush(self._queue, (_PRIORITY_RANK.get(priority, 1), next(self._seq), waiter))
+        else:
+            # 读取优先级与登记在同一把锁内，不会错过并发的 promote
+            with ticket._lock:
+                heapq.heappush(self._queue, (_PRIORITY_RANK[ticket.priority], next(self._seq), waiter))
+                ticket._waiting = [(b, w) for b, w in ticket._waiting if not (w.granted or w.cancelled)]
+                ticket._waiting.append((self, waiter))
+        return self._dispatch()
+
+    def _requeue(self, waiter: _Waiter, priority: str) -> None:
+        """按新优先级重新入队（旧条目在出队时跳过）"""
+        with self._lock:
+            if waiter.granted or waiter.cancelled:
+                return
+            heapq.heappush(self._queue, (_PRIORITY_RANK.get(priority, 1), next(self._seq), waiter))
+            self._dispatch()
+            self._nudge_head()
+
+    # ---------------- 对外接口 ----------------
+
+    def acquire_sync(
+        self, priority: str, max_wait: Optional[float] = None, ticket: Optional[PriorityTicket] = None
+    ) -> float:
+        """阻塞等待放行，返回排队时间"""
+        with self._lock:
+            if self._try_fast():
+                return 0.0
+            waiter = _Waiter()
+            delay = self._enqueue(waiter, priority, ticket)
+        start = time.monotonic()
+        deadline = start + max_wait if max_wait else None
+        while True:
+            if waiter.granted:
+                break
+            timeout = delay
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                timeout = remaining if timeout is None else min(timeout, remaining)
+            waiter.event.wait(timeout=max(0.0, timeout) if timeout is not None else None)
+            with self._lock:
+                if waiter.granted:
+                    break
+                delay = self._dispatch()
+                if waiter.granted:
+                    if delay is not None:
+                        self._nudge_head()
+                    break
+                waiter.event.clear()
+                if deadline is not None and time.monotonic() >= deadline:
+                    waiter.cancelled = True
+                    raise GovernorTimeout(f"{self.name} 排队超过 {max_wait}s")
+        return self._note_wait(time.monotonic() - start)
+
+    async def acquire(
+        self, priority: str, max_wait: Optional[float] = None, ticket: Optional[PriorityTicket] = None
+    ) -> float:
+        """协程中等待放行（不占用线程），返回排队时间"""
+        with self._lock:
+            if self._try_fast():
+                return 0.0
+            waiter = _Waiter(asyncio.get_running_loop())
+            delay = self._enqueue(waiter, priority, ticket)
+        start = time.monotonic()
+        deadline = start + max_wait if max_wait else None
+        try:
+            while not waiter.granted:
+                timeout = delay
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    timeout = remaining if timeout is None else min(timeout, remaining)
+                try:
+                    await asyncio.wait_for(asyncio.shield(waiter.future), timeout=max(0.0, timeout) if timeout is not None else None)
+                except asyncio.TimeoutError:
+                    pass
+                with self._lock:
+                    if waiter.granted:
+                        break
+                    delay = self._dispatch()
+                    if waiter.granted:
+                        if delay is not None:
+                            self._nudge_head()
+                        break
+                    if waiter.future.done():
+                        waiter.future = waiter.loop.create_future()
+                    if deadline is not None and time.monotonic() >= deadline:
+                        waiter.cancelled = True
+                        raise GovernorTimeout(f"{self.name} 排队超过 {max_wait}s")
+        except asyncio.CancelledError:
+            with self._lock:
+                waiter.cancelled = True
+                granted = waiter.granted
+            if granted:
+                self.release()
+            raise
+        return self._note_wait(time.monotonic() - start)
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            if self._dispatch() is not None:
+                self._nudge_head()
+
+    def penalize(self, seconds: float) -> None:
+        """暂停放行 seconds 秒（如收到 429）"""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + max(0.0, seconds))
+
+    def _note_wait(self, waited: float) -> float:
+        with self._lock:
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+        return waited
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            waiting = len({id(w) for _, _, w in self._queue if not (w.cancelled or w.granted)})
+            return {
+                "max_concurrent": self.max_concurrent,
+                "rate": self.rate,
+                "in_flight": self.in_flight,
+                "waiting": waiting,
+                "granted": self.granted_total,
+                "queued": self.queued_total,
+                "avg_wait": round(self.wait_total / self.queued_total, 4) if self.queued_total else 0.0,
+                "wait_total": round(self.wait_total, 4),
+                "max_wait": round(self.wait_max, 4),
+            }
+
+
+_DEFAULT_BUDGETS: Dict[str, Dict[str, Any]] = {
+    "llm": {"max_concurrent": 8, "rate": 0, "burst": 0},
+    "search": {"max_concurrent": 4, "rate": 2.0, "burst": 4},
+    "fetch": {"max_concurrent": 16, "rate": 0, "burst": 0},
+    "mcp": {"max_concurrent": 4, "rate": 0, "burst": 0},
+    "default": {"max_concurrent": 8, "rate": 0, "burst": 0},
+}
+
+
+class Governor:
+    """出站调用管控：按键管理预算，提供同步/异步限流上下文"""
+
+    def __init__(
+        self,
+        budgets: Optional[Dict[str, Dict[str, Any]]] = None,
+        enabled: bool = True,
+        max_wait: Optional[float] = 60.0,
+    ):
+        """
+        Args:
+            budgets: 预算配置；键可以是类别（llm/search/fetch/mcp/default）或具体键（如 search:baidu）
+            enabled: False 时所有调用直接放行
+            max_wait: 单次排队的最长等待（秒），超时抛出 GovernorTimeout；None 表示不限
+        """
+        self.enabled = enabled
+        self.max_wait = max_wait
+        self.configs: Dict[str, Dict[str, Any]] = {k: dict(v) for k, v in _DEFAULT_BUDGETS.items()}
+        for key, cfg in (budgets or {}).items():
+            self.configs[key] = {**self.configs.get(key, {}), **(cfg or {})}
+        self._budgets: Dict[str, Budget] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _category(key: str) -> str:
+        return key.split(":", 1)[0]
+
+    def budget(self, key: str) -> Budget:
+        budget = self._budgets.get(key)
+        if budget is None:
+            with self._lock:
+                budget = self._budgets.get(key)
+                if budget is None:
+                    cfg = self.configs.get(key) or self.configs.get(self._category(key)) or self.configs["default"]
+                    budget = self._budgets[key] = Budget(
+                        key,
+                        max_concurrent=int(cfg.get("max_concurrent", 0) or 0),
+                        rate=float(cfg.get("rate", 0) or 0),
+                        burst=int(cfg.get("burst", 0) or 0),
+                    )
+        return budget
+
+    def _record_wait(self, key: str, waited: float) -> None:
+        if waited < 0.001:
+            return
+        try:
+            from .metrics import get_metrics
+            metrics = get_metrics()
+            metrics.record_performance(f"governor_wait_{self._category(key)}", waited)
+            metrics.increment("governor.queued")
+        except Exception:
+            pass
+        if waited >= 1.0:
+            logger.debug(f"Governor: {key} 排队 {waited:.2f}s（priority={current_priority()}）")
+
+    @asynccontextmanager
+    async def limit(self, key: str, priority: Optional[str] = None):
+        """协程中限流：async with governor.limit("search:baidu"): ..."""
+        if not self.enabled:
+            yield
+            return
+        budget = self.budget(key)
+        ticket = None if priority else _current_ticket()
+        waited = await budget.acquire(priority or current_priority(), self.max_wait, ticket)
+        self._record_wait(key, waited)
+        try:
+            yield
+        finally:
+            budget.release()
+
+    @contextmanager
+    def limit_sync(self, key: str, priority: Optional[str] = None):
+        """
+        线程中限流：with governor.limit_sync("fetch"): ...
+        安装了推迟钩子且钩子接管时，由钩子决定是否及何时排队
+        """
+        if not self.enabled:
+            yield
+            return
+        deferrer = _sync_limit_deferrer
+        if deferrer is not None:
+            with deferrer(self, key, priority) as deferred:
+                if deferred:
+                    yield
+                    return
+        with self.hold_sync(key, priority):
+            yield
+
+    @contextmanager
+    def hold_sync(self, key: str, priority: Optional[str] = None):
+        """线程中立即排队并占用预算（不经推迟钩子）"""
+        if not self.enabled:
+            yield
+            return
+        budget = self.budget(key)
+        ticket = None if priority else _current_ticket()
+        waited = budget.acquire_sync(priority or current_priority(), self.max_wait, ticket)
+        self._record_wait(key, waited)
+        try:
+            yield
+        finally:
+            budget.release()
+
+    def penalize(self, key: str, seconds: float) -> None:
+        """该预算暂停放行 seconds 秒（上游返回 429 / Retry-After 时调用）"""
+        if self.enabled and seconds > 0:
+            logger.warning(f"Governor: {key} 被限流，暂停 {seconds:.1f}s")
+            self.budget(key).penalize(seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            items = list(self._budgets.items())
+        return {key: budget.snapshot() for key, budget in sorted(items)}
+
+
+def retry_after_seconds(headers: Any, default: float = 5.0) -> float:
+    """解析 Retry-After 头（秒数形式），无法解析时返回 default"""
+    try:
+        value = headers.get("Retry-After") if headers is not None else None
+        return max(0.0, float(value)) if value else default
+    except (TypeError, ValueError):
+        return default
+
+
+# 全局 governor 实例
+_global_governor: Optional[Governor] = None
+_governor_lock = threading.Lock()
+
+
+def get_governor() -> Governor:
+    """获取全局出站调用管控器（配置 performance.governor）"""
+    global _global_governor
+    if _global_governor is None:
+        with _governor_lock:
+            if _global_governor is None:
+                cfg: Dict[str, Any] = {}
+                try:
+                    from ..config.config_loader import get_config
+                    cfg = get_config().get("performance.governor", {}) or {}
+                except Exception:
+                    pass
+                max_wait = cfg.get("max_wait", 60.0)
+                _global_governor = Governor(
+                    budgets=cfg.get("budgets") or {},
+                    enabled=bool(cfg.get("enabled", True)),
+                    max_wait=float(max_wait) if max_wait else None,
+                )
+    return _global_governor
@@ -0,0 +1,371 @@
+"""
+HTML 解析服务 - 在独立进程池中解析网页，避免 BeautifulSoup 建树阻塞事件循环
+
+- 进程池常驻，worker 使用 spawn 启动，与主进程的线程/事件循环互不影响
+- 安装了 lxml 时自动使用更快的 lxml 解析器（performance.html_parse.backend 可指定）
+- 单页解析 CPU 时间受 cpu_budget 约束（worker 内用 ITIMER_PROF 计时），超出即中止
+- 每页的解析 CPU 耗时计入指标 html_parse_cpu，超时/失败计入 html_parse.* 计数
+- 进程池不可用时回退到线程执行，接口不变
+"""
+
+import asyncio
+import importlib.util
+import multiprocessing
+import re
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urljoin, urlparse
+
+from loguru import logger
+
+# bs4 在首次解析时才导入（主进程启动时无需加载）；lxml 只检测是否安装
+LXML_AVAILABLE = importlib.util.find_spec("lxml") is not None
+_BS4_MISSING = object()
+_beautiful_soup: Any = None
+
+
+def _soup_class() -> Any:
+    """返回 BeautifulSoup 类；未安装 bs4 时返回 None"""
+    global _beautiful_soup
+    if _beautiful_soup is None:
+        try:
+            from bs4 import BeautifulSoup
+            _beautiful_soup = BeautifulSoup
+        except ImportError:
+            _beautiful_soup = _BS4_MISSING
+    return None if _beautiful_soup is _BS4_MISSING else _beautiful_soup
+
+
+DEFAULT_MAX_TEXT_CHARS = 8000
+DEFAULT_STRIP_TAGS = ("script", "style", "nav", "header", "footer")
+# “查看更多/展开”等可点击文本
+MORE_BUTTON_TEXTS = ("查看更多", "展开", "展开更多", "阅读全文", "查看全部", "more", "expand", "read more")
+
+# worker 进程内的默认解析器（由进程池 initializer 设置）
+_DEFAULT_BACKEND = "lxml" if LXML_AVAILABLE else "html.parser"
+_IN_WORKER = False
+
+
+class ParseBudgetExceeded(Exception):
+    """单页解析 CPU 时间超出预算"""
+
+
+@dataclass
+class ParsedPage:
+    """页面解析结果：正文 + 可跟进链接"""
+    text: str = ""
+    links: List[Tuple[str, str]] = field(default_factory=list)
+    cpu_time: float = 0.0
+    backend: str = ""
+
+
+def resolve_backend(preferred: Optional[str] = None) -> str:
+    """解析器选择：auto/lxml 且已安装 lxml 时用 lxml，否则用标准库 html.parser"""
+    preferred = (preferred or "auto").lower()
+    if preferred in ("auto", "lxml") and LXML_AVAILABLE:
+        return "lxml"
+    return "html.parser"
+
+
+def make_soup(html: str, backend: Optional[str] = None) -> Any:
+    """构建 BeautifulSoup；未安装 bs4 时返回 None"""
+    soup_class = _soup_class()
+    if soup_class is None:
+        return None
+    return soup_class(html, backend or _DEFAULT_BACKEND)
+
+
+def extract_links(
+    soup: Any,
+    base_url: str,
+    visited: Optional[Set[str]] = None,
+    cross_domain_hosts: Iterable[str] = (),
+) -> List[Tuple[str, str]]:
+    """
+    提取可跟进链接：<a href>、查看更多/展开旁的 <a>、.more/.expand 内 <a>，以及 onclick 中的 URL。
+    默认只保留同域链接；base_url 的域名在 cross_domain_hosts 中时（如搜索结果页）允许跨域。
+    """
+    if not soup:
+        return []
+    visited = visited or set()
+    cross_domain_hosts = set(cross_domain_hosts)
+    seen_urls: Set[str] = set()
+    out: List[Tuple[str, str]] = []
+    try:
+        base_domain = urlparse(base_url).netloc
+
+        def _add_link(href: str, link_text: str) -> None:
+            if not href or href.startswith("#") or href.startswith("javascript:"):
+                return
+            full_url = urljoin(base_url, href)
+            if not full_url.startswith("http"):
+                return
+            parsed = urlparse(full_url)
+            if parsed.netloc != base_domain and base_domain not in cross_domain_hosts:
+                return
+            if full_url in visited or full_url in seen_urls:
+                return
+            if any(x in full_url.lower() for x in ("login", "signin", "logout", "javascript", "void(0)")):
+                return
+            seen_urls.add(full_url)
+            out.append((full_url, link_text or ""))
+
+        for a in soup.find_all("a", href=True):
+            href = a.get("href", "").strip()
+            link_text = a.get_text(strip=True) or ""
+            _add_link(href, link_text)
+
+        for tag in soup.find_all(True, class_=re.compile(r"more|expand|read-more|show-more", re.I)):
+            a = tag.find("a", href=True)
+            if a:
+                _add_link(a.get("href", "").strip(), a.get_text(strip=True) or tag.get_text(strip=True)[:50])
+
+        for node in soup.find_all(string=re.compile("|".join(re.escape(t) for t in MORE_BUTTON_TEXTS))):
+            parent = getattr(node, "parent", None)
+            if not parent:
+                continue
+            a = None
+            if getattr(parent, "name", None) == "a" and parent.get("href"):
+                a = parent
+            else:
+                a = parent.find("a", href=True) if hasattr(parent, "find") else None
+            if a:
+                txt = a.get_text(strip=True) if hasattr(a, "get_text") else ""
+                _add_link(a.get("href", "").strip(), txt[:80])
+
+        for tag in soup.find_all(attrs={"onclick": True}):
+            onclick = (tag.get("onclick") or "").strip()
+            m = re.search(r"['\"](https?://[^'\"]+)['\"]", onclick)
+            if m:
+                _add_link(m.group(1), tag.get_text(strip=True)[:80] or "onclick")
+    except Exception as e:
+        logger.debug(f"extract_links error: {e}")
+    return out
+
+
+def extract_page(
+    html: str,
+    base_url: str = "",
+    max_text_chars: int = DEFAULT_MAX_TEXT_CHARS,
+    with_links: bool = True,
+    cross_domain_hosts: Iterable[str] = (),
+    strip_tags: Iterable[str] = DEFAULT_STRIP_TAGS,
+) -> ParsedPage:
+    """提取正文（去除脚本/导航等，压缩空白并截断）与可跟进链接"""
+    if not html or _soup_class() is None:
+        return ParsedPage()
+    soup = make_soup(html)
+    for tag in soup(list(strip_tags)):
+        tag.decompose()
+    text = soup.get_text(separator="\n", strip=True)
+    text = " ".join(text.split())[:max_text_chars]
+    links = extract_links(soup, base_url, cross_domain_hosts=cross_domain_hosts) if with_links else []
+    return ParsedPage(text=text, links=links, backend=_DEFAULT_BACKEND)
+
+
+def _on_budget_exceeded(signum, frame):
+    raise ParseBudgetExceeded("HTML 解析 CPU 时间超出预算")
+
+
+def _worker_init(backend: str) -> None:
+    global _DEFAULT_BACKEND, _IN_WORKER
+    _DEFAULT_BACKEND = backend
+    _IN_WORKER = True
+
+
+def _invoke(func: Callable, args: tuple, kwargs: dict, cpu_budget: float) -> Tuple[Any, float]:
+    """在 worker 中执行解析函数，返回 (结果, CPU 耗时)；仅在 worker 进程主线程中启用 CPU 计时器"""
+    use_timer = (
+        _IN_WORKER and cpu_budget > 0 and hasattr(signal, "setitimer")
+        and threading.current_thread() is threading.main_thread()
+    )
+    clock = time.process_time if _IN_WORKER else time.thread_time
+    started = clock()
+    if use_timer:
+        previous = signal.signal(signal.SIGPROF, _on_budget_exceeded)
+        signal.setitimer(signal.ITIMER_PROF, cpu_budget)
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        if use_timer:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+            signal.signal(signal.SIGPROF, previous)
+    return result, clock() - started
+
+
+class HtmlParsePool:
+    """HTML 解析进程池"""
+
+    def __init__(
+        self,
+        workers: int = 2,
+        backend: str = "auto",
+        cpu_budget: float = 5.0,
+        max_html_bytes: int = 2 * 1024 * 1024,
+    ):
+        """
+        Args:
+            workers: 进程数，0 表示不使用进程池（在线程中解析）
+            backend: 解析器 auto / lxml / html.parser
+            cpu_budget: 单页解析 CPU 时间上限（秒），0 表示不限
+            max_html_bytes: 送入解析的 HTML 最大字符数，超出部分截断
+        """
+        self.workers = max(0, int(workers))
+        self.backend = resolve_backend(backend)
+        self.cpu_budget = float(cpu_budget or 0)
+        self.max_html_bytes = int(max_html_bytes or 0)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        logger.info(f"HtmlParsePool initialized (workers={self.workers}, backend={self.backend})")
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers <= 0:
+            return None
+        with self._lock:
+            if self._executor is None:
+                try:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_worker_init,
+                        initargs=(self.backend,),
+                    )
+                except Exception as e:
+                    logger.warning(f"HTML 解析进程池启动失败，回退到线程解析: {e}")
+                    self.workers = 0
+            return self._executor
+
+    def _reset_executor(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _clip(self, html: Any) -> Any:
+        if isinstance(html, str) and self.max_html_bytes and len(html) > self.max_html_bytes:
+            return html[:self.max_html_bytes]
+        return html
+
+    def _report(self, name: str, cpu_time: float, label: str = "") -> None:
+        try:
+            from .metrics import get_metrics
+            get_metrics().record_performance("html_parse_cpu", cpu_time)
+        except Exception:
+            pass
+        logger.debug(f"HTML 解析 {name} {label} CPU {cpu_time * 1000:.1f}ms")
+
+    def _count(self, event: str) -> None:
+        try:
+            from .metrics import get_metrics
+            get_metrics().increment(f"html_parse.{event}")
+        except Exception:
+            pass
+
+    def _disable_pool(self, error: Exception) -> None:
+        """进程池不可用（worker 无法启动或异常退出）时，后续解析改在线程中进行"""
+        self._count("errors")
+        logger.warning(f"HTML 解析进程池不可用，回退到线程解析: {error}")
+        self.workers = 0
+        self._reset_executor()
+
+    def _finish(self, func: Callable, outcome: Tuple[Any, float], label: str) -> Any:
+        result, cpu_time = outcome
+        self._report(func.__name__, cpu_time, label)
+        if isinstance(result, ParsedPage):
+            result.cpu_time = cpu_time
+        return result
+
+    def _fail(self, func: Callable, error: Exception, label: str) -> None:
+        if isinstance(error, ParseBudgetExceeded):
+            self._count("timeouts")
+            logger.warning(f"HTML 解析超出 CPU 预算（{self.cpu_budget}s），已中止: {label or func.__name__}")
+        else:
+            self._count("errors")
+            logger.debug(f"HTML 解析失败 {label or func.__name__}: {error}")
+        return None
+
+    async def run(self, func: Callable, html: str, *args: Any, label: str = "", **kwargs: Any) -> Any:
+        """
+        在进程池中执行 func(html, *args, **kwargs)（func 须为模块级函数）。
+        超出 CPU 预算或解析失败时返回 None。
+        """
+        call = (func, (self._clip(html),) + args, kwargs, self.cpu_budget)
+        executor = self._get_executor()
+        try:
+            if executor is not None:
+                try:
+                    outcome = await asyncio.get_running_loop().run_in_executor(executor, _invoke, *call)
+                except BrokenProcessPool as e:
+                    self._disable_pool(e)
+                    outcome = await asyncio.to_thread(_invoke, *call)
+            else:
+                outcome = await asyncio.to_thread(_invoke, *call)
+        except Exception as e:
+            return self._fail(func, e, label)
+        return self._finish(func, outcome, label)
+
+    def run_sync(self, func: Callable, html: str, *args: Any, label: str = "", **kwargs: Any) -> Any:
+        """同步版本的 run，供已在工作线程中执行的同步代码使用"""
+        call = (func, (self._clip(html),) + args, kwargs, self.cpu_budget)
+        executor = self._get_executor()
+        try:
+            if executor is not None:
+                try:
+                    outcome = executor.submit(_invoke, *call).result()
+                except BrokenProcessPool as e:
+                    self._disable_pool(e)
+                    outcome = _invoke(*call)
+            else:
+                outcome = _invoke(*call)
+        except Exception as e:
+            return self._fail(func, e, label)
+        return self._finish(func, outcome, label)
+
+    async def parse_page(self, html: str, base_url: str = "", **kwargs: Any) -> ParsedPage:
+        """提取正文 + 链接（见 extract_page），失败时返回空结果"""
+        page = await self.run(extract_page, html, base_url, label=base_url, **kwargs)
+        return page if isinstance(page, ParsedPage) else ParsedPage(backend=self.backend)
+
+    def shutdown(self) -> None:
+        """关闭进程池"""
+        self._reset_executor()
+
+
+# 全局解析池实例
+_global_pool: Optional[HtmlParsePool] = None
+_global_lock = threading.Lock()
+
+
+def get_html_parse_pool() -> HtmlParsePool:
+    """获取全局 HTML 解析池（配置 performance.html_parse）"""
+    global _global_pool
+    if _global_pool is None:
+        with _global_lock:
+            if _global_pool is None:
+                cfg = {}
+                try:
+                    from ..config.config_loader import get_config
+                    cfg = get_config().get("performance.html_parse", {}) or {}
+                except Exception:
+                    pass
+                _global_pool = HtmlParsePool(
+                    workers=cfg.get("workers", 2),
+                    backend=cfg.get("backend", "auto"),
+                    cpu_budget=cfg.get("cpu_budget", 5.0),
+                    max_html_bytes=cfg.get("max_html_bytes", 2 * 1024 * 1024),
+                )
+    return _global_pool
+
+
+def shutdown_html_parse_pool() -> None:
+    """关闭全局 HTML 解析池（服务退出时调用）"""
+    global _global_pool
+    with _global_lock:
+        if _global_pool is not None:
+            _global_pool.shutdown()
+            _global_pool = None
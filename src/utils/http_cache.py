@@ -0,0 +1,327 @@
+"""
+HTTP 响应缓存 - 按规范化 URL 缓存网页，供爬取/正文抓取工具共享
+
+- 页面正文 zlib 压缩后存入 SQLite（WAL，多线程/多进程安全），有 TTL 与字节预算
+- 过期后使用 ETag / Last-Modified 发起条件请求，304 时直接复用缓存并续期
+- 请求失败时返回过期的缓存内容（stale-if-error）
+- 可同时缓存已提取的正文/链接（按 variant 区分提取方式），命中时跳过网络请求与 HTML 解析；
+  页面内容变化时提取结果随之失效
+"""
+
+import pickle
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from loguru import logger
+
+from .disk_cache import SqliteCacheStore
+
+try:
+    import requests
+except ImportError:
+    requests = None
+
+
+# 规范化时去除的跟踪参数
+_TRACKING_PARAMS = {"fbclid", "gclid", "spm", "from", "ref", "ref_src", "share_source"}
+_DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+
+def normalize_url(url: str) -> str:
+    """
+    规范化 URL 作为缓存键：协议/域名小写、去掉默认端口与片段、去掉跟踪参数、查询参数排序。
+    """
+    try:
+        parts = urlsplit(url.strip())
+    except Exception:
+        return url
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    netloc = host
+    if port and str(port) != _DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{port}"
+    if parts.username:
+        netloc = f"{parts.username}@{netloc}"
+    path = parts.path or "/"
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in _TRACKING_PARAMS
+    ]
+    query.sort()
+    return urlunsplit((scheme, netloc, path, urlencode(query), ""))
+
+
+@dataclass
+class CachedResponse:
+    """缓存的页面"""
+    url: str
+    body: str
+    etag: str = ""
+    last_modified: str = ""
+    fetched_at: float = 0.0
+    expires_at: float = 0.0
+
+    @property
+    def fresh(self) -> bool:
+        return self.expires_at > time.time()
+
+
+class HttpCache(SqliteCacheStore):
+    """按规范化 URL 缓存 HTTP 响应（SQLite 持久化）"""
+
+    table = "pages"
+    expire_column = "expires_at"
+
+    def __init__(
+        self,
+        path: str,
+        ttl: int = 86400,
+        max_bytes: int = 256 * 1024 * 1024,
+        stale_ttl: int = 7 * 86400,
+        max_entry_bytes: int = 5 * 1024 * 1024,
+        evict_interval: int = 50,
+    ):
+        """
+        Args:
+            path: SQLite 文件路径
+            ttl: 新鲜期（秒），过期后需条件请求重新验证
+            max_bytes: 缓存总字节上限（压缩后），超出后按最近访问时间淘汰
+            stale_ttl: 过期后仍保留用于条件请求/失败兜底的时长（秒）
+            max_entry_bytes: 单个页面最大字符数，超出不缓存
+            evict_interval: 每写入多少次检查一次容量
+        """
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entry_bytes = max_entry_bytes
+        super().__init__(path, max_bytes, evict_interval)
+        logger.info(f"HttpCache initialized (path={self.path}, ttl={ttl}s, max_bytes={max_bytes})")
+
+    def _init_schema(self) -> None:
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " key TEXT PRIMARY KEY,"
+            " url TEXT NOT NULL,"
+            " body BLOB NOT NULL,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " extracted BLOB,"
+            " fetched_at REAL NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " access_at REAL NOT NULL)"
+        )
+        self._conn().execute("CREATE INDEX IF NOT EXISTS idx_pages_access ON pages(access_at)")
+
+    def _metric_name(self, event: str) -> str:
+        return f"http_cache.{event}"
+
+    def _expired_cutoff(self) -> float:
+        # 过期条目再保留 stale_ttl，用于条件请求与失败兜底
+        return time.time() - self.stale_ttl
+
+    # ---------------- 底层读写 ----------------
+
+    def lookup(self, url: str) -> Optional[CachedResponse]:
+        """查询缓存（含已过期、可用于条件请求的条目）"""
+        key = normalize_url(url)
+        try:
+            row = self._conn().execute(
+                "SELECT url, body, etag, last_modified, fetched_at, expires_at FROM pages WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn().execute("UPDATE pages SET access_at = ? WHERE key = ?", (time.time(), key))
+            return CachedResponse(
+                url=row[0],
+                body=zlib.decompress(row[1]).decode("utf-8"),
+                etag=row[2] or "",
+                last_modified=row[3] or "",
+                fetched_at=row[4],
+                expires_at=row[5],
+            )
+        except Exception as e:
+            logger.debug(f"HttpCache 读取失败（忽略）: {e}")
+            return None
+
+    def store(self, url: str, body: str, etag: str = "", last_modified: str = "", ttl: Optional[int] = None) -> None:
+        """写入页面（页面内容更新后，已缓存的提取结果一并清除）"""
+        if not body or not body.strip() or len(body) > self.max_entry_bytes:
+            return
+        now = time.time()
+        blob = zlib.compress(body.encode("utf-8"), 6)
+        try:
+            self._conn().execute(
+                "INSERT OR REPLACE INTO pages(key, url, body, etag, last_modified, extracted, fetched_at, "
+                "expires_at, size, access_at) VALUES (?, ?, ?, ?, ?, NULL, ?, ?, ?, ?)",
+                (normalize_url(url), url, sqlite3.Binary(blob), etag or "", last_modified or "",
+                 now, now + (ttl or self.ttl), len(blob), now),
+            )
+        except Exception as e:
+            logger.debug(f"HttpCache 写入失败（忽略）: {e}")
+            return
+        self._note_write()
+
+    def touch(self, url: str, ttl: Optional[int] = None) -> None:
+        """重新验证通过（304），续期"""
+        now = time.time()
+        try:
+            self._conn().execute(
+                "UPDATE pages SET expires_at = ?, access_at = ? WHERE key = ?",
+                (now + (ttl or self.ttl), now, normalize_url(url)),
+            )
+        except Exception as e:
+            logger.debug(f"HttpCache 续期失败（忽略）: {e}")
+
+    def get_extracted(self, url: str, variant: str) -> Optional[Any]:
+        """获取已缓存的提取结果（页面需仍在新鲜期内）"""
+        try:
+            row = self._conn().execute(
+                "SELECT extracted, expires_at FROM pages WHERE key = ?", (normalize_url(url),)
+            ).fetchone()
+        except Exception:
+            return None
+        if not row or not row[0] or row[1] <= time.time():
+            return None
+        try:
+            value = pickle.loads(zlib.decompress(row[0])).get(variant)
+        except Exception:
+            return None
+        if value is not None:
+            self._count("extracted_hits")
+        return value
+
+    def set_extracted(self, url: str, variant: str, value: Any) -> None:
+        """缓存页面的提取结果（页面须已缓存）"""
+        key = normalize_url(url)
+        try:
+            conn = self._conn()
+            row = conn.execute("SELECT extracted, body FROM pages WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return
+            extracted: Dict[str, Any] = pickle.loads(zlib.decompress(row[0])) if row[0] else {}
+            extracted[variant] = value
+            blob = zlib.compress(pickle.dumps(extracted, protocol=pickle.HIGHEST_PROTOCOL), 6)
+            conn.execute(
+                "UPDATE pages SET extracted = ?, size = ? WHERE key = ?",
+                (sqlite3.Binary(blob), len(row[1]) + len(blob), key),
+            )
+        except Exception as e:
+            logger.debug(f"HttpCache 写入提取结果失败（忽略）: {e}")
+
+    # ---------------- 带缓存的抓取 ----------------
+
+    def fetch(
+        self,
+        url: str,
+        session: Any = None,
+        timeout: float = 10,
+        headers: Optional[Dict[str, str]] = None,
+        retries: int = 1,
+        governor_key: Optional[str] = "fetch",
+        cacheable: Optional[Callable[[str], bool]] = None,
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """
+        带缓存的 GET，返回 (text 或 None, error_message)。
+
+        新鲜缓存直接返回；过期缓存发起条件请求（304 续期复用）；请求失败时返回过期缓存。
+        实际发出的请求经出站调用管控（governor_key 为 None 时不管控）。
+        cacheable(text) 返回 False 的响应（如反爬/验证页）照常返回但不写入缓存；空响应始终不缓存。
+        """
+        cached = self.lookup(url)
+        if cached is not None and cached.fresh:
+            self._count("hits")
+            return cached.body, None
+        if requests is None and session is None:
+            return (cached.body, None) if cached else (None, "requests 未安装")
+
+        request_headers = dict(headers or {})
+        if cached is not None:
+            if cached.etag:
+                request_headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                request_headers["If-Modified-Since"] = cached.last_modified
+        getter = session.get if session is not None else requests.get
+        from .governor import get_governor
+        governor = get_governor()
+
+        err = "请求失败或超时"
+        for attempt in range(max(1, retries)):
+            try:
+                if governor_key:
+                    with governor.limit_sync(governor_key):
+                        resp = getter(url, timeout=timeout, headers=request_headers or None)
+                else:
+                    resp = getter(url, timeout=timeout, headers=request_headers or None)
+                if resp.status_code == 304 and cached is not None:
+                    self.touch(url)
+                    self._count("revalidated")
+                    return cached.body, None
+                resp.raise_for_status()
+                if resp.encoding is None or resp.encoding.lower() == "iso-8859-1":
+                    resp.encoding = resp.apparent_encoding or "utf-8"
+                text = resp.text
+                store = "no-store" not in (resp.headers.get("Cache-Control") or "").lower()
+                if store and cacheable is not None:
+                    try:
+                        store = bool(cacheable(text))
+                    except Exception:
+                        store = False
+                if store:
+                    self.store(
+                        url, text,
+                        etag=resp.headers.get("ETag", ""),
+                        last_modified=resp.headers.get("Last-Modified", ""),
+                    )
+                self._count("misses")
+                return text, None
+            except Exception as e:
+                err = str(e)
+                logger.warning(f"请求失败 {url} attempt={attempt + 1}: {err}")
+        if cached is not None:
+            self._count("stale_served")
+            logger.info(f"请求失败，使用过期缓存: {url}")
+            return cached.body, None
+        return None, err
+
+    # ---------------- 维护 ----------------
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        stats = super().stats()
+        stats["ttl"] = self.ttl
+        return stats
+
+
+# 全局 HTTP 缓存实例
+_global_http_cache: Optional[HttpCache] = None
+_http_cache_loaded = False
+_http_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> Optional[HttpCache]:
+    """获取全局 HTTP 缓存（配置 performance.http_cache）；未启用时返回 None"""
+    global _global_http_cache, _http_cache_loaded
+    if not _http_cache_loaded:
+        with _http_cache_lock:
+            if not _http_cache_loaded:
+                try:
+                    from ..config.config_loader import get_config
+                    cfg = get_config().get("performance.http_cache", {}) or {}
+                    if cfg.get("enabled", False):
+                        _global_http_cache = HttpCache(
+                            path=cfg.get("path", "data/cache/http.sqlite3"),
+                            ttl=int(cfg.get("ttl", 86400)),
+                            max_bytes=int(cfg.get("max_bytes", 256 * 1024 * 1024)),
+                            stale_ttl=int(cfg.get("stale_ttl", 7 * 86400)),
+                        )
+                except Exception as e:
+                    logger.warning(f"HTTP 缓存初始化失败，已禁用: {e}")
+                    _global_http_cache = None
+                _http_cache_loaded = True
+    return _global_http_cache
@@ -40,6 +40,7 @@ class MetricsCollector:
         self.request_count = 0
         self.success_count = 0
         self.failure_count = 0
+        self.counters: Dict[str, int] = defaultdict(int)
         self.start_time = datetime.now()
         logger.info("MetricsCollector initialized")
     
@@ -84,6 +85,20 @@ class MetricsCollector:
         
         logger.debug(f"记录性能: {operation} = {duration:.3f}s")
     
+    def increment(self, name: str, value: int = 1):
+        """
+        累加计数器
+        
+        Args:
+            name: 计数器名称（如 "cache.default.hits"）
+            value: 增量
+        """
+        self.counters[name] += value
+    
+    def get_counters(self, prefix: str = "") -> Dict[str, int]:
+        """获取计数器（可按前缀过滤）"""
+        return {k: v for k, v in self.counters.items() if k.startswith(prefix)}
+    
     def record_request(self, success: bool):
         """记录请求"""
         self.request_count += 1
@@ -147,13 +162,15 @@ class MetricsCollector:
             "failure_count": self.failure_count,
             "success_rate": f"{success_rate:.2f}%",
             "errors": self.get_error_stats(),
-            "performance": self.get_performance_stats()
+            "performance": self.get_performance_stats(),
+            "counters": dict(self.counters)
         }
     
     def reset(self):
         """重置所有指标"""
         self.errors.clear()
         self.performance.clear()
+        self.counters.clear()
         self.request_count = 0
         self.success_count = 0
         self.failure_count = 0
@@ -0,0 +1,27 @@
+"""
+可选依赖的延迟导入 - 导入较慢或可能未安装的依赖推迟到首次使用，缩短启动与工具注册时间
+"""
+
+import threading
+from typing import Any
+
+_UNLOADED = object()
+_aiohttp: Any = _UNLOADED
+_lock = threading.Lock()
+
+
+def load_aiohttp() -> Any:
+    """
+    导入 aiohttp（只执行一次）；未安装时返回 None。
+    导入较慢（含 SSL 上下文初始化），LLM 与 MCP 的异步连接池在首次异步调用时才调用本函数。
+    """
+    global _aiohttp
+    if _aiohttp is _UNLOADED:
+        with _lock:
+            if _aiohttp is _UNLOADED:
+                try:
+                    import aiohttp
+                except ImportError:
+                    aiohttp = None
+                _aiohttp = aiohttp
+    return _aiohttp
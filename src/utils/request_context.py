@@ -0,0 +1,63 @@
+"""
+请求级执行上下文：承载单次请求的 AgentState、历史快照、trace 与 token 账本。
+
+基于 contextvars 实现：asyncio 为每个 Task 复制一份上下文，因此同一个
+AgentOrchestrator / MultiAgentSystem / LangGraphWorkflow / ToolHub 实例可以被并发请求共享，
+而各请求的运行状态互不干扰。
+"""
+
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+
+@dataclass
+class RequestContext:
+    """单次请求的运行状态"""
+    request_id: str = field(default_factory=lambda: str(uuid.uuid4())[:8])
+    state: Optional[Dict[str, Any]] = None                    # CoordinationAgent 的 AgentState
+    history_snapshot: Optional[List[Dict[str, Any]]] = None   # 处理前的对话历史快照
+    trace: Any = None                                          # TraceContext / NullTraceContext
+    tokens: Any = None                                         # TokenLedger（首次记录 LLM 用量时创建）
+    extras: Dict[str, Any] = field(default_factory=dict)      # 其他请求级数据
+
+
+_current_request: ContextVar[Optional[RequestContext]] = ContextVar("research_agent_request", default=None)
+
+
+def get_request_context() -> Optional[RequestContext]:
+    """获取当前请求上下文；不在请求作用域内时返回 None"""
+    return _current_request.get()
+
+
+def ensure_request_context() -> RequestContext:
+    """
+    获取当前请求上下文，不存在时创建并绑定到当前上下文（不自动解绑）。
+
+    用于直接调用 MultiAgentSystem 等组件、未经过 request_scope 的场景：
+    每个 asyncio Task 持有独立的上下文副本，因此依旧是并发隔离的。
+    """
+    ctx = _current_request.get()
+    if ctx is None:
+        ctx = RequestContext()
+        _current_request.set(ctx)
+    return ctx
+
+
+@contextmanager
+def request_scope(ctx: Optional[RequestContext] = None, **kwargs: Any) -> Iterator[RequestContext]:
+    """
+    进入一个新的请求作用域，退出时恢复之前的上下文。
+
+    用法:
+        with request_scope(trace=trace_ctx) as req:
+            ...
+    """
+    ctx = ctx or RequestContext(**kwargs)
+    token = _current_request.set(ctx)
+    try:
+        yield ctx
+    finally:
+        _current_request.reset(token)
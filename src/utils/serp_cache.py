@@ -0,0 +1,233 @@
+"""
+搜索结果缓存（SERP cache）- 所有搜索后端共享，按规范化查询缓存结果
+
+- 查询规范化：全角/半角（NFKC）、大小写、句读标点、空白、繁简体（安装 opencc 时完整转换，否则使用常用字表）
+- 按搜索引擎配置 TTL；空结果做短 TTL 的负缓存，避免反复请求必然无结果的查询
+- 同一查询并发请求时只发起一次搜索（single-flight），其余请求等待同一结果
+- 命中率等指标计入 MetricsCollector（serp_cache.*）
+"""
+
+import asyncio
+import copy
+import inspect
+import re
+import threading
+import unicodedata
+from typing import Any, Callable, Dict, Optional
+
+from loguru import logger
+
+from .cache import SimpleCache, _build_tiered_cache
+
+try:
+    from opencc import OpenCC
+    _T2S = OpenCC("t2s")
+except Exception:
+    _T2S = None
+
+
+# 常用繁体字 -> 简体字（未安装 opencc 时的兜底）
+_TRAD = "國學會東說時間長開關問題經濟發現與為這個們來對機電話語書門車馬見貝風飛體後歷點萬華區應實際變數處準確認識議論響頭條報導網絡資訊記錄從萊爾蘭羅譯憲總統戰爭歲臺灣廣島際級線傳統計單價兩億眾陽陰雲術藝館場葉廳聯絡屬員軍隊獎鐵銀錢鳥魚龍亞歐"
+_SIMP = "国学会东说时间长开关问题经济发现与为这个们来对机电话语书门车马见贝风飞体后历点万华区应实际变数处准确认识议论响头条报导网络资讯记录从莱尔兰罗译宪总统战争岁台湾广岛际级线传统计单价两亿众阳阴云术艺馆场叶厅联络属员军队奖铁银钱鸟鱼龙亚欧"
+_T2S_TABLE = str.maketrans(_TRAD, _SIMP)
+
+_WHITESPACE = re.compile(r"\s+")
+# 规范化时去除的句读标点（NFKC 后的半角形式及中文标点）；+、#、& 等符号保留，避免 C++ / C# 与 C 共用缓存键
+_STRIP_PUNCT = frozenset(",.!?;:'\"()[]{}<>-/~`…、。，！？；：“”‘’《》〈〉「」『』【】·—")
+# 两侧均为英文字母/数字时保留的标点（3.14、node.js、covid-19、U.S.）
+_JOINERS = frozenset(".,-'/:")
+
+
+def _is_ascii_alnum(ch: str) -> bool:
+    return ch.isascii() and ch.isalnum()
+
+
+def normalize_query(query: str) -> str:
+    """规范化搜索查询，作为缓存键的一部分"""
+    text = unicodedata.normalize("NFKC", str(query or ""))
+    if _T2S is not None:
+        try:
+            text = _T2S.convert(text)
+        except Exception:
+            text = text.translate(_T2S_TABLE)
+    else:
+        text = text.translate(_T2S_TABLE)
+    chars = []
+    for i, ch in enumerate(text):
+        if ch in _STRIP_PUNCT:
+            between = 0 < i < len(text) - 1 and _is_ascii_alnum(text[i - 1]) and _is_ascii_alnum(text[i + 1])
+            if not (ch in _JOINERS and between):
+                ch = " "
+        chars.append(ch)
+    text = "".join(chars)
+    return _WHITESPACE.sub(" ", text).strip().lower()
+
+
+class SerpCache:
+    """搜索结果缓存"""
+
+    def __init__(
+        self,
+        cache: Any = None,
+        ttl: Optional[Dict[str, int]] = None,
+        negative_ttl: int = 300,
+    ):
+        """
+        Args:
+            cache: 底层缓存（SimpleCache 或 TieredCache），默认新建内存缓存
+            ttl: 按引擎的 TTL（秒），"default" 为未列出引擎的默认值
+            negative_ttl: 空结果的缓存时长（秒），0 表示不缓存空结果
+        """
+        self.cache = cache if cache is not None else SimpleCache(default_ttl=3600, max_size=2000, name="serp")
+        self.ttl = {"default": 3600, **(ttl or {})}
+        self.negative_ttl = int(negative_ttl)
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        # 进行中的搜索：键 -> [搜索任务, 等待者数量]
+        self._inflight: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(engine: str, query: str, **params: Any) -> str:
+        extra = "&".join(f"{k}={params[k]}" for k in sorted(params))
+        return f"serp:{engine}:{normalize_query(query)}" + (f"?{extra}" if extra else "")
+
+    def _count(self, event: str) -> None:
+        with self._lock:
+            setattr(self, event, getattr(self, event) + 1)
+        try:
+            from .metrics import get_metrics
+            get_metrics().increment(f"serp_cache.{event}")
+        except Exception:
+            pass
+
+    def get(self, engine: str, query: str, **params: Any) -> Optional[Any]:
+        """
+        查询缓存：未命中返回 None；负缓存命中返回空列表。
+        返回值为副本，调用方可以放心修改（如追加抓取的正文）。
+        """
+        value = self.cache.get(self.make_key(engine, query, **params))
+        if value is None:
+            self._count("misses")
+            return None
+        self._count("negative_hits" if not value else "hits")
+        return copy.deepcopy(value)
+
+    def set(self, engine: str, query: str, results: Any, **params: Any) -> None:
+        """写入缓存；空结果按 negative_ttl 缓存"""
+        if results is None:
+            return
+        if not results:
+            if self.negative_ttl <= 0:
+                return
+            ttl = self.negative_ttl
+        else:
+            ttl = int(self.ttl.get(engine, self.ttl["default"]))
+        self.cache.set(self.make_key(engine, query, **params), copy.deepcopy(results), ttl=ttl)
+
+    async def get_or_search(
+        self,
+        engine: str,
+        query: str,
+        search: Callable[[], Any],
+        **params: Any,
+    ) -> Any:
+        """
+        命中缓存直接返回，否则执行 search()（同步函数在线程中执行）并缓存结果。
+        同一查询的并发调用共享一次搜索；search 抛出异常时不缓存、异常向上传递。
+        搜索在独立任务中执行，单个调用方被取消不影响其他等待者；全部等待者都取消后才取消搜索。
+        """
+        cached = self.get(engine, query, **params)
+        if cached is not None:
+            return cached
+        key = self.make_key(engine, query, **params)
+        loop = asyncio.get_running_loop()
+        flight = self._inflight.get(key)
+        if flight is None or flight[0].get_loop() is not loop:
+            task = loop.create_task(self._run_search(engine, query, search, params))
+            flight = [task, 0]
+            self._inflight[key] = flight
+            task.add_done_callback(lambda t, f=flight: self._finish_flight(key, f, t))
+        task = flight[0]
+        flight[1] += 1
+        try:
+            results = await asyncio.shield(task)
+        finally:
+            flight[1] -= 1
+            if flight[1] == 0 and not task.done():
+                task.cancel()
+        return copy.deepcopy(results)
+
+    async def _run_search(self, engine: str, query: str, search: Callable[[], Any], params: Dict[str, Any]) -> Any:
+        if inspect.iscoroutinefunction(search):
+            results = await search()
+        else:
+            results = await asyncio.to_thread(search)
+            if inspect.isawaitable(results):
+                results = await results
+        self.set(engine, query, results, **params)
+        return results
+
+    def _finish_flight(self, key: str, flight: list, task: "asyncio.Task") -> None:
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+        # 避免无人等待时出现 "exception was never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        """命中统计"""
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.negative_hits) / lookups, 4) if lookups else 0.0,
+            "ttl": dict(self.ttl),
+            "negative_ttl": self.negative_ttl,
+        }
+
+    def clear(self) -> None:
+        self.cache.clear()
+
+
+# 全局 SERP 缓存实例
+_global_serp_cache: Optional[SerpCache] = None
+_serp_cache_loaded = False
+_serp_cache_lock = threading.Lock()
+
+
+def get_serp_cache() -> Optional[SerpCache]:
+    """获取全局搜索结果缓存（配置 performance.serp_cache）；未启用时返回 None"""
+    global _global_serp_cache, _serp_cache_loaded
+    if not _serp_cache_loaded:
+        with _serp_cache_lock:
+            if not _serp_cache_loaded:
+                try:
+                    from ..config.config_loader import get_config
+                    cfg = get_config().get("performance.serp_cache", {}) or {}
+                    if cfg.get("enabled", True):
+                        ttl = cfg.get("ttl") or {}
+                        memory = SimpleCache(
+                            default_ttl=int(ttl.get("default", 3600)),
+                            max_size=int(cfg.get("max_size", 2000)),
+                            name="serp",
+                        )
+                        persist = cfg.get("persist") or {}
+                        cache = _build_tiered_cache(memory, {
+                            "enabled": persist.get("enabled", False),
+                            "path": persist.get("path", "data/cache/serp.sqlite3"),
+                            "max_bytes": persist.get("max_bytes", 64 * 1024 * 1024),
+                            "warm_up_on_start": persist.get("warm_up_on_start", True),
+                        }) or memory
+                        _global_serp_cache = SerpCache(
+                            cache=cache,
+                            ttl=ttl,
+                            negative_ttl=int(cfg.get("negative_ttl", 300)),
+                        )
+                except Exception as e:
+                    logger.warning(f"搜索结果缓存初始化失败，已禁用: {e}")
+                    _global_serp_cache = None
+                _serp_cache_loaded = True
+    return _global_serp_cache
@@ -0,0 +1,68 @@
+"""
+批量运行器测试
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from src.agent.batch_runner import BatchRunner, load_checkpoint
+
+
+def _read_lines(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_run_respects_limit_and_keeps_order(tmp_path):
+    """并发数受信号量约束，最终输出按题目原始顺序"""
+    running = 0
+    peak = 0
+
+    async def worker(q):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01 * (5 - q["id"]))
+        running -= 1
+        return {"id": q["id"], "answer": f"a{q['id']}"}
+
+    questions = [{"id": i, "Question": f"q{i}"} for i in range(5)]
+    output = tmp_path / "submission.jsonl"
+    report = await BatchRunner(worker, concurrency=2).run(questions, output)
+
+    assert peak == 2
+    assert report.completed == 5
+    assert [item["id"] for item in _read_lines(output)] == [0, 1, 2, 3, 4]
+    assert len(report.per_question) == 5
+
+
+@pytest.mark.asyncio
+async def test_resume_skips_answered_ids(tmp_path):
+    """续跑时跳过已作答的题目，空答案与损坏行会被重新处理"""
+    output = tmp_path / "submission.jsonl"
+    output.write_text(
+        '{"id": 0, "answer": "done"}\n{"id": 1, "answer": ""}\n{"id": 2, "ans',
+        encoding="utf-8",
+    )
+    seen = []
+
+    async def worker(q):
+        seen.append(q["id"])
+        return {"id": q["id"], "answer": "new"}
+
+    questions = [{"id": i, "Question": f"q{i}"} for i in range(3)]
+    report = await BatchRunner(worker, concurrency=3).run(questions, output)
+
+    assert sorted(seen) == [1, 2]
+    assert report.skipped == 1
+    assert load_checkpoint(output) == {
+        0: {"id": 0, "answer": "done"},
+        1: {"id": 1, "answer": "new"},
+        2: {"id": 2, "answer": "new"},
+    }
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
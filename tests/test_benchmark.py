@@ -0,0 +1,86 @@
+"""
+基准统计测试（分位数、按阶段记录耗时、基线对比、答案评估）
+"""
+
+import sys
+from pathlib import Path
+
+from src.observability import PhaseRecorder, TraceContext, diff_baselines, percentile, summarize
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+from evaluate import evaluate_result  # noqa: E402
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([7.0], 99) == 7.0
+    assert percentile([], 50) is None
+
+
+def test_summarize_reports_quantiles():
+    stats = summarize([10, 20, 30, 40])
+    assert stats["count"] == 4
+    assert stats["mean"] == 25.0
+    assert stats["p50"] == 20.0
+    assert stats["p99"] == 40.0
+    assert summarize([]) == {"count": 0}
+
+
+def test_phase_recorder_collects_phase_durations():
+    """trace 事件按阶段归类；跳耗时由相邻 hop_start / 合成开始划分"""
+    trace = TraceContext()
+    recorder = PhaseRecorder()
+    trace.add_listener(recorder)
+
+    trace.on_planning_start("q")
+    trace.on_planning_end(steps_count=2)
+    trace.on_hop_start(1, "查找作者", "search_web")
+    trace.on_tool_call_start(1, "search_web", "author")
+    trace.on_tool_call_end(1, "search_web", True, "ok")
+    trace.on_hop_start(2, "查找年份", "search_web")
+    trace.on_synthesis_start(2)
+    trace.on_synthesis_end(True, "1999")
+    samples = recorder.finish()
+
+    assert len(samples["planning"]) == 1
+    assert len(samples["hop_1"]) == 1 and len(samples["hop_2"]) == 1
+    assert len(samples["hop"]) == 2
+    assert len(samples["tool:search_web"]) == 1
+    assert len(samples["synthesis"]) == 1
+    assert "reasoning" not in samples
+
+
+def test_diff_baselines_flags_regressions():
+    old = {"levels": {"1": {
+        "throughput_qps": 2.0,
+        "llm": {"calls_per_question": 4.0, "tokens_per_question": 1000.0},
+        "latency": {"end_to_end": {"p50": 100.0, "p95": 200.0, "p99": 300.0}},
+    }}}
+    new = {"levels": {
+        "1": {
+            "throughput_qps": 2.05,
+            "llm": {"calls_per_question": 5.0, "tokens_per_question": 900.0},
+            "latency": {"end_to_end": {"p50": 100.0, "p95": 260.0, "p99": 300.0}},
+        },
+        "8": {"throughput_qps": 9.0},
+    }}
+    rows = {r["metric"]: r for r in diff_baselines(old, new, threshold=0.10)}
+
+    assert rows["llm.calls_per_question"]["regression"] is True
+    assert rows["llm.tokens_per_question"]["regression"] is False
+    assert rows["latency.end_to_end.p95"]["regression"] is True
+    assert rows["latency.end_to_end.p50"]["regression"] is False
+    assert rows["throughput_qps"]["regression"] is False
+    assert all(r["concurrency"] == "1" for r in rows.values())
+
+
+def test_evaluate_result_compares_normalized_answers():
+    assert evaluate_result({"success": True, "answer": "x"}, None) is True
+    assert evaluate_result({"success": False}, None) is False
+    assert evaluate_result({"success": True, "answer": "Paris"}, "paris") is True
+    assert evaluate_result({"success": True, "answer": "b, a"}, "a, b") is True
+    assert evaluate_result({"success": True, "answer": "London"}, ["Paris", "Rome"]) is False
+    assert evaluate_result({"success": True, "answer": "born in 1999"}, {"contains": ["1999"]}) is True
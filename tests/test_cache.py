@@ -0,0 +1,146 @@
+"""
+缓存测试：LRU 淘汰、TTL 惰性过期、字节预算与指标计数
+"""
+
+import pytest
+
+from src.utils import cache as cache_module
+from src.utils.cache import SimpleCache
+from src.utils.disk_cache import DiskCache, SqliteCacheStore, TieredCache
+from src.utils.metrics import get_metrics
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = _Clock()
+    monkeypatch.setattr(cache_module.time, "time", c.time)
+    return c
+
+
+def test_lru_eviction_keeps_recently_used():
+    """超出条目数时淘汰最久未使用的条目"""
+    cache = SimpleCache(max_size=2, name="test_lru")
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiry(clock):
+    """到期条目在读取或后续写入时被清理"""
+    cache = SimpleCache(default_ttl=10, name="test_ttl")
+    cache.set("short", "x", ttl=5)
+    cache.set("long", "y", ttl=100)
+    clock.now += 6
+    assert cache.get("short") is None
+    cache.set("other", "z", ttl=5)
+    clock.now += 6
+    cache.set("new", "w")
+    assert len(cache) == 2
+    assert cache.get("long") == "y"
+    assert cache.stats()["expirations"] == 2
+
+
+def test_overwrite_does_not_expire_with_old_deadline(clock):
+    """覆盖写入后，旧的过期时间不会误删新值"""
+    cache = SimpleCache(name="test_overwrite")
+    cache.set("k", "old", ttl=5)
+    cache.set("k", "new", ttl=100)
+    clock.now += 10
+    cache.set("x", 1)
+    assert cache.get("k") == "new"
+
+
+def test_byte_budget():
+    """超出字节预算时按 LRU 淘汰，单个超大值不缓存"""
+    cache = SimpleCache(max_size=100, max_bytes=100, name="test_bytes")
+    cache.set("a", "x" * 40)
+    cache.set("b", "y" * 40)
+    cache.set("c", "z" * 40)
+    assert cache.get("a") is None
+    assert cache.stats()["total_bytes"] <= 100
+    cache.set("huge", "h" * 500)
+    assert cache.get("huge") is None
+
+
+def test_counters_exported_to_metrics():
+    """命中/未命中计数同步到 MetricsCollector"""
+    cache = SimpleCache(name="test_metrics")
+    cache.set("k", "v")
+    cache.get("k")
+    cache.get("missing")
+    counters = get_metrics().get_counters("cache.test_metrics.")
+    assert counters["cache.test_metrics.hits"] >= 1
+    assert counters["cache.test_metrics.misses"] >= 1
+
+
+def test_disk_cache_shared_between_instances(tmp_path):
+    """两个实例（模拟两个 worker/重启前后）共享同一个缓存文件"""
+    path = tmp_path / "cache.sqlite3"
+    writer = DiskCache(str(path))
+    writer.set("answer", {"answer": "42"}, ttl=60)
+    reader = DiskCache(str(path))
+    assert reader.get("answer") == {"answer": "42"}
+    reader.set("expired", "x", ttl=-1)
+    assert writer.get("expired") is None
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    """超出字节上限时淘汰最久未访问的条目"""
+    cache = DiskCache(str(tmp_path / "cache.sqlite3"), max_bytes=1000, evict_interval=1)
+    for i in range(10):
+        cache.set(f"k{i}", "v" * 200)
+    stats = cache.stats()
+    assert stats["total_bytes"] <= 1000
+    assert cache.get("k9") is not None
+    assert cache.get("k0") is None
+
+
+def test_tiered_cache_promotes_and_warms_up(tmp_path):
+    """L2 命中回填 L1；重启后预热加载最近条目"""
+    path = str(tmp_path / "cache.sqlite3")
+    first = TieredCache(SimpleCache(name="test_tier1"), DiskCache(path))
+    first.set("q", "a", ttl=60)
+
+    restarted = TieredCache(SimpleCache(name="test_tier2"), DiskCache(path))
+    assert len(restarted.memory) == 0
+    assert restarted.get("q") == "a"
+    assert restarted.memory.get("q") == "a"
+
+    warmed = TieredCache(SimpleCache(name="test_tier3"), DiskCache(path))
+    assert warmed.warm_up() == 1
+    assert warmed.memory.get("q") == "a"
+
+
+@pytest.mark.asyncio
+async def test_tiered_cache_async_access(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    first = TieredCache(SimpleCache(name="test_tier_async1"), DiskCache(path))
+    await first.set_async("k", {"answer": "42"}, ttl=60)
+    restarted = TieredCache(SimpleCache(name="test_tier_async2"), DiskCache(path))
+    assert await restarted.get_async("k") == {"answer": "42"}
+    assert restarted.memory.get("k") == {"answer": "42"}
+
+
+def test_sqlite_store_requires_schema(tmp_path):
+    class _Incomplete(SqliteCacheStore):
+        pass
+
+    with pytest.raises(TypeError):
+        _Incomplete(str(tmp_path / "x.sqlite3"), max_bytes=0)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,231 @@
+"""
+录制/回放测试（内容寻址存储、requests 挂钩、LLM 调用、合成延迟）
+"""
+
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from src.utils.cassette import Cassette, CassetteMiss, LatencyModel, cassette_call, set_cassette
+from src.utils.governor import Governor
+
+
+class _Site:
+    """本地站点：返回带计数的页面（/big 返回大正文），记录请求次数"""
+
+    def __init__(self):
+        self.hits = 0
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                site.hits += 1
+                data = f"<html><body>第 {site.hits} 次</body></html>".encode("utf-8")
+                if self.path.startswith("/big"):
+                    data = b"x" * 200000
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Set-Cookie", "session=secret-cookie")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                self.rfile.read(length)
+                self.do_GET()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.url = self.base + "/page"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def site():
+    s = _Site()
+    yield s
+    s.close()
+
+
+@pytest.fixture
+def cassette_path(tmp_path):
+    yield str(tmp_path / "cassette.sqlite3")
+    set_cassette(None)
+
+
+def test_requests_are_recorded_and_replayed_offline(site, cassette_path):
+    """录制后回放不再访问网络，返回录制时的正文"""
+    set_cassette(Cassette(cassette_path, mode="record"))
+    recorded = requests.get(site.url, params={"q": "x"}, timeout=5)
+    assert recorded.status_code == 200
+    assert site.hits == 1
+
+    set_cassette(Cassette(cassette_path, mode="replay", latency={"http": "none"}))
+    replayed = requests.get(site.url, params={"q": "x"}, timeout=5)
+    assert site.hits == 1
+    assert replayed.status_code == 200
+    assert replayed.text == recorded.text
+    assert replayed.headers["Content-Type"].startswith("text/html")
+
+    with pytest.raises(CassetteMiss):
+        requests.post(site.url, data=b"other", timeout=5)
+    assert site.hits == 1
+
+
+def test_auto_mode_records_misses_and_hook_is_removed(site, cassette_path):
+    cassette = Cassette(cassette_path, mode="auto", latency={"default": "none"})
+    set_cassette(cassette)
+    first = requests.get(site.url, timeout=5).text
+    second = requests.get(site.url, timeout=5).text
+    assert first == second and site.hits == 1
+    assert cassette.stats()["http"] == {"misses": 1, "recorded": 1, "replayed": 1}
+
+    set_cassette(None)
+    requests.get(site.url, timeout=5)
+    assert site.hits == 2
+
+
+def test_store_deduplicates_identical_bodies(cassette_path):
+    cassette = Cassette(cassette_path, mode="record")
+    cassette.record("http", {"url": "a"}, {"status": 200}, 5.0, body=b"same page" * 100)
+    cassette.record("http", {"url": "b"}, {"status": 200}, 5.0, body=b"same page" * 100)
+    stats = cassette.store.stats()
+    assert stats["interactions"] == {"http": 2}
+    # 请求各一份，相同的响应元数据与正文只存一份
+    assert stats["blobs"] == 4
+    assert stats["stored_bytes"] < stats["raw_bytes"]
+
+
+def test_llm_chat_is_replayed_with_usage(cassette_path, monkeypatch):
+    """provider 层按消息与采样参数录制 LLM 调用，回放时不发出请求"""
+    from src.llm.model_provider import APIModelProvider
+
+    provider = APIModelProvider({"api_base": "http://127.0.0.1:9/v1", "api_key": "k", "model_name": "m"})
+    calls = []
+
+    def live(messages, temperature, max_tokens, stream):
+        calls.append(messages)
+        return {"choices": [{"message": {"content": "答案"}}], "usage": {"prompt_tokens": 7, "completion_tokens": 2}}
+
+    monkeypatch.setattr(provider, "_chat_live", live)
+    set_cassette(Cassette(cassette_path, mode="record"))
+    assert provider.generate("问题") == "答案"
+
+    replay = Cassette(cassette_path, mode="replay", latency={"llm": "none"})
+    set_cassette(replay)
+    assert provider.generate("问题") == "答案"
+    assert len(calls) == 1
+    assert replay.stats()["llm"] == {"replayed": 1, "prompt_tokens": 7, "completion_tokens": 2}
+    with pytest.raises(CassetteMiss):
+        provider.generate("另一个问题")
+
+
+@pytest.mark.asyncio
+async def test_stream_replay_yields_recorded_content(cassette_path, monkeypatch):
+    from src.llm.model_provider import APIModelProvider, ChatStream
+
+    provider = APIModelProvider({"api_base": "http://127.0.0.1:9/v1", "api_key": "k", "model_name": "m"})
+
+    def live(messages, temperature, max_tokens, timeout):
+        async def _source(stream):
+            for piece in ("流式", "回答"):
+                for delta in stream.feed([{"choices": [{"delta": {"content": piece}}]}]):
+                    yield delta
+        return ChatStream(_source)
+
+    monkeypatch.setattr(provider, "_chat_stream_live", live)
+    set_cassette(Cassette(cassette_path, mode="record"))
+    stream = provider.chat_stream_async([{"role": "user", "content": "q"}])
+    assert [d async for d in stream] == ["流式", "回答"]
+
+    set_cassette(Cassette(cassette_path, mode="replay", latency={"llm": "none"}))
+    replayed = provider.chat_stream_async([{"role": "user", "content": "q"}])
+    assert "".join([d async for d in replayed]) == "流式回答"
+    assert replayed.content == "流式回答"
+
+
+def test_cassette_call_wraps_library_calls(cassette_path):
+    results = [{"title": "t", "href": "http://x"}]
+    set_cassette(Cassette(cassette_path, mode="record"))
+    assert cassette_call("search", {"engine": "duckduckgo", "query": "q"}, lambda: results) == results
+    set_cassette(Cassette(cassette_path, mode="replay", latency={"search": "none"}))
+    assert cassette_call("search", {"engine": "duckduckgo", "query": "q"}, lambda: 1 / 0) == results
+
+
+def test_replay_latency_is_synthetic_and_deterministic(cassette_path):
+    recorder = Cassette(cassette_path, mode="record")
+    recorder.record("llm", {"p": 1}, {"choices": []}, latency_ms=40.0)
+
+    fixed = Cassette(cassette_path, mode="replay", latency={"llm": "fixed:30"})
+    start = time.perf_counter()
+    fixed.replay_sync("llm", {"p": 1})
+    assert time.perf_counter() - start >= 0.03
+
+    def delays(seed):
+        c = Cassette(cassette_path, mode="replay", latency={"llm": "lognormal:100:0.5"}, seed=seed)
+        interaction = c.store.get(c.make_key("llm", {"p": 1}))
+        return [c._delay_seconds(interaction) for _ in range(3)]
+
+    assert delays(1) == delays(1)
+    assert delays(1) != delays(2)
+
+
+def test_latency_model_specs():
+    rng = random.Random(0)
+    assert LatencyModel.from_spec("none").sample_ms(50, rng) == 0.0
+    assert LatencyModel.from_spec("recorded:2").sample_ms(50, rng) == 100.0
+    assert LatencyModel.from_spec("fixed:12").sample_ms(50, rng) == 12.0
+    assert 10 <= LatencyModel.from_spec("uniform:10:20").sample_ms(50, rng) <= 20
+    assert LatencyModel.from_spec({"distribution": "lognormal", "median_ms": 80}).sample_ms(0, rng) > 0
+
+
+def test_credentials_are_not_stored(site, cassette_path):
+    cassette = Cassette(cassette_path, mode="record")
+    set_cassette(cassette)
+    requests.get(site.url, params={"q": "x", "api_key": "secret"}, timeout=5)
+    conn = cassette.store._conn()
+    stored = b"".join(cassette.store._get_blob(conn, d) for (d,) in conn.execute("SELECT digest FROM blobs"))
+    assert b"secret" not in stored
+    assert b"secret-cookie" not in stored
+
+
+def test_replay_hits_bypass_governor(site, cassette_path):
+    """回放命中不经 governor 排队；未命中的真实请求仍受限速"""
+    governor = Governor(budgets={"search": {"max_concurrent": 1, "rate": 0.5, "burst": 1}})
+    set_cassette(Cassette(cassette_path, mode="auto", latency={"http": "none"}))
+    start = time.perf_counter()
+    for _ in range(4):
+        with governor.limit_sync("search:site"):
+            requests.get(site.url, timeout=5)
+    assert time.perf_counter() - start < 1.0
+    assert site.hits == 1
+    assert governor.budget("search:site").snapshot()["granted"] == 1
+
+
+def test_streamed_body_recorded_as_read(site, cassette_path):
+    """stream=True 时不提前读取正文，只录制调用方读取的部分"""
+    set_cassette(Cassette(cassette_path, mode="record"))
+    with requests.get(site.base + "/big", timeout=5, stream=True) as r:
+        read = b""
+        for chunk in r.iter_content(chunk_size=1024):
+            read += chunk
+            if len(read) > 4096:
+                break
+    with requests.get(site.url, timeout=5, stream=True) as r:
+        full = r.content
+
+    set_cassette(Cassette(cassette_path, mode="replay", latency={"http": "none"}))
+    assert requests.get(site.base + "/big", timeout=5).content == read
+    assert requests.get(site.url, timeout=5).content == full
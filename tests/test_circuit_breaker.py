@@ -0,0 +1,114 @@
+"""
+熔断器与 ToolHub 健康登记测试
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from src.toolhub import ToolCandidate, ToolHub
+from src.utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, HealthRegistry
+
+
+def test_breaker_state_transitions():
+    br = CircuitBreaker(name="t", failure_threshold=3, timeout_threshold=2, cool_down=0.05)
+    br.record_failure("e1")
+    br.record_failure("e2", timed_out=True)
+    assert br.state == CLOSED
+    br.record_failure("e3", timed_out=True)
+    assert br.state == OPEN and not br.allow() and not br.available()
+
+    # 冷却结束：半开，只放行一个探测
+    time.sleep(0.06)
+    assert br.available()
+    assert br.allow()
+    assert br.state == HALF_OPEN and not br.allow()
+
+    # 探测失败：重新熔断，冷却加倍
+    br.record_failure("probe")
+    assert br.state == OPEN and br.current_cool_down == pytest.approx(0.1)
+
+    time.sleep(0.11)
+    assert br.allow()
+    br.record_success()
+    assert br.state == CLOSED and br.consecutive_failures == 0
+
+
+def test_cancelled_probe_released():
+    br = CircuitBreaker(name="t", failure_threshold=1, cool_down=0.01)
+    br.record_failure("x")
+    time.sleep(0.02)
+    assert br.allow()
+    br.release()
+    assert br.allow()
+
+
+class _Tool:
+    def __init__(self, delay=0.0, success=True, error="connection refused"):
+        self.delay = delay
+        self.success = success
+        self.error = error
+        self.calls = 0
+
+    async def execute(self, input_data):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {"success": self.success, "result": "ok" if self.success else None, "error": None if self.success else self.error}
+
+
+@pytest.mark.asyncio
+async def test_toolhub_skips_open_candidates():
+    registry = HealthRegistry(failure_threshold=2, timeout_threshold=1, cool_down=60)
+    hub = ToolHub(health=registry)
+    hub._config_cache = {"timeout": 0.05}
+    hub._config_cache_time = float("inf")
+    hanging, healthy = _Tool(delay=1.0), _Tool()
+    hub.register_candidate(ToolCandidate("calculator", "tools", hanging, 0, {"capabilities": ["calculate"]}))
+    hub.register_candidate(ToolCandidate("calculator", "skills", healthy, 1, {"capabilities": ["calculate"]}))
+
+    # 一次超时即熔断
+    res = await hub._call_candidate(hub._candidates_by_name["calculator"][0], "1+1")
+    assert "timeout" in res["error"]
+    assert registry.snapshot()["open"] == ["calculator@tools"]
+
+    for call in (
+        hub.execute("calculator", "1+1"),
+        hub.execute_by_capability("calculate", "1+1"),
+        hub.execute_with_task_context("calculator", "1+1", {"capability_tags": []}),
+    ):
+        res = await call
+        assert res["success"] and res["_meta"]["source"] == "skills"
+    assert hanging.calls == 1
+
+    healthy.success = False
+    for _ in range(2):
+        await hub._call_candidate(hub._candidates_by_name["calculator"][1], "1+1")
+    res = await hub.execute("calculator", "1+1")
+    assert res["error"] == "all_candidates_circuit_open"
+    assert healthy.calls == 5
+
+
+@pytest.mark.asyncio
+async def test_non_transport_failures_do_not_trip_breaker():
+    """工具正常返回的失败（如无结果）不计入熔断，传输层错误才计入"""
+    registry = HealthRegistry(failure_threshold=2, cool_down=60)
+    hub = ToolHub(health=registry)
+    hub._config_cache = {"timeout": 1.0}
+    hub._config_cache_time = float("inf")
+    tool = _Tool(success=False, error="no_results")
+    cand = ToolCandidate("search_web", "tools", tool, 0, {})
+    hub.register_candidate(cand)
+
+    for _ in range(3):
+        await hub._call_candidate(cand, "q")
+    assert registry.snapshot()["open"] == []
+
+    tool.error = "http_503"
+    for _ in range(2):
+        await hub._call_candidate(cand, "q")
+    assert registry.snapshot()["open"] == ["search_web@tools"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,165 @@
+"""
+异步爬取引擎测试
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.tools.crawl_engine import AsyncCrawlEngine, thread_fetcher
+
+
+class _FakeWeb:
+    """模拟站点：记录并发与请求时间"""
+
+    def __init__(self, delay=0.05, pages=None):
+        self.delay = delay
+        self.pages = pages or {}
+        self.in_flight = 0
+        self.peak = 0
+        self.host_peak = {}
+        self.host_in_flight = {}
+        self.started = []
+        self.completed = []
+
+    async def fetch(self, url):
+        host = url.split("/")[2]
+        self.in_flight += 1
+        self.host_in_flight[host] = self.host_in_flight.get(host, 0) + 1
+        self.peak = max(self.peak, self.in_flight)
+        self.host_peak[host] = max(self.host_peak.get(host, 0), self.host_in_flight[host])
+        self.started.append((url, time.perf_counter()))
+        try:
+            await asyncio.sleep(self.delay)
+            self.completed.append(url)
+            return self.pages.get(url, f"<html>{url}</html>"), None
+        finally:
+            self.in_flight -= 1
+            self.host_in_flight[host] -= 1
+
+
+def _score(url, text):
+    return float(text) if text else 0.0
+
+
+@pytest.mark.asyncio
+async def test_pages_fetched_concurrently_in_priority_order():
+    """多个页面同时在途，得分高的先启动"""
+    web = _FakeWeb()
+    engine = AsyncCrawlEngine(
+        web.fetch, _score, lambda url, html: ([], False),
+        max_in_flight=3, per_host_limit=5, politeness_delay=0, max_pages=10,
+    )
+    seeds = [(f"http://h{i}.com/p", str(i)) for i in range(6)]
+    t0 = time.perf_counter()
+    result = await engine.crawl(seeds)
+    elapsed = time.perf_counter() - t0
+
+    assert result.pages_fetched == 6
+    assert web.peak == 3
+    assert elapsed < 0.2  # 串行约 0.3s
+    assert [u for u, _ in web.started[:3]] == ["http://h5.com/p", "http://h4.com/p", "http://h3.com/p"]
+
+
+@pytest.mark.asyncio
+async def test_per_host_limit_and_politeness_delay():
+    """同一站点并发不超过上限，相邻请求间隔不小于礼貌延迟"""
+    web = _FakeWeb(delay=0.01)
+    engine = AsyncCrawlEngine(
+        web.fetch, _score, lambda url, html: ([], False),
+        max_in_flight=4, per_host_limit=1, politeness_delay=0.05, max_pages=10,
+    )
+    seeds = [(f"http://a.com/{i}", "1") for i in range(3)] + [("http://b.com/x", "0")]
+    result = await engine.crawl(seeds)
+
+    assert result.pages_fetched == 4
+    assert web.host_peak["a.com"] == 1
+    a_times = [t for u, t in web.started if u.startswith("http://a.com")]
+    gaps = [b - a for a, b in zip(a_times, a_times[1:])]
+    assert all(g >= 0.045 for g in gaps)
+    # 其他站点不受 a.com 的限制
+    b_time = [t for u, t in web.started if u.startswith("http://b.com")][0]
+    assert b_time - a_times[0] < 0.03
+
+
+@pytest.mark.asyncio
+async def test_frontier_expands_and_stops_when_answer_found():
+    """页面回调返回的新链接进入 frontier；找到答案后取消在途请求"""
+    web = _FakeWeb(delay=0.05)
+    web.pages["http://s.com/slow"] = "slow"
+
+    async def slow_fetch(url):
+        if url == "http://s.com/slow":
+            await asyncio.sleep(1)
+        return await web.fetch(url)
+
+    def on_page(url, html):
+        if url == "http://s.com/root":
+            return [("http://s.com/answer", "9"), ("http://s.com/other", "1")], False
+        return [], url == "http://s.com/answer"
+
+    engine = AsyncCrawlEngine(
+        slow_fetch, _score, on_page,
+        max_in_flight=3, per_host_limit=3, politeness_delay=0, max_pages=10,
+    )
+    t0 = time.perf_counter()
+    result = await engine.crawl([("http://s.com/root", "5"), ("http://s.com/slow", "0")])
+    elapsed = time.perf_counter() - t0
+
+    assert result.answer_found
+    assert result.answer_url == "http://s.com/answer"
+    assert result.cancelled >= 1
+    assert "http://s.com/slow" not in web.completed
+    assert elapsed < 0.5
+
+
+@pytest.mark.asyncio
+async def test_max_pages_and_failures():
+    """达到页面上限即停止；抓取失败计入 pages_failed"""
+
+    async def fetch(url):
+        if url.endswith("bad"):
+            return None, "boom"
+        return "<html></html>", None
+
+    def on_page(url, html):
+        n = int(url.rsplit("/", 1)[-1])
+        return [(f"http://x.com/{n + 1}", "1"), (f"http://x.com/{n}bad", "2")], False
+
+    engine = AsyncCrawlEngine(fetch, _score, on_page, max_in_flight=1, politeness_delay=0, max_pages=5)
+    result = await engine.crawl([("http://x.com/0", "1")])
+    assert result.pages_fetched + result.pages_failed == 5
+    assert result.pages_failed >= 1
+
+
+@pytest.mark.asyncio
+async def test_thread_fetcher_drops_queued_fetches_on_stop():
+    """同步抓取在有界线程池中执行：找到答案后，排队中尚未开始的抓取被丢弃"""
+    started = []
+    lock = threading.Lock()
+
+    def fetch_sync(url):
+        with lock:
+            started.append(url)
+        time.sleep(0.05)
+        return f"<html>{url}</html>", None
+
+    executor = ThreadPoolExecutor(max_workers=1)
+    engine = AsyncCrawlEngine(
+        thread_fetcher(fetch_sync, executor), _score, lambda url, html: ([], True),
+        max_in_flight=4, per_host_limit=4, politeness_delay=0, max_pages=10,
+    )
+    result = await engine.crawl([(f"http://h.com/{i}", str(10 - i)) for i in range(4)])
+    executor.shutdown(wait=True)
+
+    assert result.answer_found and result.pages_fetched == 1
+    assert result.cancelled == 3
+    # 工作线程可能在事件循环处理完成前已取走下一项；其余排队的抓取从未开始
+    assert started[0] == "http://h.com/0" and len(started) <= 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
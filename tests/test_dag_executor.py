@@ -0,0 +1,133 @@
+"""
+DAG 执行器测试
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from src.agent.dag_executor import DagExecutor
+
+
+def _step(step_id, deps=None, **extra):
+    return {"id": step_id, "description": f"step {step_id}", "dependencies": deps or [], **extra}
+
+
+@pytest.mark.asyncio
+async def test_independent_steps_run_in_parallel_and_respect_deps():
+    """无依赖步骤并行执行，有依赖的步骤拿到依赖结果后才启动"""
+    started = {}
+    seen_deps = {}
+
+    async def run_step(step, dep_results):
+        started[step["id"]] = time.perf_counter()
+        seen_deps[step["id"]] = [r["step_id"] for r in dep_results]
+        await asyncio.sleep(0.05)
+        return {"step_id": step["id"], "success": True, "result": step["id"]}
+
+    steps = [_step(1), _step(2), _step(3, [1, 2])]
+    t0 = time.perf_counter()
+    run = await DagExecutor(run_step, max_parallel=5).run(steps)
+    elapsed = time.perf_counter() - t0
+
+    assert elapsed < 0.14  # 关键路径为两步
+    assert abs(started[1] - started[2]) < 0.03
+    assert started[3] >= max(started[1], started[2])
+    assert seen_deps[3] == [1, 2]
+    assert [r["step_id"] for r in run.ordered(steps)] == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_concurrency_cap():
+    """同时运行的步骤数不超过 max_parallel"""
+    running = 0
+    peak = 0
+
+    async def run_step(step, dep_results):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return {"step_id": step["id"], "success": True}
+
+    run = await DagExecutor(run_step, max_parallel=2).run([_step(i) for i in range(6)])
+    assert peak == 2
+    assert len(run.completion_order) == 6
+
+
+@pytest.mark.asyncio
+async def test_failure_and_timeout_cancel_downstream():
+    """步骤失败或超时时，下游步骤（含传递依赖）被取消，无关步骤照常执行"""
+    executed = []
+
+    async def run_step(step, dep_results):
+        executed.append(step["id"])
+        if step["id"] == 1:
+            return {"step_id": 1, "success": False, "error": "boom"}
+        if step["id"] == 4:
+            await asyncio.sleep(1)
+        return {"step_id": step["id"], "success": True}
+
+    steps = [
+        _step(1), _step(2, [1]), _step(3, [2]),
+        _step(4, timeout=0.05), _step(5, [4]),
+        _step(6),
+    ]
+    run = await DagExecutor(run_step, max_parallel=4, step_timeout=5).run(steps)
+
+    assert sorted(executed) == [1, 4, 6]
+    assert sorted(run.skipped) == [2, 3, 5]
+    assert run.results[3]["skipped"] is True
+    assert "超时" in run.results[4]["error"]
+    assert run.results[6]["success"] is True
+
+
+@pytest.mark.asyncio
+async def test_missing_and_cyclic_dependencies_are_skipped():
+    """依赖不存在或成环的步骤不会执行"""
+
+    async def run_step(step, dep_results):
+        return {"step_id": step["id"], "success": True}
+
+    steps = [_step(1, [99]), _step(2, [3]), _step(3, [2]), _step(4)]
+    run = await DagExecutor(run_step).run(steps)
+    assert run.completion_order == [4]
+    assert sorted(run.skipped) == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_independent_plan_steps_see_question_and_plan_only():
+    """无依赖的步骤只拿到问题与计划概要，不包含兄弟步骤的结果；有依赖的步骤拿到依赖结果"""
+    from src.agent.multi_agent_system import CoordinationAgent
+    from src.utils.request_context import request_scope
+
+    seen = {}
+
+    class _Planning:
+        llm = None
+
+        def decompose_task(self, question, context=None):
+            return {"steps": [_step(1), _step(2), _step(3, [1])]}
+
+    class _Execution:
+        async def execute_step(self, step, context):
+            seen[step["id"]] = context
+            await asyncio.sleep(0.01 * step["id"])
+            return {"step_id": step["id"], "success": True, "result": f"r{step['id']}"}
+
+    class _Verification:
+        async def verify_result(self, step_result, context):
+            return {"verified": True, "confidence": 1.0}
+
+    agent = CoordinationAgent(_Planning(), _Execution(), _Verification())
+    with request_scope():
+        await agent.process_question("问题", {})
+    assert seen[2]["step_results"] == []
+    assert seen[2]["question"] == "问题" and seen[2]["plan"] == ["1. step 1", "2. step 2", "3. step 3"]
+    assert [r["step_id"] for r in seen[3]["step_results"]] == [1]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,124 @@
+"""
+证据压缩测试（切段、BM25 相关性挑选、预算装箱、跨来源去重、执行层接入）
+"""
+
+import src.agent.multi_agent_system as mas
+import src.utils.evidence_compressor as ec
+from src.agent.multi_agent_system import ExecutionAgent
+from src.observability import estimate_tokens
+from src.utils.evidence_compressor import EvidenceCompressor, compress_text, split_passages, tokenize
+
+_PAGE = "\n".join([
+    "北京是中华人民共和国的首都，位于华北平原北部，背靠燕山。",
+    "北京有着三千余年的建城史和八百六十余年的建都史。",
+    "根据第七次全国人口普查，北京市常住人口为2189万人。",
+    "北京的气候为暖温带半湿润半干旱季风气候，夏季高温多雨。",
+    "北京是全国的政治中心、文化中心和国际交往中心。",
+])
+
+
+def test_tokenize_and_split():
+    assert tokenize("北京人口 Population of Beijing") == ["population", "beijing", "北京", "京人", "人口"]
+    passages = split_passages("第一句。第二句很长" + "长" * 30 + "。\n第三行", passage_chars=20)
+    assert all(len(p) <= 20 for p in passages)
+    assert "".join(passages).replace(" ", "") == ("第一句。第二句很长" + "长" * 30 + "。第三行")
+
+
+def test_keeps_answer_bearing_passage_within_budget():
+    compressor = EvidenceCompressor(passage_chars=40)
+    text = compressor.compress("北京的常住人口是多少", [_PAGE], budget_tokens=40)
+    assert "2189万" in text
+    assert estimate_tokens(text) <= 40 + 2
+    assert "气候" not in text
+
+
+def test_output_keeps_original_order_and_dedups_across_sources():
+    compressor = EvidenceCompressor(passage_chars=40)
+    documents = [
+        ("a", "北京是首都。\n北京常住人口2189万人。"),
+        ("b", "北京常住人口2189万人。"),
+        ("c", "上海常住人口2487万人。"),
+    ]
+    selected = compressor.select("北京 上海 常住人口", documents, budget_tokens=200)
+    texts = [p.text for p in selected]
+    assert texts.count("北京常住人口2189万人。") == 1
+    assert [p.doc_index for p in selected] == sorted(p.doc_index for p in selected)
+    assert "上海常住人口2487万人。" in texts
+
+
+def test_no_overlap_falls_back_to_head():
+    compressor = EvidenceCompressor(passage_chars=40)
+    text = compressor.compress("zzz", [_PAGE], budget_tokens=30)
+    assert text.startswith("北京是中华人民共和国的首都")
+
+
+def test_min_per_source_keeps_every_hop():
+    compressor = EvidenceCompressor(passage_chars=40)
+    documents = [(0, _PAGE), (1, "天气晴。"), (2, "人口普查每十年一次。" * 3)]
+    selected = compressor.select("北京常住人口", documents, budget_tokens=60, min_per_source=1)
+    assert {p.doc_index for p in selected} == {0, 1, 2}
+
+
+def test_compress_text_respects_max_chars():
+    assert compress_text("短文本", "任意", 100) == "短文本"
+    out = compress_text(_PAGE * 3, "常住人口", 80)
+    assert len(out) <= 80 and "2189万" in out
+
+
+def test_compress_text_disabled_returns_none(monkeypatch):
+    """压缩关闭时返回 None，工具回退到原有截断"""
+    from src.tools.web_search_crawl_tool import WebSearchCrawlTool
+
+    monkeypatch.setattr(ec, "get_evidence_compressor", lambda: None)
+    assert compress_text(_PAGE * 3, "常住人口", 80) is None
+    out = WebSearchCrawlTool()._smart_truncate(_PAGE * 3, 80, "常住人口")
+    assert out.startswith("北京是中华人民共和国的首都")
+
+
+def test_format_tool_result_ranks_all_results(monkeypatch):
+    """压缩开启时不再只取前 3 条结果：第 5 条中的答案也能进入提示词"""
+    monkeypatch.setattr(mas, "get_evidence_compressor", lambda: EvidenceCompressor(budgets={"search_web": 60}))
+    results = [{"title": f"无关页面{i}", "snippet": "介绍旅游景点与美食推荐。" * 3, "link": f"http://x/{i}"} for i in range(4)]
+    results.append({"title": "人口普查", "snippet": "北京市常住人口为2189万人。", "link": "http://x/4"})
+    agent = ExecutionAgent()
+    text = agent._format_tool_result({"success": True, "results": results}, "search_web", "北京常住人口")
+    assert "2189万" in text
+    assert "人口普查（http://x/4）" in text
+    assert estimate_tokens(text) <= 60
+
+    monkeypatch.setattr(mas, "get_evidence_compressor", lambda: None)
+    truncated = agent._format_tool_result({"success": True, "results": results}, "search_web", "北京常住人口")
+    assert "2189万" not in truncated
+
+
+def test_labelled_documents_selected_once_within_budget(monkeypatch):
+    """来源标注的 token 在挑选时计入预算：只挑选一次，压缩指标只记一次"""
+    from src.utils.metrics import get_metrics
+
+    compressor = EvidenceCompressor(passage_chars=40)
+    documents = [_PAGE, "北京常住人口统计口径说明。" * 4]
+    labels = ["北京市情（http://example.com/beijing/overview）", ""]
+    before = get_metrics().get_counters("compression.").get("compression.calls", 0)
+    text = ExecutionAgent._compress_documents(compressor, "北京常住人口", documents, labels, 80)
+    after = get_metrics().get_counters("compression.").get("compression.calls", 0)
+    assert after == before + 1
+    assert estimate_tokens(text) <= 80
+    assert f"{labels[0]}: " in text and "2189万" in text
+
+
+def test_fuse_hop_evidence_compresses_long_evidence(monkeypatch):
+    monkeypatch.setattr(mas, "get_evidence_compressor", lambda: EvidenceCompressor(passage_chars=40, fusion_budget=100))
+    prompts = []
+
+    class _LLM:
+        def chat(self, messages, max_tokens=None, temperature=None):
+            prompts.append(messages[-1]["content"])
+            return {"content": "融合"}
+
+    agent = ExecutionAgent(llm=_LLM())
+    evidence = [_PAGE * 4, "上海常住人口2487万人。" + "无关内容。" * 60]
+    assert agent.fuse_hop_evidence(evidence, query="北京和上海的常住人口") == "融合"
+    prompt = prompts[0]
+    assert "2189万" in prompt and "2487万" in prompt
+    assert "第1跳：" in prompt and "第2跳：" in prompt
+    assert estimate_tokens(prompt) < estimate_tokens("".join(evidence)) / 2
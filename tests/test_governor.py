@@ -0,0 +1,188 @@
+"""
+出站调用管控（governor）测试
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.utils.governor import (
+    PRIORITY_HIGH,
+    PRIORITY_LOW,
+    PRIORITY_NORMAL,
+    Governor,
+    GovernorTimeout,
+    PriorityTicket,
+    current_priority,
+    priority_scope,
+    run_with_priority,
+    set_sync_limit_deferrer,
+)
+
+
+@pytest.mark.asyncio
+async def test_concurrency_cap_and_separate_budgets():
+    gov = Governor(budgets={"search": {"max_concurrent": 2, "rate": 0}})
+    active = {"search:baidu": 0, "search:zhihu": 0}
+    peak = {"search:baidu": 0, "search:zhihu": 0}
+
+    async def call(key):
+        async with gov.limit(key):
+            active[key] += 1
+            peak[key] = max(peak[key], active[key])
+            await asyncio.sleep(0.02)
+            active[key] -= 1
+
+    await asyncio.gather(*[call(k) for k in ("search:baidu", "search:zhihu") for _ in range(6)])
+    # 每个引擎各自最多 2 个在途
+    assert peak == {"search:baidu": 2, "search:zhihu": 2}
+    stats = gov.stats()
+    assert stats["search:baidu"]["granted"] == 6 and stats["search:baidu"]["queued"] > 0
+
+
+@pytest.mark.asyncio
+async def test_priority_order():
+    """排队中的高优先级请求先于低优先级放行"""
+    gov = Governor(budgets={"llm": {"max_concurrent": 1, "rate": 0}})
+    order = []
+
+    async def call(tag, priority):
+        with priority_scope(priority):
+            async with gov.limit("llm:test"):
+                order.append(tag)
+                await asyncio.sleep(0.01)
+
+    async with gov.limit("llm:test"):
+        tasks = [asyncio.create_task(call("low", PRIORITY_LOW))]
+        await asyncio.sleep(0.01)
+        tasks.append(asyncio.create_task(call("high", PRIORITY_HIGH)))
+        await asyncio.sleep(0.01)
+    await asyncio.gather(*tasks)
+    assert order == ["high", "low"]
+
+
+def test_rate_limit_and_threads():
+    """令牌桶限速对线程调用同样生效，优先级随 contextvar 传入"""
+    gov = Governor(budgets={"fetch": {"max_concurrent": 0, "rate": 20.0, "burst": 1}})
+    done = []
+
+    def worker():
+        with gov.limit_sync("fetch"):
+            done.append(time.monotonic())
+
+    start = time.monotonic()
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # 5 个请求、突发 1、每秒 20 个：至少约 0.2 秒
+    assert len(done) == 5
+    assert max(done) - start >= 0.18
+
+    with priority_scope(PRIORITY_HIGH):
+        assert current_priority() == PRIORITY_HIGH
+    assert current_priority() == "normal"
+
+
+@pytest.mark.asyncio
+async def test_penalize_timeout_and_cancel():
+    gov = Governor(budgets={"mcp": {"max_concurrent": 1, "rate": 0}}, max_wait=0.05)
+    gov.penalize("mcp:x", 1.0)
+    with pytest.raises(GovernorTimeout):
+        async with gov.limit("mcp:x"):
+            pass
+
+    # 排队中被取消的请求不占用名额
+    gov = Governor(budgets={"mcp": {"max_concurrent": 1, "rate": 0}})
+    async with gov.limit("mcp:y"):
+        waiter = asyncio.create_task(gov.limit("mcp:y").__aenter__())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+    async with gov.limit("mcp:y"):
+        assert gov.stats()["mcp:y"]["in_flight"] == 1
+    assert gov.stats()["mcp:y"]["in_flight"] == 0
+
+
+def test_disabled_governor_passthrough():
+    gov = Governor(enabled=False)
+    with gov.limit_sync("llm:x"):
+        pass
+    assert gov.stats() == {}
+
+
+@pytest.mark.asyncio
+async def test_waiter_queued_on_concurrency_wakes_when_tokens_refill():
+    """排队时因并发上限阻塞、释放后转为等待令牌的请求，在令牌补充后放行"""
+    gov = Governor(budgets={"search": {"max_concurrent": 2, "rate": 5.0, "burst": 2}}, max_wait=None)
+
+    async def call():
+        async with gov.limit("search:serpapi"):
+            await asyncio.sleep(0.01)
+
+    start = time.monotonic()
+    await asyncio.wait_for(asyncio.gather(*[call() for _ in range(4)]), timeout=3)
+    # 2 个突发令牌 + 2 个按 5/s 补充
+    assert time.monotonic() - start < 1.5
+    assert gov.stats()["search:serpapi"]["granted"] == 4
+
+
+@pytest.mark.asyncio
+async def test_promoted_ticket_requeues_waiting_request():
+    """低优先级后台任务被提升后，已在排队的请求先于后到的普通请求放行"""
+    gov = Governor(budgets={"search": {"max_concurrent": 1, "rate": 0}})
+    order = []
+
+    async def call(tag):
+        async with gov.limit("search:x"):
+            order.append(tag)
+            await asyncio.sleep(0.01)
+
+    ticket = PriorityTicket(PRIORITY_LOW)
+    async with gov.limit("search:x"):
+        background = asyncio.create_task(run_with_priority(ticket, call("prefetch")))
+        await asyncio.sleep(0.01)
+        other = asyncio.create_task(call("normal"))
+        await asyncio.sleep(0.01)
+        ticket.promote(PRIORITY_HIGH)
+        assert ticket.priority == PRIORITY_HIGH
+    await asyncio.gather(background, other)
+    assert order == ["prefetch", "normal"]
+    assert gov.stats()["search:x"]["waiting"] == 0
+
+    # 只升不降；作用域内 current_priority 随票据变化
+    ticket.promote(PRIORITY_NORMAL)
+    with priority_scope(ticket):
+        assert current_priority() == PRIORITY_HIGH
+
+
+def test_sync_limit_deferrer_hook():
+    """推迟钩子接管时 limit_sync 不占用预算，由钩子在需要时调用 hold_sync"""
+    from contextlib import contextmanager
+
+    gov = Governor(budgets={"fetch": {"max_concurrent": 1, "rate": 0}})
+    calls = []
+
+    @contextmanager
+    def deferrer(governor, key, priority):
+        calls.append(key)
+        yield key == "fetch:deferred"
+
+    set_sync_limit_deferrer(deferrer)
+    try:
+        with gov.limit_sync("fetch:deferred"):
+            assert gov.stats().get("fetch:deferred", {}).get("granted", 0) == 0
+        with gov.limit_sync("fetch:direct"):
+            pass
+    finally:
+        set_sync_limit_deferrer(None)
+    assert calls == ["fetch:deferred", "fetch:direct"]
+    assert gov.stats()["fetch:direct"]["granted"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
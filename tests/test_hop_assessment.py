@@ -0,0 +1,147 @@
+"""
+单跳综合评估测试：一次 LLM 调用替代校验/融合/单跳终止/整体终止四次调用
+"""
+
+import json
+
+import pytest
+
+from src.agent.langgraph_workflow import LangGraphWorkflow
+from src.agent.multi_agent_system import ExecutionAgent
+from src.utils.request_context import request_scope
+
+
+class _FakeLLM:
+    """按顺序返回预设回复，并记录调用次数"""
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.prompts = []
+
+    def chat(self, messages, max_tokens=None, temperature=None):
+        self.prompts.append(messages[-1]["content"])
+        reply = self.replies.pop(0) if self.replies else "YES"
+        return {"content": reply}
+
+
+def _agent(llm):
+    agent = ExecutionAgent(llm=llm)
+
+    async def execute_step(step, context=None):
+        return {"step_id": step["id"], "success": True, "result": f"r{step['id']}"}
+
+    agent.execute_step = execute_step
+    return agent
+
+
+def _state(hops):
+    return {
+        "question": "北京和上海哪个人口多？",
+        "multi_hop_plan": {"hops": hops, "total_stop_condition": "能回答原问题"},
+        "current_hop": 0,
+        "step_results": [],
+        "evidence_list": [],
+        "metadata": {},
+    }
+
+
+_HOPS = [
+    {"hop_num": 1, "target": "查询北京的人口", "tool": "search_web", "stop_condition": "获取到人口"},
+    {"hop_num": 2, "target": "查询上海的人口", "tool": "search_web", "stop_condition": "获取到人口"},
+]
+
+
+def test_parse_hop_assessment():
+    """解析 JSON（允许前后多余文本与字符串布尔值），字段缺失时返回 None"""
+    text = '评估结果：{"valid": "true", "corrected_result": "", "hop_complete": true, ' \
+           '"fused_evidence": "北京人口2100万", "total_complete": false} 完毕'
+    parsed = ExecutionAgent._parse_hop_assessment(text)
+    assert parsed == {
+        "valid": True,
+        "hop_complete": True,
+        "total_complete": False,
+        "corrected_result": "",
+        "fused_evidence": "北京人口2100万",
+    }
+    assert ExecutionAgent._parse_hop_assessment('{"valid": true}') is None
+    assert ExecutionAgent._parse_hop_assessment("YES") is None
+
+
+@pytest.mark.asyncio
+async def test_one_llm_call_per_hop(monkeypatch):
+    """综合评估成功时每跳只调用一次 LLM，整体终止后提前结束"""
+    import src.agent.langgraph_workflow as lw
+
+    monkeypatch.setattr(lw, "_get_speculative_config", lambda: {"enabled": False, "max_prefetch": 0})
+    replies = [
+        json.dumps({"valid": True, "corrected_result": "", "hop_complete": True,
+                    "fused_evidence": "北京2100万", "total_complete": False}, ensure_ascii=False),
+        json.dumps({"valid": True, "corrected_result": "", "hop_complete": True,
+                    "fused_evidence": "北京2100万；上海2400万", "total_complete": True}, ensure_ascii=False),
+    ]
+    llm = _FakeLLM(replies)
+    workflow = LangGraphWorkflow(agents={"execution": _agent(llm)})
+    state = _state(_HOPS)
+    with request_scope():
+        for _ in _HOPS:
+            state = await workflow._execution_node(state)
+
+    assert len(llm.prompts) == 2
+    # 第二跳的评估以第一跳得到的融合汇总代替逐跳原始证据（增量融合）
+    assert "查询上海的人口" in llm.prompts[1] and "北京2100万" in llm.prompts[1]
+    assert "第1跳：r1" not in llm.prompts[1]
+    assert state["current_hop"] == 2
+    assert state["final_answer"] == "北京2100万；上海2400万"
+
+
+@pytest.mark.asyncio
+async def test_fallback_to_individual_calls_on_parse_failure(monkeypatch):
+    """综合评估输出无法解析时回退到逐项调用"""
+    import src.agent.langgraph_workflow as lw
+
+    monkeypatch.setattr(lw, "_get_speculative_config", lambda: {"enabled": False, "max_prefetch": 0})
+    # 综合评估（无法解析）→ 校验 → 融合 / 单跳终止（并发，回复均可兼容）→ 整体终止
+    llm = _FakeLLM(["不是JSON", "TRUE", "YES", "YES", "NO"])
+    workflow = LangGraphWorkflow(agents={"execution": _agent(llm)})
+    state = _state(_HOPS[:1])
+    with request_scope():
+        state = await workflow._execution_node(state)
+
+    assert len(llm.prompts) == 5
+    assert state["current_hop"] == 1
+    assert state["evidence_list"] == ["r1"]
+    assert not state.get("final_answer")
+
+
+@pytest.mark.asyncio
+async def test_invalid_assessment_uses_its_correction(monkeypatch):
+    """综合评估判定无效并给出纠正结果时直接采用，且计为回退"""
+    import src.agent.langgraph_workflow as lw
+    from src.utils.metrics import get_metrics
+
+    monkeypatch.setattr(lw, "_get_speculative_config", lambda: {"enabled": False, "max_prefetch": 0})
+    reply = json.dumps({"valid": False, "corrected_result": "北京2185万", "hop_complete": False,
+                        "fused_evidence": "北京2185万", "total_complete": False}, ensure_ascii=False)
+    llm = _FakeLLM([reply, "YES", "YES", "NO"])
+    agent = _agent(llm)
+    corrections = []
+
+    async def correct_hop_result(target, result, tool):
+        corrections.append(target)
+        return "纠错结果"
+
+    agent.correct_hop_result = correct_hop_result
+    workflow = LangGraphWorkflow(agents={"execution": agent})
+    before = get_metrics().get_counters("hop_assessment.")
+    with request_scope():
+        state = await workflow._execution_node(_state(_HOPS[:1]))
+    after = get_metrics().get_counters("hop_assessment.")
+
+    assert corrections == []
+    assert state["evidence_list"] == ["北京2185万"]
+    assert after.get("hop_assessment.fallback", 0) == before.get("hop_assessment.fallback", 0) + 1
+    assert after.get("hop_assessment.combined", 0) == before.get("hop_assessment.combined", 0)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,134 @@
+"""
+多跳预取测试：独立跳提前并发执行，依赖跳按顺序执行
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from src.agent.langgraph_workflow import LangGraphWorkflow, hop_depends_on_previous
+from src.utils.request_context import request_scope
+
+
+class _Execution:
+    """模拟执行层：工具调用为异步，校验/融合/终止判断为阻塞调用"""
+
+    def __init__(self, step_delay=0.1, judge_delay=0.03):
+        self.step_delay = step_delay
+        self.judge_delay = judge_delay
+        self.started = {}
+
+    async def execute_step(self, step, context=None):
+        self.started[step["id"]] = time.perf_counter()
+        await asyncio.sleep(self.step_delay)
+        return {"step_id": step["id"], "success": True, "result": f"r{step['id']}"}
+
+    def validate_hop_result(self, target, result):
+        time.sleep(self.judge_delay)
+        return True, result
+
+    def fuse_hop_evidence(self, evidence_list, query=""):
+        time.sleep(self.judge_delay)
+        return " | ".join(str(e) for e in evidence_list)
+
+    def check_single_hop_complete(self, hop_info, result):
+        time.sleep(self.judge_delay)
+        return True
+
+
+def _state(hops):
+    return {
+        "question": "q",
+        "multi_hop_plan": {"hops": hops, "total_stop_condition": ""},
+        "current_hop": 0,
+        "step_results": [],
+        "evidence_list": [],
+        "metadata": {},
+    }
+
+
+def test_hop_dependency_heuristic():
+    """引用前面跳（指代词、第N跳、显式依赖）的跳视为依赖"""
+    assert not hop_depends_on_previous({"target": "查询北京的人口"}, 0)
+    assert not hop_depends_on_previous({"target": "查询上海的人口"}, 1)
+    assert hop_depends_on_previous({"target": "查询该公司的创始人"}, 1)
+    assert hop_depends_on_previous({"target": "根据第1跳计算差值"}, 2)
+    assert hop_depends_on_previous({"target": "查询上海的人口", "dependencies": [1]}, 1)
+    assert not hop_depends_on_previous({"target": "查询其人口", "dependencies": []}, 1)
+    # 普通词中的单字（其他、尤其、这些）与含 result/prior 的英文单词不视为指代
+    assert not hop_depends_on_previous({"target": "查询上海的人口及其他统计数据"}, 1)
+    assert not hop_depends_on_previous({"target": "find search results about priority queues"}, 1)
+    assert hop_depends_on_previous({"target": "use the previous answer"}, 1)
+    assert hop_depends_on_previous({"target": "compare with #1"}, 1)
+
+
+@pytest.mark.asyncio
+async def test_independent_hops_are_prefetched():
+    """独立跳在前一跳执行/校验期间已开始执行，依赖跳不会被预取"""
+    hops = [
+        {"hop_num": 1, "target": "查询北京的人口", "tool": "search_web", "stop_condition": ""},
+        {"hop_num": 2, "target": "查询上海的人口", "tool": "search_web", "stop_condition": ""},
+        {"hop_num": 3, "target": "根据第1跳和第2跳计算差值", "tool": "calculate", "stop_condition": ""},
+    ]
+    execution = _Execution()
+    workflow = LangGraphWorkflow(agents={"execution": execution})
+    state = _state(hops)
+
+    with request_scope():
+        t0 = time.perf_counter()
+        for _ in hops:
+            state = await workflow._execution_node(state)
+        elapsed = time.perf_counter() - t0
+        workflow._cancel_hop_prefetch()
+
+    assert state["current_hop"] == 3
+    assert [r["step_id"] for r in state["step_results"]] == [1, 2, 3]
+    assert state["fused_evidence"] == "r1 | r2 | r3"
+    # 第 2 跳与第 1 跳同时启动；第 3 跳依赖前面结果，在第 2 跳处理时才启动
+    assert execution.started[2] - execution.started[1] < 0.03
+    assert execution.started[3] - execution.started[1] >= 0.1
+    # 串行约 3 * (0.1 + 0.06)；预取后第 2 跳的工具调用与第 1 跳重叠
+    assert elapsed < 0.42
+
+
+@pytest.mark.asyncio
+async def test_prefetch_disabled(monkeypatch):
+    """关闭 task.speculative_hops 时按顺序逐跳执行"""
+    import src.agent.langgraph_workflow as lw
+
+    monkeypatch.setattr(lw, "_get_speculative_config", lambda: {"enabled": False, "max_prefetch": 0})
+    hops = [
+        {"hop_num": 1, "target": "查询北京的人口", "tool": "search_web", "stop_condition": ""},
+        {"hop_num": 2, "target": "查询上海的人口", "tool": "search_web", "stop_condition": ""},
+    ]
+    execution = _Execution(judge_delay=0)
+    workflow = LangGraphWorkflow(agents={"execution": execution})
+    state = _state(hops)
+    with request_scope():
+        for _ in hops:
+            state = await workflow._execution_node(state)
+    assert execution.started[2] - execution.started[1] >= 0.1
+
+
+@pytest.mark.asyncio
+async def test_synthesis_node_runs_at_high_priority():
+    """合成节点与其他合成入口一致，以高优先级执行，先于预取等后台调用"""
+    from src.utils.governor import PRIORITY_HIGH, current_priority
+
+    seen = []
+
+    class _Trace:
+        def on_synthesis_start(self, **kwargs):
+            seen.append(current_priority())
+
+    state = _state([])
+    state["metadata"] = {"_trace": _Trace()}
+    state["fused_evidence"] = "答案"
+    state = await LangGraphWorkflow()._synthesis_node(state)
+    assert seen == [PRIORITY_HIGH]
+    assert state["final_answer"] == "答案"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,84 @@
+"""
+HTML 解析服务测试
+"""
+
+import pytest
+
+from src.utils.html_parse import HtmlParsePool, ParsedPage, extract_page
+from src.tools.web_search_crawl_tool import parse_baidu_html
+
+
+_PAGE = """
+<html><head><script>var x = 1;</script><style>p {}</style></head>
+<body>
+  <nav>导航</nav>
+  <p>北京到上海的距离约为 1200 公里。</p>
+  <a href="/detail?id=1">详情</a>
+  <a href="https://other.com/x">外站</a>
+  <a href="/login">登录</a>
+  <div class="read-more"><a href="/more">查看更多</a></div>
+</body></html>
+"""
+
+
+def _burn_cpu(html):
+    """模拟病态页面：解析永不结束"""
+    while True:
+        pass
+
+
+def test_extract_page_text_and_links():
+    """提取正文（去除脚本/导航）与同域链接"""
+    page = extract_page(_PAGE, "https://example.com/a")
+    assert "1200 公里" in page.text
+    assert "var x" not in page.text and "导航" not in page.text
+    urls = [u for u, _ in page.links]
+    assert urls == ["https://example.com/detail?id=1", "https://example.com/more"]
+
+    # 搜索结果页允许跨域
+    page = extract_page(_PAGE, "https://www.baidu.com/s", cross_domain_hosts=("www.baidu.com",))
+    assert "https://other.com/x" in [u for u, _ in page.links]
+
+
+def test_parse_baidu_html():
+    html = """
+    <div id="content_left">
+      <div class="result c-container"><h3><a href="https://a.com/1">标题一</a></h3>
+        <div class="c-abstract">摘要一</div></div>
+    </div>
+    """
+    results = parse_baidu_html(html)
+    assert results == [{"title": "标题一", "snippet": "摘要一", "link": "https://a.com/1", "source": "baidu"}]
+
+
+@pytest.mark.asyncio
+async def test_thread_fallback_reports_cpu_time():
+    """workers=0 时在线程中解析，接口一致"""
+    pool = HtmlParsePool(workers=0)
+    page = await pool.parse_page(_PAGE, "https://example.com/a")
+    assert isinstance(page, ParsedPage)
+    assert "1200 公里" in page.text
+    assert page.cpu_time >= 0
+
+
+@pytest.mark.asyncio
+async def test_process_pool_parses_and_enforces_cpu_budget():
+    """进程池中解析页面；超出 CPU 预算的解析被中止，进程池仍可继续使用"""
+    pool = HtmlParsePool(workers=1, cpu_budget=0.3)
+    try:
+        page = await pool.parse_page(_PAGE, "https://example.com/a")
+        assert "1200 公里" in page.text
+        assert len(page.links) == 2
+        assert page.cpu_time > 0
+
+        assert await pool.run(_burn_cpu, "<html></html>") is None
+
+        page = await pool.parse_page(_PAGE, "https://example.com/a")
+        assert "1200 公里" in page.text
+        assert pool.run_sync(parse_baidu_html, "<html></html>") == []
+    finally:
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,162 @@
+"""
+HTTP 响应缓存测试
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.utils.http_cache import HttpCache, normalize_url
+
+
+class _Site:
+    """本地站点：支持 ETag 条件请求，记录请求次数"""
+
+    def __init__(self):
+        self.body = "<html><body>版本一</body></html>"
+        self.etag = '"v1"'
+        self.requests = []
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                site.requests.append(self.headers.get("If-None-Match"))
+                if self.headers.get("If-None-Match") == site.etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                data = site.body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("ETag", site.etag)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/page?b=2&a=1&utm_source=x"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def site():
+    s = _Site()
+    yield s
+    s.close()
+
+
+def test_normalize_url():
+    assert normalize_url("HTTPS://Example.COM:443/a?b=2&a=1&utm_source=x#frag") == "https://example.com/a?a=1&b=2"
+    assert normalize_url("http://example.com") == "http://example.com/"
+    assert normalize_url("http://example.com:8080/x") == "http://example.com:8080/x"
+
+
+def test_fresh_hit_skips_network(site, tmp_path):
+    cache = HttpCache(str(tmp_path / "http.sqlite3"), ttl=60)
+    text, err = cache.fetch(site.url)
+    assert err is None and "版本一" in text
+    # 同一页面的不同写法命中同一条目
+    text2, _ = cache.fetch(site.url.replace("?b=2&a=1", "?a=1&b=2"))
+    assert text2 == text
+    assert len(site.requests) == 1
+
+
+def test_conditional_revalidation_and_extracted_invalidation(site, tmp_path):
+    cache = HttpCache(str(tmp_path / "http.sqlite3"), ttl=1)
+    cache.fetch(site.url)
+    cache.set_extracted(site.url, "text", "版本一正文")
+    assert cache.get_extracted(site.url, "text") == "版本一正文"
+
+    # 过期后发起条件请求，304 续期并保留提取结果
+    time.sleep(1.1)
+    assert cache.get_extracted(site.url, "text") is None
+    text, _ = cache.fetch(site.url)
+    assert "版本一" in text
+    assert site.requests[-1] == '"v1"'
+    assert cache.get_extracted(site.url, "text") == "版本一正文"
+
+    # 页面变化：返回新内容，旧提取结果失效
+    time.sleep(1.1)
+    site.body, site.etag = "<html><body>版本二</body></html>", '"v2"'
+    text, _ = cache.fetch(site.url)
+    assert "版本二" in text
+    assert cache.get_extracted(site.url, "text") is None
+
+
+def test_stale_served_on_error(tmp_path):
+    cache = HttpCache(str(tmp_path / "http.sqlite3"), ttl=1)
+    url = "http://127.0.0.1:9/unreachable"
+    cache.store(url, "旧内容", etag='"x"')
+    time.sleep(1.1)
+    text, err = cache.fetch(url, timeout=0.5)
+    assert text == "旧内容" and err is None
+
+
+def test_byte_budget_eviction(tmp_path):
+    import os
+
+    cache = HttpCache(str(tmp_path / "http.sqlite3"), ttl=60, max_bytes=3000)
+    for i in range(10):
+        cache.store(f"http://example.com/{i}", os.urandom(600).hex())
+        time.sleep(0.01)
+    cache.evict()
+    stats = cache.stats()
+    assert stats["total_bytes"] <= 3000
+    assert cache.lookup("http://example.com/9") is not None
+    assert cache.lookup("http://example.com/0") is None
+
+
+def test_uncacheable_and_empty_responses_not_stored(site, tmp_path):
+    """cacheable 判定为反爬/验证页的响应照常返回但不写入缓存；空响应不写入"""
+    cache = HttpCache(str(tmp_path / "http.sqlite3"), ttl=60)
+    site.body = "<html>安全验证</html>"
+    text, err = cache.fetch(site.url, cacheable=lambda t: "安全验证" not in t)
+    assert err is None and "安全验证" in text
+    assert cache.lookup(site.url) is None
+    cache.store("http://example.com/empty", "  ")
+    assert cache.lookup("http://example.com/empty") is None
+
+
+class _Session:
+    """返回固定内容的假 session（未经 HTTP 缓存的请求走这里）"""
+
+    def get(self, url, timeout=None, headers=None):
+        class _Resp:
+            encoding = "utf-8"
+            text = "serp"
+
+            def raise_for_status(self):
+                pass
+        return _Resp()
+
+
+def test_search_result_pages_bypass_http_cache(monkeypatch, tmp_path):
+    """搜索结果页不经 HTTP 缓存；内容页的反爬页面不写入缓存"""
+    import src.tools.web_search_crawl_tool as wsc
+
+    cache = HttpCache(str(tmp_path / "http.sqlite3"), ttl=60)
+    calls = []
+    monkeypatch.setattr(wsc, "get_http_cache", lambda: cache)
+    monkeypatch.setattr(cache, "fetch", lambda url, **kw: calls.append((url, kw)) or ("<html>ok</html>", None))
+    tool = wsc.WebSearchCrawlTool()
+    monkeypatch.setattr(tool, "_get_session", lambda: _Session())
+
+    assert tool._fetch_page("https://www.baidu.com/s?wd=x&ie=utf-8") == ("serp", None)
+    assert tool._fetch_page("https://www.zhihu.com/api/v4/search_v3?q=x") == ("serp", None)
+    tool._fetch_page("https://example.com/article")
+    assert [url for url, _ in calls] == ["https://example.com/article"]
+    assert calls[0][1]["cacheable"]("<html>百度安全验证</html>") is False
+    assert calls[0][1]["cacheable"]("<html>正文</html>") is True
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
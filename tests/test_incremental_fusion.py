@@ -0,0 +1,119 @@
+"""
+增量证据融合测试（后续跳只合并新证据、汇总过长时回到全量融合、trace 记录每跳融合方式与开销）
+"""
+
+import pytest
+
+from src.agent.langgraph_workflow import LangGraphWorkflow
+from src.agent.multi_agent_system import ExecutionAgent
+from src.observability import PhaseRecorder, TokenLedger, TraceContext, record_llm_usage, token_phase
+from src.utils.request_context import request_scope
+
+
+class _FusionAgent:
+    """只提供执行与融合的假执行层，记录每次融合调用"""
+
+    def __init__(self, summary="汇总"):
+        self.summary = summary
+        self.calls = []
+
+    async def execute_step(self, step, context=None):
+        return {"step_id": step["id"], "success": True, "result": f"r{step['id']}"}
+
+    @token_phase("fusion")
+    def fuse_hop_evidence(self, evidence_list, query=""):
+        self.calls.append(("full", list(evidence_list)))
+        record_llm_usage([{"role": "user", "content": "x"}], {"prompt_tokens": 20 * len(evidence_list), "completion_tokens": 5})
+        return f"{self.summary}{len(evidence_list)}"
+
+    @token_phase("fusion")
+    def merge_hop_evidence(self, fused_summary, new_evidence, hop_num, query=""):
+        self.calls.append(("delta", fused_summary, new_evidence, hop_num))
+        record_llm_usage([{"role": "user", "content": "x"}], {"prompt_tokens": 20, "completion_tokens": 5})
+        return f"{self.summary}{hop_num}"
+
+
+def _state(count, trace=None):
+    hops = [{"hop_num": i, "target": f"第{i}跳", "tool": "search_web", "stop_condition": ""} for i in range(1, count + 1)]
+    return {
+        "question": "q",
+        "multi_hop_plan": {"hops": hops, "total_stop_condition": ""},
+        "current_hop": 0,
+        "step_results": [],
+        "evidence_list": [],
+        "metadata": {"_trace": trace} if trace else {},
+    }
+
+
+async def _run(monkeypatch, agent, count, fusion_config, trace=None):
+    import src.agent.langgraph_workflow as lw
+
+    monkeypatch.setattr(lw, "_get_speculative_config", lambda: {"enabled": False, "max_prefetch": 0})
+    monkeypatch.setattr(lw, "_get_fusion_config", lambda: fusion_config)
+    workflow = LangGraphWorkflow(agents={"execution": agent})
+    state = _state(count, trace)
+    with request_scope() as req:
+        req.tokens = TokenLedger()
+        for _ in range(count):
+            state = await workflow._execution_node(state)
+    return state
+
+
+@pytest.mark.asyncio
+async def test_later_hops_merge_only_new_evidence(monkeypatch):
+    agent = _FusionAgent()
+    state = await _run(monkeypatch, agent, 3, {"enabled": True, "max_summary_tokens": 800})
+
+    assert [c[0] for c in agent.calls] == ["full", "delta", "delta"]
+    assert agent.calls[1] == ("delta", "汇总1", "r2", 2)
+    assert agent.calls[2] == ("delta", "汇总2", "r3", 3)
+    assert state["fused_evidence"] == "汇总3"
+    assert state["fused_hops"] == 3
+
+
+@pytest.mark.asyncio
+async def test_oversized_summary_or_disabled_triggers_full_refusion(monkeypatch):
+    agent = _FusionAgent(summary="很长的汇总" * 20)
+    await _run(monkeypatch, agent, 3, {"enabled": True, "max_summary_tokens": 10})
+    assert [c[0] for c in agent.calls] == ["full", "full", "full"]
+    assert agent.calls[2][1] == ["r1", "r2", "r3"]
+
+    agent = _FusionAgent()
+    await _run(monkeypatch, agent, 2, {"enabled": False, "max_summary_tokens": 800})
+    assert [c[0] for c in agent.calls] == ["full", "full"]
+
+
+@pytest.mark.asyncio
+async def test_trace_records_fusion_mode_and_cost(monkeypatch):
+    trace = TraceContext()
+    recorder = PhaseRecorder()
+    trace.add_listener(recorder)
+    await _run(monkeypatch, _FusionAgent(), 2, {"enabled": True, "max_summary_tokens": 800}, trace=trace)
+
+    fused = [e for e in trace.events if e.phase == "evidence_fused"]
+    assert [e.extra["mode"] for e in fused] == ["full", "delta"]
+    assert [e.extra["tokens"] for e in fused] == [25, 25]
+    assert all(e.duration_ms is not None for e in fused)
+    samples = recorder.finish()
+    assert len(samples["fusion"]) == 2
+    assert len(samples["fusion:delta"]) == 1
+
+
+def test_merge_hop_evidence_prompt_and_fallback():
+    prompts = []
+
+    class _LLM:
+        def chat(self, messages, max_tokens=None, temperature=None):
+            prompts.append(messages[-1]["content"])
+            return {"content": "北京2189万；上海2487万"}
+
+    agent = ExecutionAgent(llm=_LLM())
+    merged = agent.merge_hop_evidence("北京2189万", "上海常住人口2487万", 2, query="北京和上海的人口")
+    assert merged == "北京2189万；上海2487万"
+    assert "北京2189万" in prompts[0] and "上海常住人口2487万" in prompts[0]
+
+    class _BrokenLLM:
+        def chat(self, messages, max_tokens=None, temperature=None):
+            raise RuntimeError("down")
+
+    assert ExecutionAgent(llm=_BrokenLLM()).merge_hop_evidence("a", "b", 2) == "a\nb"
@@ -0,0 +1,168 @@
+"""
+延迟注册测试（LazyTool 占位、按 mtime 失效的注册清单、skill 延迟加载）
+"""
+
+import os
+
+import pytest
+
+from src.skills.loader import load_skill_tools, load_skillmd_tools
+from src.tools.lazy_tool import LazyTool, ToolManifest
+from src.tools.tool_registry import BaseTool
+
+
+class _EchoTool(BaseTool):
+    def __init__(self):
+        super().__init__(name="echo", description="echo input")
+        self.extra = "real-attr"
+
+    async def execute(self, input_data):
+        return {"success": True, "result": input_data}
+
+
+SKILL_PY = '''
+from src.tools.tool_registry import BaseTool
+
+LOADS = globals().setdefault("LOADS", 0) + 1
+
+
+class Upper(BaseTool):
+    def __init__(self):
+        super().__init__(name="upper", description="uppercase text")
+
+    async def execute(self, input_data):
+        return {"success": True, "result": str(input_data).upper()}
+
+
+TOOL = Upper()
+'''
+
+SKILL_MD = """---
+name: summarize-notes
+description: Summarize meeting notes into bullet points
+---
+
+## Instructions
+Summarize the input.
+"""
+
+
+@pytest.mark.asyncio
+async def test_lazy_tool_instantiates_once_on_first_execute():
+    created = []
+
+    def factory():
+        created.append(1)
+        return _EchoTool()
+
+    tool = LazyTool(name="echo", description="echo input", factory=factory)
+    assert not tool.loaded and created == []
+    assert tool.get_schema()["name"] == "echo"
+
+    assert (await tool.execute("hi"))["result"] == "hi"
+    assert (await tool.execute("again"))["result"] == "again"
+    assert created == [1]
+    # 工具特有属性转发给真实工具
+    assert tool.extra == "real-attr"
+
+
+@pytest.mark.asyncio
+async def test_lazy_tool_factory_error_is_reported():
+    def factory():
+        raise ImportError("missing dependency")
+
+    result = await LazyTool(name="broken", description="", factory=factory).execute("x")
+    assert result["success"] is False and "missing dependency" in result["error"]
+
+
+@pytest.mark.asyncio
+async def test_lazy_tool_loads_off_the_event_loop():
+    """首次 execute 在线程中导入/实例化真实工具，不阻塞事件循环"""
+    import threading
+
+    threads = []
+
+    def factory():
+        threads.append(threading.current_thread())
+        return _EchoTool()
+
+    await LazyTool(name="echo", description="", factory=factory).execute("x")
+    assert threads and threads[0] is not threading.main_thread()
+
+
+def test_tools_package_imports_tool_modules_on_demand():
+    """导入 src.tools 不连带导入各工具模块（及 bs4 等依赖），访问导出名时才导入"""
+    import subprocess
+    import sys
+
+    code = (
+        "import sys; import src.tools as t; "
+        "assert 'src.tools.web_search_crawl_tool' not in sys.modules; "
+        "assert 'src.tools.advanced_web_search_tool' not in sys.modules; "
+        "assert t.CalculatorTool.__name__ == 'CalculatorTool'; "
+        "assert 'src.tools.calculator_tool' in sys.modules"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, "-c", code], cwd=root, check=True)
+
+
+def test_manifest_invalidated_by_file_change(tmp_path):
+    source = tmp_path / "tool.py"
+    source.write_text("x = 1\n", encoding="utf-8")
+    path = str(tmp_path / "manifest.json")
+
+    manifest = ToolManifest(path)
+    assert manifest.lookup("tool:X", source) is None
+    manifest.store("tool:X", source, {"name": "x"})
+    manifest.save()
+
+    reloaded = ToolManifest(path)
+    assert reloaded.lookup("tool:X", source) == {"name": "x"}
+
+    source.write_text("x = 22\n", encoding="utf-8")
+    st = os.stat(source)
+    os.utime(source, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert ToolManifest(path).lookup("tool:X", source) is None
+
+
+@pytest.mark.asyncio
+async def test_python_skill_registered_lazily_from_manifest(tmp_path):
+    skills = tmp_path / "skills"
+    skills.mkdir()
+    (skills / "upper_skill.py").write_text(SKILL_PY, encoding="utf-8")
+    manifest_path = str(tmp_path / "manifest.json")
+
+    first = ToolManifest(manifest_path)
+    tools = load_skill_tools(skills, manifest=first)
+    assert [t.name for t in tools] == ["upper"] and not isinstance(tools[0], LazyTool)
+    first.save()
+
+    second = ToolManifest(manifest_path)
+    stubs = load_skill_tools(skills, manifest=second)
+    assert [t.name for t in stubs] == ["upper"]
+    assert isinstance(stubs[0], LazyTool) and not stubs[0].loaded
+    assert stubs[0].description == "uppercase text"
+    assert (await stubs[0].execute("abc"))["result"] == "ABC"
+    assert second.stats()["hits"] == 1
+
+
+def test_skillmd_registered_lazily_from_manifest(tmp_path):
+    skills = tmp_path / "skills"
+    (skills / "notes").mkdir(parents=True)
+    (skills / "notes" / "SKILL.md").write_text(SKILL_MD, encoding="utf-8")
+    manifest_path = str(tmp_path / "manifest.json")
+
+    first = ToolManifest(manifest_path)
+    tools = load_skillmd_tools(skills, llm_client=None, manifest=first)
+    assert [t.name for t in tools] == ["summarize-notes"]
+    first.save()
+
+    stubs = load_skillmd_tools(skills, llm_client=None, manifest=ToolManifest(manifest_path))
+    assert isinstance(stubs[0], LazyTool) and not stubs[0].loaded
+    assert stubs[0].description == "Summarize meeting notes into bullet points"
+    # 首次访问真实工具时才解析 SKILL.md
+    assert stubs[0].resolve().name == "summarize-notes"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,156 @@
+"""
+HttpJsonMcpTool 异步传输测试（连接池、批量、响应大小限制）
+"""
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.mcps.loader import HttpJsonMcpTool, McpResponseTooLarge, close_mcp_sessions, decode_ndjson
+
+
+class _Endpoint:
+    """本地 MCP 端点：/echo 回显（支持批量），/slow 延迟返回，/big 大响应，/lines JSON Lines，
+    /busy 批量请求返回 503，/nobatch 批量请求不返回 results，/text 纯文本"""
+
+    def __init__(self):
+        self.requests = []
+        endpoint = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send(self, body, content_type="application/json", headers=None, status=200):
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                endpoint.requests.append((self.path, payload))
+                if self.path == "/slow":
+                    time.sleep(0.2)
+                if self.path == "/big":
+                    return self._send(json.dumps({"data": "x" * 5000}))
+                if self.path == "/lines":
+                    return self._send('{"a": 1}\n{"a": 2}\n', content_type="application/x-ndjson")
+                if self.path == "/text":
+                    return self._send("plain answer", content_type="text/plain")
+                if self.path == "/busy" and "inputs" in payload:
+                    return self._send("overloaded", content_type="text/plain", status=503)
+                if self.path == "/nobatch" and "inputs" in payload:
+                    return self._send(json.dumps({"echo": payload["inputs"]}))
+                if "inputs" in payload:
+                    return self._send(json.dumps({"results": [{"echo": x} for x in payload["inputs"]]}))
+                return self._send(json.dumps({"echo": payload["input"]}), headers={"X-MCP-Max-Batch": "4"})
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def endpoint():
+    e = _Endpoint()
+    yield e
+    e.close()
+
+
+@pytest.mark.asyncio
+async def test_execute_does_not_block_event_loop(endpoint):
+    tool = HttpJsonMcpTool("slow", "", endpoint.base + "/slow", timeout=5)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    t = asyncio.create_task(ticker())
+    res = await tool.execute("hi")
+    t.cancel()
+    await close_mcp_sessions()
+    assert res == {"success": True, "result": {"echo": "hi"}}
+    assert ticks >= 5
+
+
+@pytest.mark.asyncio
+async def test_batching_after_endpoint_advertises(endpoint):
+    tool = HttpJsonMcpTool("echo", "", endpoint.base + "/echo", batch_window=0.05)
+    assert (await tool.execute("first"))["result"] == {"echo": "first"}
+    # 端点通过响应头声明支持批量
+    assert tool.max_batch_size == 4
+
+    endpoint.requests.clear()
+    results = await asyncio.gather(*[tool.execute(i) for i in range(6)])
+    await close_mcp_sessions()
+    assert [r["result"]["echo"] for r in results] == list(range(6))
+    # 6 个调用：一批 4 个 + 一批 2 个
+    assert len(endpoint.requests) == 2
+    assert all("inputs" in p for _, p in endpoint.requests)
+
+
+@pytest.mark.asyncio
+async def test_response_size_limits(endpoint):
+    tool = HttpJsonMcpTool("big", "", endpoint.base + "/big", max_response_bytes=1000)
+    res = await tool.execute("x")
+    assert not res["success"] and "exceeds" in res["error"]
+
+    tool = HttpJsonMcpTool("lines", "", endpoint.base + "/lines")
+    res = await tool.execute("x")
+    await close_mcp_sessions()
+    assert res == {"success": True, "result": [{"a": 1}, {"a": 2}]}
+
+
+@pytest.mark.asyncio
+async def test_batch_errors_not_resent_but_protocol_mismatch_falls_back(endpoint):
+    tool = HttpJsonMcpTool("busy", "", endpoint.base + "/busy", max_batch_size=4)
+    results = await tool.execute_batch([1, 2, 3])
+    assert [r["error"] for r in results] == ["http_503"] * 3
+    # 服务端错误不重发、不关闭批量
+    assert len(endpoint.requests) == 1 and tool.max_batch_size == 4
+
+    endpoint.requests.clear()
+    tool = HttpJsonMcpTool("nobatch", "", endpoint.base + "/nobatch", max_batch_size=4)
+    results = await tool.execute_batch([1, 2])
+    await close_mcp_sessions()
+    assert [r["result"]["echo"] for r in results] == [1, 2]
+    # 2xx 但没有 results：退回逐个调用
+    assert len(endpoint.requests) == 3 and all("input" in p for _, p in endpoint.requests[1:])
+
+
+@pytest.mark.asyncio
+async def test_non_json_body_returned_as_text(endpoint):
+    tool = HttpJsonMcpTool("text", "", endpoint.base + "/text")
+    res = await tool.execute("x")
+    await close_mcp_sessions()
+    assert res == {"success": True, "result": "plain answer"}
+
+
+def test_decode_ndjson_limits():
+    assert decode_ndjson([b'{"a": 1}', b"", b"\x1e[2]"]) == [{"a": 1}, [2]]
+    with pytest.raises(McpResponseTooLarge):
+        decode_ndjson([b"1", b"2", b"3"], max_items=2)
+    with pytest.raises(McpResponseTooLarge):
+        decode_ndjson([b'"' + b"x" * 100 + b'"'], max_line_bytes=50)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
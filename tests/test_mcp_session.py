@@ -0,0 +1,178 @@
+"""
+MCP 协议会话测试（长连接复用、并发调用、list_tools 缓存、断线重连、loader 注册）
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from src.mcps.loader import ConfigOnlyMcpTool, load_server_tools
+from src.mcps.session import McpRemoteTool, McpSessionManager, resolve_transport
+
+
+class _FakeServer:
+    """模拟 MCP 服务器：记录连接次数，call_tool 可并发，可模拟断线"""
+
+    def __init__(self, tools=None, delay=0.05):
+        self.tools = tools or [
+            {"name": "search_docs", "description": "search documentation",
+             "inputSchema": {"type": "object", "properties": {"query": {"type": "string"}}, "required": ["query"]}},
+            {"name": "fail", "description": "always errors", "inputSchema": {}},
+        ]
+        self.delay = delay
+        self.connects = 0
+        self.list_calls = 0
+        self.active = 0
+        self.max_active = 0
+        self.drop_next = False
+
+    def connect(self, config):
+        server = self
+
+        class _Session:
+            def __init__(self, owner):
+                self.owner = owner
+
+            async def list_tools(self):
+                server.list_calls += 1
+                return SimpleNamespace(tools=[SimpleNamespace(**t) for t in server.tools])
+
+            async def call_tool(self, name, arguments=None):
+                if server.drop_next:
+                    # 模拟传输层断开：持有连接的任务被取消
+                    server.drop_next = False
+                    self.owner.cancel()
+                    raise ConnectionResetError("connection lost")
+                server.active += 1
+                server.max_active = max(server.max_active, server.active)
+                try:
+                    await asyncio.sleep(server.delay)
+                finally:
+                    server.active -= 1
+                if name == "fail":
+                    return SimpleNamespace(isError=True, content=[SimpleNamespace(text="boom")], structuredContent=None)
+                return SimpleNamespace(
+                    isError=False,
+                    content=[SimpleNamespace(text=f"{name}:{arguments}")],
+                    structuredContent=None,
+                )
+
+        @asynccontextmanager
+        async def _ctx():
+            server.connects += 1
+            yield _Session(asyncio.current_task())
+
+        return _ctx()
+
+
+SERVERS = {"docs": {"command": "fake-mcp-server", "args": ["--stdio"]}}
+
+
+def _manager(server, tmp_path=None, **kwargs):
+    cache_path = str(tmp_path / "mcp_tools.json") if tmp_path is not None else None
+    return McpSessionManager(connect=server.connect, connect_timeout=5, call_timeout=5, cache_path=cache_path, **kwargs)
+
+
+def test_resolve_transport():
+    assert resolve_transport({"command": "npx"}) == "stdio"
+    assert resolve_transport({"url": "http://host/sse"}) == "sse"
+    assert resolve_transport({"url": "http://host/mcp"}) == "http"
+    assert resolve_transport({"url": "http://host/mcp", "transport": "sse"}) == "sse"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_session():
+    server = _FakeServer(delay=0.1)
+    manager = _manager(server)
+    try:
+        tools = await asyncio.to_thread(load_server_tools, SERVERS, {}, manager)
+        assert sorted(t.name for t in tools) == ["fail", "search_docs"]
+        assert all(isinstance(t, McpRemoteTool) for t in tools)
+        search = next(t for t in tools if t.name == "search_docs")
+
+        result = await search.execute("q0")
+        assert result["success"] and result["result"] == "search_docs:{'query': 'q0'}"
+
+        # 并发调用在同一会话上复用（不经过 governor 预算）
+        start = asyncio.get_running_loop().time()
+        await asyncio.gather(*[manager.call_tool("docs", "search_docs", {"query": f"q{i}"}) for i in range(8)])
+        elapsed = asyncio.get_running_loop().time() - start
+        assert server.connects == 1
+        assert server.max_active == 8
+        assert elapsed < 0.6
+    finally:
+        await asyncio.to_thread(manager.close)
+
+
+@pytest.mark.asyncio
+async def test_tool_error_and_dict_arguments():
+    server = _FakeServer(delay=0)
+    manager = _manager(server)
+    try:
+        tools = {t.name: t for t in await asyncio.to_thread(load_server_tools, SERVERS, {}, manager)}
+        failed = await tools["fail"].execute({})
+        assert failed["success"] is False and failed["error"] == "boom"
+        ok = await tools["search_docs"].execute({"query": "x", "limit": 3})
+        assert ok["result"] == "search_docs:{'query': 'x', 'limit': 3}"
+        assert server.connects == 1
+    finally:
+        await asyncio.to_thread(manager.close)
+
+
+def test_list_tools_cache_skips_discovery(tmp_path):
+    server = _FakeServer(delay=0)
+    first = _manager(server, tmp_path)
+    assert [t["name"] for t in first.start(SERVERS)["docs"]] == ["search_docs", "fail"]
+    first.close()
+    assert server.list_calls == 1
+
+    second = _manager(server, tmp_path)
+    try:
+        assert [t["name"] for t in second.start(SERVERS)["docs"]] == ["search_docs", "fail"]
+        assert server.list_calls == 1
+        # 配置变化后缓存失效
+        changed = {"docs": {"command": "fake-mcp-server", "args": ["--other"]}}
+        third = _manager(server, tmp_path)
+        third.start(changed)
+        third.close()
+        assert server.list_calls == 2
+    finally:
+        second.close()
+
+
+@pytest.mark.asyncio
+async def test_reconnect_after_connection_lost():
+    server = _FakeServer(delay=0)
+    manager = _manager(server)
+    try:
+        await asyncio.to_thread(manager.start, SERVERS)
+        server.drop_next = True
+        result = await manager.call_tool("docs", "search_docs", {"query": "a"})
+        assert result.isError is False
+        assert server.connects == 2
+    finally:
+        await asyncio.to_thread(manager.close)
+
+
+def test_failed_server_falls_back_to_config_only():
+    def broken(config):
+        @asynccontextmanager
+        async def _ctx():
+            raise OSError("spawn failed")
+            yield
+        return _ctx()
+
+    manager = McpSessionManager(connect=broken, connect_timeout=2)
+    try:
+        tools = load_server_tools({"docs": {"command": "missing"}, "plain": {}}, {}, manager)
+        assert sorted(t.name for t in tools) == ["docs", "plain"]
+        assert all(isinstance(t, ConfigOnlyMcpTool) for t in tools)
+        assert manager.stats()["docs"]["last_error"] == "spawn failed"
+    finally:
+        manager.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
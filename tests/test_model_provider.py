@@ -0,0 +1,122 @@
+"""
+APIModelProvider 异步连接池测试（本地 aiohttp 模拟服务）
+"""
+
+import asyncio
+import json
+
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+from aiohttp import web
+
+from src.llm.model_provider import APIModelProvider
+
+
+async def _start_server(handler):
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/v1/chat/completions"
+
+
+def _provider(api_base, **extra):
+    config = {"api_base": api_base, "api_key": "test", "model_name": "fake", "timeout": 5}
+    config.update(extra)
+    return APIModelProvider(config)
+
+
+@pytest.mark.asyncio
+async def test_generate_async_reuses_keepalive_connection():
+    """多次异步调用复用同一条 keep-alive 连接，并兼容 body 包装的响应"""
+    peers = set()
+
+    async def handler(request):
+        peers.add(request.transport.get_extra_info("peername"))
+        payload = await request.json()
+        content = "echo:" + payload["messages"][-1]["content"]
+        return web.json_response({"status": "200", "body": {"choices": [{"message": {"content": content}}]}})
+
+    runner, url = await _start_server(handler)
+    provider = _provider(url)
+    try:
+        answers = [await provider.generate_async(f"q{i}") for i in range(5)]
+        assert answers == [f"echo:q{i}" for i in range(5)]
+        assert len(peers) == 1
+    finally:
+        await provider.aclose()
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_chat_async_per_call_deadline():
+    """单次调用的截止时间生效，超时抛出异常"""
+    async def handler(request):
+        await asyncio.sleep(1)
+        return web.json_response({"choices": [{"message": {"content": "late"}}]})
+
+    runner, url = await _start_server(handler)
+    provider = _provider(url)
+    try:
+        with pytest.raises(Exception, match="超时"):
+            await provider.chat_async([{"role": "user", "content": "hi"}], timeout=0.2)
+    finally:
+        await provider.aclose()
+        await runner.cleanup()
+
+
+async def _sse_handler(request):
+    """模拟 OpenAI 兼容的流式响应：含 body 包装分片、usage 分片与 [DONE]"""
+    response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+    await response.prepare(request)
+    chunks = [
+        {"choices": [{"delta": {"role": "assistant"}}]},
+        {"choices": [{"delta": {"content": "北京"}}]},
+        {"body": {"choices": [{"delta": {"content": "是首都"}, "finish_reason": "stop"}]}},
+        {"choices": [], "usage": {"prompt_tokens": 7, "completion_tokens": 3, "total_tokens": 10}},
+    ]
+    await response.write(b": keep-alive\n\n")
+    for chunk in chunks:
+        await response.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+    await response.write(b"data: [DONE]\n\n")
+    await response.write(b'data: {"choices": [{"delta": {"content": "ignored"}}]}\n\n')
+    await response.write_eof()
+    return response
+
+
+@pytest.mark.asyncio
+async def test_chat_stream_async_yields_deltas_and_usage():
+    """异步流式解码：逐个产出增量，处理 body 包装与 [DONE]，累计 usage"""
+    runner, url = await _start_server(_sse_handler)
+    provider = _provider(url)
+    try:
+        stream = provider.chat_stream_async([{"role": "user", "content": "首都？"}])
+        deltas = [delta async for delta in stream]
+        assert deltas == ["北京", "是首都"]
+        assert stream.content == "北京是首都"
+        assert stream.usage["total_tokens"] == 10
+        assert stream.finish_reason == "stop"
+    finally:
+        await provider.aclose()
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_sync_chat_stream_returns_openai_format():
+    """同步 chat(stream=True) 拼接流式分片，返回与非流式一致的结构"""
+    runner, url = await _start_server(_sse_handler)
+    provider = _provider(url)
+    try:
+        result = await asyncio.to_thread(provider.chat, [{"role": "user", "content": "首都？"}], None, None, True)
+        assert result["choices"][0]["message"]["content"] == "北京是首都"
+        assert result["usage"]["prompt_tokens"] == 7
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
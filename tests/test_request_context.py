@@ -0,0 +1,95 @@
+"""
+请求级上下文测试：共享同一组 Agent 实例的并发请求之间状态不串扰
+"""
+
+import asyncio
+import random
+import re
+
+import pytest
+
+from src.agent.memory import MemoryManager
+from src.agent.multi_agent_system import CoordinationAgent
+from src.utils.request_context import get_request_context, request_scope
+
+
+class _FakePlanning:
+    def __init__(self):
+        self.llm = _FakeLLM()
+
+    def decompose_task(self, question, context=None):
+        return {"steps": [
+            {"id": 1, "description": question, "tool_type": "none", "dependencies": []},
+            {"id": 2, "description": question, "tool_type": "none", "dependencies": [1]},
+        ]}
+
+
+class _FakeExecution:
+    async def execute_step(self, step, context):
+        await asyncio.sleep(random.uniform(0, 0.01))
+        qid = re.search(r"q(\d+)", step["description"]).group(1)
+        return {"step_id": step["id"], "success": True, "result": f"evidence-{qid}", "method": "fake"}
+
+
+class _FakeVerification:
+    async def verify_result(self, step_result, context):
+        await asyncio.sleep(random.uniform(0, 0.01))
+        return {"verified": True, "confidence": 0.9}
+
+
+class _FakeLLM:
+    async def generate_async(self, prompt):
+        await asyncio.sleep(random.uniform(0, 0.01))
+        ids = set(re.findall(r"evidence-(\d+)", prompt))
+        # 若状态串扰，提示词中会混入其他请求的证据
+        return "answer-" + ",".join(sorted(ids))
+
+
+@pytest.mark.asyncio
+async def test_concurrent_questions_do_not_cross():
+    """50 个并发请求共享同一个 CoordinationAgent，答案与状态均不串扰"""
+    agent = CoordinationAgent(_FakePlanning(), _FakeExecution(), _FakeVerification())
+
+    async def _ask(i):
+        with request_scope():
+            result = await agent.process_question(f"q{i} 是什么？")
+            state = agent.state
+            return i, result, state
+
+    outcomes = await asyncio.gather(*(_ask(i) for i in range(50)))
+    for i, result, state in outcomes:
+        assert result["success"]
+        assert result["answer"] == f"answer-{i}"
+        assert state["question"] == f"q{i} 是什么？"
+        assert len(state["step_results"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_history_snapshot_is_request_scoped():
+    """并发请求各自的历史快照互不覆盖，退出作用域后快照失效"""
+    memory = MemoryManager()
+    gate = asyncio.Event()
+
+    async def _request(text):
+        with request_scope():
+            memory.create_snapshot()
+            memory.add_conversation("user", text)
+            await gate.wait()
+            snapshot = [m["content"] for m in memory.get_conversation_context(n=10, use_snapshot=True)]
+            memory.clear_snapshot()
+            return snapshot
+
+    first = asyncio.create_task(_request("first"))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(_request("second"))
+    await asyncio.sleep(0)
+    gate.set()
+
+    assert await first == []
+    assert await second == ["first"]
+    assert get_request_context() is None
+    assert memory.short_term.get_snapshot() is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
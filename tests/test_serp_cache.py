@@ -0,0 +1,130 @@
+"""
+搜索结果缓存测试
+"""
+
+import asyncio
+
+import pytest
+
+from src.utils.serp_cache import SerpCache, normalize_query
+
+
+def test_normalize_query():
+    """全角/大小写/标点/空白/繁简体差异归一到同一键"""
+    assert normalize_query("  Python  教程？ ") == "python 教程"
+    assert normalize_query("ＡＢＣ，  測試") == normalize_query("abc 測試")
+    assert normalize_query("臺灣的經濟") == normalize_query("台湾的经济")
+    assert SerpCache.make_key("bing", "Hello!", num_results=5) == SerpCache.make_key("bing", "hello", num_results=5)
+    assert SerpCache.make_key("bing", "hello", num_results=5) != SerpCache.make_key("bing", "hello", num_results=3)
+    # 与字母数字相连的符号保留：C++ / C# 不与 C 共用缓存键
+    assert normalize_query("C++ tutorial") != normalize_query("C tutorial")
+    assert normalize_query("C#") == "c#"
+    assert normalize_query("node.js 教程") == "node.js 教程"
+
+
+def test_injected_empty_cache_is_used():
+    """注入的共享缓存即使为空（len 为 0）也不会被替换"""
+    from src.utils.cache import SimpleCache
+
+    shared = SimpleCache(name="serp_shared")
+    cache = SerpCache(cache=shared)
+    assert cache.cache is shared
+
+
+def test_hit_returns_copy_and_negative_cache():
+    cache = SerpCache(ttl={"default": 60}, negative_ttl=60)
+    assert cache.get("baidu", "北京") is None
+    cache.set("baidu", "北京", [{"title": "北京"}])
+    hit = cache.get("baidu", "北京！")
+    assert hit == [{"title": "北京"}]
+    hit[0]["content"] = "正文"
+    assert "content" not in cache.get("baidu", "北京")[0]
+
+    # 空结果负缓存；失败（None）不缓存
+    cache.set("baidu", "无结果查询", [])
+    assert cache.get("baidu", "无结果查询") == []
+    cache.set("baidu", "失败查询", None)
+    assert cache.get("baidu", "失败查询") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 2 and stats["negative_hits"] == 1 and stats["misses"] == 2
+
+
+def test_negative_ttl_zero_disables_negative_cache():
+    cache = SerpCache(negative_ttl=0)
+    cache.set("bing", "q", [])
+    assert cache.get("bing", "q") is None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_queries_search_once():
+    """同一查询的并发请求只发起一次搜索"""
+    cache = SerpCache()
+    calls = []
+
+    async def search():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return [{"title": "结果"}]
+
+    results = await asyncio.gather(*[cache.get_or_search("zhihu", "Q", search) for _ in range(5)])
+    assert len(calls) == 1
+    assert all(r == [{"title": "结果"}] for r in results)
+    assert await cache.get_or_search("zhihu", "q", search) == [{"title": "结果"}]
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_search_not_cached():
+    cache = SerpCache()
+    calls = []
+
+    def search():
+        calls.append(1)
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_search("duckduckgo", "q", search)
+    with pytest.raises(RuntimeError):
+        await cache.get_or_search("duckduckgo", "q", search)
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_does_not_cancel_followers():
+    """发起搜索的调用方被取消时，其余等待者仍拿到结果；全部取消后搜索才被取消"""
+    cache = SerpCache()
+    calls = []
+    cancelled = []
+
+    async def search():
+        calls.append(1)
+        try:
+            await asyncio.sleep(0.05)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+        return [{"title": "结果"}]
+
+    leader = asyncio.create_task(cache.get_or_search("bing", "q", search))
+    await asyncio.sleep(0.01)
+    follower = asyncio.create_task(cache.get_or_search("bing", "q", search))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+    assert await follower == [{"title": "结果"}]
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    assert len(calls) == 1 and not cancelled
+
+    only = asyncio.create_task(cache.get_or_search("bing", "other", search))
+    await asyncio.sleep(0.01)
+    only.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await only
+    await asyncio.sleep(0)
+    assert cancelled == [1]
+    assert not cache._inflight
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
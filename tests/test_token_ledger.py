@@ -0,0 +1,145 @@
+"""
+Token 账本测试（provider 用量记录、阶段归属、估算兜底、trace 输出与单题预算降级）
+"""
+
+import pytest
+
+from src.agent.langgraph_workflow import LangGraphWorkflow
+from src.agent.multi_agent_system import ExecutionAgent
+from src.observability import TokenLedger, TraceContext, get_token_ledger, record_llm_usage, token_phase
+from src.utils.metrics import get_metrics
+from src.utils.request_context import request_scope
+
+
+def _provider(monkeypatch, usage):
+    from src.llm.model_provider import APIModelProvider
+
+    provider = APIModelProvider({"api_base": "http://127.0.0.1:9/v1", "api_key": "k", "model_name": "m"})
+
+    def live(messages, temperature, max_tokens, stream):
+        response = {"choices": [{"message": {"content": "答案"}}]}
+        if usage:
+            response["usage"] = usage
+        return response
+
+    monkeypatch.setattr(provider, "_chat_live", live)
+    return provider
+
+
+def test_provider_usage_is_recorded_per_phase(monkeypatch):
+    provider = _provider(monkeypatch, {"prompt_tokens": 30, "completion_tokens": 5})
+    before = get_metrics().get_counters("tokens.")
+    with request_scope():
+        with token_phase("planning"):
+            provider.generate("问题")
+        provider.generate("问题")
+        ledger = get_token_ledger().to_dict()
+
+    assert ledger["prompt_tokens"] == 60 and ledger["completion_tokens"] == 10
+    assert ledger["phases"]["planning"] == {"calls": 1, "prompt_tokens": 30, "completion_tokens": 5}
+    assert ledger["phases"]["other"]["calls"] == 1
+    assert ledger["estimated_calls"] == 0
+    after = get_metrics().get_counters("tokens.")
+    assert after["tokens.prompt"] - before.get("tokens.prompt", 0) == 60
+    assert after["tokens.phase.planning.completion"] - before.get("tokens.phase.planning.completion", 0) == 5
+
+
+def test_missing_usage_is_estimated(monkeypatch):
+    provider = _provider(monkeypatch, None)
+    with request_scope():
+        provider.generate("一二三四")
+        ledger = get_token_ledger()
+    assert ledger.estimated_calls == 1
+    assert ledger.prompt_tokens == 4 + 4
+    assert ledger.completion_tokens == 2
+
+
+@pytest.mark.asyncio
+async def test_stream_usage_is_recorded_when_stream_finishes(monkeypatch):
+    from src.llm.model_provider import APIModelProvider, ChatStream
+
+    provider = APIModelProvider({"api_base": "http://127.0.0.1:9/v1", "api_key": "k", "model_name": "m"})
+
+    def live(messages, temperature, max_tokens, timeout):
+        async def _source(stream):
+            for delta in stream.feed([{"choices": [{"delta": {"content": "流式"}}],
+                                       "usage": {"prompt_tokens": 12, "completion_tokens": 2}}]):
+                yield delta
+        return ChatStream(_source)
+
+    monkeypatch.setattr(provider, "_chat_stream_live", live)
+    with request_scope():
+        with token_phase("synthesis"):
+            stream = provider.chat_stream_async([{"role": "user", "content": "q"}])
+            assert get_token_ledger().calls == 0
+            assert [d async for d in stream] == ["流式"]
+        ledger = get_token_ledger()
+    assert ledger.phases["synthesis"] == {"calls": 1, "prompt_tokens": 12, "completion_tokens": 2}
+
+
+def test_budget_levels_and_trace_output():
+    ledger = TokenLedger(budget=100, shrink_at=0.5, skip_judges_at=0.8, stop_at=1.0, shrink_ratio=0.25)
+    assert not ledger.should_shrink() and ledger.context_scale() == 1.0
+    ledger.record("hop", 40, 15)
+    assert ledger.should_shrink() and ledger.context_scale() == 0.25
+    assert not ledger.should_skip_judges()
+    ledger.record("judge", 30, 15)
+    assert ledger.should_skip_judges() and ledger.should_stop()
+    assert not TokenLedger(budget=0).should_stop()
+
+    trace = TraceContext()
+    trace.tokens = ledger
+    assert trace.to_dict()["tokens"]["total_tokens"] == 100
+
+
+class _BudgetLLM:
+    """每次调用记入 50 个 token 的假 LLM"""
+
+    def __init__(self):
+        self.prompts = []
+
+    def chat(self, messages, max_tokens=None, temperature=None):
+        self.prompts.append(messages[-1]["content"])
+        record_llm_usage(messages, {"prompt_tokens": 40, "completion_tokens": 10})
+        return {"content": "融合结果"}
+
+
+@pytest.mark.asyncio
+async def test_workflow_skips_judges_then_stops_hopping(monkeypatch):
+    """预算接近上限时跳过综合评估/终止判断，用尽后不再开始新的跳"""
+    import src.agent.langgraph_workflow as lw
+
+    monkeypatch.setattr(lw, "_get_speculative_config", lambda: {"enabled": False, "max_prefetch": 0})
+    llm = _BudgetLLM()
+    agent = ExecutionAgent(llm=llm)
+    executed = []
+
+    async def execute_step(step, context=None):
+        executed.append(step["id"])
+        return {"step_id": step["id"], "success": True, "result": f"r{step['id']}"}
+
+    agent.execute_step = execute_step
+    workflow = LangGraphWorkflow(agents={"execution": agent})
+    hops = [{"hop_num": i, "target": f"第{i}跳", "tool": "search_web", "stop_condition": ""} for i in (1, 2, 3)]
+    state = {
+        "question": "q",
+        "multi_hop_plan": {"hops": hops, "total_stop_condition": ""},
+        "current_hop": 0,
+        "step_results": [],
+        "evidence_list": [],
+        "metadata": {},
+    }
+    with request_scope() as req:
+        req.tokens = TokenLedger(budget=100, skip_judges_at=0.5, stop_at=1.0)
+        req.tokens.record("planning", 50, 10)
+        state = await workflow._execution_node(state)
+        assert state["current_hop"] == 1
+        state = await workflow._execution_node(state)
+        actions = [a["action"] for a in req.tokens.actions]
+
+    # 第一跳只做了证据融合（跳过综合评估、单跳与整体终止判断），第二跳起预算用尽
+    assert executed == [1]
+    assert len(llm.prompts) == 1
+    assert state["current_hop"] == 3
+    assert state["fused_evidence"] == "融合结果"
+    assert actions == ["skip_judges", "stop_hops"]
@@ -0,0 +1,116 @@
+"""
+ToolHub 延迟统计与对冲调度测试
+"""
+
+import asyncio
+
+import pytest
+
+from src.toolhub import CandidateStats, ToolCandidate, ToolHub
+from src.utils.circuit_breaker import HealthRegistry
+
+
+class _Tool:
+    def __init__(self, delay, success=True):
+        self.delay = delay
+        self.success = success
+        self.calls = 0
+        self.cancelled = 0
+
+    async def execute(self, input_data):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if not self.success:
+            return {"success": False, "error": "boom"}
+        return {"success": True, "result": f"结果 delay={self.delay}"}
+
+
+def _hub(**tools):
+    """构造 ToolHub；计算类工具走“选最优”策略（不综合多个结果）"""
+    hub = ToolHub(health=HealthRegistry(enabled=False))
+    hub._config_cache = {"timeout": 5.0}
+    hub._config_cache_time = float("inf")
+    hub._config_cache["hedging"] = {
+        "enabled": True, "min_samples": 3, "window": 100,
+        "default_delay": 0.05, "min_delay": 0.01, "max_delay": 1.0,
+    }
+    for i, (source, tool) in enumerate(tools.items()):
+        hub.register_candidate(ToolCandidate(name="calculator", source=source, tool=tool, priority=i, meta={}))
+    return hub
+
+
+def test_candidate_stats_percentiles():
+    st = CandidateStats(window=10)
+    for d in range(1, 21):
+        st.record(d / 10, True)
+    st.record(99.0, False)
+    assert st.samples == 10
+    assert len(st.latencies) == 10
+    assert st.percentile(0.5) == 1.5
+    assert st.percentile(0.9) == 1.9
+    assert 0.8 < st.success_rate < 0.95
+
+
+@pytest.mark.asyncio
+async def test_fast_candidate_ranked_first_without_backup():
+    """统计充足后最快的候选排在首位，且在其 p90 内返回时不启动备份"""
+    slow, fast, slower = _Tool(0.08), _Tool(0.01), _Tool(0.1)
+    hub = _hub(tools=slow, skills=fast, mcps=slower)
+    for cand in hub._candidates_by_name["calculator"]:
+        for _ in range(3):
+            await hub._call_candidate(cand, "q")
+    slow.calls = fast.calls = 0
+
+    assert hub.rank_candidates(hub._candidates_by_name["calculator"]) == [1, 0, 2]
+    res = await hub.execute("calculator", "q")
+    assert res["success"] and res["_meta"]["source"] == "skills"
+    assert (fast.calls, slow.calls) == (1, 0)
+    assert "calculator@skills" in hub.latency_stats()
+
+
+@pytest.mark.asyncio
+async def test_backup_launched_after_p90():
+    """首选候选超过 p90 未返回时启动备份，备份先返回则取消首选"""
+    primary, backup = _Tool(0.01), _Tool(0.01)
+    hub = _hub(tools=primary, skills=backup)
+    cands = hub._candidates_by_name["calculator"]
+    for _ in range(3):
+        await hub._call_candidate(cands[0], "q")
+    primary.delay = 1.0  # 本次出现长尾
+
+    pos, results = await hub._hedged_call(cands, "q")
+    assert pos == 1 and results[1]["success"]
+    assert primary.cancelled == 1
+
+
+@pytest.mark.asyncio
+async def test_failure_triggers_next_candidate_immediately():
+    broken, ok = _Tool(0.0, success=False), _Tool(0.01)
+    hub = _hub(tools=broken, skills=ok, mcps=_Tool(0.5))
+    res = await hub.execute("calculator", "q")
+    assert res["success"] and res["_meta"]["source"] == "skills"
+    assert hub._last_success_index["calculator"] == 1
+
+    hub = _hub(tools=broken, skills=_Tool(0.0, success=False), mcps=_Tool(0.0, success=False))
+    res = await hub.execute("calculator", "q")
+    assert res["error"] == "all_candidates_failed"
+    assert len(res["_meta"]["errors"]) == 3
+
+
+def test_last_success_breaks_ties_in_ranking():
+    """样本不足、优先级相同时，最近一次成功的候选排在前面"""
+    hub = ToolHub(health=HealthRegistry(enabled=False))
+    hub._config_cache = {"timeout": 5.0, "hedging": {"min_samples": 3}}
+    hub._config_cache_time = float("inf")
+    cands = [ToolCandidate(name="calculator", source=s, tool=_Tool(0), priority=0, meta={}) for s in ("a", "b")]
+    assert hub.rank_candidates(cands) == [0, 1]
+    hub._last_success_index["calculator"] = 1
+    assert hub.rank_candidates(cands) == [1, 0]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,114 @@
+"""
+进度事件流测试：trace 事件在处理过程中实时转成 SSE
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from src.agent.multi_agent_system import CoordinationAgent
+from src.observability import TraceContext, TraceEventStream
+from src.utils.request_context import request_scope
+
+
+def _parse(message):
+    lines = message.strip().split("\n")
+    return lines[0][len("event: "):], json.loads(lines[1][len("data: "):])
+
+
+@pytest.mark.asyncio
+async def test_events_are_relayed_before_work_finishes():
+    """事件在处理完成前就被推送，答案增量不写入 trace.events"""
+    trace = TraceContext()
+    stream = TraceEventStream(trace)
+    release = asyncio.Event()
+
+    async def work():
+        trace.on_planning_start("q")
+        trace.on_planning_end(steps_count=2)
+        trace.on_hop_start(1, "查找作者", "search")
+        await release.wait()
+        # 工作线程中产生的事件同样能被推送
+        await asyncio.to_thread(trace.on_evidence_fused, 1, "作者是张三", 1)
+        trace.on_answer_delta("张")
+        trace.on_answer_delta("三")
+        return {"success": True, "answer": "张三"}
+
+    received = []
+    async for message in stream.relay(work()):
+        received.append(_parse(message))
+        if len(received) == 2:
+            release.set()
+
+    names = [name for name, _ in received]
+    assert names == ["planning", "hop", "evidence", "token", "token"]
+    assert received[1][1]["input_preview"] == "查找作者"
+    assert "".join(data["delta"] for name, data in received if name == "token") == "张三"
+    assert stream.result["answer"] == "张三"
+    assert all(e.phase != "answer_delta" for e in trace.events)
+
+
+class _StreamingLLM:
+    async def generate_stream(self, prompt):
+        for token in ["答", "案"]:
+            yield token
+
+    async def generate_async(self, prompt):
+        raise AssertionError("有订阅方时应走流式生成")
+
+
+class _Planning:
+    llm = _StreamingLLM()
+
+    def decompose_task(self, question, context=None):
+        return {"steps": [{"id": 1, "description": question, "tool_type": "none", "dependencies": []}]}
+
+
+class _Execution:
+    async def execute_step(self, step, context):
+        return {"step_id": 1, "success": True, "result": "证据"}
+
+
+class _Verification:
+    async def verify_result(self, step_result, context):
+        return {"verified": True, "confidence": 1.0}
+
+
+@pytest.mark.asyncio
+async def test_synthesis_streams_tokens_to_trace_listeners():
+    """合成阶段有订阅方时按 token 推送答案增量"""
+    trace = TraceContext()
+    deltas = []
+    trace.add_listener(lambda e: deltas.append(e.output_preview) if e.phase == "answer_delta" else None)
+    agent = CoordinationAgent(_Planning(), _Execution(), _Verification())
+    with request_scope():
+        result = await agent.process_question("问题", {"_trace": trace})
+    assert result["answer"] == "答案"
+    assert deltas == ["答", "案"]
+
+
+class _FailingStreamLLM:
+    async def generate_stream(self, prompt):
+        yield "半"
+        raise RuntimeError("stream broken")
+
+
+@pytest.mark.asyncio
+async def test_failed_stream_resets_partial_answer():
+    """流式生成中途失败：先推送 reset，再给出降级答案"""
+    trace = TraceContext()
+    stream = TraceEventStream(trace)
+    planning = _Planning()
+    planning.llm = _FailingStreamLLM()
+    agent = CoordinationAgent(planning, _Execution(), _Verification())
+    with request_scope():
+        work = agent.process_question("问题", {"_trace": trace})
+        received = [m async for m in stream.relay(work)]
+    names = [m.split("\n", 1)[0].split(": ", 1)[1] for m in received]
+    assert names[-2:] == ["token", "reset"]
+    assert stream.result["answer"] == "证据"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])